@@ -9,7 +9,7 @@ import subprocess
 import sys
 import tempfile
 import textwrap
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, List, Iterator, Dict, Tuple
 
 from debputy import DEBPUTY_ROOT_DIR
@@ -30,6 +30,7 @@ from debputy.util import (
     print_command,
     program_name,
     escape_shell,
+    clone_or_copy_file,
 )
 from debputy.version import __version__
 
@@ -219,8 +220,9 @@ def _perform_data_tar_materialization(
     replacement_manifest_paths = []
     _info("Materializing data.tar part of the deb:")
 
-    directories = ["mkdir"]
+    directories = []
     symlinks = []
+    hardlinks = []
     bulk_copies: Dict[str, List[str]] = collections.defaultdict(list)
     copies = []
     renames = []
@@ -241,10 +243,16 @@ def _perform_data_tar_materialization(
             directories.append(materialization_path)
         elif tar_member.path_type == PathType.SYMLINK:
             symlinks.append((tar_member.link_target, materialization_path))
+        elif tar_member.path_type == PathType.HARDLINK:
+            link_target = strip_path_prefix(tar_member.link_target)
+            hardlinks.append(
+                (f"{output_packaging_root}/{link_target}", materialization_path)
+            )
         elif tar_member.fs_path is not None:
             if tar_member.link_target:
-                # Not sure if hardlinks gets here yet as we do not support hardlinks
-                _error("Internal error; hardlink not supported")
+                _error(
+                    "Internal error; only symlinks and hardlinks can have a link target"
+                )
 
             if may_move_data_files and tar_member.may_steal_fs_path:
                 renames.append((tar_member.fs_path, materialization_path))
@@ -266,28 +274,54 @@ def _perform_data_tar_materialization(
             (materialization_path, replacement_tar_member)
         )
 
-    if len(directories) > 1:
-        _run(directories)
+    phase_times: List[Tuple[str, int, timedelta]] = []
+    phase_start_time = datetime.now()
+
+    def _phase_done(phase: str, count: int) -> None:
+        nonlocal phase_start_time
+        phase_end_time = datetime.now()
+        phase_times.append((phase, count, phase_end_time - phase_start_time))
+        phase_start_time = phase_end_time
+
+    if directories:
+        print_command("mkdir", *directories)
+        for directory in directories:
+            os.makedirs(directory)
+    _phase_done("directories", len(directories))
 
     for dest_dir, files in bulk_copies.items():
-        cmd = ["cp", "--reflink=auto", "-t", dest_dir]
-        cmd.extend(files)
-        _run(cmd)
+        print_command("cp", "--reflink=auto", "-t", dest_dir, *files)
+        for source in files:
+            clone_or_copy_file(source, os.path.join(dest_dir, os.path.basename(source)))
 
     for source, dest in copies:
-        _run(["cp", "--reflink=auto", source, dest])
+        print_command("cp", "--reflink=auto", source, dest)
+        clone_or_copy_file(source, dest)
+    _phase_done(
+        "copies", len(copies) + sum(len(files) for files in bulk_copies.values())
+    )
 
     for source, dest in renames:
         print_command("mv", source, dest)
         os.rename(source, dest)
+    _phase_done("renames", len(renames))
+
+    # The link targets are files, so they exist by now (whether copied or renamed).
+    for link_target, link_path in hardlinks:
+        print_command("ln", link_target, link_path)
+        os.link(link_target, link_path)
+    _phase_done("hardlinks", len(hardlinks))
 
     for link_target, link_path in symlinks:
         print_command("ln", "-s", link_target, link_path)
         os.symlink(link_target, link_path)
+    _phase_done("symlinks", len(symlinks))
 
     end_time = datetime.now()
 
     _info(f"Materialization of data.tar finished, took: {end_time - start_time}")
+    for phase, count, duration in phase_times:
+        _info(f"  - {phase} ({count} paths) took {duration}")
 
     return replacement_manifest_paths
 
@@ -315,7 +349,9 @@ def materialize_deb(
         output_packaging_root, intermediate_manifest, may_move_data_files
     )
     for materialization_path, tar_member in reversed(replacement_manifest_paths):
-        # TODO: Hardlinks should probably skip these commands
+        if tar_member.path_type == PathType.HARDLINK:
+            # Shares the inode (and therefore the metadata) with its link target
+            continue
         if tar_member.path_type != PathType.SYMLINK:
             os.chmod(materialization_path, tar_member.mode, follow_symlinks=False)
         os.utime(
@@ -518,6 +554,9 @@ def assemble_deb(
             )
             if needs_root or not combined_materialization_and_assembly:
                 for tar_member in reversed(intermediate_manifest):
+                    if tar_member.path_type == PathType.HARDLINK:
+                        # Shares the inode (and therefore the metadata) with its link target
+                        continue
                     p = os.path.join(
                         deb_root, strip_path_prefix(tar_member.member_path)
                     )
@@ -1,14 +1,31 @@
 #!/usr/bin/python3 -B
 import argparse
 import errno
+import io
 import operator
 import os
 import stat
 import subprocess
 import tarfile
 import textwrap
-from typing import Optional, List, FrozenSet, Iterable, Callable, BinaryIO, cast
+from typing import (
+    Optional,
+    List,
+    Iterable,
+    Callable,
+    BinaryIO,
+    Tuple,
+    Sequence,
+)
 
+from debputy._deb_options_profiles import DebBuildOptionsAndProfiles
+from debputy.deb_compression import (
+    COMPRESSIONS,
+    Compression,
+    CompressionCommand,
+    InProcessCompressor,
+    _compression_threads,
+)
 from debputy.intermediate_manifest import TarMember, PathType
 from debputy.util import (
     _error,
@@ -93,6 +110,7 @@ def generate_ar_archive(
                     fixed_binary = assume_not_none(member.fixed_binary)
                     write_header(fd, member, len(fixed_binary), mtime)
                     fd.write(fixed_binary)
+                    content_len = len(fixed_binary)
                 else:
                     header_pos = fd.tell()
                     fd.write(AR_HEADER)
@@ -103,6 +121,9 @@ def generate_ar_archive(
                     assert content_len >= 0
                     write_header(fd, member, content_len, mtime)
                     fd.seek(current_pos, os.SEEK_SET)
+                if content_len % 2:
+                    # ar members are aligned to an even offset
+                    fd.write(b"\n")
     except OSError as e:
         if prefer_raw_exceptions:
             raise
@@ -122,29 +143,155 @@ def generate_ar_archive(
     print(f"Generated {output_filename}")
 
 
+_TAR_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class TarStreamWriter:
+    """Streaming GNU tar writer with zero-copy transfer of file content
+
+    The headers are generated by `tarfile`, so the output is identical to
+    `tarfile.open(mode="w|", format=tarfile.GNU_FORMAT)`. However, the content
+    of regular files is moved via `os.sendfile` when the output is backed by a
+    file descriptor (such as the pipe to an external compressor or the .deb
+    itself). Otherwise, the content is copied in large chunks.
+    """
+
+    def __init__(self, output: BinaryIO) -> None:
+        self._output = output
+        self._output_fileno = _fileno_or_none(output)
+        self._use_sendfile = self._output_fileno is not None
+        self._buffer = bytearray()
+        self._offset = 0
+        self._copy_buffer: Optional[bytearray] = None
+        # Only used for its `gettarinfo` (via `TarMember.create_tar_info`).
+        self._tarinfo_factory = tarfile.TarFile(
+            fileobj=io.BytesIO(),
+            mode="w",
+            format=tarfile.GNU_FORMAT,
+        )
+
+    def add_member(self, tar_member: TarMember) -> None:
+        tar_info = tar_member.create_tar_info(self._tarinfo_factory)
+        self._write(
+            tar_info.tobuf(tarfile.GNU_FORMAT, tarfile.ENCODING, "surrogateescape")
+        )
+        if tar_member.path_type != PathType.FILE or tar_info.size == 0:
+            return
+        fs_path = assume_not_none(tar_member.fs_path)
+        with open(fs_path, "rb", buffering=0) as mfd:
+            self._flush()
+            self._copy_content(mfd, tar_info.size)
+        self._offset += tar_info.size
+        remainder = tar_info.size % tarfile.BLOCKSIZE
+        if remainder:
+            self._write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+
+    def close(self) -> None:
+        self._write(tarfile.NUL * (tarfile.BLOCKSIZE * 2))
+        remainder = self._offset % tarfile.RECORDSIZE
+        if remainder:
+            self._write(tarfile.NUL * (tarfile.RECORDSIZE - remainder))
+        self._flush()
+        self._output.flush()
+
+    def __enter__(self) -> "TarStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+
+    def _write(self, data: bytes) -> None:
+        self._buffer.extend(data)
+        self._offset += len(data)
+        if len(self._buffer) >= _TAR_COPY_BUFFER_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buffer:
+            self._output.write(self._buffer)
+            self._buffer.clear()
+
+    def _copy_content(self, mfd: BinaryIO, size: int) -> None:
+        copied = 0
+        if self._use_sendfile:
+            copied = self._sendfile(mfd, size)
+        if copied < size:
+            self._buffered_copy(mfd, copied, size)
+
+    def _sendfile(self, mfd: BinaryIO, size: int) -> int:
+        out_fd = assume_not_none(self._output_fileno)
+        in_fd = mfd.fileno()
+        # Any data buffered by the Python file object must reach the fd first.
+        self._output.flush()
+        copied = 0
+        try:
+            while copied < size:
+                sent = os.sendfile(out_fd, in_fd, copied, size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+        except OSError as e:
+            if copied or e.errno not in (errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+                raise
+            # The output does not support sendfile; stop trying for this archive.
+            self._use_sendfile = False
+            return 0
+        if self._output.seekable():
+            # Bring the position of the Python file object in sync with the fd
+            self._output.seek(os.lseek(out_fd, 0, os.SEEK_CUR), os.SEEK_SET)
+        return copied
+
+    def _buffered_copy(self, mfd: BinaryIO, copied: int, size: int) -> None:
+        copy_buffer = self._copy_buffer
+        if copy_buffer is None:
+            copy_buffer = bytearray(_TAR_COPY_BUFFER_SIZE)
+            self._copy_buffer = copy_buffer
+        view = memoryview(copy_buffer)
+        mfd.seek(copied, os.SEEK_SET)
+        while copied < size:
+            read = mfd.readinto(view[: min(len(view), size - copied)])
+            if not read:
+                # Same error as tarfile, when the file shrinks while being archived
+                raise OSError("unexpected end of data")
+            self._output.write(view[:read])
+            copied += read
+
+
+def _fileno_or_none(fd: BinaryIO) -> Optional[int]:
+    try:
+        return fd.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _add_tar_members(
+    tar_fd: TarStreamWriter,
+    tar_members: Iterable[TarMember],
+) -> None:
+    for tar_member in tar_members:
+        tar_fd.add_member(tar_member)
+
+
 def _generate_tar_file(
     tar_members: Iterable[TarMember],
-    compression_cmd: List[str],
+    compression_cmd: CompressionCommand,
     write_to: BinaryIO,
 ) -> None:
+    if isinstance(compression_cmd, InProcessCompressor):
+        with (
+            compression_cmd.open(write_to) as compressed_fd,
+            TarStreamWriter(compressed_fd) as tar_fd,
+        ):
+            _add_tar_members(tar_fd, tar_members)
+        return
     with (
         subprocess.Popen(
             compression_cmd, stdin=subprocess.PIPE, stdout=write_to
         ) as compress_proc,
-        tarfile.open(
-            mode="w|",
-            fileobj=compress_proc.stdin,
-            format=tarfile.GNU_FORMAT,
-            errorlevel=1,
-        ) as tar_fd,
+        TarStreamWriter(assume_not_none(compress_proc.stdin)) as tar_fd,
     ):
-        for tar_member in tar_members:
-            tar_info: tarfile.TarInfo = tar_member.create_tar_info(tar_fd)
-            if tar_member.path_type == PathType.FILE:
-                with open(assume_not_none(tar_member.fs_path), "rb") as mfd:
-                    tar_fd.addfile(tar_info, fileobj=mfd)
-            else:
-                tar_fd.addfile(tar_info)
+        _add_tar_members(tar_fd, tar_members)
     compress_proc.wait()
     if compress_proc.returncode != 0:
         _error(
@@ -154,7 +301,7 @@ def _generate_tar_file(
 
 def generate_tar_file_member(
     tar_members: Iterable[TarMember],
-    compression_cmd: List[str],
+    compression_cmd: CompressionCommand,
 ) -> Callable[[BinaryIO], None]:
     def _impl(fd: BinaryIO) -> None:
         _generate_tar_file(
@@ -166,87 +313,6 @@ def generate_tar_file_member(
     return _impl
 
 
-def _xz_cmdline(
-    compression_rule: "Compression",
-    parsed_args: Optional[argparse.Namespace],
-) -> List[str]:
-    compression_level = compression_rule.effective_compression_level(parsed_args)
-    cmdline = ["xz", "-T2", "-" + str(compression_level)]
-    strategy = None if parsed_args is None else parsed_args.compression_strategy
-    if strategy is None:
-        strategy = "none"
-    if strategy != "none":
-        cmdline.append("--" + strategy)
-    cmdline.append("--no-adjust")
-    return cmdline
-
-
-def _gzip_cmdline(
-    compression_rule: "Compression",
-    parsed_args: Optional[argparse.Namespace],
-) -> List[str]:
-    compression_level = compression_rule.effective_compression_level(parsed_args)
-    cmdline = ["gzip", "-n" + str(compression_level)]
-    strategy = None if parsed_args is None else parsed_args.compression_strategy
-    if strategy is not None and strategy != "none":
-        raise ValueError(
-            f"Not implemented: Compression strategy {strategy}"
-            " for gzip is currently unsupported (but dpkg-deb does)"
-        )
-    return cmdline
-
-
-def _uncompressed_cmdline(
-    _unused_a: "Compression",
-    _unused_b: Optional[argparse.Namespace],
-) -> List[str]:
-    return ["cat"]
-
-
-class Compression:
-    def __init__(
-        self,
-        default_compression_level: int,
-        extension: str,
-        allowed_strategies: FrozenSet[str],
-        cmdline_builder: Callable[
-            ["Compression", Optional[argparse.Namespace]], List[str]
-        ],
-    ) -> None:
-        self.default_compression_level = default_compression_level
-        self.extension = extension
-        self.allowed_strategies = allowed_strategies
-        self.cmdline_builder = cmdline_builder
-
-    def __repr__(self) -> str:
-        return f"<{self.__class__.__name__} {self.extension}>"
-
-    def effective_compression_level(
-        self, parsed_args: Optional[argparse.Namespace]
-    ) -> int:
-        if parsed_args and parsed_args.compression_level is not None:
-            return cast("int", parsed_args.compression_level)
-        return self.default_compression_level
-
-    def as_cmdline(self, parsed_args: Optional[argparse.Namespace]) -> List[str]:
-        return self.cmdline_builder(self, parsed_args)
-
-    def with_extension(self, filename: str) -> str:
-        return filename + self.extension
-
-
-COMPRESSIONS = {
-    "xz": Compression(6, ".xz", frozenset({"none", "extreme"}), _xz_cmdline),
-    "gzip": Compression(
-        9,
-        ".gz",
-        frozenset({"none", "filtered", "huffman", "rle", "fixed"}),
-        _gzip_cmdline,
-    ),
-    "none": Compression(0, "", frozenset({"none"}), _uncompressed_cmdline),
-}
-
-
 def _normalize_compression_args(parsed_args: argparse.Namespace) -> argparse.Namespace:
     if (
         parsed_args.compression_level == 0
@@ -258,6 +324,16 @@ def _normalize_compression_args(parsed_args: argparse.Namespace) -> argparse.Nam
         setattr(parsed_args, "compression_algorithm", "none")
 
     compression = COMPRESSIONS[parsed_args.compression_algorithm]
+    compression_level = parsed_args.compression_level
+    if (
+        compression_level is not None
+        and compression_level not in compression.compression_levels
+    ):
+        levels = compression.compression_levels
+        _error(
+            f'Compression algorithm "{parsed_args.compression_algorithm}" does not support compression level'
+            f" {compression_level}.  Allowed values: {levels.start}-{levels.stop - 1}"
+        )
     strategy = parsed_args.compression_strategy
     if strategy is not None and strategy not in compression.allowed_strategies:
         _error(
@@ -267,7 +343,7 @@ def _normalize_compression_args(parsed_args: argparse.Namespace) -> argparse.Nam
     return parsed_args
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     try:
         compression_level_default = int(os.environ["DPKG_DEB_COMPRESSOR_LEVEL"])
     except (KeyError, ValueError):
@@ -362,11 +438,11 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "-z",
         dest="compression_level",
-        metavar="{0-9}",
-        choices=[0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
+        metavar="{0-22}",
+        choices=range(0, 23),
         default=compression_level_default,
         type=int,
-        help="The compression level to be used",
+        help="The compression level to be used (zstd supports 1-22, the others 0-9)",
     )
     parser.add_argument(
         "-S",
@@ -398,7 +474,16 @@ def parse_args() -> argparse.Namespace:
         default=threads_max,
         # TODO: Support this properly
         type=int,
-        help="Ignored; accepted for compatibility",
+        help="The maximum number of threads used for compression. Defaults to the"
+        ' "parallel" option from DEB_BUILD_OPTIONS (only used with the in-process backend)',
+    )
+    parser.add_argument(
+        "--compression-backend",
+        dest="compression_backend",
+        choices=["in-process", "external"],
+        default="in-process",
+        help="Whether to compress in-process or via external commands (such as xz). Note that zstd"
+        " always uses the external zstd command.",
     )
     parser.add_argument(
         "-d",
@@ -409,7 +494,7 @@ def parse_args() -> argparse.Namespace:
         help="Enable debug logging and raw stack traces on errors",
     )
 
-    parsed_args = parser.parse_args()
+    parsed_args = parser.parse_args(argv)
     parsed_args = _normalize_compression_args(parsed_args)
 
     return parsed_args
@@ -448,8 +533,7 @@ CTRL_MEMBER_SCRIPTS = {
 }
 
 
-def _ctrl_tar_members(package_root_dir: str, mtime: int) -> Iterable[TarMember]:
-    debian_root = os.path.join(package_root_dir, "DEBIAN")
+def _ctrl_tar_members(debian_root: str, mtime: int) -> Iterable[TarMember]:
     dir_st = os.stat(debian_root)
     dir_mtime = int(dir_st.st_mtime)
     yield _ctrl_member(
@@ -482,21 +566,76 @@ def parse_manifest(manifest_path: "Optional[str]") -> "List[TarMember]":
     return TarMember.parse_intermediate_manifest(manifest_path)
 
 
-def main() -> None:
-    setup_logging()
-    parsed_args = parse_args()
-    root_dir: str = parsed_args.package_root_dir
-    output_path: str = parsed_args.package_output_path
-    mtime = resolve_source_date_epoch(parsed_args.source_date_epoch)
+def _compression_threads_and_memory_limit(
+    parsed_args: argparse.Namespace,
+) -> Tuple[int, Optional[int]]:
+    """Determine the thread count and memory limit for the in-process compression
+
+    The memory limit (in MiB) comes from the `debputy-compression-memory` option of
+    `DEB_BUILD_OPTIONS`.
+    """
+    deb_build_options = DebBuildOptionsAndProfiles.instance().deb_build_options
+    threads = _compression_threads(parsed_args)
+    memory_limit: Optional[int] = None
+    memory_limit_raw = deb_build_options.get("debputy-compression-memory")
+    if memory_limit_raw is not None:
+        try:
+            memory_limit = int(memory_limit_raw) * 1024 * 1024
+        except ValueError:
+            _error(
+                "The debputy-compression-memory option in DEB_BUILD_OPTIONS must be an integer"
+                f" (MiB), got: {memory_limit_raw}"
+            )
+    return threads, memory_limit
+
 
+def _compression_cmd(
+    compression: Compression,
+    parsed_args: Optional[argparse.Namespace],
+    backend_args: argparse.Namespace,
+) -> CompressionCommand:
+    if backend_args.compression_backend == "external":
+        return compression.as_cmdline(parsed_args)
+    threads, memory_limit = _compression_threads_and_memory_limit(backend_args)
+    in_process_compressor = compression.as_in_process_compressor(
+        parsed_args,
+        threads=threads,
+        memory_limit=memory_limit,
+    )
+    if in_process_compressor is None:
+        return compression.as_cmdline(parsed_args)
+    return in_process_compressor
+
+
+def _compressions(
+    parsed_args: argparse.Namespace,
+) -> Tuple[Compression, Compression, CompressionCommand, CompressionCommand]:
     data_compression: Compression = COMPRESSIONS[parsed_args.compression_algorithm]
-    data_compression_cmd = data_compression.as_cmdline(parsed_args)
+    data_compression_cmd = _compression_cmd(data_compression, parsed_args, parsed_args)
     if parsed_args.uniform_compression:
         ctrl_compression = data_compression
         ctrl_compression_cmd = data_compression_cmd
     else:
         ctrl_compression = COMPRESSIONS["gzip"]
-        ctrl_compression_cmd = COMPRESSIONS["gzip"].as_cmdline(None)
+        ctrl_compression_cmd = _compression_cmd(ctrl_compression, None, parsed_args)
+    return (
+        ctrl_compression,
+        data_compression,
+        ctrl_compression_cmd,
+        data_compression_cmd,
+    )
+
+
+def main() -> None:
+    setup_logging()
+    parsed_args = parse_args()
+    root_dir: str = parsed_args.package_root_dir
+    output_path: str = parsed_args.package_output_path
+    mtime = resolve_source_date_epoch(parsed_args.source_date_epoch)
+
+    ctrl_compression, data_compression, ctrl_compression_cmd, data_compression_cmd = (
+        _compressions(parsed_args)
+    )
 
     if output_path.endswith("/") or os.path.isdir(output_path):
         deb_file = os.path.join(
@@ -526,18 +665,73 @@ def pack(
     root_dir: str,
     package_manifest: "Optional[str]",
     mtime: int,
-    ctrl_compression_cmd: List[str],
-    data_compression_cmd: List[str],
+    ctrl_compression_cmd: CompressionCommand,
+    data_compression_cmd: CompressionCommand,
+    prefer_raw_exceptions: bool = False,
+) -> None:
+    _pack_members(
+        deb_file,
+        ctrl_compression,
+        data_compression,
+        os.path.join(root_dir, "DEBIAN"),
+        parse_manifest(package_manifest),
+        mtime,
+        ctrl_compression_cmd,
+        data_compression_cmd,
+        prefer_raw_exceptions=prefer_raw_exceptions,
+    )
+
+
+def pack_from_intermediate_manifest(
+    deb_file: str,
+    control_root_dir: str,
+    data_tar_members: Sequence[TarMember],
+    mtime: int,
+    dpkg_deb_args: Sequence[str],
+) -> None:
+    """Assemble a deb directly from an intermediate manifest
+
+    Unlike `pack`, this does not need a package root directory. The control.tar
+    is generated from `control_root_dir` (the would-be `DEBIAN` directory) and
+    the data.tar is streamed from the `fs_path` of each member. The
+    `dpkg_deb_args` are the compression options that `dpkg-deb -b` accepts
+    (such as `-Zxz -z6`).
+    """
+    # The positional arguments are required by the parser but unused here.
+    parsed_args = parse_args([*dpkg_deb_args, "--", control_root_dir, deb_file])
+    ctrl_compression, data_compression, ctrl_compression_cmd, data_compression_cmd = (
+        _compressions(parsed_args)
+    )
+    _pack_members(
+        deb_file,
+        ctrl_compression,
+        data_compression,
+        control_root_dir,
+        data_tar_members,
+        mtime,
+        ctrl_compression_cmd,
+        data_compression_cmd,
+    )
+
+
+def _pack_members(
+    deb_file: str,
+    ctrl_compression: Compression,
+    data_compression: Compression,
+    control_root_dir: str,
+    data_tar_members: Iterable[TarMember],
+    mtime: int,
+    ctrl_compression_cmd: CompressionCommand,
+    data_compression_cmd: CompressionCommand,
     prefer_raw_exceptions: bool = False,
 ) -> None:
-    data_tar_members = parse_manifest(package_manifest)
     members = [
         ArMember("debian-binary", mtime, fixed_binary=b"2.0\n"),
         ArMember(
             ctrl_compression.with_extension("control.tar"),
             mtime,
             write_to_impl=generate_tar_file_member(
-                _ctrl_tar_members(root_dir, mtime),
+                _ctrl_tar_members(control_root_dir, mtime),
                 ctrl_compression_cmd,
             ),
         ),
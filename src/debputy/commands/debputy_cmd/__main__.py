@@ -19,13 +19,10 @@ from typing import (
     NamedTuple,
     Literal,
     cast,
+    TYPE_CHECKING,
 )
 
 from debputy import DEBPUTY_ROOT_DIR, DEBPUTY_PLUGIN_ROOT_DIR
-from debputy._deb_options_profiles import DebBuildOptionsAndProfiles
-from debputy.analysis import REFERENCE_DATA_TABLE
-from debputy.analysis.debian_dir import scan_debian_dir
-from debputy.build_support import perform_clean, perform_builds
 from debputy.commands.debputy_cmd.context import (
     CommandContext,
     add_arg,
@@ -33,7 +30,6 @@ from debputy.commands.debputy_cmd.context import (
     CommandArg,
 )
 from debputy.commands.debputy_cmd.output import _stream_to_pager, _output_styling
-from debputy.dh_migration.migrators import MIGRATORS
 from debputy.exceptions import (
     DebputyRuntimeError,
     PluginNotFoundError,
@@ -42,15 +38,6 @@ from debputy.exceptions import (
     UnhandledOrUnexpectedErrorFromPluginError,
     SymlinkLoopError,
 )
-from debputy.highlevel_manifest import HighLevelManifest
-from debputy.package_build.assemble_deb import (
-    assemble_debs,
-)
-from debputy.plugin.api.spec import (
-    INTEGRATION_MODE_DH_DEBPUTY_RRR,
-    DebputyIntegrationMode,
-    INTEGRATION_MODE_FULL,
-)
 
 try:
     from argcomplete import autocomplete
@@ -61,35 +48,6 @@ except ImportError:
 
 
 from debputy.version import __version__
-from debputy.filesystem_scan import (
-    FSROOverlay,
-    FSRootDir,
-)
-from debputy.plugin.api.impl_types import (
-    DebputyPluginMetadata,
-)
-from debputy.plugin.api.impl import (
-    find_json_plugin,
-    find_tests_for_plugin,
-    find_related_implementation_files_for_plugin,
-    parse_json_plugin_desc,
-)
-from debputy.dh_migration.migration import migrate_from_dh, _check_migration_target
-from debputy.dh_migration.models import AcceptableMigrationIssues
-from debputy.dh.debhelper_emulation import (
-    dhe_pkgdir,
-)
-
-from debputy.deb_packaging_support import (
-    usr_local_transformation,
-    handle_perl_code,
-    detect_systemd_user_service_files,
-    fixup_debian_changelog_and_news_file,
-    install_upstream_changelog,
-    relocate_dwarves_into_dbgsym_packages,
-    run_package_processors,
-    cross_package_control_files,
-)
 from debputy.util import (
     _error,
     _warn,
@@ -102,8 +60,20 @@ from debputy.util import (
     PRINT_BUILD_SYSTEM_COMMAND,
     PRINT_COMMAND,
     change_log_level,
+    run_in_parallel,
+    package_parallelization_limits,
 )
 
+# The command handlers import their implementation when they are run, so that
+# `debputy` starts quickly for commands that do not need all of it.
+if TYPE_CHECKING:
+    from debputy.filesystem_scan import FSRootDir
+    from debputy.highlevel_manifest import HighLevelManifest
+    from debputy.packages import BinaryPackage
+    from debputy.plugin.api.feature_set import PluginProvidedFeatureSet
+    from debputy.plugin.api.impl_types import DebputyPluginMetadata
+    from debputy.plugin.api.spec import DebputyIntegrationMode
+
 
 class SharedArgument(NamedTuple):
     """
@@ -313,16 +283,6 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--version", action="version", version=__version__)
 
     _add_common_args(parser)
-    from debputy.commands.debputy_cmd.plugin_cmds import (
-        ensure_plugin_commands_are_loaded,
-    )
-    from debputy.commands.debputy_cmd.lint_and_lsp_cmds import (
-        ensure_lint_and_lsp_commands_are_loaded,
-    )
-
-    ensure_plugin_commands_are_loaded()
-    ensure_lint_and_lsp_commands_are_loaded()
-
     ROOT_COMMAND.configure(parser)
 
     autocomplete(parser)
@@ -347,15 +307,18 @@ def parse_args() -> argparse.Namespace:
     "check-manifest",
     help_description="Check the manifest for obvious errors, but do not run anything",
     requested_plugins_only=True,
+    use_persistent_cache=True,
 )
 def _check_manifest(context: CommandContext) -> None:
     context.parse_manifest()
 
 
 def _install_plugin_from_plugin_metadata(
-    plugin_metadata: DebputyPluginMetadata,
+    plugin_metadata: "DebputyPluginMetadata",
     dest_dir: str,
 ) -> None:
+    from debputy.plugin.api.impl import find_related_implementation_files_for_plugin
+
     related_files = find_related_implementation_files_for_plugin(plugin_metadata)
     install_dir = os.path.join(
         f"{dest_dir}/{DEBPUTY_PLUGIN_ROOT_DIR}".replace("//", "/"),
@@ -390,6 +353,8 @@ def _install_plugin_from_plugin_metadata(
     ],
 )
 def _install_plugin(context: CommandContext) -> None:
+    from debputy.plugin.api.impl import parse_json_plugin_desc
+
     target_plugin = context.parsed_args.target_plugin
     if not os.path.isfile(target_plugin):
         _error(
@@ -408,7 +373,10 @@ _DH_PLUGIN_PKG_DIR = "debputy-plugins"
 
 def _find_plugins_and_tests_in_source_package(
     context: CommandContext,
-) -> Tuple[bool, List[Tuple[DebputyPluginMetadata, str]], List[str]]:
+) -> Tuple[bool, List[Tuple["DebputyPluginMetadata", str]], List[str]]:
+    from debputy.dh.debhelper_emulation import dhe_pkgdir
+    from debputy.plugin.api.impl import find_tests_for_plugin, parse_json_plugin_desc
+
     debian_dir = context.debian_dir
     binary_packages = context.binary_packages()
     installs = []
@@ -609,6 +577,8 @@ def _run_tests(
     ],
 )
 def _run_tests_for_plugin(context: CommandContext) -> None:
+    from debputy.plugin.api.impl import find_json_plugin, find_tests_for_plugin
+
     target_plugin = context.parsed_args.target_plugin
     if not os.path.isfile(target_plugin):
         _error(
@@ -649,6 +619,14 @@ def _run_tests_for_plugin(context: CommandContext) -> None:
     _run_tests(context, tests, cwd="/")
 
 
+def _report_loaded_plugins(plugin_feature_set: "PluginProvidedFeatureSet") -> None:
+    for plugin in plugin_feature_set.plugin_data.values():
+        if not plugin.is_bundled:
+            _info(f"Loaded plugin {plugin.plugin_name}")
+    for plugin_name in sorted(plugin_feature_set.deferred_plugins):
+        _info(f"Loaded plugin {plugin_name} (initialized on first use)")
+
+
 @internal_commands.register_subcommand(
     "dpkg-build-driver-run-task",
     help_description="[Internal command] Perform a given Dpkg::BuildDriver task (Not stable API)",
@@ -679,6 +657,9 @@ def _run_tests_for_plugin(context: CommandContext) -> None:
     ],
 )
 def _dpkg_build_driver_integration(context: CommandContext) -> None:
+    from debputy.build_support import perform_clean, perform_builds
+    from debputy.plugin.api.spec import INTEGRATION_MODE_FULL
+
     parsed_args = context.parsed_args
     log_level = context.set_log_level_for_build_subcommand()
     task_name = parsed_args.task_name
@@ -690,10 +671,7 @@ def _dpkg_build_driver_integration(context: CommandContext) -> None:
 
     manifest = context.parse_manifest()
 
-    plugins = context.load_plugins().plugin_data
-    for plugin in plugins.values():
-        if not plugin.is_bundled:
-            _info(f"Loaded plugin {plugin.plugin_name}")
+    _report_loaded_plugins(context.load_plugins())
     if task_name == "clean":
         perform_clean(context, manifest)
     elif task_name in ("build", "build-indep", "build-arch"):
@@ -733,6 +711,8 @@ def _dpkg_build_driver_integration(context: CommandContext) -> None:
     ],
 )
 def _dh_integration_generate_debs(context: CommandContext) -> None:
+    from debputy.plugin.api.spec import INTEGRATION_MODE_DH_DEBPUTY_RRR
+
     integrated_with_debhelper()
     log_level = context.set_log_level_for_build_subcommand()
     integration_mode = context.resolve_integration_mode()
@@ -746,10 +726,7 @@ def _dh_integration_generate_debs(context: CommandContext) -> None:
                 f"Plugins are not supported in the zz-debputy-rrr sequence. Detected plugins: {plugin_names}"
             )
 
-    plugins = context.load_plugins().plugin_data
-    for plugin in plugins.values():
-        if not plugin.is_bundled:
-            _info(f"Loaded plugin {plugin.plugin_name}")
+    _report_loaded_plugins(context.load_plugins())
     manifest = context.parse_manifest()
 
     assemble(
@@ -762,18 +739,56 @@ def _dh_integration_generate_debs(context: CommandContext) -> None:
 
 def assemble(
     context: CommandContext,
-    manifest: HighLevelManifest,
-    integration_mode: DebputyIntegrationMode,
+    manifest: "HighLevelManifest",
+    integration_mode: "DebputyIntegrationMode",
     *,
     debug_materialization: bool = False,
 ) -> None:
-    source_fs = FSROOverlay.create_root_dir("..", ".")
+    from debputy.build_support.build_context import BuildContext
+    from debputy.deb_packaging_support import (
+        usr_local_transformation,
+        handle_perl_code,
+        detect_systemd_user_service_files,
+        fixup_debian_changelog_and_news_file,
+        install_upstream_changelog,
+        relocate_dwarves_into_dbgsym_packages,
+        run_package_processors,
+        cross_package_control_files,
+    )
+    from debputy.filesystem_scan import FSROOverlay
+    from debputy.package_build.assemble_deb import assemble_debs
+    from debputy.plugin.api.spec import INTEGRATION_MODE_DH_DEBPUTY_RRR
+
     source_version = manifest.source_version()
     is_native = "-" not in source_version
     is_dh_rrr_only_mode = integration_mode == INTEGRATION_MODE_DH_DEBPUTY_RRR
-    package_data_table = manifest.perform_installations(integration_mode)
+    parallelization_limit = BuildContext.from_command_context(
+        context
+    ).parallelization_limit()
+    package_data_table = manifest.perform_installations(
+        integration_mode,
+        parallelization_limit=parallelization_limit,
+    )
     if not is_dh_rrr_only_mode:
-        for dctrl_bin in manifest.active_packages:
+        active_packages = list(manifest.active_packages)
+        # The packages may be processed concurrently and each package may in turn
+        # run its own tools concurrently (such as `strip`). The limit for the latter
+        # is available via the `package_metadata_context`.
+        package_limit, _ = package_parallelization_limits(
+            manifest.deb_options_and_profiles.deb_build_options,
+            parallelization_limit,
+            len(active_packages),
+        )
+        # The source overlay resolves its directories lazily, which is not safe to do
+        # from multiple threads. Therefore, it is only shared when the packages are
+        # processed one at a time.
+        shared_source_fs = (
+            FSROOverlay.create_root_dir("..", ".") if package_limit < 2 else None
+        )
+
+        def _assemble_package(dctrl_bin: "BinaryPackage") -> None:
+            # Only the file system of this package is mutated here. Anything that
+            # involves other packages belongs in `cross_package_control_files`.
             package = dctrl_bin.name
             dctrl_data = package_data_table[package]
             fs_root = dctrl_data.fs_root
@@ -790,10 +805,12 @@ def assemble(
                 dctrl_data.substvars,
             )
             if "nostrip" not in manifest.deb_options_and_profiles.deb_build_options:
+                per_package_limit = package_metadata_context.parallelization_limit
                 dbgsym_ids = relocate_dwarves_into_dbgsym_packages(
                     dctrl_bin,
                     fs_root,
                     dctrl_data.dbgsym_info.dbgsym_fs_root,
+                    parallelization_limit=per_package_limit,
                 )
                 dctrl_data.dbgsym_info.dbgsym_ids = dbgsym_ids
 
@@ -804,6 +821,9 @@ def assemble(
                 manifest.deb_options_and_profiles,
             )
             if not is_native:
+                source_fs = shared_source_fs
+                if source_fs is None:
+                    source_fs = FSROOverlay.create_root_dir("..", ".")
                 install_upstream_changelog(
                     dctrl_bin,
                     fs_root,
@@ -811,6 +831,12 @@ def assemble(
                 )
             run_package_processors(manifest, package_metadata_context, fs_root)
 
+        run_in_parallel(
+            _assemble_package,
+            active_packages,
+            parallelization_limit=package_limit,
+        )
+
         cross_package_control_files(package_data_table, manifest)
     for binary_data in package_data_table:
         if not binary_data.binary_package.should_be_acted_on:
@@ -827,6 +853,7 @@ def assemble(
         package_data_table,
         is_dh_rrr_only_mode,
         debug_materialization=debug_materialization,
+        parallelization_limit=parallelization_limit,
     )
 
 
@@ -848,6 +875,19 @@ def _supports_tool_command(context: CommandContext) -> None:
         sys.exit(2)
 
 
+def _add_reference_data_set_arg(argparser: argparse.ArgumentParser) -> None:
+    from debputy.analysis import REFERENCE_DATA_TABLE
+
+    argparser.add_argument(
+        "dataset",
+        metavar="name",
+        default=None,
+        nargs="?",
+        help="The dataset to export (if any)",
+        choices=REFERENCE_DATA_TABLE,
+    )
+
+
 @tool_support_commands.register_subcommand(
     "export-reference-data",
     help_description="Export reference data for other tool-support commands",
@@ -858,17 +898,12 @@ def _supports_tool_command(context: CommandContext) -> None:
             choices=["text", "json"],
             help="Output format of the reference data",
         ),
-        add_arg(
-            "dataset",
-            metavar="name",
-            default=None,
-            nargs="?",
-            help="The dataset to export (if any)",
-            choices=REFERENCE_DATA_TABLE,
-        ),
+        _add_reference_data_set_arg,
     ],
 )
 def _export_reference_data(context: CommandContext) -> None:
+    from debputy.analysis import REFERENCE_DATA_TABLE
+
     dataset_name = context.parsed_args.dataset
     output_format = context.parsed_args.output_format
     if dataset_name is not None:
@@ -910,6 +945,8 @@ def _export_reference_data(context: CommandContext) -> None:
     " or want additional features.",
 )
 def _annotate_debian_directory(context: CommandContext) -> None:
+    from debputy.analysis.debian_dir import scan_debian_dir
+
     # Validates that we are run from a debian directory as a side effect
     binary_packages = context.binary_packages()
     feature_set = context.load_plugins()
@@ -947,6 +984,21 @@ def _json_output(data: Any) -> None:
         print()
 
 
+def _add_migration_target_arg(argparser: argparse.ArgumentParser) -> None:
+    from debputy.dh_migration.migrators import MIGRATORS
+
+    argparser.add_argument(
+        "--migration-target",
+        dest="migration_target",
+        action="store",
+        choices=MIGRATORS,
+        type=str,
+        default=None,
+        help="Continue the migration even if this/these issues are detected."
+        " Can be set to ALL (in all upper-case) to accept all issues",
+    )
+
+
 @ROOT_COMMAND.register_subcommand(
     "migrate-from-dh",
     help_description='Generate/update manifest from a "dh $@" using package',
@@ -960,16 +1012,7 @@ def _json_output(data: Any) -> None:
             help="Continue the migration even if this/these issues are detected."
             " Can be set to ALL (in all upper-case) to accept all issues",
         ),
-        add_arg(
-            "--migration-target",
-            dest="migration_target",
-            action="store",
-            choices=MIGRATORS,
-            type=str,
-            default=None,
-            help="Continue the migration even if this/these issues are detected."
-            " Can be set to ALL (in all upper-case) to accept all issues",
-        ),
+        _add_migration_target_arg,
         add_arg(
             "--no-act",
             "--no-apply-changes",
@@ -988,6 +1031,12 @@ def _json_output(data: Any) -> None:
     ],
 )
 def _migrate_from_dh(context: CommandContext) -> None:
+    from debputy.dh_migration.migration import (
+        migrate_from_dh,
+        _check_migration_target,
+    )
+    from debputy.dh_migration.models import AcceptableMigrationIssues
+
     context.must_be_called_in_source_root()
     parsed_args = context.parsed_args
     resolved_migration_target = _check_migration_target(
@@ -1011,6 +1060,30 @@ def _migrate_from_dh(context: CommandContext) -> None:
     )
 
 
+# These are implemented in separate modules, which are only imported when one of
+# their commands is run.
+ROOT_COMMAND.register_lazy_subcommand(
+    "plugin",
+    "debputy.commands.debputy_cmd.plugin_cmds",
+    help_description="Interact with debputy plugins",
+)
+ROOT_COMMAND.register_lazy_subcommand(
+    "lsp",
+    "debputy.commands.debputy_cmd.lint_and_lsp_cmds",
+    help_description="Language server related subcommands",
+)
+ROOT_COMMAND.register_lazy_subcommand(
+    "lint",
+    "debputy.commands.debputy_cmd.lint_and_lsp_cmds",
+    help_description="Provide diagnostics for the packaging (like `lsp server` except no editor is needed)",
+)
+ROOT_COMMAND.register_lazy_subcommand(
+    "reformat",
+    "debputy.commands.debputy_cmd.lint_and_lsp_cmds",
+    help_description="Reformat the packaging files based on the packaging/maintainer rules",
+)
+
+
 def _setup_and_parse_args() -> argparse.Namespace:
     is_arg_completing = "_ARGCOMPLETE" in os.environ
     if not is_arg_completing:
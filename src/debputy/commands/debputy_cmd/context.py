@@ -1,6 +1,7 @@
 import argparse
 import dataclasses
 import errno
+import importlib
 import logging
 import os
 from typing import (
@@ -18,34 +19,7 @@ from typing import (
     Literal,
 )
 
-from debian.debian_support import DpkgArchTable
-
-from debputy._deb_options_profiles import DebBuildOptionsAndProfiles
-from debputy.architecture_support import (
-    DpkgArchitectureBuildProcessValuesTable,
-    dpkg_architecture_table,
-)
-from debputy.dh.dh_assistant import read_dh_addon_sequences
 from debputy.exceptions import DebputyRuntimeError
-from debputy.filesystem_scan import FSROOverlay
-from debputy.highlevel_manifest import HighLevelManifest
-from debputy.highlevel_manifest_parser import YAMLManifestParser
-from debputy.integration_detection import determine_debputy_integration_mode
-from debputy.packages import (
-    SourcePackage,
-    BinaryPackage,
-    DctrlParser,
-)
-from debputy.plugin.api import VirtualPath
-from debputy.plugin.api.impl import load_plugin_features
-from debputy.plugin.api.feature_set import PluginProvidedFeatureSet
-from debputy.plugin.api.spec import DebputyIntegrationMode
-from debputy.substitution import (
-    Substitution,
-    VariableContext,
-    SubstitutionImpl,
-    NULL_SUBSTITUTION,
-)
 from debputy.util import (
     _error,
     PKGNAME_REGEX,
@@ -59,6 +33,21 @@ from debputy.util import (
 if TYPE_CHECKING:
     from argparse import _SubParsersAction
 
+    from debputy._deb_options_profiles import DebBuildOptionsAndProfiles
+    from debputy.architecture_support import DpkgArchitectureBuildProcessValuesTable
+    from debputy.highlevel_manifest import HighLevelManifest
+    from debputy.highlevel_manifest_parser import YAMLManifestParser
+    from debputy.packages import (
+        SourcePackage,
+        BinaryPackage,
+        DctrlParser,
+    )
+    from debputy.persistent_cache import PersistentCache
+    from debputy.plugin.api import VirtualPath
+    from debputy.plugin.api.feature_set import PluginProvidedFeatureSet
+    from debputy.plugin.api.spec import DebputyIntegrationMode
+    from debputy.substitution import Substitution
+
 
 CommandHandler = Callable[["CommandContext"], None]
 ArgparserConfigurator = Callable[[argparse.ArgumentParser], None]
@@ -113,22 +102,24 @@ class CommandContext:
         plugin_search_dirs: Sequence[str],
         require_substitution: bool = True,
         requested_plugins_only: bool = False,
+        use_persistent_cache: bool = False,
     ) -> None:
         self.parsed_args = parsed_args
         self.plugin_search_dirs = plugin_search_dirs
         self._require_substitution = require_substitution
         self._requested_plugins_only = requested_plugins_only
-        self._debputy_plugin_feature_set: PluginProvidedFeatureSet = (
-            PluginProvidedFeatureSet()
-        )
-        self._debian_dir = FSROOverlay.create_root_dir("debian", "debian")
+        self._use_persistent_cache = use_persistent_cache
+        # Both are created on first use, so commands that need neither (such as
+        # `tool-support supports-tool-command`) do not pay for importing them.
+        self._debputy_plugin_feature_set: Optional["PluginProvidedFeatureSet"] = None
+        self._debian_dir: Optional["VirtualPath"] = None
         self._mtime: Optional[int] = None
         self._source_variables: Optional[Mapping[str, str]] = None
-        self._substitution: Optional[Substitution] = None
+        self._substitution: Optional["Substitution"] = None
         self._requested_plugins: Optional[Sequence[str]] = None
         self._plugins_loaded = False
-        self._dctrl_parser: Optional[DctrlParser] = None
-        self.debputy_integration_mode: Optional[DebputyIntegrationMode] = None
+        self._dctrl_parser: Optional["DctrlParser"] = None
+        self.debputy_integration_mode: Optional["DebputyIntegrationMode"] = None
         self._dctrl_data: Optional[
             Tuple[
                 "SourcePackage",
@@ -136,6 +127,7 @@ class CommandContext:
             ]
         ] = None
         self._package_set: Literal["both", "arch", "indep"] = "both"
+        self._persistent_cache: Optional["PersistentCache"] = None
 
     @property
     def package_set(self) -> Literal["both", "arch", "indep"]:
@@ -150,8 +142,42 @@ class CommandContext:
         self._package_set = new_value
 
     @property
-    def debian_dir(self) -> VirtualPath:
-        return self._debian_dir
+    def persistent_cache(self) -> Optional["PersistentCache"]:
+        """The cache shared between invocations (None unless the command opted in)
+
+        The cache is stored in the home directory of the user. Therefore, it must not be
+        used by commands that run during the package build, which may only write inside
+        the source tree and temporary directories (Debian Policy 4.9).
+        """
+        if not self._use_persistent_cache:
+            return None
+        cache = self._persistent_cache
+        if cache is None:
+            from debputy.persistent_cache import PersistentCache, user_cache_dir
+
+            cache = PersistentCache(user_cache_dir())
+            self._persistent_cache = cache
+        return cache
+
+    @property
+    def debian_dir(self) -> "VirtualPath":
+        debian_dir = self._debian_dir
+        if debian_dir is None:
+            from debputy.filesystem_scan import FSROOverlay
+
+            debian_dir = FSROOverlay.create_root_dir("debian", "debian")
+            self._debian_dir = debian_dir
+        return debian_dir
+
+    @property
+    def _plugin_feature_set(self) -> "PluginProvidedFeatureSet":
+        feature_set = self._debputy_plugin_feature_set
+        if feature_set is None:
+            from debputy.plugin.api.feature_set import PluginProvidedFeatureSet
+
+            feature_set = PluginProvidedFeatureSet()
+            self._debputy_plugin_feature_set = feature_set
+        return feature_set
 
     @property
     def mtime(self) -> int:
@@ -163,9 +189,15 @@ class CommandContext:
         return self._mtime
 
     @property
-    def dctrl_parser(self) -> DctrlParser:
+    def dctrl_parser(self) -> "DctrlParser":
         parser = self._dctrl_parser
         if parser is None:
+            from debian.debian_support import DpkgArchTable
+
+            from debputy._deb_options_profiles import DebBuildOptionsAndProfiles
+            from debputy.architecture_support import dpkg_architecture_table
+            from debputy.packages import DctrlParser
+
             packages: Union[Set[str], FrozenSet[str]] = frozenset()
             if hasattr(self.parsed_args, "packages"):
                 packages = self.parsed_args.packages
@@ -191,7 +223,7 @@ class CommandContext:
             self._dctrl_parser = parser
         return parser
 
-    def source_package(self) -> SourcePackage:
+    def source_package(self) -> "SourcePackage":
         source, _ = self._parse_dctrl()
         return source
 
@@ -199,7 +231,9 @@ class CommandContext:
         _, binary_package_table = self._parse_dctrl()
         return binary_package_table
 
-    def dpkg_architecture_variables(self) -> DpkgArchitectureBuildProcessValuesTable:
+    def dpkg_architecture_variables(
+        self,
+    ) -> "DpkgArchitectureBuildProcessValuesTable":
         return self.dctrl_parser.dpkg_architecture_variables
 
     def requested_plugins(self) -> Sequence[str]:
@@ -221,9 +255,15 @@ class CommandContext:
     def _create_substitution(
         self,
         parsed_args: argparse.Namespace,
-        plugin_feature_set: PluginProvidedFeatureSet,
-        debian_dir: VirtualPath,
-    ) -> Substitution:
+        plugin_feature_set: "PluginProvidedFeatureSet",
+        debian_dir: "VirtualPath",
+    ) -> "Substitution":
+        from debputy.substitution import (
+            VariableContext,
+            SubstitutionImpl,
+            NULL_SUBSTITUTION,
+        )
+
         requested_subst = self._require_substitution
         if hasattr(parsed_args, "substitution"):
             requested_subst = parsed_args.substitution
@@ -238,23 +278,32 @@ class CommandContext:
             )
         return NULL_SUBSTITUTION
 
-    def load_plugins(self) -> PluginProvidedFeatureSet:
+    def load_plugins(self) -> "PluginProvidedFeatureSet":
         if not self._plugins_loaded:
+            from debputy.plugin.api.impl import load_plugin_features
+
             requested_plugins = None
             required_plugins = self.required_plugins()
             if self._requested_plugins_only:
                 requested_plugins = self.requested_plugins()
             debug_mode = getattr(self.parsed_args, "debug_mode", False)
+            plugin_index = None
+            # Like the persistent cache, it must not be used during the package build
+            if self._use_persistent_cache:
+                from debputy.persistent_cache import JSONPersistentCache, user_cache_dir
+
+                plugin_index = JSONPersistentCache(user_cache_dir())
             load_plugin_features(
                 self.plugin_search_dirs,
                 self.substitution,
                 requested_plugins_only=requested_plugins,
                 required_plugins=required_plugins,
-                plugin_feature_set=self._debputy_plugin_feature_set,
+                plugin_feature_set=self._plugin_feature_set,
                 debug_mode=debug_mode,
+                plugin_index=plugin_index,
             )
             self._plugins_loaded = True
-        return self._debputy_plugin_feature_set
+        return self._plugin_feature_set
 
     @staticmethod
     def _plugin_from_dependency_field(dep_field: str) -> Iterable[str]:
@@ -286,11 +335,11 @@ class CommandContext:
         return plugins
 
     @property
-    def substitution(self) -> Substitution:
+    def substitution(self) -> "Substitution":
         if self._substitution is None:
             self._substitution = self._create_substitution(
                 self.parsed_args,
-                self._debputy_plugin_feature_set,
+                self._plugin_feature_set,
                 self.debian_dir,
             )
         return self._substitution
@@ -345,9 +394,14 @@ class CommandContext:
     def resolve_integration_mode(
         self,
         require_integration: bool = True,
-    ) -> DebputyIntegrationMode:
+    ) -> "DebputyIntegrationMode":
         integration_mode = self.debputy_integration_mode
         if integration_mode is None:
+            from debputy.dh.dh_assistant import read_dh_addon_sequences
+            from debputy.integration_detection import (
+                determine_debputy_integration_mode,
+            )
+
             r = read_dh_addon_sequences(self.debian_dir)
             bd_sequences, dr_sequences, _ = r
             all_sequences = bd_sequences | dr_sequences
@@ -377,7 +431,9 @@ class CommandContext:
         self,
         *,
         manifest_path: Optional[str] = None,
-    ) -> YAMLManifestParser:
+    ) -> "YAMLManifestParser":
+        from debputy.highlevel_manifest_parser import YAMLManifestParser
+
         substitution = self.substitution
         dctrl_parser = self.dctrl_parser
 
@@ -404,7 +460,7 @@ class CommandContext:
         self,
         *,
         manifest_path: Optional[str] = None,
-    ) -> HighLevelManifest:
+    ) -> "HighLevelManifest":
         substitution = self.substitution
         manifest_required = False
 
@@ -420,12 +476,44 @@ class CommandContext:
             "Internal resolution",
         )
         if os.path.isfile(manifest_path):
-            return parser.parse_manifest()
+            return parser.parse_manifest(persistent_cache=self.persistent_cache)
         if manifest_required:
             _error(f'The path "{manifest_path}" is not a file!')
         return parser.build_manifest()
 
 
+class _DeferredConfigurationSubParsersAction(argparse._SubParsersAction):
+    """Sub-parsers action that configures a subcommand parser once it is selected
+
+    Configuring a subcommand can require importing its implementation (for example,
+    to compute the valid choices of an argument). By deferring the configuration
+    until argparse dispatches to the subcommand, only the subcommand being run pays
+    that cost. The top-level `--help` only needs the name and help of each subcommand.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._pending_configurations: Dict[
+            int, Tuple[argparse.ArgumentParser, ArgparserConfigurator]
+        ] = {}
+
+    def defer_configuration(
+        self,
+        parser: argparse.ArgumentParser,
+        configurator: ArgparserConfigurator,
+    ) -> None:
+        self._pending_configurations[id(parser)] = (parser, configurator)
+
+    def __call__(self, parser, namespace, values, option_string=None) -> None:
+        subparser = self._name_parser_map.get(values[0])
+        if subparser is not None:
+            pending = self._pending_configurations.pop(id(subparser), None)
+            if pending is not None:
+                _, configurator = pending
+                configurator(subparser)
+        super().__call__(parser, namespace, values, option_string=option_string)
+
+
 class CommandBase:
     __slots__ = ()
 
@@ -461,7 +549,10 @@ class SubcommandBase(CommandBase):
             help=self.help_description,
             allow_abbrev=False,
         )
-        self.configure(parser)
+        if isinstance(subparser, _DeferredConfigurationSubParsersAction):
+            subparser.defer_configuration(parser, self.configure)
+        else:
+            self.configure(parser)
         return parser
 
 
@@ -471,6 +562,7 @@ class GenericSubCommand(SubcommandBase):
         "_configure_handler",
         "_require_substitution",
         "_requested_plugins_only",
+        "_use_persistent_cache",
         "_log_only_to_stderr",
         "_default_log_level",
     )
@@ -485,6 +577,7 @@ class GenericSubCommand(SubcommandBase):
         configure_handler: Optional[Callable[[argparse.ArgumentParser], None]] = None,
         require_substitution: bool = True,
         requested_plugins_only: bool = False,
+        use_persistent_cache: bool = False,
         log_only_to_stderr: bool = False,
         default_log_level: Union[int, Callable[[CommandContext], int]] = logging.INFO,
     ) -> None:
@@ -493,6 +586,7 @@ class GenericSubCommand(SubcommandBase):
         self._configure_handler = configure_handler
         self._require_substitution = require_substitution
         self._requested_plugins_only = requested_plugins_only
+        self._use_persistent_cache = use_persistent_cache
         self._log_only_to_stderr = log_only_to_stderr
         self._default_log_level = default_log_level
 
@@ -515,6 +609,7 @@ class GenericSubCommand(SubcommandBase):
             command_arg.plugin_search_dirs,
             self._require_substitution,
             self._requested_plugins_only,
+            self._use_persistent_cache,
         )
         if self._log_only_to_stderr:
             setup_logging(reconfigure_logging=True, log_only_to_stderr=True)
@@ -560,6 +655,34 @@ class DispatchingCommandMixin(CommandBase):
         self.add_subcommand(ds)
         return ds
 
+    def register_lazy_subcommand(
+        self,
+        name: Union[str, Sequence[str]],
+        module_name: str,
+        *,
+        help_description: Optional[str] = None,
+    ) -> None:
+        """Register a subcommand implemented by a module that is imported on first use
+
+        Importing `module_name` must register the subcommand with the same names and
+        help description on this command. That registration replaces the placeholder.
+        """
+        if isinstance(name, str):
+            cmd_name = name
+            aliases: Sequence[str] = []
+        else:
+            cmd_name = name[0]
+            aliases = name[1:]
+        self.add_subcommand(
+            LazyLoadedSubcommand(
+                cmd_name,
+                self,
+                module_name,
+                aliases=aliases,
+                help_description=help_description,
+            )
+        )
+
     def register_subcommand(
         self,
         name: Union[str, Sequence[str]],
@@ -570,6 +693,7 @@ class DispatchingCommandMixin(CommandBase):
         ] = None,
         require_substitution: bool = True,
         requested_plugins_only: bool = False,
+        use_persistent_cache: bool = False,
         log_only_to_stderr: bool = False,
         default_log_level: Union[int, Callable[[CommandContext], int]] = logging.INFO,
     ) -> Callable[[CommandHandler], GenericSubCommand]:
@@ -597,6 +721,7 @@ class DispatchingCommandMixin(CommandBase):
                 help_description=help_description,
                 require_substitution=require_substitution,
                 requested_plugins_only=requested_plugins_only,
+                use_persistent_cache=use_persistent_cache,
                 log_only_to_stderr=log_only_to_stderr,
                 default_log_level=default_log_level,
             )
@@ -643,6 +768,21 @@ class DispatcherCommand(SubcommandBase, DispatchingCommandMixin):
         if subcommand.aliases:
             all_names.extend(subcommand.aliases)
         aliases = self._aliases
+        placeholder = self._subcommands.get(subcommand.name)
+        if isinstance(placeholder, LazyLoadedSubcommand) and not isinstance(
+            subcommand, LazyLoadedSubcommand
+        ):
+            if (
+                set(placeholder.aliases) != set(subcommand.aliases)
+                or placeholder.help_description != subcommand.help_description
+            ):
+                raise ValueError(
+                    f"Internal error: The lazy registration of {subcommand.name} on topic {self.name}"
+                    " does not match its implementation (aliases or help description differs)"
+                )
+            del aliases[placeholder.name]
+            for n in placeholder.aliases:
+                del aliases[n]
         for n in all_names:
             if n in aliases:
                 raise ValueError(
@@ -672,10 +812,16 @@ class DispatcherCommand(SubcommandBase, DispatchingCommandMixin):
                 f"Internal error: Subcommand {self.name} should have {default_subcommand} as default,"
                 " but it was not registered?"
             )
+        subparser_kwargs = {}
+        if "_ARGCOMPLETE" not in os.environ:
+            # argcomplete inspects the parsers without dispatching to them, so it
+            # needs all of them to be configured.
+            subparser_kwargs["action"] = _DeferredConfigurationSubParsersAction
         subparser = argparser.add_subparsers(
             dest=self._dest,
             required=required,
             metavar=self._metavar,
+            **subparser_kwargs,
         )
         for subcommand in subcommands.values():
             subcommand.add_subcommand_to_subparser(subparser)
@@ -683,6 +829,9 @@ class DispatcherCommand(SubcommandBase, DispatchingCommandMixin):
     def has_command(self, command: str) -> bool:
         return command in self._aliases
 
+    def subcommand(self, command: str) -> SubcommandBase:
+        return self._aliases[command]
+
     def __call__(self, command_arg: CommandArg) -> None:
         argparser = self._argparser
         assert argparser is not None
@@ -702,6 +851,43 @@ class DispatcherCommand(SubcommandBase, DispatchingCommandMixin):
         self._aliases[v](command_arg)
 
 
+class LazyLoadedSubcommand(SubcommandBase):
+    """Placeholder for a subcommand in a module that has not been imported yet
+
+    See `DispatchingCommandMixin.register_lazy_subcommand`.
+    """
+
+    __slots__ = ("_dispatcher", "_module_name")
+
+    def __init__(
+        self,
+        name: str,
+        dispatcher: DispatcherCommand,
+        module_name: str,
+        *,
+        aliases: Sequence[str] = tuple(),
+        help_description: Optional[str] = None,
+    ) -> None:
+        super().__init__(name, aliases=aliases, help_description=help_description)
+        self._dispatcher = dispatcher
+        self._module_name = module_name
+
+    def load(self) -> SubcommandBase:
+        importlib.import_module(self._module_name)
+        subcommand = self._dispatcher.subcommand(self.name)
+        if isinstance(subcommand, LazyLoadedSubcommand):
+            raise AssertionError(
+                f"Internal error: Importing {self._module_name} did not register the {self.name} subcommand"
+            )
+        return subcommand
+
+    def configure(self, argparser: argparse.ArgumentParser) -> None:
+        self.load().configure(argparser)
+
+    def __call__(self, command_arg: CommandArg) -> None:
+        self.load()(command_arg)
+
+
 ROOT_COMMAND = DispatcherCommand(
     "root",
     dest="command",
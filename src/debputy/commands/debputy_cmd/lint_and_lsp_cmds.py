@@ -1,9 +1,9 @@
 import random
 import textwrap
+import argparse
 from argparse import BooleanOptionalAction
 
 from debputy.commands.debputy_cmd.context import ROOT_COMMAND, CommandContext, add_arg
-from debputy.lsp.lsp_reference_keyword import ALL_PUBLIC_NAMED_STYLES
 from debputy.util import _error
 
 
@@ -317,17 +317,23 @@ def lint_cmd(context: CommandContext) -> None:
     perform_linting(context)
 
 
+def _add_style_arg(argparser: argparse.ArgumentParser) -> None:
+    from debputy.lsp.lsp_reference_keyword import ALL_PUBLIC_NAMED_STYLES
+
+    argparser.add_argument(
+        "--style",
+        dest="named_style",
+        choices=ALL_PUBLIC_NAMED_STYLES,
+        default=None,
+        help="The formatting style to use (overrides packaging style).",
+    )
+
+
 @ROOT_COMMAND.register_subcommand(
     "reformat",
     help_description="Reformat the packaging files based on the packaging/maintainer rules",
     argparser=[
-        add_arg(
-            "--style",
-            dest="named_style",
-            choices=ALL_PUBLIC_NAMED_STYLES,
-            default=None,
-            help="The formatting style to use (overrides packaging style).",
-        ),
+        _add_style_arg,
         add_arg(
             "--auto-fix",
             dest="auto_fix",
@@ -375,11 +381,3 @@ def reformat_cmd(context: CommandContext) -> None:
     context.must_be_called_in_source_root()
     perform_reformat(context, named_style=context.parsed_args.named_style)
 
-
-def ensure_lint_and_lsp_commands_are_loaded() -> None:
-    # Loading the module does the heavy lifting
-    # However, having this function means that we do not have an "unused" import that some tool
-    # gets tempted to remove
-    assert ROOT_COMMAND.has_command("lsp")
-    assert ROOT_COMMAND.has_command("lint")
-    assert ROOT_COMMAND.has_command("reformat")
@@ -1190,9 +1190,3 @@ def _render_value(v: Any) -> str:
         return f'"{v}"'
     return str(v)
 
-
-def ensure_plugin_commands_are_loaded() -> None:
-    # Loading the module does the heavy lifting
-    # However, having this function means that we do not have an "unused" import that some tool
-    # gets tempted to remove
-    assert ROOT_COMMAND.has_command("plugin")
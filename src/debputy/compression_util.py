@@ -0,0 +1,458 @@
+import collections
+import concurrent.futures
+import dataclasses
+import io
+import lzma
+import struct
+import zlib
+from typing import Optional, BinaryIO, Deque, Tuple, Union
+
+from debputy.util import worker_count
+
+_MiB = 1024 * 1024
+
+# Dictionary sizes and (approximate) encoder memory usage for the xz presets as
+# documented in xz(1).
+_XZ_PRESET_DICT_SIZES = (
+    256 * 1024,
+    1 * _MiB,
+    2 * _MiB,
+    4 * _MiB,
+    4 * _MiB,
+    8 * _MiB,
+    8 * _MiB,
+    16 * _MiB,
+    32 * _MiB,
+    64 * _MiB,
+)
+_XZ_PRESET_ENCODER_MEMORY = (
+    3 * _MiB,
+    9 * _MiB,
+    17 * _MiB,
+    32 * _MiB,
+    48 * _MiB,
+    94 * _MiB,
+    94 * _MiB,
+    186 * _MiB,
+    370 * _MiB,
+    674 * _MiB,
+)
+_XZ_HEADER_MAGIC = b"\xfd7zXZ\x00"
+_XZ_FOOTER_MAGIC = b"YZ"
+_XZ_STREAM_FLAGS = b"\x00\x04"  # Check type: CRC64 (the xz default)
+_XZ_CHECK_SIZE = 8
+_XZ_BLOCK_HAS_SIZES = 0xC0
+_XZ_HEADERS_BOUND = 92
+_LZMA2_CHUNK_MAX = 1 << 16
+_LZMA2_HEADER_UNCOMPRESSED = 3
+
+_GZIP_BLOCK_SIZE = 1 * _MiB
+_DEFLATE_WINDOW_SIZE = 32 * 1024
+_DEFLATE_MEMORY = 1 * _MiB
+_GZIP_OS_UNIX = 3
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class CompressedBlock:
+    data: bytes
+    uncompressed_size: int
+    unpadded_size: int
+
+
+class BlockCompressor:
+    """Compress a stream as a sequence of independently compressed blocks
+
+    The stream is cut into blocks of a fixed size (`block_size`), which are compressed
+    independently by `compress_block` (possibly concurrently). All other methods are
+    only called from one thread and in stream order.
+
+    The block size must never depend on the number of threads, since the output would
+    then depend on the machine that did the compression.
+    """
+
+    __slots__ = ()
+
+    @property
+    def block_size(self) -> int:
+        raise NotImplementedError
+
+    @property
+    def memory_per_thread(self) -> int:
+        """Approximate memory usage of compressing one block"""
+        raise NotImplementedError
+
+    def stream_header(self) -> bytes:
+        raise NotImplementedError
+
+    def compress_block(self, block: bytes, previous_block: bytes) -> CompressedBlock:
+        raise NotImplementedError
+
+    def block_done(self, block: bytes, compressed_block: CompressedBlock) -> None:
+        raise NotImplementedError
+
+    def stream_footer(self) -> bytes:
+        raise NotImplementedError
+
+
+def _xz_varint(value: int) -> bytes:
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _xz_block_buffer_bound(uncompressed_size: int) -> int:
+    # Mirrors `lzma_block_buffer_bound64` from liblzma
+    lzma2_bound = (
+        uncompressed_size
+        + (uncompressed_size + _LZMA2_CHUNK_MAX - 1)
+        // _LZMA2_CHUNK_MAX
+        * _LZMA2_HEADER_UNCOMPRESSED
+        + 1
+    )
+    return ((lzma2_bound + 3) & ~3) + _XZ_HEADERS_BOUND
+
+
+def _xz_read_varint(data: Union[bytes, memoryview], offset: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        b = data[offset]
+        offset += 1
+        value |= (b & 0x7F) << shift
+        if b < 0x80:
+            return value, offset
+        shift += 7
+
+
+class XzBlockCompressor(BlockCompressor):
+    """Produce the same output as the multithreaded mode of xz (as in `xz -T2`)
+
+    The xz format supports multiple blocks in a stream. In multithreaded mode, xz
+    cuts the input into blocks of 3 times the dictionary size (but at least 1 MiB)
+    and records the sizes in each block header. Since the block size only depends
+    on the preset, the output is the same regardless of the number of threads.
+
+    >>> c = XzBlockCompressor(6)
+    >>> compressed = compress_to_bytes(c, b"Hello world")
+    >>> compressed[:6] == _XZ_HEADER_MAGIC
+    True
+    >>> lzma.decompress(compressed)
+    b'Hello world'
+    """
+
+    __slots__ = (
+        "_compression_level",
+        "_preset",
+        "_block_size",
+        "_block_header_size",
+        "_index_records",
+    )
+
+    def __init__(self, compression_level: int, *, extreme: bool = False) -> None:
+        self._compression_level = compression_level
+        self._preset = compression_level | (lzma.PRESET_EXTREME if extreme else 0)
+        dict_size = _XZ_PRESET_DICT_SIZES[compression_level]
+        block_size = max(3 * dict_size, _MiB)
+        self._block_size = block_size
+        # The multithreaded xz encoder reserves space in the block header for the
+        # sizes of a full block (and its worst case compressed size). The actual
+        # sizes are then written into the reserved space and any remaining space is
+        # padding.
+        filter_flags_size = 3
+        header_size = (
+            2
+            + len(_xz_varint(_xz_block_buffer_bound(block_size)))
+            + len(_xz_varint(block_size))
+            + filter_flags_size
+        )
+        self._block_header_size = header_size + (-header_size % 4) + 4
+        self._index_records = []
+
+    @property
+    def block_size(self) -> int:
+        return self._block_size
+
+    @property
+    def memory_per_thread(self) -> int:
+        return _XZ_PRESET_ENCODER_MEMORY[self._compression_level] + (
+            2 * self._block_size
+        )
+
+    def stream_header(self) -> bytes:
+        return (
+            _XZ_HEADER_MAGIC
+            + _XZ_STREAM_FLAGS
+            + struct.pack("<L", zlib.crc32(_XZ_STREAM_FLAGS))
+        )
+
+    def compress_block(self, block: bytes, previous_block: bytes) -> CompressedBlock:
+        # Let liblzma produce a complete single block stream and then lift the block out
+        # of it. This is how we get the CRC64 of the block computed by liblzma.
+        stream = memoryview(
+            lzma.compress(
+                block,
+                format=lzma.FORMAT_XZ,
+                check=lzma.CHECK_CRC64,
+                preset=self._preset,
+            )
+        )
+        header_offset = len(_XZ_HEADER_MAGIC) + len(_XZ_STREAM_FLAGS) + 4
+        header_size = (stream[header_offset] + 1) * 4
+        block_flags = stream[header_offset + 1]
+        assert block_flags == 0, "liblzma is not expected to emit block sizes"
+        # Filter flags of the LZMA2 filter (id, property size and the property)
+        filter_flags = bytes(stream[header_offset + 2 : header_offset + 5])
+        assert filter_flags[0:2] == b"\x21\x01"
+
+        backward_size = (struct.unpack_from("<L", stream, len(stream) - 8)[0] + 1) * 4
+        index_offset = len(stream) - 12 - backward_size
+        _, offset = _xz_read_varint(stream, index_offset + 1)
+        unpadded_size, _ = _xz_read_varint(stream, offset)
+        data_offset = header_offset + header_size
+        compressed_size = unpadded_size - header_size - _XZ_CHECK_SIZE
+        check_offset = index_offset - _XZ_CHECK_SIZE
+
+        block_header = bytearray((0, _XZ_BLOCK_HAS_SIZES))
+        block_header += _xz_varint(compressed_size)
+        block_header += _xz_varint(len(block))
+        block_header += filter_flags
+        block_header_size = self._block_header_size
+        block_header += b"\0" * (block_header_size - 4 - len(block_header))
+        block_header[0] = block_header_size // 4 - 1
+        block_header += struct.pack("<L", zlib.crc32(block_header))
+
+        data = b"".join(
+            (
+                block_header,
+                stream[data_offset : data_offset + compressed_size],
+                b"\0" * (-compressed_size % 4),
+                stream[check_offset:index_offset],
+            )
+        )
+        return CompressedBlock(
+            data,
+            len(block),
+            block_header_size + compressed_size + _XZ_CHECK_SIZE,
+        )
+
+    def block_done(self, block: bytes, compressed_block: CompressedBlock) -> None:
+        self._index_records.append(
+            (compressed_block.unpadded_size, compressed_block.uncompressed_size)
+        )
+
+    def stream_footer(self) -> bytes:
+        index = bytearray(b"\0")
+        index += _xz_varint(len(self._index_records))
+        for unpadded_size, uncompressed_size in self._index_records:
+            index += _xz_varint(unpadded_size)
+            index += _xz_varint(uncompressed_size)
+        index += b"\0" * (-len(index) % 4)
+        index += struct.pack("<L", zlib.crc32(index))
+        footer = struct.pack("<L", len(index) // 4 - 1) + _XZ_STREAM_FLAGS
+        return b"".join(
+            (
+                index,
+                struct.pack("<L", zlib.crc32(footer)),
+                footer,
+                _XZ_FOOTER_MAGIC,
+            )
+        )
+
+
+class GzipBlockCompressor(BlockCompressor):
+    """Produce a single member gzip stream from independently compressed blocks
+
+    This is the same approach as `pigz`: Each block is compressed as raw deflate data
+    and ends on a byte boundary (via a sync flush), so the compressed blocks can be
+    concatenated. The last 32 KiB of the previous block is used as the dictionary to
+    avoid losing compression at the block boundaries.
+
+    The gzip header is identical to the one from `gzip -n`.
+
+    >>> c = GzipBlockCompressor(9)
+    >>> compressed = compress_to_bytes(c, b"Hello world")
+    >>> compressed[:4].hex()
+    '1f8b0800'
+    >>> import gzip
+    >>> gzip.decompress(compressed)
+    b'Hello world'
+    """
+
+    __slots__ = ("_compression_level", "_crc", "_size")
+
+    def __init__(self, compression_level: int) -> None:
+        self._compression_level = compression_level
+        self._crc = 0
+        self._size = 0
+
+    @property
+    def block_size(self) -> int:
+        return _GZIP_BLOCK_SIZE
+
+    @property
+    def memory_per_thread(self) -> int:
+        return _DEFLATE_MEMORY + 2 * _GZIP_BLOCK_SIZE
+
+    def stream_header(self) -> bytes:
+        # Matches gzip: Maximum compression (2) for -9, fastest (4) for -1
+        if self._compression_level == 9:
+            extra_flags = 2
+        elif self._compression_level == 1:
+            extra_flags = 4
+        else:
+            extra_flags = 0
+        return b"\x1f\x8b\x08\x00\x00\x00\x00\x00" + bytes((extra_flags, _GZIP_OS_UNIX))
+
+    def compress_block(self, block: bytes, previous_block: bytes) -> CompressedBlock:
+        if previous_block:
+            compressor = zlib.compressobj(
+                self._compression_level,
+                zlib.DEFLATED,
+                -zlib.MAX_WBITS,
+                zdict=previous_block[-_DEFLATE_WINDOW_SIZE:],
+            )
+        else:
+            compressor = zlib.compressobj(
+                self._compression_level,
+                zlib.DEFLATED,
+                -zlib.MAX_WBITS,
+            )
+        data = compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        return CompressedBlock(data, len(block), len(data))
+
+    def block_done(self, block: bytes, compressed_block: CompressedBlock) -> None:
+        self._crc = zlib.crc32(block, self._crc)
+        self._size += len(block)
+
+    def stream_footer(self) -> bytes:
+        # An empty final block terminates the deflate stream.
+        final_block = zlib.compressobj(
+            self._compression_level,
+            zlib.DEFLATED,
+            -zlib.MAX_WBITS,
+        ).flush(zlib.Z_FINISH)
+        return final_block + struct.pack("<LL", self._crc, self._size & 0xFFFFFFFF)
+
+
+class ParallelCompressionWriter:
+    """Binary file-like object that compresses its input via a `BlockCompressor`
+
+    Blocks are compressed by a pool of threads (both `lzma` and `zlib` release the GIL
+    while compressing). The compressed blocks are written to the underlying file in
+    order, so the output does not depend on the number of threads.
+
+    The number of threads is bounded by the memory limit (if any) and at most
+    `threads + 1` blocks are kept in memory at any point in time.
+    """
+
+    def __init__(
+        self,
+        compressor: BlockCompressor,
+        output: BinaryIO,
+        *,
+        threads: int = 1,
+        memory_limit: Optional[int] = None,
+    ) -> None:
+        if memory_limit is not None:
+            threads = min(threads, memory_limit // compressor.memory_per_thread)
+        self._threads = worker_count(threads, threads)
+        self._compressor = compressor
+        self._output = output
+        self._buffer = bytearray()
+        self._previous_block = b""
+        self._pending: Deque[
+            Tuple[bytes, "concurrent.futures.Future[CompressedBlock]"]
+        ] = collections.deque()
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        if self._threads > 1:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self._threads
+            )
+        self._closed = False
+        output.write(compressor.stream_header())
+
+    @property
+    def threads(self) -> int:
+        return self._threads
+
+    def __enter__(self) -> "ParallelCompressionWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._abort()
+
+    def write(self, data: Union[bytes, bytearray, memoryview]) -> int:
+        assert not self._closed
+        buffer = self._buffer
+        buffer += data
+        block_size = self._compressor.block_size
+        if len(buffer) >= block_size:
+            offset = 0
+            while len(buffer) - offset >= block_size:
+                self._submit(bytes(buffer[offset : offset + block_size]))
+                offset += block_size
+            del buffer[:offset]
+        return len(data)
+
+    def flush(self) -> None:
+        # Data can only be flushed in full blocks (except at the end)
+        pass
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._write_next_block()
+        self._output.write(self._compressor.stream_footer())
+        self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _abort(self) -> None:
+        self._closed = True
+        self._pending.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _submit(self, block: bytes) -> None:
+        previous_block = self._previous_block
+        self._previous_block = block
+        executor = self._executor
+        if executor is None:
+            compressed_block = self._compressor.compress_block(block, previous_block)
+            self._block_done(block, compressed_block)
+            return
+        while len(self._pending) > self._threads:
+            self._write_next_block()
+        future = executor.submit(self._compressor.compress_block, block, previous_block)
+        self._pending.append((block, future))
+
+    def _write_next_block(self) -> None:
+        block, future = self._pending.popleft()
+        self._block_done(block, future.result())
+
+    def _block_done(self, block: bytes, compressed_block: CompressedBlock) -> None:
+        self._compressor.block_done(block, compressed_block)
+        self._output.write(compressed_block.data)
+
+
+def compress_to_bytes(
+    compressor: BlockCompressor,
+    data: bytes,
+    *,
+    threads: int = 1,
+) -> bytes:
+    """Compress `data` in memory (mostly useful for small data and testing)"""
+    output = io.BytesIO()
+    with ParallelCompressionWriter(compressor, output, threads=threads) as writer:
+        writer.write(data)
+    return output.getvalue()
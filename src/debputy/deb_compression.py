@@ -0,0 +1,245 @@
+import argparse
+import contextlib
+import dataclasses
+import os
+from typing import (
+    Optional,
+    List,
+    FrozenSet,
+    Callable,
+    BinaryIO,
+    cast,
+    Union,
+    Iterator,
+)
+
+from debputy._deb_options_profiles import DebBuildOptionsAndProfiles
+from debputy.compression_util import (
+    BlockCompressor,
+    XzBlockCompressor,
+    GzipBlockCompressor,
+    ParallelCompressionWriter,
+)
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class InProcessCompressor:
+    """Compress in-process (and in parallel) rather than via an external command
+
+    The output is the same regardless of the number of threads.
+    """
+
+    block_compressor_builder: Optional[Callable[[], BlockCompressor]]
+    threads: int = 1
+    memory_limit: Optional[int] = None
+
+    @contextlib.contextmanager
+    def open(self, write_to: BinaryIO) -> Iterator[BinaryIO]:
+        if self.block_compressor_builder is None:
+            yield write_to
+            return
+        with ParallelCompressionWriter(
+            self.block_compressor_builder(),
+            write_to,
+            threads=self.threads,
+            memory_limit=self.memory_limit,
+        ) as compressed_fd:
+            yield cast("BinaryIO", compressed_fd)
+
+
+CompressionCommand = Union[List[str], InProcessCompressor]
+
+
+def _compression_threads(parsed_args: Optional[argparse.Namespace]) -> int:
+    """Determine the thread count for compression
+
+    The thread count comes from `--threads-max` (`DPKG_DEB_THREADS_MAX`), falling back
+    to the `parallel` option of `DEB_BUILD_OPTIONS`.
+    """
+    threads = getattr(parsed_args, "threads_max", None)
+    if threads is None:
+        deb_build_options = DebBuildOptionsAndProfiles.instance().deb_build_options
+        try:
+            threads = int(deb_build_options.get("parallel") or 1)
+        except ValueError:
+            threads = 1
+    if threads < 1:
+        # As with dpkg-deb, 0 means "as many as there are CPUs"
+        threads = os.cpu_count() or 1
+    return threads
+
+
+def _xz_cmdline(
+    compression_rule: "Compression",
+    parsed_args: Optional[argparse.Namespace],
+) -> List[str]:
+    compression_level = compression_rule.effective_compression_level(parsed_args)
+    cmdline = ["xz", "-T2", "-" + str(compression_level)]
+    strategy = None if parsed_args is None else parsed_args.compression_strategy
+    if strategy is None:
+        strategy = "none"
+    if strategy != "none":
+        cmdline.append("--" + strategy)
+    cmdline.append("--no-adjust")
+    return cmdline
+
+
+def _gzip_cmdline(
+    compression_rule: "Compression",
+    parsed_args: Optional[argparse.Namespace],
+) -> List[str]:
+    compression_level = compression_rule.effective_compression_level(parsed_args)
+    cmdline = ["gzip", "-n" + str(compression_level)]
+    strategy = None if parsed_args is None else parsed_args.compression_strategy
+    if strategy is not None and strategy != "none":
+        raise ValueError(
+            f"Not implemented: Compression strategy {strategy}"
+            " for gzip is currently unsupported (but dpkg-deb does)"
+        )
+    return cmdline
+
+
+def _uncompressed_cmdline(
+    _unused_a: "Compression",
+    _unused_b: Optional[argparse.Namespace],
+) -> List[str]:
+    return ["cat"]
+
+
+def _zstd_cmdline(
+    compression_rule: "Compression",
+    parsed_args: Optional[argparse.Namespace],
+) -> List[str]:
+    compression_level = compression_rule.effective_compression_level(parsed_args)
+    # The output of zstd is the same for any number of threads (as long as it
+    # is not run with --single-thread), so this does not affect reproducibility.
+    threads = _compression_threads(parsed_args)
+    cmdline = ["zstd", "-q", f"-T{threads}", "-" + str(compression_level)]
+    if compression_level > 19:
+        cmdline.append("--ultra")
+    strategy = None if parsed_args is None else parsed_args.compression_strategy
+    if strategy == "long":
+        # 128 MiB is the largest window that decompressors accept by default
+        cmdline.append("--long=27")
+    return cmdline
+
+
+def _xz_block_compressor(
+    compression_rule: "Compression",
+    parsed_args: Optional[argparse.Namespace],
+) -> Optional[Callable[[], BlockCompressor]]:
+    compression_level = compression_rule.effective_compression_level(parsed_args)
+    strategy = None if parsed_args is None else parsed_args.compression_strategy
+    extreme = strategy == "extreme"
+    return lambda: XzBlockCompressor(compression_level, extreme=extreme)
+
+
+def _gzip_block_compressor(
+    compression_rule: "Compression",
+    parsed_args: Optional[argparse.Namespace],
+) -> Optional[Callable[[], BlockCompressor]]:
+    compression_level = compression_rule.effective_compression_level(parsed_args)
+    strategy = None if parsed_args is None else parsed_args.compression_strategy
+    if strategy is not None and strategy != "none":
+        raise ValueError(
+            f"Not implemented: Compression strategy {strategy}"
+            " for gzip is currently unsupported (but dpkg-deb does)"
+        )
+    return lambda: GzipBlockCompressor(compression_level)
+
+
+def _uncompressed_block_compressor(
+    _unused_a: "Compression",
+    _unused_b: Optional[argparse.Namespace],
+) -> Optional[Callable[[], BlockCompressor]]:
+    return None
+
+
+class Compression:
+    def __init__(
+        self,
+        default_compression_level: int,
+        extension: str,
+        allowed_strategies: FrozenSet[str],
+        cmdline_builder: Callable[
+            ["Compression", Optional[argparse.Namespace]], List[str]
+        ],
+        block_compressor_builder: Optional[
+            Callable[
+                ["Compression", Optional[argparse.Namespace]],
+                Optional[Callable[[], BlockCompressor]],
+            ]
+        ] = None,
+        *,
+        compression_levels: range = range(0, 10),
+    ) -> None:
+        self.default_compression_level = default_compression_level
+        self.extension = extension
+        self.allowed_strategies = allowed_strategies
+        self.cmdline_builder = cmdline_builder
+        self.block_compressor_builder = block_compressor_builder
+        self.compression_levels = compression_levels
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.extension}>"
+
+    def effective_compression_level(
+        self, parsed_args: Optional[argparse.Namespace]
+    ) -> int:
+        if parsed_args and parsed_args.compression_level is not None:
+            return cast("int", parsed_args.compression_level)
+        return self.default_compression_level
+
+    def as_cmdline(self, parsed_args: Optional[argparse.Namespace]) -> List[str]:
+        return self.cmdline_builder(self, parsed_args)
+
+    def as_in_process_compressor(
+        self,
+        parsed_args: Optional[argparse.Namespace],
+        *,
+        threads: int = 1,
+        memory_limit: Optional[int] = None,
+    ) -> Optional[InProcessCompressor]:
+        """The in-process compressor or None if only external compression is supported"""
+        if self.block_compressor_builder is None:
+            return None
+        return InProcessCompressor(
+            self.block_compressor_builder(self, parsed_args),
+            threads=threads,
+            memory_limit=memory_limit,
+        )
+
+    def with_extension(self, filename: str) -> str:
+        return filename + self.extension
+
+
+COMPRESSIONS = {
+    "xz": Compression(
+        6,
+        ".xz",
+        frozenset({"none", "extreme"}),
+        _xz_cmdline,
+        _xz_block_compressor,
+    ),
+    "gzip": Compression(
+        9,
+        ".gz",
+        frozenset({"none", "filtered", "huffman", "rle", "fixed"}),
+        _gzip_cmdline,
+        _gzip_block_compressor,
+    ),
+    "zstd": Compression(
+        3,
+        ".zst",
+        frozenset({"none", "long"}),
+        _zstd_cmdline,
+        compression_levels=range(1, 23),
+    ),
+    "none": Compression(
+        0,
+        "",
+        frozenset({"none"}),
+        _uncompressed_cmdline,
+        _uncompressed_block_compressor,
+    ),
+}
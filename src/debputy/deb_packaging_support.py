@@ -44,7 +44,7 @@ from debputy.dh.debhelper_emulation import (
 )
 from debputy.elf_util import find_all_elf_files, ELF_MAGIC
 from debputy.exceptions import DebputyDpkgGensymbolsError
-from debputy.filesystem_scan import FSPath, FSROOverlay
+from debputy.filesystem_scan import FSPath, FSROOverlay, split_hardlinked_paths
 from debputy.highlevel_manifest import (
     HighLevelManifest,
     PackageTransformationDefinition,
@@ -69,6 +69,7 @@ from debputy.plugin.api.impl_types import (
     MetadataOrMaintscriptDetector,
     PackageDataTable,
     ServiceManagerDetails,
+    route_paths_to_detectors,
 )
 from debputy.plugin.api.spec import (
     FlushableSubstvars,
@@ -83,14 +84,14 @@ from debputy.util import (
     assume_not_none,
     resolve_perl_config,
     perlxs_api_dependency,
-    detect_fakeroot,
-    grouper,
     _info,
     xargs,
     escape_shell,
     generated_content_dir,
     print_command,
     _warn,
+    run_in_parallel,
+    worker_count,
 )
 
 VP = TypeVar("VP", bound=VirtualPath, covariant=True)
@@ -99,7 +100,19 @@ _T64_REGEX = re.compile("^lib.*t64(?:-nss)?$")
 _T64_PROVIDES = "t64:Provides"
 
 
-def generate_md5sums_file(control_output_dir: str, fs_root: VirtualPath) -> None:
+def _content_md5(path: VirtualPath) -> str:
+    if isinstance(path, FSPath):
+        return path.content_digest("md5")
+    with path.open(byte_io=True) as fd:
+        return hashlib.file_digest(fd, "md5").hexdigest()
+
+
+def generate_md5sums_file(
+    control_output_dir: str,
+    fs_root: VirtualPath,
+    *,
+    parallelization_limit: int = 1,
+) -> None:
     conffiles = os.path.join(control_output_dir, "conffiles")
     md5sums = os.path.join(control_output_dir, "md5sums")
     exclude = set()
@@ -109,7 +122,6 @@ def generate_md5sums_file(control_output_dir: str, fs_root: VirtualPath) -> None
                 if not line.startswith("/"):
                     continue
                 exclude.add("." + line.rstrip("\n"))
-    had_content = False
     files = sorted(
         (
             path
@@ -121,19 +133,26 @@ def generate_md5sums_file(control_output_dir: str, fs_root: VirtualPath) -> None
         # the two approaches.
         key=lambda p: p.path,
     )
+    if not files:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(md5sums)
+        return
+    # Hard linked files share their content, so each inode is only hashed once.
+    to_hash, remaining_hardlinks = split_hardlinked_paths(files)
+    # hashlib releases the GIL while hashing, so threads are sufficient here.
+    digests = run_in_parallel(
+        _content_md5,
+        to_hash,
+        parallelization_limit=parallelization_limit,
+    )
+    digest_by_path = {p.path: digest for p, digest in zip(to_hash, digests)}
+    for hardlink, first_path in remaining_hardlinks:
+        digest_by_path[hardlink.path] = digest_by_path[first_path.path]
     with open(md5sums, "wt") as md5fd:
         for member in files:
             path = member.path
             assert path.startswith("./")
-            path = path[2:]
-            with member.open(byte_io=True) as f:
-                file_hash = hashlib.md5()
-                while chunk := f.read(8192):
-                    file_hash.update(chunk)
-            had_content = True
-            md5fd.write(f"{file_hash.hexdigest()}  {path}\n")
-    if not had_content:
-        os.unlink(md5sums)
+            md5fd.write(f"{digest_by_path[path]}  {path[2:]}\n")
 
 
 def install_or_generate_conffiles(
@@ -538,6 +557,8 @@ def _all_elf_files(fs_root: VirtualPath) -> Iterator[Dict[str, _ElfInfo]]:
     if not all_elf_files:
         yield {}
         return
+    # Hard linked files are processed once and then linked to the result
+    all_elf_files, remaining_hardlinks = split_hardlinked_paths(all_elf_files)
     with ExitStack() as cm_stack:
         resolved = (
             (p, cm_stack.enter_context(p.replace_fs_path_content()))
@@ -552,6 +573,7 @@ def _all_elf_files(fs_root: VirtualPath) -> Iterator[Dict[str, _ElfInfo]]:
         }
         _resolve_build_ids(elf_info)
         yield elf_info
+    _link_to_processed_content(remaining_hardlinks)
 
 
 def _find_all_static_libs(
@@ -586,7 +608,9 @@ def _find_all_static_libs(
 
 @contextlib.contextmanager
 def _all_static_libs(fs_root: FSPath) -> Iterator[List[str]]:
-    all_static_libs = list(_find_all_static_libs(fs_root))
+    all_static_libs, remaining_hardlinks = split_hardlinked_paths(
+        _find_all_static_libs(fs_root)
+    )
     if not all_static_libs:
         yield []
         return
@@ -595,82 +619,127 @@ def _all_static_libs(fs_root: FSPath) -> Iterator[List[str]]:
             cm_stack.enter_context(p.replace_fs_path_content()) for p in all_static_libs
         ]
         yield resolved
+    _link_to_processed_content(remaining_hardlinks)
 
 
-_FILE_BUILD_ID_RE = re.compile(rb"BuildID(?:\[\S+\])?=([A-Fa-f0-9]+)")
+def _link_to_processed_content(
+    remaining_hardlinks: Iterable[Tuple[VirtualPath, VirtualPath]],
+) -> None:
+    for hardlink, first_path in remaining_hardlinks:
+        cast("FSPath", hardlink)._hardlink_content_to(cast("FSPath", first_path))
 
 
 def _resolve_build_ids(elf_info: Dict[str, _ElfInfo]) -> None:
-    static_cmd = ["file", "-00", "-N"]
-    if detect_fakeroot():
-        static_cmd.append("--no-sandbox")
-
-    for cmd in xargs(static_cmd, (i.fs_path for i in elf_info.values())):
-        _info(f"Looking up build-ids via: {escape_shell(*cmd)}")
-        output = subprocess.check_output(cmd)
-
-        # Trailing "\0" gives an empty element in the end when splitting, so strip it out
-        lines = output.rstrip(b"\0").split(b"\0")
-
-        for fs_path_b, verdict in grouper(lines, 2, incomplete="strict"):
-            fs_path = fs_path_b.decode("utf-8")
-            info = elf_info[fs_path]
-            info.is_stripped = b"not stripped" not in verdict
-            m = _FILE_BUILD_ID_RE.search(verdict)
-            if m:
-                info.build_id = m.group(1).decode("utf-8")
+    for info in elf_info.values():
+        # The ELF details are cached from `find_all_elf_files`, so this does not re-read the files.
+        details = info.path.elf_info()
+        if details is None:
+            _warn(
+                f"Could not read the ELF details of {info.path.path}. Assuming it is stripped"
+                " and has no build-id."
+            )
+            info.is_stripped = True
+            continue
+        info.is_stripped = details.is_stripped
+        info.build_id = details.build_id
 
 
-def _make_debug_file(
-    objcopy: str, fs_path: str, build_id: str, dbgsym_fs_root: FSPath
-) -> FSPath:
+def _reserve_debug_file(
+    build_id: str,
+    dbgsym_fs_root: FSPath,
+    cm_stack: ExitStack,
+) -> Tuple[FSPath, bool]:
     dbgsym_dirname = f"./usr/lib/debug/.build-id/{build_id[0:2]}/"
     dbgsym_basename = f"{build_id[2:]}.debug"
     dbgsym_dir = dbgsym_fs_root.mkdirs(dbgsym_dirname)
     if dbgsym_basename in dbgsym_dir:
-        return dbgsym_dir[dbgsym_basename]
+        return dbgsym_dir[dbgsym_basename], False
     # objcopy is a pain and includes the basename verbatim when you do `--add-gnu-debuglink` without having an option
     # to overwrite the physical basename.  So we have to ensure that the physical basename matches the installed
     # basename.
-    with dbgsym_dir.add_file(
-        dbgsym_basename,
-        unlink_if_exists=False,
-        fs_basename_matters=True,
-        subdir_key="dbgsym-build-ids",
-    ) as dbgsym:
-        try:
-            subprocess.check_call(
-                [
-                    objcopy,
-                    "--only-keep-debug",
-                    "--compress-debug-sections",
-                    fs_path,
-                    dbgsym.fs_path,
-                ]
-            )
-        except subprocess.CalledProcessError:
-            full_command = (
-                f"{objcopy} --only-keep-debug --compress-debug-sections"
-                f" {escape_shell(fs_path, dbgsym.fs_path)}"
-            )
-            _error(
-                f"Attempting to create a .debug file failed. Please review the error message from {objcopy} to"
-                f" understand what went wrong.  Full command was: {full_command}"
+    dbgsym = cm_stack.enter_context(
+        dbgsym_dir.add_file(
+            dbgsym_basename,
+            unlink_if_exists=False,
+            fs_basename_matters=True,
+            subdir_key="dbgsym-build-ids",
+        )
+    )
+    return dbgsym, True
+
+
+def _make_debug_file(objcopy: str, fs_path: str, dbgsym_fs_path: str) -> None:
+    try:
+        subprocess.check_call(
+            [
+                objcopy,
+                "--only-keep-debug",
+                "--compress-debug-sections",
+                fs_path,
+                dbgsym_fs_path,
+            ]
+        )
+    except subprocess.CalledProcessError:
+        full_command = (
+            f"{objcopy} --only-keep-debug --compress-debug-sections"
+            f" {escape_shell(fs_path, dbgsym_fs_path)}"
+        )
+        _error(
+            f"Attempting to create a .debug file failed. Please review the error message from {objcopy} to"
+            f" understand what went wrong.  Full command was: {full_command}"
+        )
+
+
+def _make_debug_files(
+    objcopy: str,
+    unstripped_elf_info: List[_ElfInfo],
+    dbgsym_fs_root: FSPath,
+    parallelization_limit: int,
+) -> None:
+    work_items = []
+    with ExitStack() as cm_stack:
+        # The file system is not thread-safe, so all mutations of it happen here in
+        # a deterministic order. Only the objcopy calls are done concurrently.
+        for elf_info in unstripped_elf_info:
+            dbgsym, is_new = _reserve_debug_file(
+                assume_not_none(elf_info.build_id),
+                dbgsym_fs_root,
+                cm_stack,
             )
-    return dbgsym
+            elf_info.dbgsym = dbgsym
+            if is_new:
+                work_items.append((elf_info.fs_path, dbgsym.fs_path))
+
+        run_in_parallel(
+            lambda w: _make_debug_file(objcopy, *w),
+            work_items,
+            parallelization_limit=parallelization_limit,
+        )
 
 
-def _strip_binary(strip: str, options: List[str], paths: Iterable[str]) -> None:
+def _strip_binary(
+    strip: str,
+    options: List[str],
+    paths: Iterable[str],
+    *,
+    parallelization_limit: int = 1,
+) -> None:
     # We assume the paths are obtained via `p.replace_fs_path_content()`,
     # which is the case at the time of written and should remain so forever.
-    it = iter(paths)
-    first = next(it, None)
-    if first is None:
+    all_paths = list(paths)
+    if not all_paths:
         return
     static_cmd = [strip]
     static_cmd.extend(options)
 
-    for cmd in xargs(static_cmd, itertools.chain((first,), (f for f in it))):
+    # Split the paths evenly between the workers, so each of them gets a fair share
+    # of the work even when all paths would fit into a single command line.
+    workers = worker_count(parallelization_limit, len(all_paths))
+    cmds = [
+        cmd for i in range(workers) for cmd in xargs(static_cmd, all_paths[i::workers])
+    ]
+
+    def _run_strip(cmd: List[str]) -> None:
         _info(f"Removing unnecessary ELF debug info via: {escape_shell(*cmd)}")
         try:
             subprocess.check_call(
@@ -684,19 +753,45 @@ def _strip_binary(strip: str, options: List[str], paths: Iterable[str]) -> None:
                 f" understand what went wrong."
             )
 
+    run_in_parallel(_run_strip, cmds, parallelization_limit=parallelization_limit)
 
-def _attach_debug(objcopy: str, elf_binary: VirtualPath, dbgsym: FSPath) -> None:
-    dbgsym_fs_path: str
-    with dbgsym.replace_fs_path_content() as dbgsym_fs_path:
-        cmd = [objcopy, "--add-gnu-debuglink", dbgsym_fs_path, elf_binary.fs_path]
-        print_command(*cmd)
-        try:
-            subprocess.check_call(cmd)
-        except subprocess.CalledProcessError:
-            _error(
-                f"Attempting to attach ELF debug link to ELF binary failed. Please review the error from {objcopy}"
-                f" above understand what went wrong."
-            )
+
+def _attach_debug(objcopy: str, elf_fs_path: str, dbgsym_fs_path: str) -> None:
+    cmd = [objcopy, "--add-gnu-debuglink", dbgsym_fs_path, elf_fs_path]
+    print_command(*cmd)
+    try:
+        subprocess.check_call(cmd)
+    except subprocess.CalledProcessError:
+        _error(
+            f"Attempting to attach ELF debug link to ELF binary failed. Please review the error from {objcopy}"
+            f" above understand what went wrong."
+        )
+
+
+def _attach_debug_links(
+    objcopy: str,
+    unstripped_elf_info: List[_ElfInfo],
+    parallelization_limit: int,
+) -> None:
+    work_items = []
+    with ExitStack() as cm_stack:
+        seen: Dict[str, str] = {}
+        for elf_info in unstripped_elf_info:
+            dbgsym = assume_not_none(elf_info.dbgsym)
+            dbgsym_fs_path = seen.get(dbgsym.path)
+            if dbgsym_fs_path is None:
+                dbgsym_fs_path = cm_stack.enter_context(
+                    dbgsym.replace_fs_path_content()
+                )
+                seen[dbgsym.path] = dbgsym_fs_path
+            elf_fs_path = assume_not_none(elf_info.path).fs_path
+            work_items.append((elf_fs_path, dbgsym_fs_path))
+
+        run_in_parallel(
+            lambda w: _attach_debug(objcopy, *w),
+            work_items,
+            parallelization_limit=parallelization_limit,
+        )
 
 
 @functools.lru_cache()
@@ -750,8 +845,9 @@ def relocate_dwarves_into_dbgsym_packages(
     dctrl: BinaryPackage,
     package_fs_root: FSPath,
     dbgsym_fs_root: VirtualPath,
+    *,
+    parallelization_limit: int = 1,
 ) -> List[str]:
-    # FIXME: hardlinks
     with _all_static_libs(package_fs_root) as all_static_files:
         if all_static_files:
             strip = dctrl.cross_command("strip")
@@ -772,6 +868,7 @@ def relocate_dwarves_into_dbgsym_packages(
                     "__gnu_lto_v1",
                 ],
                 all_static_files,
+                parallelization_limit=parallelization_limit,
             )
 
     with _all_elf_files(package_fs_root) as all_elf_files:
@@ -785,13 +882,12 @@ def relocate_dwarves_into_dbgsym_packages(
 
         _run_dwz(dctrl, dbgsym_fs_root, unstripped_elf_info)
 
-        for elf_info in unstripped_elf_info:
-            elf_info.dbgsym = _make_debug_file(
-                objcopy,
-                elf_info.fs_path,
-                assume_not_none(elf_info.build_id),
-                dbgsym_fs_root,
-            )
+        _make_debug_files(
+            objcopy,
+            unstripped_elf_info,
+            dbgsym_fs_root,
+            parallelization_limit,
+        )
 
         # Note: When run strip, we do so also on already stripped ELF binaries because that is what debhelper does!
         # Executables (defined by mode)
@@ -799,6 +895,7 @@ def relocate_dwarves_into_dbgsym_packages(
             strip,
             ["--remove-section=.comment", "--remove-section=.note"],
             (i.fs_path for i in all_elf_files.values() if i.path.is_executable),
+            parallelization_limit=parallelization_limit,
         )
 
         # Libraries (defined by mode)
@@ -806,14 +903,10 @@ def relocate_dwarves_into_dbgsym_packages(
             strip,
             ["--remove-section=.comment", "--remove-section=.note", "--strip-unneeded"],
             (i.fs_path for i in all_elf_files.values() if not i.path.is_executable),
+            parallelization_limit=parallelization_limit,
         )
 
-        for elf_info in unstripped_elf_info:
-            _attach_debug(
-                objcopy,
-                assume_not_none(elf_info.path),
-                assume_not_none(elf_info.dbgsym),
-            )
+        _attach_debug_links(objcopy, unstripped_elf_info, parallelization_limit)
 
         # Set for uniqueness
         all_debug_info = sorted(
@@ -1088,6 +1181,7 @@ def setup_control_files(
     package_metadata_context: PackageProcessingContext,
     *,
     allow_ctrl_file_management: bool = True,
+    parallelization_limit: int = 1,
 ) -> None:
     binary_package = package_metadata_context.binary_package
     control_output_dir = assume_not_none(binary_package_data.control_output_dir)
@@ -1128,18 +1222,33 @@ def setup_control_files(
             feature_set,
         )
 
+        applicable_detectors = [
+            d
+            for d in itertools.chain.from_iterable(
+                metadata_maintscript_detectors.values()
+            )
+            if d.applies_to(binary_package)
+        ]
+        # Path based detectors share a single traversal of the file system. The detectors
+        # are still run in registration order, so the maintscript snippets are unaffected.
+        matched_paths_by_detector = route_paths_to_detectors(
+            fs_root,
+            applicable_detectors,
+        )
         plugin_detector_definition: MetadataOrMaintscriptDetector
-        for plugin_detector_definition in itertools.chain.from_iterable(
-            metadata_maintscript_detectors.values()
+        for plugin_detector_definition, matched_paths in zip(
+            applicable_detectors,
+            matched_paths_by_detector,
         ):
-            if not plugin_detector_definition.applies_to(binary_package):
-                continue
             ctrl = binary_package_data.ctrl_creator.for_plugin(
                 plugin_detector_definition.plugin_metadata,
                 plugin_detector_definition.detector_id,
             )
             plugin_detector_definition.run_detector(
-                fs_root, ctrl, package_metadata_context
+                fs_root,
+                ctrl,
+                package_metadata_context,
+                matched_paths=matched_paths,
             )
 
         for script in snippets:
@@ -1253,6 +1362,7 @@ def setup_control_files(
         substvars,
         dbgsym_fs_root,
         dbgsym_ids,
+        parallelization_limit=parallelization_limit,
     )
 
 
@@ -1611,6 +1721,8 @@ def _generate_control_files(
     substvars: FlushableSubstvars,
     dbgsym_root_fs: Optional[VirtualPath],
     dbgsym_build_ids: Optional[List[str]],
+    *,
+    parallelization_limit: int = 1,
 ) -> None:
     package = binary_package.name
     extra_common_params = []
@@ -1675,6 +1787,7 @@ def _generate_control_files(
             generate_md5sums_file(
                 os.path.join(dbgsym_root_dir, "DEBIAN"),
                 dbgsym_root_fs,
+                parallelization_limit=parallelization_limit,
             )
         elif dbgsym_ids:
             extra_common_params.append(f"-DBuild-Ids={dbgsym_ids}")
@@ -1703,4 +1816,8 @@ def _generate_control_files(
         os.chmod(ctrl_file, 0o644)
 
     if not binary_package.is_udeb:
-        generate_md5sums_file(control_output_dir, fs_root)
+        generate_md5sums_file(
+            control_output_dir,
+            fs_root,
+            parallelization_limit=parallelization_limit,
+        )
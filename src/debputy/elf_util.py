@@ -1,10 +1,22 @@
+import contextlib
+import dataclasses
 import io
-import os
+import mmap
 import struct
-from typing import List, Optional, Callable, Tuple, Iterable
+from typing import (
+    List,
+    Optional,
+    Callable,
+    Tuple,
+    Union,
+    Iterator,
+    TYPE_CHECKING,
+    cast,
+)
 
-from debputy.filesystem_scan import FSPath
-from debputy.plugin.api import VirtualPath
+if TYPE_CHECKING:
+    from debputy.filesystem_scan import FSPath
+    from debputy.plugin.api import VirtualPath
 
 ELF_HEADER_SIZE32 = 136
 ELF_HEADER_SIZE64 = 232
@@ -22,8 +34,24 @@ ELF_LINKING_TYPE_STATIC = False
 ELF_EI_ELFCLASS32 = 1
 ELF_EI_ELFCLASS64 = 2
 
+ELF_PT_LOAD = 1
 ELF_PT_DYNAMIC = 2
 
+ELF_SHT_SYMTAB = 2
+ELF_SHT_DYNAMIC = 6
+ELF_SHT_NOTE = 7
+ELF_SHN_XINDEX = 0xFFFF
+
+ELF_NT_GNU_BUILD_ID = 3
+
+ELF_DT_NULL = 0
+ELF_DT_NEEDED = 1
+ELF_DT_STRTAB = 5
+ELF_DT_STRSZ = 10
+ELF_DT_SONAME = 14
+ELF_DT_RPATH = 15
+ELF_DT_RUNPATH = 29
+
 ELF_EI_NIDENT = 0x10
 
 # ELF header format:
@@ -45,12 +73,98 @@ ELF_EI_NIDENT = 0x10
 # } ElfN_Ehdr;
 
 
+# Section header format:
+# typedef struct {
+#     uint32_t   sh_name;
+#     uint32_t   sh_type;
+#     ElfN_Word  sh_flags;  # <-- uint32_t for ELF32, uint64_t for ELF64
+#     ElfN_Addr  sh_addr;
+#     ElfN_Off   sh_offset;
+#     ElfN_Word  sh_size;  # <-- uint32_t for ELF32, uint64_t for ELF64
+#     uint32_t   sh_link;
+#     uint32_t   sh_info;
+#     ElfN_Word  sh_addralign;  # <-- uint32_t for ELF32, uint64_t for ELF64
+#     ElfN_Word  sh_entsize;  # <-- uint32_t for ELF32, uint64_t for ELF64
+# } ElfN_Shdr;
+
+
+_ElfData = Union[mmap.mmap, bytes]
+
+
 class IncompleteFileError(RuntimeError):
     pass
 
 
+@dataclasses.dataclass(slots=True, frozen=True)
+class ElfFileInfo:
+    """Classification of an ELF executable or shared object
+
+    Instances are available via `VirtualPath.elf_info()`, which caches the result
+    until the content of the path is replaced.
+    """
+
+    elf_type: int
+    """The ELF type (`ELF_TYPE_EXECUTABLE` or `ELF_TYPE_SHARED_OBJECT`)"""
+
+    elf_class: int
+    """The ELF class (`ELF_EI_ELFCLASS32` or `ELF_EI_ELFCLASS64`)"""
+
+    endianness: int
+    """The endianness of the ELF file (`ELF_ENDIAN_LE` or `ELF_ENDIAN_BE`)"""
+
+    linking_type: bool
+    """The linking type (`ELF_LINKING_TYPE_DYNAMIC` or `ELF_LINKING_TYPE_STATIC`)"""
+
+    build_id: Optional[str]
+    """The GNU build-id in hex form if present"""
+
+    is_stripped: bool
+    """Whether the ELF file is stripped
+
+    This follows the same definition as `file` (libmagic), which is what debhelper
+    relies on: An ELF file is "not stripped" if it has a symbol table (`.symtab`)
+    or a `.debug_info` section.
+    """
+
+    soname: Optional[str]
+    """The SONAME of the ELF file if present"""
+
+    needed: Tuple[str, ...]
+    """The NEEDED entries of the dynamic section (in order)"""
+
+    rpath: Tuple[str, ...]
+    """The RPATH and RUNPATH entries of the dynamic section (in order)"""
+
+    @property
+    def is_dynamically_linked(self) -> bool:
+        return self.linking_type == ELF_LINKING_TYPE_DYNAMIC
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class _ElfDebugState:
+    build_id: Optional[str]
+    is_stripped: bool
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class _ElfDynamicInfo:
+    soname: Optional[str]
+    needed: Tuple[str, ...]
+    rpath: Tuple[str, ...]
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class _ElfSectionHeader:
+    name_offset: int
+    section_type: int
+    offset: int
+    size: int
+    link: int
+    alignment: int
+
+
 def is_so_or_exec_elf_file(
-    path: VirtualPath,
+    path: "VirtualPath",
     *,
     assert_linking_type: Optional[bool] = ELF_LINKING_TYPE_ANY,
 ) -> bool:
@@ -65,62 +179,48 @@ def is_so_or_exec_elf_file(
 
 
 def _read_elf_file(
-    path: VirtualPath,
+    path: "VirtualPath",
     *,
     determine_linking_type: bool = False,
 ) -> Tuple[bool, Optional[bool]]:
-    buffer_size = 4096
-    fd_buffer = bytearray(buffer_size)
-    linking_type = None
-    fd: io.BufferedReader
-    with path.open(byte_io=True, buffering=io.DEFAULT_BUFFER_SIZE) as fd:
-        len_elf_header_raw = fd.readinto(fd_buffer)
-        if (
-            not fd_buffer
-            or len_elf_header_raw < ELF_HEADER_SIZE32
-            or not fd_buffer.startswith(ELF_MAGIC)
-        ):
+    with _open_elf_file(path) as data:
+        if data is None:
             return False, None
+        return _classify_elf_file(data, determine_linking_type=determine_linking_type)
 
-        elf_ei_class = fd_buffer[4]
-        endian_raw = fd_buffer[5]
-        if endian_raw == ELF_ENDIAN_LE:
-            endian = "<"
-        elif endian_raw == ELF_ENDIAN_BE:
-            endian = ">"
-        else:
-            return False, None
 
-        if elf_ei_class == ELF_EI_ELFCLASS64:
-            offset_size = "Q"
-            # We know it needs to be a 64bit ELF, then the header must be
-            # large enough for that.
-            if len_elf_header_raw < ELF_HEADER_SIZE64:
-                return False, None
-        elif elf_ei_class == ELF_EI_ELFCLASS32:
-            offset_size = "L"
-        else:
-            return False, None
+def _classify_elf_file(
+    data: _ElfData,
+    *,
+    determine_linking_type: bool = False,
+) -> Tuple[bool, Optional[bool]]:
+    ident = _elf_ident(data)
+    if ident is None:
+        return False, None
+    endian, offset_size = ident
 
-        elf_type, _elf_machine, elf_version = struct.unpack_from(
-            f"{endian}HHL", fd_buffer, offset=ELF_EI_NIDENT
-        )
-        if elf_version != ELF_VERSION:
-            return False, None
-        if elf_type not in (ELF_TYPE_EXECUTABLE, ELF_TYPE_SHARED_OBJECT):
-            return False, None
+    elf_type, _elf_machine, elf_version = struct.unpack_from(
+        f"{endian}HHL", data, offset=ELF_EI_NIDENT
+    )
+    if elf_version != ELF_VERSION:
+        return False, None
+    if elf_type not in (ELF_TYPE_EXECUTABLE, ELF_TYPE_SHARED_OBJECT):
+        return False, None
 
-        if determine_linking_type:
-            linking_type = _determine_elf_linking_type(
-                fd, fd_buffer, endian, offset_size
-            )
-            if linking_type is None:
-                return False, None
+    linking_type = None
+    if determine_linking_type:
+        linking_type = _determine_elf_linking_type(data, endian, offset_size)
+        if linking_type is None:
+            return False, None
 
     return True, linking_type
 
 
-def _determine_elf_linking_type(fd, fd_buffer, endian, offset_size) -> Optional[bool]:
+def _determine_elf_linking_type(
+    data: _ElfData,
+    endian: str,
+    offset_size: str,
+) -> Optional[bool]:
     # To check the linking, we look for a DYNAMICALLY program header
     # In other words, we assume static linking by default.
 
@@ -138,7 +238,7 @@ def _determine_elf_linking_type(fd, fd_buffer, endian, offset_size) -> Optional[
     #  * e_phnum
     _, e_phoff, _, _, _, e_phentsize, e_phnum = struct.unpack_from(
         f"{endian}{offset_size}{offset_size}{offset_size}LHHH",
-        fd_buffer,
+        data,
         offset=ELF_EI_NIDENT + 8,
     )
 
@@ -153,56 +253,390 @@ def _determine_elf_linking_type(fd, fd_buffer, endian, offset_size) -> Optional[
     if e_phentsize < 4:
         return None
 
-    fd.seek(e_phoff, os.SEEK_SET)
-    unpack_format = f"{endian}L"
-    try:
-        for program_header_raw in _read_bytes_iteratively(fd, e_phentsize, e_phnum):
-            p_type = struct.unpack_from(unpack_format, program_header_raw)[0]
-            if p_type == ELF_PT_DYNAMIC:
-                linking_type = ELF_LINKING_TYPE_DYNAMIC
-                break
-    except IncompleteFileError:
+    phdr_table_end = e_phoff + e_phentsize * e_phnum
+    if phdr_table_end > len(data):
         return None
 
-    return linking_type
-
-
-def _read_bytes_iteratively(
-    fd: io.BufferedReader,
-    object_size: int,
-    object_count: int,
-) -> Iterable[bytes]:
-    total_size = object_size * object_count
-    bytes_remaining = total_size
-    # FIXME: improve this to read larger chunks and yield them one-by-one
-    byte_buffer = bytearray(object_size)
-
-    while bytes_remaining > 0:
-        n = fd.readinto(byte_buffer)
-        if n != object_size:
+    # Only the p_type (first field) is relevant, so skip the remainder of
+    # each program header.
+    unpack_format = f"{endian}L{e_phentsize - 4}x"
+    for (p_type,) in struct.iter_unpack(unpack_format, data[e_phoff:phdr_table_end]):
+        if p_type == ELF_PT_DYNAMIC:
+            linking_type = ELF_LINKING_TYPE_DYNAMIC
             break
-        bytes_remaining -= n
-        yield byte_buffer
 
-    if bytes_remaining:
-        raise IncompleteFileError()
+    return linking_type
 
 
 def find_all_elf_files(
-    fs_root: VirtualPath,
+    fs_root: "VirtualPath",
     *,
-    walk_filter: Optional[Callable[[VirtualPath, List[VirtualPath]], bool]] = None,
+    walk_filter: Optional[Callable[["VirtualPath", List["VirtualPath"]], bool]] = None,
     with_linking_type: Optional[bool] = ELF_LINKING_TYPE_ANY,
-) -> List[VirtualPath]:
-    matches: List[VirtualPath] = []
+) -> List["VirtualPath"]:
+    matches: List["VirtualPath"] = []
     # FIXME: Implementation detail that fs_root is always `FSPath` and has `.walk()`
-    assert isinstance(fs_root, FSPath)
-    for path, children in fs_root.walk():
+    assert hasattr(fs_root, "walk")
+    for path, children in cast("FSPath", fs_root).walk():
         if walk_filter is not None and not walk_filter(path, children):
             continue
         if not path.is_file or path.size < ELF_HEADER_SIZE32:
             continue
-        if not is_so_or_exec_elf_file(path, assert_linking_type=with_linking_type):
+        elf_info = path.elf_info()
+        if elf_info is None:
+            continue
+        if (
+            with_linking_type is not ELF_LINKING_TYPE_ANY
+            and elf_info.linking_type != with_linking_type
+        ):
             continue
         matches.append(path)
     return matches
+
+
+def read_elf_file_info(path: "VirtualPath") -> Optional[ElfFileInfo]:
+    """Classify an ELF executable or shared object
+
+    Most consumers should use `VirtualPath.elf_info()` instead, which caches the
+    result of this function.
+
+    :param path: The path to the file to classify
+    :return: The ELF file information or None if the file is not an ELF executable
+      or shared object.
+    """
+    if path.size < ELF_HEADER_SIZE32:
+        return None
+    with _open_elf_file(path) as data:
+        if data is None:
+            return None
+        is_elf, linking_type = _classify_elf_file(data, determine_linking_type=True)
+        if not is_elf:
+            return None
+        assert linking_type is not None
+        return _read_elf_file_info(data, linking_type)
+
+
+@contextlib.contextmanager
+def _open_elf_file(path: "VirtualPath") -> Iterator[Optional[_ElfData]]:
+    with path.open(byte_io=True, buffering=0) as fd:
+        # Most files are not ELF files. Rule those out with a small read as
+        # that is cheaper than setting up (and tearing down) a mapping.
+        if fd.read(len(ELF_MAGIC)) != ELF_MAGIC:
+            yield None
+            return
+        try:
+            fileno = fd.fileno()
+        except io.UnsupportedOperation:
+            # In-memory content (such as from the test API)
+            fd.seek(0)
+            yield fd.read()
+            return
+        with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def _read_elf_file_info(data: _ElfData, linking_type: bool) -> ElfFileInfo:
+    ident = _elf_ident(data)
+    assert ident is not None
+    endian, offset_size = ident
+    elf_type = struct.unpack_from(f"{endian}H", data, offset=ELF_EI_NIDENT)[0]
+    try:
+        section_headers, shstrtab_index = _section_headers(data, endian, offset_size)
+        debug_state = _read_elf_debug_state(
+            data, endian, section_headers, shstrtab_index
+        )
+    except (IncompleteFileError, struct.error):
+        section_headers = []
+        debug_state = _ElfDebugState(None, True)
+    dynamic_info = None
+    if linking_type == ELF_LINKING_TYPE_DYNAMIC:
+        try:
+            dynamic_info = _read_elf_dynamic_info(
+                data, endian, offset_size, section_headers
+            )
+        except (IncompleteFileError, struct.error, UnicodeDecodeError):
+            pass
+
+    return ElfFileInfo(
+        elf_type=elf_type,
+        elf_class=data[4],
+        endianness=data[5],
+        linking_type=linking_type,
+        build_id=debug_state.build_id,
+        is_stripped=debug_state.is_stripped,
+        soname=dynamic_info.soname if dynamic_info else None,
+        needed=dynamic_info.needed if dynamic_info else (),
+        rpath=dynamic_info.rpath if dynamic_info else (),
+    )
+
+
+def _elf_ident(data: _ElfData) -> Optional[Tuple[str, str]]:
+    if len(data) < ELF_HEADER_SIZE32 or data[0:4] != ELF_MAGIC:
+        return None
+    elf_ei_class = data[4]
+    endian_raw = data[5]
+    if endian_raw == ELF_ENDIAN_LE:
+        endian = "<"
+    elif endian_raw == ELF_ENDIAN_BE:
+        endian = ">"
+    else:
+        return None
+    if elf_ei_class == ELF_EI_ELFCLASS64:
+        if len(data) < ELF_HEADER_SIZE64:
+            return None
+        offset_size = "Q"
+    elif elf_ei_class == ELF_EI_ELFCLASS32:
+        offset_size = "L"
+    else:
+        return None
+    return endian, offset_size
+
+
+def _read_elf_debug_state(
+    data: _ElfData,
+    endian: str,
+    section_headers: List[_ElfSectionHeader],
+    shstrtab_index: int,
+) -> _ElfDebugState:
+    build_id = None
+    is_stripped = True
+    shstrtab = (
+        section_headers[shstrtab_index]
+        if 0 < shstrtab_index < len(section_headers)
+        else None
+    )
+
+    for section_header in section_headers:
+        if section_header.section_type == ELF_SHT_SYMTAB:
+            is_stripped = False
+        elif section_header.section_type == ELF_SHT_NOTE and build_id is None:
+            build_id = _find_gnu_build_id(data, endian, section_header)
+        if (
+            is_stripped
+            and shstrtab is not None
+            and _section_name(data, shstrtab, section_header) == b".debug_info"
+        ):
+            is_stripped = False
+    return _ElfDebugState(build_id, is_stripped)
+
+
+def _section_headers(
+    data: _ElfData,
+    endian: str,
+    offset_size: str,
+) -> Tuple[List[_ElfSectionHeader], int]:
+    # Reading - in order at offset 0x18:
+    #  * e_entry (ignored)
+    #  * e_phoff (ignored)
+    #  * e_shoff
+    #  * e_flags (ignored)
+    #  * e_ehsize (ignored)
+    #  * e_phentsize (ignored)
+    #  * e_phnum (ignored)
+    #  * e_shentsize
+    #  * e_shnum
+    #  * e_shstrndx
+    _, _, e_shoff, _, _, _, _, e_shentsize, e_shnum, e_shstrndx = struct.unpack_from(
+        f"{endian}{offset_size}{offset_size}{offset_size}LHHHHHH",
+        data,
+        offset=ELF_EI_NIDENT + 8,
+    )
+    if e_shoff == 0:
+        return [], 0
+    shdr_format = struct.Struct(
+        f"{endian}LL{offset_size}{offset_size}{offset_size}{offset_size}LL{offset_size}{offset_size}"
+    )
+    if e_shentsize < shdr_format.size:
+        raise IncompleteFileError()
+
+    def _read_shdr(index: int) -> _ElfSectionHeader:
+        shdr_offset = e_shoff + index * e_shentsize
+        if shdr_offset + shdr_format.size > len(data):
+            raise IncompleteFileError()
+        name, sh_type, _, _, offset, size, link, _, alignment, _ = (
+            shdr_format.unpack_from(data, shdr_offset)
+        )
+        return _ElfSectionHeader(name, sh_type, offset, size, link, alignment)
+
+    first = _read_shdr(0)
+    # With many sections, the real values are stored in the first (otherwise
+    # reserved) section header.
+    if e_shnum == 0:
+        e_shnum = first.size
+    if e_shstrndx == ELF_SHN_XINDEX:
+        e_shstrndx = first.link
+    section_headers = [first]
+    section_headers.extend(_read_shdr(index) for index in range(1, e_shnum))
+    return section_headers, e_shstrndx
+
+
+def _read_elf_dynamic_info(
+    data: _ElfData,
+    endian: str,
+    offset_size: str,
+    section_headers: List[_ElfSectionHeader],
+) -> Optional[_ElfDynamicInfo]:
+    dynamic = next(
+        (s for s in section_headers if s.section_type == ELF_SHT_DYNAMIC), None
+    )
+    if dynamic is not None:
+        if not 0 < dynamic.link < len(section_headers):
+            return None
+        dynstr = section_headers[dynamic.link]
+        dyn_offset = dynamic.offset
+        dyn_size = dynamic.size
+        strtab_offset = dynstr.offset
+        strtab_end = dynstr.offset + dynstr.size
+        entries = _dynamic_entries(data, endian, offset_size, dyn_offset, dyn_size)
+    else:
+        located = _locate_dynamic_via_program_headers(data, endian, offset_size)
+        if located is None:
+            return None
+        entries, strtab_offset, strtab_end = located
+
+    if strtab_end > len(data):
+        raise IncompleteFileError()
+
+    def _str(offset: int) -> str:
+        start = strtab_offset + offset
+        end = data.find(b"\0", start, strtab_end)
+        if end < 0:
+            raise IncompleteFileError()
+        return data[start:end].decode("utf-8")
+
+    soname = None
+    needed = []
+    rpath = []
+    for d_tag, d_val in entries:
+        if d_tag == ELF_DT_NEEDED:
+            needed.append(_str(d_val))
+        elif d_tag == ELF_DT_SONAME:
+            soname = _str(d_val)
+        elif d_tag in (ELF_DT_RPATH, ELF_DT_RUNPATH):
+            rpath.append(_str(d_val))
+    return _ElfDynamicInfo(soname, tuple(needed), tuple(rpath))
+
+
+def _dynamic_entries(
+    data: _ElfData,
+    endian: str,
+    offset_size: str,
+    offset: int,
+    size: int,
+) -> List[Tuple[int, int]]:
+    if offset + size > len(data):
+        raise IncompleteFileError()
+    # typedef struct {
+    #     ElfN_Sxword d_tag;  # <-- int32_t for ELF32, int64_t for ELF64
+    #     ElfN_Xword  d_val;  # <-- uint32_t for ELF32, uint64_t for ELF64
+    # } ElfN_Dyn;
+    entry_format = f"{endian}{offset_size.lower()}{offset_size}"
+    entry_size = struct.calcsize(entry_format)
+    entries = []
+    for d_tag, d_val in struct.iter_unpack(
+        entry_format, data[offset : offset + size - size % entry_size]
+    ):
+        if d_tag == ELF_DT_NULL:
+            break
+        entries.append((d_tag, d_val))
+    return entries
+
+
+def _locate_dynamic_via_program_headers(
+    data: _ElfData,
+    endian: str,
+    offset_size: str,
+) -> Optional[Tuple[List[Tuple[int, int]], int, int]]:
+    _, e_phoff, _, _, _, e_phentsize, e_phnum = struct.unpack_from(
+        f"{endian}{offset_size}{offset_size}{offset_size}LHHH",
+        data,
+        offset=ELF_EI_NIDENT + 8,
+    )
+    if e_phnum == 0:
+        return None
+    # The ELF32 and ELF64 program headers do not have the same field order.
+    if offset_size == "Q":
+        # p_type, p_flags, p_offset, p_vaddr, p_paddr, p_filesz, ...
+        phdr_format = struct.Struct(f"{endian}LLQQQQ")
+        type_index, offset_index, vaddr_index, filesz_index = 0, 2, 3, 5
+    else:
+        # p_type, p_offset, p_vaddr, p_paddr, p_filesz, ...
+        phdr_format = struct.Struct(f"{endian}LLLLL")
+        type_index, offset_index, vaddr_index, filesz_index = 0, 1, 2, 4
+    if e_phentsize < phdr_format.size or e_phoff + e_phnum * e_phentsize > len(data):
+        raise IncompleteFileError()
+    loads = []
+    dynamic = None
+    for i in range(e_phnum):
+        phdr = phdr_format.unpack_from(data, e_phoff + i * e_phentsize)
+        segment = (phdr[offset_index], phdr[vaddr_index], phdr[filesz_index])
+        if phdr[type_index] == ELF_PT_LOAD:
+            loads.append(segment)
+        elif phdr[type_index] == ELF_PT_DYNAMIC:
+            dynamic = segment
+    if dynamic is None:
+        return None
+    entries = _dynamic_entries(data, endian, offset_size, dynamic[0], dynamic[2])
+    strtab_addr = None
+    strtab_size = None
+    for d_tag, d_val in entries:
+        if d_tag == ELF_DT_STRTAB:
+            strtab_addr = d_val
+        elif d_tag == ELF_DT_STRSZ:
+            strtab_size = d_val
+    if strtab_addr is None or strtab_size is None:
+        return None
+    for p_offset, p_vaddr, p_filesz in loads:
+        if p_vaddr <= strtab_addr < p_vaddr + p_filesz:
+            strtab_offset = strtab_addr - p_vaddr + p_offset
+            return entries, strtab_offset, strtab_offset + strtab_size
+    return None
+
+
+def _section_name(
+    data: _ElfData,
+    shstrtab: _ElfSectionHeader,
+    section_header: _ElfSectionHeader,
+) -> Optional[bytes]:
+    start = shstrtab.offset + section_header.name_offset
+    end = data.find(b"\0", start, shstrtab.offset + shstrtab.size)
+    if end < 0:
+        return None
+    return data[start:end]
+
+
+def _find_gnu_build_id(
+    data: _ElfData,
+    endian: str,
+    section_header: _ElfSectionHeader,
+) -> Optional[str]:
+    # Note format:
+    #  * n_namesz (uint32_t)
+    #  * n_descsz (uint32_t)
+    #  * n_type (uint32_t)
+    #  * name (padded to the alignment)
+    #  * desc (padded to the alignment)
+    alignment = 8 if section_header.alignment == 8 else 4
+    offset = section_header.offset
+    end = offset + section_header.size
+    if end > len(data):
+        raise IncompleteFileError()
+    note_header = struct.Struct(f"{endian}LLL")
+    while offset + note_header.size <= end:
+        namesz, descsz, n_type = note_header.unpack_from(data, offset)
+        name_start = offset + note_header.size
+        desc_start = name_start + _align(namesz, alignment)
+        desc_end = desc_start + descsz
+        if desc_end > end:
+            break
+        if (
+            n_type == ELF_NT_GNU_BUILD_ID
+            and data[name_start : name_start + namesz] == b"GNU\0"
+        ):
+            return data[desc_start:desc_end].hex()
+        offset = desc_start + _align(descsz, alignment)
+    return None
+
+
+def _align(value: int, alignment: int) -> int:
+    return (value + alignment - 1) & ~(alignment - 1)
@@ -2,11 +2,14 @@ import atexit
 import contextlib
 import dataclasses
 import errno
+import hashlib
 import io
 import operator
 import os
 import stat
+import struct
 import subprocess
+import sys
 import tempfile
 import time
 from abc import ABC
@@ -28,9 +31,12 @@ from typing import (
     NoReturn,
     Type,
     Generic,
+    Literal,
+    Sequence,
 )
 from weakref import ref, ReferenceType
 
+from debputy.elf_util import ElfFileInfo
 from debputy.exceptions import (
     PureVirtualPathError,
     DebputyFSIsROError,
@@ -58,10 +64,49 @@ from debputy.util import (
     assume_not_none,
     _normalize_path,
     _debug_log,
+    run_in_parallel,
 )
 
 BY_BASENAME = operator.attrgetter("name")
 
+# Cached stat results are stored packed, since an `os.stat_result` (with its
+# int and float objects) is several times larger than the data it holds.
+_COMPACT_STAT_EXTRA_FIELDS = (
+    "st_atime",
+    "st_mtime",
+    "st_ctime",
+    "st_atime_ns",
+    "st_mtime_ns",
+    "st_ctime_ns",
+    "st_blksize",
+    "st_blocks",
+    "st_rdev",
+)
+_COMPACT_STAT_FORMAT = struct.Struct("<6Q4q3d5qQ")
+_COMPACT_STAT_SEQUENCE_LEN = 10
+CompactStat = Union[bytes, os.stat_result]
+
+
+def _compact_stat(st: os.stat_result) -> CompactStat:
+    _, (fields, extra_fields) = st.__reduce__()
+    if tuple(extra_fields) != _COMPACT_STAT_EXTRA_FIELDS:
+        # Unknown layout (such as a different platform); keep it as-is
+        return st
+    try:
+        return _COMPACT_STAT_FORMAT.pack(*fields, *extra_fields.values())
+    except struct.error:
+        return st
+
+
+def _expand_stat(st: CompactStat) -> os.stat_result:
+    if not isinstance(st, bytes):
+        return st
+    values = _COMPACT_STAT_FORMAT.unpack(st)
+    return os.stat_result(
+        values[:_COMPACT_STAT_SEQUENCE_LEN],
+        dict(zip(_COMPACT_STAT_EXTRA_FIELDS, values[_COMPACT_STAT_SEQUENCE_LEN:])),
+    )
+
 
 class AlwaysEmptyReadOnlyMetadataReference(PathMetadataReference[PMT]):
     __slots__ = ("_metadata_type", "_owning_plugin", "_current_plugin")
@@ -234,6 +279,75 @@ def _root(path: VP) -> VP:
         current = parent
 
 
+def _basename_extension(basename: str) -> Optional[str]:
+    dot_idx = basename.rfind(".")
+    if dot_idx < 0:
+        return None
+    return basename[dot_idx:]
+
+
+def _subtree_unsorted(path: "FSPath") -> Iterator["FSPath"]:
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        yield current
+        children = current._children
+        if children:
+            stack.extend(children.values())
+
+
+class BasenameIndex:
+    """Index of all paths in a file system by basename and by extension
+
+    The extension is the part of the basename starting from the last "." (such as ".la"
+    for "libfoo.la"). The root directory itself is not indexed. The index is kept up to
+    date by the file system as paths are added, removed or renamed.
+    """
+
+    __slots__ = ("_by_basename", "_by_extension")
+
+    def __init__(self) -> None:
+        self._by_basename: Dict[str, Dict[int, "FSPath"]] = {}
+        self._by_extension: Dict[str, Dict[int, "FSPath"]] = {}
+
+    def paths_with_basename(self, basename: str) -> List["FSPath"]:
+        paths = self._by_basename.get(basename)
+        return list(paths.values()) if paths else []
+
+    def paths_with_extension(self, extension: str) -> List["FSPath"]:
+        paths = self._by_extension.get(extension)
+        return list(paths.values()) if paths else []
+
+    def _add(self, path: "FSPath", basename: str) -> None:
+        self._by_basename.setdefault(basename, {})[id(path)] = path
+        extension = _basename_extension(basename)
+        if extension is not None:
+            self._by_extension.setdefault(extension, {})[id(path)] = path
+
+    def _remove(self, path: "FSPath", basename: str) -> None:
+        paths = self._by_basename.get(basename)
+        if paths is not None:
+            paths.pop(id(path), None)
+            if not paths:
+                del self._by_basename[basename]
+        extension = _basename_extension(basename)
+        if extension is None:
+            return
+        paths = self._by_extension.get(extension)
+        if paths is not None:
+            paths.pop(id(path), None)
+            if not paths:
+                del self._by_extension[extension]
+
+    def _add_subtree(self, path: "FSPath") -> None:
+        for p in _subtree_unsorted(path):
+            self._add(p, p.name)
+
+    def _remove_subtree(self, path: "FSPath") -> None:
+        for p in _subtree_unsorted(path):
+            self._remove(p, p.name)
+
+
 def _check_fs_path_is_file(
     fs_path: str,
     unlink_on_error: Optional["FSPath"] = None,
@@ -402,6 +516,7 @@ class FSPath(VirtualPathBase, ABC):
         "_basename",
         "_parent_dir",
         "_children",
+        "_sorted_children_cache",
         "_path_cache",
         "_parent_path_cache",
         "_last_known_parent_path",
@@ -410,6 +525,8 @@ class FSPath(VirtualPathBase, ABC):
         "_group",
         "_mtime",
         "_stat_cache",
+        "_elf_info_cache",
+        "_content_digest_cache",
         "_metadata",
         "__weakref__",
     )
@@ -423,15 +540,27 @@ class FSPath(VirtualPathBase, ABC):
         mtime: Optional[float] = None,
         stat_cache: Optional[os.stat_result] = None,
     ) -> None:
-        self._basename = basename
+        # Basenames repeat a lot in large trees (`__init__.py`, `Makefile`, etc.), so
+        # interning them means each distinct basename is only stored once.
+        self._basename = sys.intern(basename)
         self._path_cache: Optional[str] = None
         self._parent_path_cache: Optional[str] = None
         self._children = children
+        self._sorted_children_cache: Optional[List["FSPath"]] = None
         self._last_known_parent_path: Optional[str] = None
         self._mode = initial_mode
         self._mtime = mtime
-        self._stat_cache = stat_cache
-        self._metadata: Dict[Tuple[str, Type[Any]], PathMetadataValue[Any]] = {}
+        self._stat_cache: Optional[CompactStat] = (
+            _compact_stat(stat_cache) if stat_cache is not None else None
+        )
+        self._elf_info_cache: Union[ElfFileInfo, None, Literal[False]] = False
+        self._content_digest_cache: Optional[
+            Tuple[Tuple[int, int, int, int], Dict[str, str]]
+        ] = None
+        # Allocated on first use as most paths never have any metadata
+        self._metadata: Optional[
+            Dict[Tuple[str, Type[Any]], PathMetadataValue[Any]]
+        ] = None
         self._owner = ROOT_DEFINITION
         self._group = ROOT_DEFINITION
 
@@ -461,46 +590,71 @@ class FSPath(VirtualPathBase, ABC):
         if new_name == self._basename:
             return
         if self.is_detached:
-            self._basename = new_name
+            self._basename = sys.intern(new_name)
             return
         self._rw_check()
-        parent = self.parent_dir
-        # This little parent_dir dance ensures the parent dir detects the rename properly
-        self.parent_dir = None
-        self._basename = new_name
-        self.parent_dir = parent
+        parent = assume_not_none(self.parent_dir)
+        parent._rw_check()
+        index = parent._find_basename_index()
+        old_name = self._basename
+        children = assume_not_none(parent._children)
+        # Renaming in place (rather than detaching and re-attaching the path) means only
+        # the path itself has to be re-indexed; its children keep their basenames.
+        del children[old_name]
+        parent._sorted_children_cache = None
+        if index is not None:
+            index._remove(self, old_name)
+        conflict_child = children.get(new_name)
+        if conflict_child is not None:
+            conflict_child.unlink(recursive=True)
+        self._basename = sys.intern(new_name)
+        self._parent_path_cache = None
+        children[self._basename] = self
+        if index is not None:
+            index._add(self, new_name)
 
     @property
     def iterdir(self) -> Iterable["FSPath"]:
         if self._children is not None:
             yield from self._children.values()
 
+    def _sorted_children(self) -> Sequence["FSPath"]:
+        # The list is shared between traversals and must not be mutated by the caller.
+        # Any change to `_children` resets the cache, so it is rebuilt on next use.
+        if not self._children:
+            # Avoid allocating a list for every file (or empty directory)
+            return ()
+        sorted_children = self._sorted_children_cache
+        if sorted_children is None:
+            sorted_children = sorted(self.iterdir, key=BY_BASENAME)
+            self._sorted_children_cache = sorted_children
+        return sorted_children
+
     def all_paths(self) -> Iterable["FSPath"]:
         yield self
         if not self.is_dir:
             return
-        by_basename = BY_BASENAME
-        stack = sorted(self.iterdir, key=by_basename, reverse=True)
+        stack = list(reversed(self._sorted_children()))
         while stack:
             current = stack.pop()
             yield current
             if current.is_dir and not current.is_detached:
-                stack.extend(sorted(current.iterdir, key=by_basename, reverse=True))
+                stack.extend(reversed(current._sorted_children()))
 
     def walk(self) -> Iterable[Tuple["FSPath", List["FSPath"]]]:
         # FIXME: can this be more "os.walk"-like without making it harder to implement?
         if not self.is_dir:
             yield self, []
             return
-        by_basename = BY_BASENAME
         stack = [self]
         while stack:
             current = stack.pop()
-            children = sorted(current.iterdir, key=by_basename)
+            # Copy as the caller is allowed to prune the children (e.g., via `.clear()`)
+            children = list(current._sorted_children())
             assert not children or current.is_dir
             yield current, children
             # Removing the directory counts as discarding the children.
-            if not current.is_detached:
+            if children and not current.is_detached:
                 stack.extend(reversed(children))
 
     def _orphan_safe_path(self) -> str:
@@ -539,7 +693,11 @@ class FSPath(VirtualPathBase, ABC):
         children = self._children
         if children is None:
             raise KeyError(key)
-        del children[key]
+        child = children.pop(key)
+        self._sorted_children_cache = None
+        index = self._find_basename_index()
+        if index is not None:
+            index._remove_subtree(child)
 
     def get(self, key: str) -> "Optional[FSPath]":
         try:
@@ -566,6 +724,24 @@ class FSPath(VirtualPathBase, ABC):
         if conflict_child is not None:
             conflict_child.unlink(recursive=True)
         self._children[child.name] = child
+        self._sorted_children_cache = None
+        index = self._find_basename_index()
+        if index is not None:
+            index._add_subtree(child)
+
+    def _find_basename_index(self) -> Optional[BasenameIndex]:
+        current = self
+        while True:
+            parent_ref = current._parent_dir
+            if parent_ref is None:
+                break
+            parent = parent_ref()
+            if parent is None:
+                return None
+            current = parent
+        if isinstance(current, FSRootDir):
+            return current.basename_index
+        return None
 
     @property
     def tar_path(self) -> str:
@@ -613,9 +789,13 @@ class FSPath(VirtualPathBase, ABC):
         old_parent = None
         self._last_known_parent_path = None
         if not self.is_detached:
-            old_parent = self.parent_dir
-            old_parent_children = assume_not_none(assume_not_none(old_parent)._children)
+            old_parent = assume_not_none(self.parent_dir)
+            old_parent_children = assume_not_none(old_parent._children)
             del old_parent_children[self.name]
+            old_parent._sorted_children_cache = None
+            index = old_parent._find_basename_index()
+            if index is not None:
+                index._remove_subtree(self)
         if new_parent is not None:
             self._parent_dir = ref(new_parent)
             new_parent._add_child(self)
@@ -651,9 +831,10 @@ class FSPath(VirtualPathBase, ABC):
     def stat(self) -> os.stat_result:
         st = self._stat_cache
         if st is None:
-            st = self._uncached_stat()
-            self._stat_cache = st
-        return st
+            uncached_st = self._uncached_stat()
+            self._stat_cache = _compact_stat(uncached_st)
+            return uncached_st
+        return _expand_stat(st)
 
     def _uncached_stat(self) -> os.stat_result:
         return os.lstat(self.fs_path)
@@ -721,6 +902,20 @@ class FSPath(VirtualPathBase, ABC):
             group.entity_id,
         )
 
+    @property
+    def hardlink_key(self) -> Optional[Tuple[int, int]]:
+        """The inode identity (device and inode number) of a hard linked file
+
+        Paths with the same key share their content and are emitted as hardlinks in the
+        data.tar. The key is None for anything that is not a hard linked file.
+        """
+        if not self.is_file or not self.has_fs_path:
+            return None
+        st = self.stat()
+        if st.st_nlink < 2:
+            return None
+        return st.st_dev, st.st_ino
+
     @property
     def _can_replace_inline(self) -> bool:
         return False
@@ -951,6 +1146,48 @@ class FSPath(VirtualPathBase, ABC):
     def _reset_caches(self) -> None:
         self._mtime = None
         self._stat_cache = None
+        self._elf_info_cache = False
+        self._content_digest_cache = None
+
+    def elf_info(self) -> Optional[ElfFileInfo]:
+        # The ELF details are cached per path, so the tree is only scanned once even though
+        # multiple parts of the pipeline (dbgsym, shlibs, shlibdeps, plugins) need them.
+        # The cache is reset when the content is replaced via `replace_fs_path_content`.
+        elf_info = self._elf_info_cache
+        if elf_info is False:
+            elf_info = super().elf_info()
+            self._elf_info_cache = elf_info
+        return elf_info
+
+    def content_digest(self, algorithm: str = "md5") -> str:
+        """Compute the hex digest of the file content
+
+        The digest is cached on the path and keyed by the (dev, inode, size, mtime) of the
+        underlying file. This enables the md5sums generation and other consumers to share
+        the digest without hashing the file again. The cache is also reset when the content
+        is replaced via `replace_fs_path_content`.
+
+        :param algorithm: The name of the digest algorithm (as understood by `hashlib`)
+        :return: The hex digest of the file content
+        """
+        if not self.is_file:
+            raise TypeError(f'Cannot compute the digest of "{self.path}": Not a file')
+        try:
+            st = os.stat(self.fs_path)
+        except (PureVirtualPathError, TestPathWithNonExistentFSPathError):
+            with self.open(byte_io=True) as fd:
+                return hashlib.file_digest(fd, algorithm).hexdigest()
+        cache_key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        digest_cache = self._content_digest_cache
+        if digest_cache is None or digest_cache[0] != cache_key:
+            digest_cache = (cache_key, {})
+            self._content_digest_cache = digest_cache
+        digest = digest_cache[1].get(algorithm)
+        if digest is None:
+            with open(self.fs_path, "rb", buffering=0) as fd:
+                digest = hashlib.file_digest(fd, algorithm).hexdigest()
+            digest_cache[1][algorithm] = digest
+        return digest
 
     def metadata(
         self,
@@ -962,7 +1199,8 @@ class FSPath(VirtualPathBase, ABC):
         if owning_plugin is None:
             owning_plugin = current_plugin
         metadata_key = (owning_plugin, metadata_type)
-        metadata_value = self._metadata.get(metadata_key)
+        metadata = self._metadata
+        metadata_value = metadata.get(metadata_key) if metadata is not None else None
         if metadata_value is None:
             if self.is_detached:
                 raise TypeError(
@@ -975,7 +1213,10 @@ class FSPath(VirtualPathBase, ABC):
                     metadata_type,
                 )
             metadata_value = PathMetadataValue(owning_plugin, metadata_type)
-            self._metadata[metadata_key] = metadata_value
+            if metadata is None:
+                metadata = {}
+                self._metadata = metadata
+            metadata[metadata_key] = metadata_value
         return PathMetadataReferenceImplementation(
             self,
             current_plugin,
@@ -1020,6 +1261,17 @@ class FSPath(VirtualPathBase, ABC):
     def _replaced_path(self, new_fs_path: str) -> None:
         raise NotImplementedError
 
+    def _hardlink_content_to(self, target: "FSPath") -> None:
+        """Replace the content of this file with a hard link to the content of `target`
+
+        Afterwards, the two paths share an inode (see `hardlink_key`). Changing the
+        content of either path via `replace_fs_path_content` will break the link
+        rather than change both paths.
+        """
+        raise TypeError(
+            f"Cannot replace the content of {self._orphan_safe_path()!r} with a hardlink"
+        )
+
 
 class VirtualFSPathBase(FSPath, ABC):
     __slots__ = ()
@@ -1073,11 +1325,17 @@ class VirtualFSPathBase(FSPath, ABC):
 
 
 class FSRootDir(FSPath):
-    __slots__ = ("_fs_path", "_fs_read_write", "_plugin_context")
+    __slots__ = ("_fs_path", "_fs_read_write", "_plugin_context", "_basename_index")
 
-    def __init__(self, fs_path: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        fs_path: Optional[str] = None,
+        *,
+        basename_index: bool = False,
+    ) -> None:
         self._fs_path = fs_path
         self._fs_read_write = True
+        self._basename_index = BasenameIndex() if basename_index else None
         super().__init__(
             ".",
             None,
@@ -1154,6 +1412,11 @@ class FSRootDir(FSPath):
     def is_read_write(self, new_value: bool) -> None:
         self._fs_read_write = new_value
 
+    @property
+    def basename_index(self) -> Optional[BasenameIndex]:
+        """The index of all paths by basename and extension (if enabled for this file system)"""
+        return self._basename_index
+
     def prune_if_empty_dir(self) -> None:
         # No-op for the root directory. There is never a case where you want to delete this directory
         # (and even if you could, debputy will need it for technical reasons, so the root dir stays)
@@ -1243,7 +1506,7 @@ class VirtualPathWithReference(VirtualFSPathBase, ABC):
 
 
 class VirtualDirectoryFSPath(VirtualPathWithReference):
-    __slots__ = ("_reference_path",)
+    __slots__ = ()
 
     def __init__(
         self,
@@ -1340,7 +1603,8 @@ class FSBackedFilePath(VirtualPathWithReference):
             self.mode = initial_mode
         if mtime is not None:
             self._mtime = mtime
-        self._stat_cache = stat_cache
+        if stat_cache is not None:
+            self._stat_cache = _compact_stat(stat_cache)
         assert (
             not replaceable_inline or "debputy/scratch-dir/" in fs_path
         ), f"{fs_path} should not be inline-replaceable -- {self.path}"
@@ -1378,6 +1642,35 @@ class FSBackedFilePath(VirtualPathWithReference):
         self._reference_path = None
         self._replaceable_inline = True
 
+    def _hardlink_content_to(self, target: "FSPath") -> None:
+        self._rw_check()
+        if not target.is_file or not target.has_fs_path:
+            raise TypeError(
+                f"Cannot hardlink {self._orphan_safe_path()!r} to {target._orphan_safe_path()!r}:"
+                " The latter is not a file backed by the file system"
+            )
+        target_fs_path = target.fs_path
+        with tempfile.NamedTemporaryFile(
+            dir=generated_content_dir(), suffix=f"__{self.name}", delete=False
+        ) as new_path_fd:
+            new_fs_path = new_path_fd.name
+        os.unlink(new_fs_path)
+        try:
+            os.link(target_fs_path, new_fs_path)
+        except OSError:
+            # Such as when the target is on a different file system. A copy will do
+            # at the price of the two paths no longer being hard linked.
+            _cp_a(target_fs_path, new_fs_path)
+        self._fs_path = new_fs_path
+        self._reference_path = None
+        # The content is now shared with `target`, so neither path can be modified inline
+        # (nor stolen during materialization) without affecting the other.
+        self._replaceable_inline = False
+        self._reset_caches()
+        if isinstance(target, FSBackedFilePath):
+            target._replaceable_inline = False
+        target._reset_caches()
+
 
 _SYMLINK_MODE = 0o777
 
@@ -1470,6 +1763,14 @@ class VirtualTestPath(FSPath):
     def has_fs_path(self) -> bool:
         return self._has_fs_path
 
+    @property
+    def hardlink_key(self) -> Optional[Tuple[int, int]]:
+        # Test paths often have a made-up fs_path, which cannot be hard linked to anything
+        try:
+            return super().hardlink_key
+        except PureVirtualPathError:
+            return None
+
     def stat(self) -> os.stat_result:
         if self.has_fs_path:
             path = self.fs_path
@@ -1574,6 +1875,7 @@ class FSROOverlay(VirtualPathBase):
         "_readlink_cache",
         "_children",
         "_stat_failed_cache",
+        "_file_type",
         "__weakref__",
     )
 
@@ -1582,6 +1884,8 @@ class FSROOverlay(VirtualPathBase):
         path: str,
         fs_path: str,
         parent: Optional["FSROOverlay"],
+        *,
+        file_type: Optional[int] = None,
     ) -> None:
         self._path: str = path
         prefix = "/" if fs_path.startswith("/") else ""
@@ -1593,6 +1897,9 @@ class FSROOverlay(VirtualPathBase):
         self._readlink_cache: Optional[str] = None
         self._stat_failed_cache = False
         self._children: Optional[Mapping[str, FSROOverlay]] = None
+        # The `stat.S_IFMT` part of the mode when known without a `stat` (that is, from
+        # the directory listing of the parent directory).
+        self._file_type = file_type
 
     @classmethod
     def create_root_dir(cls, path: str, fs_path: str) -> "FSROOverlay":
@@ -1647,24 +1954,60 @@ class FSROOverlay(VirtualPathBase):
                     current._ensure_children_are_resolved()
                 stack.extend(reversed(current._children.values()))
 
-    def _ensure_children_are_resolved(self) -> None:
+    def _ensure_children_are_resolved(self, *, prefetch_stat: bool = False) -> None:
         if not self.is_dir or self._children:
             return
         dir_path = self.path
         dir_fs_path = self.fs_path
         children = {}
-        for name in sorted(os.listdir(dir_fs_path), key=os.path.basename):
+        # The file type of the children is (usually) available from the directory
+        # listing itself, which saves an `lstat` per child for `is_dir` and friends.
+        with os.scandir(dir_fs_path) as dir_iter:
+            entries = sorted(dir_iter, key=_BY_DIR_ENTRY_NAME)
+        for entry in entries:
+            name = entry.name
             child_path = os.path.join(dir_path, name) if dir_path != "." else name
             child_fs_path = (
                 os.path.join(dir_fs_path, name) if dir_fs_path != "." else name
             )
-            children[name] = FSROOverlay(
+            child = FSROOverlay(
                 child_path,
                 child_fs_path,
                 self,
+                file_type=_dir_entry_file_type(entry),
             )
+            if prefetch_stat:
+                with suppress(FileNotFoundError):
+                    child._stat_cache = entry.stat(follow_symlinks=False)
+            children[name] = child
         self._children = children
 
+    def prefetch_tree(self, *, parallelization_limit: int) -> None:
+        """Eagerly load this directory and everything beneath it
+
+        The directories are listed (and their content stat'ed) via a thread pool one
+        directory level at a time. This is useful for trees that will be traversed in
+        full on file systems where the latency of each syscall dominates (such as
+        network or overlay file systems).
+
+        Without parallelization, the tree is left to be loaded lazily as usual.
+        """
+        if parallelization_limit < 2 or not self.is_dir:
+            return
+        pending = [self]
+        while pending:
+            run_in_parallel(
+                _prefetch_children,
+                pending,
+                parallelization_limit=parallelization_limit,
+            )
+            pending = [
+                child
+                for directory in pending
+                for child in assume_not_none(directory._children).values()
+                if child.is_dir
+            ]
+
     @property
     def is_detached(self) -> bool:
         return False
@@ -1749,29 +2092,27 @@ class FSROOverlay(VirtualPathBase):
     def fs_path(self) -> str:
         return self._fs_path
 
-    @property
-    def is_dir(self) -> bool:
+    def _has_file_type(self, file_type: int) -> bool:
+        known_file_type = self._file_type
+        if known_file_type is not None:
+            return known_file_type == file_type
         # The root path can have a non-existent fs_path (such as d/tmp not always existing)
         try:
-            return stat.S_ISDIR(self.stat().st_mode)
+            return stat.S_IFMT(self.stat().st_mode) == file_type
         except FileNotFoundError:
             return False
 
+    @property
+    def is_dir(self) -> bool:
+        return self._has_file_type(stat.S_IFDIR)
+
     @property
     def is_file(self) -> bool:
-        # The root path can have a non-existent fs_path (such as d/tmp not always existing)
-        try:
-            return stat.S_ISREG(self.stat().st_mode)
-        except FileNotFoundError:
-            return False
+        return self._has_file_type(stat.S_IFREG)
 
     @property
     def is_symlink(self) -> bool:
-        # The root path can have a non-existent fs_path (such as d/tmp not always existing)
-        try:
-            return stat.S_ISLNK(self.stat().st_mode)
-        except FileNotFoundError:
-            return False
+        return self._has_file_type(stat.S_IFLNK)
 
     @property
     def has_fs_path(self) -> bool:
@@ -1837,6 +2178,26 @@ class FSROOverlay(VirtualPathBase):
         )
 
 
+_BY_DIR_ENTRY_NAME = operator.attrgetter("name")
+
+
+def _dir_entry_file_type(entry: os.DirEntry) -> Optional[int]:
+    # These only need an `lstat` when the file system does not provide the file type
+    # in the directory listing (in which case the `DirEntry` does the `lstat` for us).
+    if entry.is_symlink():
+        return stat.S_IFLNK
+    if entry.is_dir(follow_symlinks=False):
+        return stat.S_IFDIR
+    if entry.is_file(follow_symlinks=False):
+        return stat.S_IFREG
+    # Rare file types (such as named pipes) are left to `stat`.
+    return None
+
+
+def _prefetch_children(directory: FSROOverlay) -> None:
+    directory._ensure_children_are_resolved(prefetch_stat=True)
+
+
 class FSROOverlayRootDir(FSROOverlay):
     __slots__ = ("_plugin_context",)
 
@@ -1853,6 +2214,31 @@ class FSROOverlayRootDir(FSROOverlay):
             yield r
 
 
+def split_hardlinked_paths(
+    paths: Iterable[VP],
+) -> Tuple[List[VP], List[Tuple[VP, VP]]]:
+    """Split the paths into the paths to process and the remaining hard links of those
+
+    Only the first path of a group of hard linked paths (see `FSPath.hardlink_key`) needs
+    to be processed. The other paths of the group are returned as `(path, first_path)`
+    pairs, so the caller can share the result of processing `first_path` with them (e.g.,
+    via `_hardlink_content_to`).
+    """
+    to_process = []
+    remaining_hardlinks = []
+    seen: Dict[Tuple[int, int], VP] = {}
+    for path in paths:
+        hardlink_key = path.hardlink_key if isinstance(path, FSPath) else None
+        if hardlink_key is not None:
+            first_path = seen.get(hardlink_key)
+            if first_path is not None:
+                remaining_hardlinks.append((path, first_path))
+                continue
+            seen[hardlink_key] = path
+        to_process.append(path)
+    return to_process, remaining_hardlinks
+
+
 def as_path_def(pd: Union[str, PathDef]) -> PathDef:
     return PathDef(pd) if isinstance(pd, str) else pd
 
@@ -1,5 +1,6 @@
 import dataclasses
 import functools
+import itertools
 import os
 import textwrap
 from contextlib import suppress
@@ -69,7 +70,7 @@ from .plugin.api.spec import (
     DebputyIntegrationMode,
     INTEGRATION_MODE_DH_DEBPUTY_RRR,
 )
-from .plugin.debputy.binary_package_rules import ServiceRule
+from .plugin.debputy.binary_package_rules import ServiceRule, DebCompression
 from .plugin.debputy.to_be_api_types import BuildRule
 from .plugin.plugin_state import run_in_context_of_plugin
 from .substitution import Substitution
@@ -84,6 +85,7 @@ from .util import (
     debian_policy_normalize_symlink_target,
     generated_content_dir,
     _info,
+    package_parallelization_limits,
 )
 from .yaml import MANIFEST_YAML
 from .yaml.compat import CommentedMap, CommentedSeq
@@ -114,6 +116,7 @@ class PackageTransformationDefinition:
     substitution: Substitution
     is_auto_generated_package: bool
     binary_version: Optional[str] = None
+    deb_compression: Optional[DebCompression] = None
     search_dirs: Optional[List[FileSystemExactMatchRule]] = None
     dpkg_maintscript_helper_snippets: List[DpkgMaintscriptHelperCommand] = field(
         default_factory=list
@@ -143,7 +146,7 @@ def _path_to_tar_member(
     if path.is_dir:
         path_type = PathType.DIRECTORY
     elif path.is_file:
-        # TODO: someday we will need to deal with hardlinks and it might appear here.
+        # Hardlinks are derived from these by `_generate_intermediate_manifest`
         path_type = PathType.FILE
     elif path.is_symlink:
         # Special-case that we resolve immediately (since we need to normalize the target anyway)
@@ -198,16 +201,52 @@ def _path_to_tar_member(
     )
 
 
+def _as_hardlink_if_possible(
+    tar_member: TarMember,
+    link_target: TarMember,
+) -> TarMember:
+    # A hardlink shares all the metadata with the file it links to. When the paths
+    # disagree, they are emitted as separate files to preserve the metadata.
+    if (
+        tar_member.mode != link_target.mode
+        or tar_member.uid != link_target.uid
+        or tar_member.gid != link_target.gid
+        or tar_member.owner != link_target.owner
+        or tar_member.group != link_target.group
+        or tar_member.mtime != link_target.mtime
+    ):
+        return tar_member
+    return TarMember.virtual_path(
+        tar_member.member_path,
+        PathType.HARDLINK,
+        tar_member.mtime,
+        link_target=link_target.member_path,
+        mode=tar_member.mode,
+        owner=tar_member.owner,
+        uid=tar_member.uid,
+        group=tar_member.group,
+        gid=tar_member.gid,
+    )
+
+
 def _generate_intermediate_manifest(
     fs_root: FSPath,
     clamp_mtime_to: int,
 ) -> Iterable[TarMember]:
     symlinks = []
+    hardlink_targets: Dict[Tuple[int, int], TarMember] = {}
     for path in fs_root.all_paths():
         tar_member = _path_to_tar_member(path, clamp_mtime_to)
         if tar_member.path_type == PathType.SYMLINK:
             symlinks.append(tar_member)
             continue
+        hardlink_key = path.hardlink_key
+        if hardlink_key is not None:
+            link_target = hardlink_targets.get(hardlink_key)
+            if link_target is None:
+                hardlink_targets[hardlink_key] = tar_member
+            else:
+                tar_member = _as_hardlink_if_possible(tar_member, link_target)
         yield tar_member
     yield from symlinks
 
@@ -1193,6 +1232,7 @@ class HighLevelManifest:
         integration_mode: DebputyIntegrationMode,
         *,
         install_request_context: Optional[InstallSearchDirContext] = None,
+        parallelization_limit: int = 1,
     ) -> PackageDataTable:
         package_data_dict = {}
         package_data_table = PackageDataTable(package_data_dict)
@@ -1226,6 +1266,12 @@ class HighLevelManifest:
                 for s in search_dirs
                 if s.search_dir.fs_path != source_root_dir.fs_path
             )
+            # These are traversed in full (at the latest, by the check for uninstalled
+            # paths), so loading them up front is not wasted.
+            for search_dir in check_for_uninstalled_dirs:
+                cast("FSROOverlay", search_dir).prefetch_tree(
+                    parallelization_limit=parallelization_limit
+                )
             if enable_manifest_installation_feature:
                 _present_installation_dirs(
                     search_dirs, check_for_uninstalled_dirs, into
@@ -1288,7 +1334,9 @@ class HighLevelManifest:
 
             install_rule_context[package] = BinaryPackageInstallRuleContext(
                 dctrl_bin,
-                FSRootDir(),
+                # The index speeds up the glob matching of the transformations and
+                # mode normalization rules applied later.
+                FSRootDir(basename_index=True),
                 doc_main_package,
             )
 
@@ -1317,6 +1365,9 @@ class HighLevelManifest:
                         ".",
                         build_system_staging_dir_fs_path,
                     )
+                    build_system_staging_dir.prefetch_tree(
+                        parallelization_limit=parallelization_limit
+                    )
                 else:
                     build_system_staging_dir = None
 
@@ -1335,6 +1386,11 @@ class HighLevelManifest:
             # What we want to check is transformations do not exclude everything from an install
             # rule. The hard part here is that renaming (etc.) is fine, so we cannot 1:1 string
             # match.
+            path_matcher.compile_match_rules(
+                itertools.chain.from_iterable(
+                    install_rule.match_rules() for install_rule in self._install_rules
+                )
+            )
             for install_rule in self._install_rules:
                 install_rule.perform_install(
                     path_matcher,
@@ -1346,6 +1402,11 @@ class HighLevelManifest:
             for search_dir in check_for_uninstalled_dirs:
                 _detect_missing_installations(path_matcher, search_dir)
 
+        _, per_package_limit = package_parallelization_limits(
+            self.deb_options_and_profiles.deb_build_options,
+            parallelization_limit,
+            sum(1 for _ in self.active_packages),
+        )
         for dctrl_bin in self.all_packages:
             package = dctrl_bin.name
             binary_install_rule_context = install_rule_context[package]
@@ -1386,6 +1447,7 @@ class HighLevelManifest:
                 udeb_package,
                 package_data_table,
                 # FIXME: source_package
+                parallelization_limit=per_package_limit,
             )
 
             ctrl_creator = BinaryCtrlAccessorProviderCreator(
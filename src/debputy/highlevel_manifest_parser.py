@@ -1,5 +1,6 @@
 import collections
 import contextlib
+import os
 from typing import (
     Optional,
     Dict,
@@ -48,6 +49,7 @@ from .manifest_parser.exceptions import ManifestParseException
 from .manifest_parser.parser_data import ParserContextData
 from .manifest_parser.util import AttributePath
 from .packager_provided_files import detect_all_packager_provided_files
+from .persistent_cache import PersistentCache
 from .plugin.api import VirtualPath
 from .plugin.api.feature_set import PluginProvidedFeatureSet
 from .plugin.api.impl_types import (
@@ -239,9 +241,15 @@ class HighLevelManifestParser(ParserContextData):
                 )
         if isinstance(self, YAMLManifestParser) and self._mutable_yaml_manifest is None:
             self._mutable_yaml_manifest = MutableYAMLManifest.empty_manifest()
+        debian_dir = self._debian_dir
+        # Only load the (deferred) plugins relevant for the files in debian/
+        feature_set = self._plugin_provided_feature_set
+        packager_provided_files = feature_set.packager_provided_files_for(
+            p.name for p in debian_dir.iterdir if not p.is_dir
+        )
         all_packager_provided_files = detect_all_packager_provided_files(
-            self._plugin_provided_feature_set.packager_provided_files,
-            self._debian_dir,
+            packager_provided_files,
+            debian_dir,
             self.binary_packages,
         )
 
@@ -578,6 +586,9 @@ class YAMLManifestParser(HighLevelManifestParser):
                             definition_source["binary-version"].path,
                         )
                     )
+                deb_compression = parsed.get("deb-compression")
+                if deb_compression is not None:
+                    package_state.deb_compression = deb_compression
                 search_dirs = parsed.get("installation_search_dirs")
                 if search_dirs is not None:
                     package_state.search_dirs = search_dirs
@@ -596,9 +607,9 @@ class YAMLManifestParser(HighLevelManifestParser):
 
         return self.build_manifest()
 
-    def _parse_manifest(self, fd: Union[IO[bytes], str]) -> HighLevelManifest:
+    def _load_yaml(self, fd: Union[IO[bytes], str]) -> Any:
         try:
-            data = MANIFEST_YAML.load(fd)
+            return MANIFEST_YAML.load(fd)
         except YAMLError as e:
             msg = str(e)
             lines = msg.splitlines(keepends=True)
@@ -620,6 +631,24 @@ class YAMLManifestParser(HighLevelManifestParser):
             raise ManifestParseException(
                 f"Could not parse {self.manifest_path} as a YAML document: {msg}"
             ) from e
+
+    def _parse_manifest(
+        self,
+        fd: Union[IO[bytes], str],
+        persistent_cache: Optional[PersistentCache],
+    ) -> HighLevelManifest:
+        if persistent_cache is None:
+            data = self._load_yaml(fd)
+        else:
+            # Loading the YAML document is the most expensive part of parsing the manifest,
+            # so reuse the document from an earlier invocation when the content is unchanged.
+            content = fd if isinstance(fd, str) else fd.read()
+            data = persistent_cache.get_or_compute(
+                "manifest-yaml",
+                os.path.abspath(self.manifest_path),
+                [content],
+                lambda: self._load_yaml(content),
+            )
         self._mutable_yaml_manifest = MutableYAMLManifest(data)
         return self.from_yaml_dict(data)
 
@@ -627,9 +656,10 @@ class YAMLManifestParser(HighLevelManifestParser):
         self,
         *,
         fd: Optional[Union[IO[bytes], str]] = None,
+        persistent_cache: Optional[PersistentCache] = None,
     ) -> HighLevelManifest:
         if fd is None:
             with open(self.manifest_path, "rb") as fd:
-                return self._parse_manifest(fd)
+                return self._parse_manifest(fd, persistent_cache)
         else:
-            return self._parse_manifest(fd)
+            return self._parse_manifest(fd, persistent_cache)
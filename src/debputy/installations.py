@@ -34,7 +34,12 @@ from debputy.manifest_parser.base_types import (
 )
 from debputy.manifest_parser.tagging_types import DebputyDispatchableType
 from debputy.packages import BinaryPackage
-from debputy.path_matcher import MatchRule, ExactFileSystemPath, MATCH_ANYTHING
+from debputy.path_matcher import (
+    MatchRule,
+    ExactFileSystemPath,
+    MATCH_ANYTHING,
+    CompiledMatchRules,
+)
 from debputy.plugin.plugin_state import run_in_context_of_plugin
 from debputy.substitution import Substitution
 from debputy.util import _error, _warn
@@ -280,6 +285,15 @@ class SourcePathMatcher:
         self._discarded: Dict[str, DiscardState] = {}
         self._auto_discard_rules = auto_discard_rules
         self.used_auto_discard_rules: Dict[str, Set[str]] = collections.defaultdict(set)
+        self._compiled_match_rules: Optional[CompiledMatchRules] = None
+
+    def compile_match_rules(self, match_rules: Iterable[MatchRule]) -> None:
+        """Prepare for matching all the given rules with one walk per search directory
+
+        The search directories must not change after this point. Rules not provided here
+        are still supported but will find their matches on their own.
+        """
+        self._compiled_match_rules = CompiledMatchRules(match_rules)
 
     def is_reserved(self, path: "VirtualPath") -> bool:
         fs_path = path.fs_path
@@ -413,6 +427,7 @@ class SourcePathMatcher:
             dir_only_match,
             match_filter,
             reserved_by,
+            compiled_match_rules=self._compiled_match_rules,
         ):
             installed_into, excluded = self.may_match(
                 match, is_exact_match=not glob_expand
@@ -472,6 +487,8 @@ def _resolve_path(
     dir_only_match: bool,
     match_filter: Optional[Callable[["VirtualPath"], bool]],
     into: FrozenSet[BinaryPackage],
+    *,
+    compiled_match_rules: Optional[CompiledMatchRules] = None,
 ) -> Iterator[PathMatch]:
     missing_matches = set(into)
     for sdir in search_dirs:
@@ -480,10 +497,18 @@ def _resolve_path(
             # All the packages, where this search dir applies, already got a match
             continue
         applicable = sdir.applies_to & missing_matches
-        for matched_path in match_rule.finditer(
-            sdir.search_dir,
-            ignore_paths=match_filter,
-        ):
+        if compiled_match_rules is not None:
+            matched_paths = compiled_match_rules.finditer(
+                match_rule,
+                sdir.search_dir,
+                ignore_paths=match_filter,
+            )
+        else:
+            matched_paths = match_rule.finditer(
+                sdir.search_dir,
+                ignore_paths=match_filter,
+            )
+        for matched_path in matched_paths:
             if dir_only_match and not matched_path.is_dir:
                 continue
             if matched_path.parent_dir is None:
@@ -820,6 +845,10 @@ class InstallRule(DebputyDispatchableType):
     ) -> None:
         raise NotImplementedError
 
+    def match_rules(self) -> Iterable[MatchRule]:
+        """The match rules this install rule will use to find paths in the search directories"""
+        return ()
+
     @classmethod
     def install_as(
         cls,
@@ -1091,6 +1120,9 @@ class GenericInstallationRule(InstallRule):
         if self._require_single_match and len(sources) != 1:
             raise ValueError("require_single_match implies sources must have len 1")
 
+    def match_rules(self) -> Iterable[MatchRule]:
+        return (source.match_rule for source in self._sources)
+
     def perform_install(
         self,
         path_matcher: SourcePathMatcher,
@@ -1131,6 +1163,9 @@ class DiscardRule(InstallRule):
         self._fs_match_rules = fs_match_rules
         self._limit_to = limit_to
 
+    def match_rules(self) -> Iterable[MatchRule]:
+        return (fs_match_rule.match_rule for fs_match_rule in self._fs_match_rules)
+
     def perform_install(
         self,
         path_matcher: SourcePathMatcher,
@@ -7,7 +7,18 @@ import tarfile
 from enum import Enum
 
 
-from typing import Optional, List, Dict, Any, Iterable, Union, Self, Mapping, IO
+from typing import (
+    Optional,
+    List,
+    Dict,
+    Any,
+    Iterable,
+    Union,
+    Self,
+    Mapping,
+    IO,
+    Sequence,
+)
 
 IntermediateManifest = List["TarMember"]
 
@@ -16,7 +27,8 @@ class PathType(Enum):
     FILE = ("file", tarfile.REGTYPE)
     DIRECTORY = ("directory", tarfile.DIRTYPE)
     SYMLINK = ("symlink", tarfile.SYMTYPE)
-    # TODO: Add hardlink, FIFO, Char device, BLK device, etc.
+    HARDLINK = ("hardlink", tarfile.LNKTYPE)
+    # TODO: Add FIFO, Char device, BLK device, etc.
 
     @property
     def manifest_key(self) -> str:
@@ -28,7 +40,11 @@ class PathType(Enum):
 
     @property
     def can_be_virtual(self) -> bool:
-        return self in (PathType.DIRECTORY, PathType.SYMLINK)
+        return self in (PathType.DIRECTORY, PathType.SYMLINK, PathType.HARDLINK)
+
+    @property
+    def has_link_target(self) -> bool:
+        return self in (PathType.SYMLINK, PathType.HARDLINK)
 
 
 KEY2PATH_TYPE = {pt.manifest_key: pt for pt in PathType}
@@ -97,8 +113,14 @@ class TarMember:
                 raise ValueError(
                     f"Unable to prepare tar info for {self.member_path}"
                 ) from e
+            if tar_info.islnk():
+                # The `tar_fd` turns files sharing an inode with an earlier member into
+                # hardlinks. However, the manifest decides what is a hardlink, so undo that.
+                tar_info.type = self.path_type.tarinfo_type
+                tar_info.linkname = ""
+                tar_info.size = os.lstat(self.fs_path).st_size
             # TODO: Eventually, we should be able to unconditionally rely on link_target.  However,
-            # until we got symlinks and hardlinks correctly done in the JSON generator, it will be
+            # until we got symlinks correctly done in the JSON generator, it will be
             # conditional for now.
             if self.link_target != "":
                 tar_info.linkpath = self.link_target
@@ -176,12 +198,10 @@ class TarMember:
     ) -> Self:
         if not path_type.can_be_virtual:
             raise ValueError(f"The path type {path_type.name} cannot be virtual")
-        if (path_type == PathType.SYMLINK) ^ bool(link_target):
+        if path_type.has_link_target ^ bool(link_target):
             if not link_target:
-                raise ValueError("Symlinks must have a link target")
-            # TODO: Dear future programmer. Hardlinks will appear here some day and you will have to fix this
-            # code then!
-            raise ValueError("Non-symlinks must not have a link target")
+                raise ValueError("Symlinks and hardlinks must have a link target")
+            raise ValueError("Only symlinks and hardlinks can have a link target")
         return cls(
             member_path=member_path,
             path_type=path_type,
@@ -218,30 +238,21 @@ class TarMember:
 
     @classmethod
     def parse_intermediate_manifest(cls, manifest_path: str) -> IntermediateManifest:
-        directories = {"."}
         if manifest_path == "-":
             with sys.stdin as fd:
                 data = json.load(fd)
-                contents = [TarMember.from_dict(m) for m in data]
         else:
             with open(manifest_path) as fd:
                 data = json.load(fd)
-                contents = [TarMember.from_dict(m) for m in data]
-        if not contents:
-            raise ValueError(
-                "Empty manifest (note that the root directory should always be present"
-            )
-        if contents[0].member_path != "./":
-            raise ValueError('The first member must always be the root directory "./"')
-        for tar_member in contents:
-            directory = _dirname(tar_member.member_path)
-            if directory not in directories:
-                raise ValueError(
-                    f'The path "{tar_member.member_path}" came before the directory it is in (or the path'
-                    f" is not a directory). Either way leads to a broken deb."
-                )
-            if tar_member.path_type == PathType.DIRECTORY:
-                directories.add(tar_member.member_path.rstrip("/"))
+        return cls.from_intermediate_manifest_data(data)
+
+    @classmethod
+    def from_intermediate_manifest_data(
+        cls,
+        data: Iterable[Any],
+    ) -> IntermediateManifest:
+        contents = [TarMember.from_dict(m) for m in data]
+        check_intermediate_manifest_order(contents)
         return contents
 
     @classmethod
@@ -277,22 +288,26 @@ class TarMember:
             )
 
         link_target = d.get("link_target")
-        if path_type == PathType.SYMLINK:
-            if mode != 0o777:
-                raise ValueError(
-                    f'Invalid declaration for "{member_path}".'
-                    f" Symlinks must have mode 0o0777, got {oct(mode)[2:]}."
-                )
+        if path_type == PathType.SYMLINK and mode != 0o777:
+            raise ValueError(
+                f'Invalid declaration for "{member_path}".'
+                f" Symlinks must have mode 0o0777, got {oct(mode)[2:]}."
+            )
+        if path_type == PathType.HARDLINK and not is_virtual_entry:
+            raise ValueError(
+                f'Invalid declaration for "{member_path}".'
+                " Hardlinks must be virtual entries"
+            )
+        if path_type.has_link_target:
             if not link_target:
                 raise ValueError(
                     f'Invalid declaration for "{member_path}".'
-                    " Symlinks must have a link_target"
+                    " Symlinks and hardlinks must have a link_target"
                 )
         elif link_target is not None and link_target != "":
-            # TODO: Eventually hardlinks should have them too.  But that is a problem for a future programmer
             raise ValueError(
                 f'Invalid declaration for "{member_path}".'
-                " Only symlinks can have a link_target"
+                " Only symlinks and hardlinks can have a link_target"
             )
         else:
             link_target = ""
@@ -318,6 +333,43 @@ class TarMember:
         )
 
 
+def check_intermediate_manifest_order(members: Sequence[TarMember]) -> None:
+    """Check that the members of an intermediate manifest are in a valid order
+
+    Every path must come after the directory it is in and every hardlink after the
+    file it links to.
+
+    :raises ValueError: If the order is not valid
+    """
+    if not members:
+        raise ValueError(
+            "Empty manifest (note that the root directory should always be present"
+        )
+    if members[0].member_path != "./":
+        raise ValueError('The first member must always be the root directory "./"')
+    directories = {"."}
+    files = set()
+    for tar_member in members:
+        directory = _dirname(tar_member.member_path)
+        if directory not in directories:
+            raise ValueError(
+                f'The path "{tar_member.member_path}" came before the directory it is in (or the path'
+                f" is not a directory). Either way leads to a broken deb."
+            )
+        if tar_member.path_type == PathType.DIRECTORY:
+            directories.add(tar_member.member_path.rstrip("/"))
+        elif tar_member.path_type == PathType.FILE:
+            files.add(tar_member.member_path)
+        elif (
+            tar_member.path_type == PathType.HARDLINK
+            and tar_member.link_target not in files
+        ):
+            raise ValueError(
+                f'The hardlink "{tar_member.member_path}" must come after the file it links to'
+                f' ("{tar_member.link_target}").'
+            )
+
+
 def output_intermediate_manifest(
     manifest_output_file: str,
     members: Iterable[TarMember],
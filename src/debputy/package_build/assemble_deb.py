@@ -1,15 +1,21 @@
 import json
 import os
 import subprocess
-from typing import Optional, Sequence, List, Tuple
+from datetime import datetime
+from typing import Optional, Sequence, List, Tuple, Mapping, TYPE_CHECKING
 
 from debputy import DEBPUTY_ROOT_DIR
+from debputy.commands.deb_packer import pack_from_intermediate_manifest
 from debputy.commands.debputy_cmd.context import CommandContext
 from debputy.deb_packaging_support import setup_control_files
 from debputy.dh.debhelper_emulation import dhe_dbgsym_root_dir
 from debputy.filesystem_scan import FSRootDir
 from debputy.highlevel_manifest import HighLevelManifest
-from debputy.intermediate_manifest import IntermediateManifest
+from debputy.intermediate_manifest import (
+    IntermediateManifest,
+    check_intermediate_manifest_order,
+)
+from debputy.packages import BinaryPackage
 from debputy.plugin.api.impl_types import PackageDataTable
 from debputy.util import (
     escape_shell,
@@ -19,10 +25,16 @@ from debputy.util import (
     ensure_dir,
     assume_not_none,
     _info,
+    run_in_parallel,
+    package_parallelization_limits,
 )
 
+if TYPE_CHECKING:
+    from debputy.plugin.debputy.binary_package_rules import DebCompression
+
 
 _RRR_DEB_ASSEMBLY_KEYWORD = "debputy/deb-assembly"
+_DEB_ASSEMBLY_BUILD_OPTION = "debputy-deb-assembly"
 _NOTIFIED_ABOUT_FALLBACK_ASSEMBLY = False
 
 
@@ -79,14 +91,24 @@ def assemble_debs(
     is_dh_rrr_only_mode: bool,
     *,
     debug_materialization: bool = False,
+    parallelization_limit: int = 1,
 ) -> None:
     parsed_args = context.parsed_args
     output_path = parsed_args.output
     upstream_args = parsed_args.upstream_args
     deb_materialize = str(DEBPUTY_ROOT_DIR / "deb_materialization.py")
     mtime = context.mtime
+    active_packages = list(manifest.active_packages)
+    prefer_debputy_assembly = _prefer_debputy_assembly(
+        manifest.deb_options_and_profiles.deb_build_options
+    )
+    package_limit, per_package_limit = package_parallelization_limits(
+        manifest.deb_options_and_profiles.deb_build_options,
+        parallelization_limit,
+        len(active_packages),
+    )
 
-    for dctrl_bin in manifest.active_packages:
+    def _assemble_debs_for_package(dctrl_bin: BinaryPackage) -> None:
         package = dctrl_bin.name
         dbgsym_package_name = f"{package}-dbgsym"
         dctrl_data = package_data_table[package]
@@ -104,6 +126,14 @@ def assemble_debs(
             dctrl_data.dbgsym_info.dbgsym_ids.clear()
         dbgsym_fs_root = dctrl_data.dbgsym_info.dbgsym_fs_root
         dbgsym_ids = dctrl_data.dbgsym_info.dbgsym_ids
+        deb_compression = manifest.package_state_for(package).deb_compression
+        package_upstream_args, requires_debputy_assembly = _dpkg_deb_args(
+            deb_compression,
+            upstream_args,
+        )
+        force_debputy_assembly = (
+            prefer_debputy_assembly or requires_debputy_assembly
+        )
         intermediate_manifest = manifest.finalize_data_tar_contents(
             package, fs_root, mtime
         )
@@ -115,6 +145,7 @@ def assemble_debs(
             dbgsym_ids,
             package_metadata_context,
             allow_ctrl_file_management=not is_dh_rrr_only_mode,
+            parallelization_limit=per_package_limit,
         )
 
         needs_root, use_fallback_assembly, gain_root_cmd = determine_assembly_method(
@@ -143,10 +174,11 @@ def assemble_debs(
                 mtime,
                 os.path.join(dbgsym_root, "DEBIAN"),
                 output_path,
-                upstream_args,
+                package_upstream_args,
                 is_udeb=dctrl_bin.is_udeb,  # Review this if we ever do dbgsyms for udebs
                 use_fallback_assembly=False,
                 needs_root=False,
+                force_debputy_assembly=force_debputy_assembly,
                 debug_materialization=debug_materialization,
             )
 
@@ -157,14 +189,61 @@ def assemble_debs(
             mtime,
             control_output_dir,
             output_path,
-            upstream_args,
+            package_upstream_args,
             is_udeb=dctrl_bin.is_udeb,
             use_fallback_assembly=use_fallback_assembly,
             needs_root=needs_root,
             gain_root_cmd=gain_root_cmd,
+            force_debputy_assembly=force_debputy_assembly,
             debug_materialization=debug_materialization,
         )
 
+    # The file systems are read-only at this point and each package only writes to
+    # its own control and materialization directories, so the packages can be
+    # assembled concurrently (when enabled).
+    run_in_parallel(
+        _assemble_debs_for_package,
+        active_packages,
+        parallelization_limit=package_limit,
+    )
+
+
+def _dpkg_deb_args(
+    deb_compression: Optional["DebCompression"],
+    upstream_args: Optional[List[str]],
+) -> Tuple[Optional[List[str]], bool]:
+    """Combine the compression settings from the manifest with the command line options
+
+    Options from the command line (`dh_debputy -- <params>`) take precedence. When they
+    choose the compression algorithm, the compression settings from the manifest are
+    ignored entirely, since the level and strategy are specific to the algorithm.
+
+    :return: A tuple of the `dpkg-deb` options and whether the package must be assembled
+      by debputy.
+    """
+    if deb_compression is None or _has_compression_algorithm_arg(upstream_args):
+        return upstream_args, False
+    args = deb_compression.as_dpkg_deb_args()
+    if upstream_args:
+        args.extend(upstream_args)
+    return args, deb_compression.requires_debputy_assembly
+
+
+def _has_compression_algorithm_arg(upstream_args: Optional[List[str]]) -> bool:
+    return upstream_args is not None and any(a.startswith("-Z") for a in upstream_args)
+
+
+def _prefer_debputy_assembly(deb_build_options: Mapping[str, Optional[str]]) -> bool:
+    method = deb_build_options.get(_DEB_ASSEMBLY_BUILD_OPTION)
+    if method is None or method == "dpkg-deb":
+        return False
+    if method != "debputy":
+        _error(
+            f'The {_DEB_ASSEMBLY_BUILD_OPTION} option in DEB_BUILD_OPTIONS must be either "dpkg-deb" or'
+            f' "debputy", got: {method}'
+        )
+    return True
+
 
 def _assemble_deb(
     package: str,
@@ -179,8 +258,29 @@ def _assemble_deb(
     needs_root: bool = False,
     gain_root_cmd: Optional[Sequence[str]] = None,
     *,
+    force_debputy_assembly: bool = False,
     debug_materialization: bool = False,
 ) -> None:
+    if force_debputy_assembly or (needs_root and use_fallback_assembly):
+        assembly_method = "debputy"
+    else:
+        assembly_method = "dpkg-deb"
+
+    if assembly_method == "debputy":
+        # The debputy assembly method never needs root, so there is no reason to
+        # materialize the deb-root first.
+        _assemble_deb_in_process(
+            package,
+            intermediate_manifest,
+            mtime,
+            control_output_dir,
+            output_path,
+            upstream_args,
+            is_udeb=is_udeb,
+            debug_materialization=debug_materialization,
+        )
+        return
+
     scratch_root_dir = scratch_dir()
     materialization_dir = os.path.join(
         scratch_root_dir, "materialization-dirs", package
@@ -219,7 +319,6 @@ def _assemble_deb(
             output_path, compute_output_filename(control_output_dir, True)
         )
 
-    assembly_method = "debputy" if needs_root and use_fallback_assembly else "dpkg-deb"
     combined_materialization_and_assembly = not needs_root
     if combined_materialization_and_assembly:
         materialize_cmd.extend(
@@ -261,3 +360,54 @@ def _assemble_deb(
                 f"Assembly command for {package} failed{exit_code}. Please review the output of the command"
                 f" for more details on the problem."
             )
+
+
+def _assemble_deb_in_process(
+    package: str,
+    intermediate_manifest: IntermediateManifest,
+    mtime: int,
+    control_output_dir: str,
+    output_path: str,
+    upstream_args: Optional[List[str]],
+    *,
+    is_udeb: bool = False,
+    debug_materialization: bool = False,
+) -> None:
+    if not os.path.isfile(os.path.join(control_output_dir, "control")):
+        _error(
+            f'The directory "{control_output_dir}" does not look like a package root dir (there is no control file)'
+        )
+    # Apply the same checks as when the manifest is passed to the materialization command
+    # (such as hardlinks coming after the file they link to).
+    try:
+        check_intermediate_manifest_order(intermediate_manifest)
+    except ValueError as e:
+        _error(
+            f"Internal error: The intermediate manifest for {package} is invalid: {e}"
+        )
+    dpkg_deb_args = []
+    if is_udeb:
+        dpkg_deb_args.extend(["-z6", "-Zxz", "-Sextreme"])
+    if upstream_args:
+        dpkg_deb_args.extend(upstream_args)
+    output = output_path
+    if os.path.isdir(output_path):
+        output = os.path.join(
+            output_path, compute_output_filename(control_output_dir, is_udeb)
+        )
+    _info(f"Assembling {package} in-process from its intermediate manifest")
+    if debug_materialization:
+        _info(
+            f"  - {len(intermediate_manifest)} paths, dpkg-deb options: {escape_shell(*dpkg_deb_args)}"
+        )
+    start_time = datetime.now()
+    pack_from_intermediate_manifest(
+        output,
+        control_output_dir,
+        intermediate_manifest,
+        mtime,
+        dpkg_deb_args,
+    )
+    if debug_materialization:
+        end_time = datetime.now()
+        _info(f"  - assembly took {end_time - start_time}")
@@ -28,11 +28,10 @@ if TYPE_CHECKING:
     from debputy.highlevel_manifest import HighLevelManifest
 
 
-HAS_SONAME = re.compile(r"\s+SONAME\s+(\S+)")
 SHLIBS_LINE_READER = re.compile(r"^(?:(\S*):)?\s*(\S+)\s*(\S+)\s*(\S.+)$")
 SONAME_FORMATS = [
-    re.compile(r"\s+SONAME\s+((.*)[.]so[.](.*))"),
-    re.compile(r"\s+SONAME\s+((.*)-(\d.*)[.]so)"),
+    re.compile(r"^((.*)[.]so[.](.*))$"),
+    re.compile(r"^((.*)-(\d.*)[.]so)$"),
 ]
 
 
@@ -97,35 +96,23 @@ class ShlibsContent:
         fd.writelines(self._udeb_lines)
 
 
-def extract_so_name(
-    binary_package: BinaryPackage,
-    path: VirtualPath,
-) -> Optional[SONAMEInfo]:
-    objdump = binary_package.cross_command("objdump")
-    output = subprocess.check_output([objdump, "-p", path.fs_path], encoding="utf-8")
+def extract_so_name(path: VirtualPath) -> Optional[SONAMEInfo]:
+    elf_info = path.elf_info()
+    if elf_info is None or elf_info.soname is None:
+        return None
+    full_soname = elf_info.soname
     for r in SONAME_FORMATS:
-        m = r.search(output)
+        m = r.search(full_soname)
         if m:
             full_soname, library, major_version = m.groups()
             return SONAMEInfo(path, full_soname, library, major_version)
-    m = HAS_SONAME.search(output)
-    if not m:
-        return None
-    full_soname = m.group(1)
     return SONAMEInfo(path, full_soname, full_soname, None)
 
 
-def extract_soname_info(
-    binary_package: BinaryPackage,
-    fs_root: VirtualPath,
-) -> List[SONAMEInfo]:
-    so_files = elf_util.find_all_elf_files(
-        fs_root,
-        with_linking_type=ELF_LINKING_TYPE_DYNAMIC,
-    )
+def extract_soname_info(so_files: List[VirtualPath]) -> List[SONAMEInfo]:
     result = []
     for so_file in so_files:
-        soname_info = extract_so_name(binary_package, so_file)
+        soname_info = extract_so_name(so_file)
         if not soname_info:
             continue
         result.append(soname_info)
@@ -258,7 +245,7 @@ def compute_shlibs(
         fs_root,
         with_linking_type=ELF_LINKING_TYPE_DYNAMIC,
     )
-    sonames = extract_soname_info(binary_package, fs_root)
+    sonames = extract_soname_info(so_files)
     provided_shlibs_file = resolve_reserved_provided_file(
         "shlibs",
         reserved_packager_provided_files,
@@ -1,6 +1,7 @@
 import fnmatch
 import glob
 import itertools
+import operator
 import os
 import re
 from enum import Enum
@@ -12,13 +13,20 @@ from typing import (
     Union,
     Sequence,
     Tuple,
+    Dict,
+    List,
+    Iterator,
+    TYPE_CHECKING,
 )
 
 from debputy.intermediate_manifest import PathType
 from debputy.plugin.api import VirtualPath
 from debputy.substitution import Substitution, NULL_SUBSTITUTION
 from debputy.types import VP
-from debputy.util import _normalize_path, _error, escape_shell
+from debputy.util import _normalize_path, _error, escape_shell, assume_not_none
+
+if TYPE_CHECKING:
+    from debputy.filesystem_scan import BasenameIndex
 
 MR = TypeVar("MR")
 _GLOB_PARTS = re.compile(r"[*?]|\[]?[^]]+]")
@@ -60,6 +68,16 @@ def _compile_basename_glob(
     return None, lambda x: bool(slow_pattern.match(x))
 
 
+def _path_parts(path: VP) -> List[str]:
+    parts = []
+    current: Optional[VP] = path
+    while current is not None:
+        parts.append(current.name)
+        current = current.parent_dir
+    parts.reverse()
+    return parts
+
+
 def _apply_match(
     fs_path: VP,
     match_part: Union[Callable[[str], bool], str],
@@ -234,7 +252,8 @@ class MatchAnything(MatchRule):
     ) -> Iterable[VP]:
         if ignore_paths is not None:
             yield from (p for p in fs_root.all_paths() if not ignore_paths(p))
-        yield from fs_root.all_paths()
+        else:
+            yield from fs_root.all_paths()
 
     def describe_match_exact(self) -> str:
         return "**/* (Match anything)"
@@ -351,6 +370,7 @@ class BasenameGlobMatch(MatchRule):
         "_path_type",
         "_recursive_match",
         "_escaped_basename_pattern",
+        "_index_key",
     )
 
     def __init__(
@@ -373,6 +393,14 @@ class BasenameGlobMatch(MatchRule):
         self._escaped_basename_pattern, self._matcher = _compile_basename_glob(
             basename_glob
         )
+        # Used to find candidates via the `BasenameIndex` of the file system (if any)
+        self._index_key: Optional[Tuple[bool, str]] = None
+        if not glob.has_magic(basename_glob):
+            self._index_key = True, basename_glob
+        else:
+            extension = _literal_extension_of(basename_glob)
+            if extension is not None:
+                self._index_key = False, extension
 
     def _full_pattern(self) -> str:
         if self._directory is not None:
@@ -392,6 +420,11 @@ class BasenameGlobMatch(MatchRule):
             if p is None or not p.is_dir:
                 return
             search_root = p
+        if self._recursive_match and self._index_key is not None:
+            index = getattr(fs_root, "basename_index", None)
+            if index is not None:
+                yield from self._finditer_indexed(index, search_root, ignore_paths)
+                return
         path_iter = (
             search_root.all_paths() if self._recursive_match else search_root.iterdir
         )
@@ -406,6 +439,41 @@ class BasenameGlobMatch(MatchRule):
                 if self._matcher(m.name) and _match_file_type(self._path_type, m)
             )
 
+    def _finditer_indexed(
+        self,
+        index: "BasenameIndex",
+        search_root: VP,
+        ignore_paths: Optional[Callable[[VP], bool]],
+    ) -> Iterable[VP]:
+        is_basename, key = assume_not_none(self._index_key)
+        if is_basename:
+            candidates = index.paths_with_basename(key)
+        else:
+            candidates = index.paths_with_extension(key)
+        path_type = self._path_type
+        matcher = self._matcher
+        root_parts = _path_parts(search_root)
+        root_depth = len(root_parts)
+        keyed_matches = []
+        # Like `all_paths()`, the search root itself is also a candidate (but the
+        # root dir is never in the index).
+        candidates = [p for p in candidates if p is not search_root]
+        candidates.append(search_root)
+        for p in candidates:
+            if not matcher(p.name) or (
+                path_type is not None and not _match_file_type(path_type, p)
+            ):
+                continue
+            parts = _path_parts(p)
+            if parts[:root_depth] != root_parts:
+                continue
+            if ignore_paths is not None and ignore_paths(p):
+                continue
+            keyed_matches.append((parts, p))
+        # Provide the matches in the same order as `all_paths()` would
+        keyed_matches.sort(key=operator.itemgetter(0))
+        return [p for _, p in keyed_matches]
+
     def describe_match_short(self) -> str:
         path_type_match = (
             ""
@@ -541,3 +609,239 @@ class GenericGlobImplementation(MatchRule):
     @property
     def path_type(self) -> Optional[PathType]:
         return self._path_type
+
+
+class _BasenameGlobBuckets:
+    """Match a basename against many rules at once
+
+    Rules without a basename constraint always match. Literal basenames are found via a
+    dict lookup and `*<suffix>` globs are bucketed by the final extension. Only the
+    remaining globs are tried one by one.
+    """
+
+    __slots__ = ("rules", "_match_any", "_by_name", "_by_extension", "_other")
+
+    def __init__(
+        self,
+        rules: Sequence[Tuple[int, Optional[str], Optional[PathType]]],
+    ) -> None:
+        self.rules = rules
+        self._match_any: List[Tuple[int, Optional[PathType]]] = []
+        self._by_name: Dict[str, List[Tuple[int, Optional[PathType]]]] = {}
+        self._by_extension: Dict[
+            str,
+            List[Tuple[int, Callable[[str], bool], Optional[PathType]]],
+        ] = {}
+        self._other: List[Tuple[int, Callable[[str], bool], Optional[PathType]]] = []
+        for rule_id, basename_glob, path_type in rules:
+            if basename_glob is None:
+                self._match_any.append((rule_id, path_type))
+                continue
+            if not glob.has_magic(basename_glob):
+                self._by_name.setdefault(basename_glob, []).append((rule_id, path_type))
+                continue
+            _, matcher = _compile_basename_glob(basename_glob)
+            extension = _literal_extension_of(basename_glob)
+            if extension is not None:
+                self._by_extension.setdefault(extension, []).append(
+                    (rule_id, matcher, path_type)
+                )
+            else:
+                self._other.append((rule_id, matcher, path_type))
+
+    def matching_rules(self, path: VP) -> Iterable[int]:
+        name = path.name
+        for rule_id, path_type in self._match_any:
+            if path_type is None or _match_file_type(path_type, path):
+                yield rule_id
+        by_name = self._by_name.get(name)
+        if by_name:
+            for rule_id, path_type in by_name:
+                if path_type is None or _match_file_type(path_type, path):
+                    yield rule_id
+        if self._by_extension:
+            dot_idx = name.rfind(".")
+            by_extension = (
+                self._by_extension.get(name[dot_idx:]) if dot_idx > -1 else None
+            )
+            if by_extension:
+                for rule_id, matcher, path_type in by_extension:
+                    if matcher(name) and (
+                        path_type is None or _match_file_type(path_type, path)
+                    ):
+                        yield rule_id
+        for rule_id, matcher, path_type in self._other:
+            if matcher(name) and (
+                path_type is None or _match_file_type(path_type, path)
+            ):
+                yield rule_id
+
+
+def _literal_extension_of(basename_glob: str) -> Optional[str]:
+    # For `*.so` or `lib*.so.1`, any match must end with the literal extension after
+    # the last glob character.
+    m = None
+    for m in _GLOB_PARTS.finditer(basename_glob):
+        pass
+    if m is None:
+        return None
+    remainder = basename_glob[m.end() :]
+    dot_idx = remainder.rfind(".")
+    if dot_idx < 0:
+        return None
+    return remainder[dot_idx:]
+
+
+class _MatchRuleTrieNode:
+    __slots__ = ("children", "rules")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_MatchRuleTrieNode"] = {}
+        self.rules: List[Tuple[int, Optional[str], Optional[PathType]]] = []
+
+
+def _recursive_match_rule_spec(
+    match_rule: MatchRule,
+) -> Optional[Tuple[Optional[str], Optional[str], Optional[PathType]]]:
+    if match_rule is MATCH_ANYTHING:
+        return None, None, None
+    if isinstance(match_rule, DirectoryBasedMatch):
+        if match_rule.rule_type != MatchRuleType.ANYTHING_BENEATH_DIR:
+            return None
+        return match_rule.directory, None, match_rule.path_type
+    if isinstance(match_rule, BasenameGlobMatch):
+        if not match_rule._recursive_match:
+            return None
+        return match_rule.directory, match_rule._basename_glob, match_rule.path_type
+    return None
+
+
+class CompiledMatchRules:
+    """Find the matches for many match rules with a single walk per search directory
+
+    Only the match rules that would otherwise walk a directory tree on their own (such
+    as `**/*.so` or `usr/share/foo/**/*`) are compiled. These are stored in a trie by
+    their (literal) directory. Each search directory is then walked once beneath each
+    top-most directory in the trie and every path is checked against the basename globs
+    of all rules anchored at or above it.
+
+    The matches for each rule are provided in the same order as the rule's own `finditer`
+    would have provided them. Other rules (such as exact matches) are delegated to their
+    `finditer` method.
+
+    The search directories must not change once the matches have been computed for them.
+    """
+
+    __slots__ = ("_match_rules", "_rule_ids", "_trie", "_matches_by_root")
+
+    def __init__(self, match_rules: Iterable[MatchRule]) -> None:
+        self._match_rules: List[MatchRule] = []
+        self._rule_ids: Dict[int, int] = {}
+        self._trie = _MatchRuleTrieNode()
+        self._matches_by_root: Dict[int, Tuple[VP, Dict[int, List[VP]]]] = {}
+        for match_rule in match_rules:
+            if id(match_rule) in self._rule_ids:
+                continue
+            spec = _recursive_match_rule_spec(match_rule)
+            if spec is None:
+                continue
+            directory, basename_glob, path_type = spec
+            rule_id = len(self._match_rules)
+            self._match_rules.append(match_rule)
+            self._rule_ids[id(match_rule)] = rule_id
+            node = self._trie
+            if directory is not None:
+                for part in directory[2:].split("/"):
+                    node = node.children.setdefault(part, _MatchRuleTrieNode())
+            node.rules.append((rule_id, basename_glob, path_type))
+
+    def __len__(self) -> int:
+        return len(self._match_rules)
+
+    def finditer(
+        self,
+        match_rule: MatchRule,
+        fs_root: VP,
+        *,
+        ignore_paths: Optional[Callable[[VP], bool]] = None,
+    ) -> Iterable[VP]:
+        rule_id = self._rule_ids.get(id(match_rule))
+        if rule_id is None:
+            return match_rule.finditer(fs_root, ignore_paths=ignore_paths)
+        matches = self._matches_for(fs_root, rule_id)
+        if ignore_paths is not None:
+            return (p for p in matches if not ignore_paths(p))
+        return iter(matches)
+
+    def _matches_for(self, fs_root: VP, rule_id: int) -> List[VP]:
+        cached = self._matches_by_root.get(id(fs_root))
+        if cached is None:
+            cached = fs_root, self._find_all_matches(fs_root)
+            self._matches_by_root[id(fs_root)] = cached
+        all_matches = cached[1]
+        matches = all_matches.get(rule_id)
+        if matches is None:
+            # The walk did not reach the directory of this rule (for example, because
+            # the directory is reached via a symlink). Let the rule find its own matches.
+            matches = list(self._match_rules[rule_id].finditer(fs_root))
+            all_matches[rule_id] = matches
+        return matches
+
+    def _find_all_matches(self, fs_root: VP) -> Dict[int, List[VP]]:
+        all_matches: Dict[int, List[VP]] = {}
+        for directory, node in self._top_most_anchors():
+            if directory is None:
+                anchor = fs_root
+            else:
+                anchor = _lookup_path(fs_root, directory)
+                if anchor is None or not anchor.is_dir:
+                    continue
+            self._walk_anchor(anchor, node, all_matches)
+        return all_matches
+
+    def _top_most_anchors(
+        self,
+    ) -> Iterator[Tuple[Optional[str], _MatchRuleTrieNode]]:
+        stack: List[Tuple[Optional[str], _MatchRuleTrieNode]] = [(None, self._trie)]
+        while stack:
+            directory, node = stack.pop()
+            if node.rules:
+                yield directory, node
+                continue
+            prefix = directory if directory is not None else "."
+            stack.extend((f"{prefix}/{name}", c) for name, c in node.children.items())
+
+    @staticmethod
+    def _walk_anchor(
+        anchor: VP,
+        anchor_node: _MatchRuleTrieNode,
+        all_matches: Dict[int, List[VP]],
+    ) -> None:
+        buckets = _BasenameGlobBuckets(anchor_node.rules)
+        for rule_id, _, _ in anchor_node.rules:
+            all_matches[rule_id] = []
+        dir_state: Dict[
+            int,
+            Tuple[Optional[_MatchRuleTrieNode], _BasenameGlobBuckets],
+        ] = {}
+        for path in anchor.all_paths():
+            if path is anchor:
+                node: Optional[_MatchRuleTrieNode] = anchor_node
+                path_buckets = buckets
+            else:
+                parent_node, path_buckets = dir_state[id(path.parent_dir)]
+                node = (
+                    parent_node.children.get(path.name)
+                    if parent_node is not None
+                    else None
+                )
+                if node is not None and node.rules and path.is_dir:
+                    path_buckets = _BasenameGlobBuckets(
+                        [*path_buckets.rules, *node.rules]
+                    )
+                    for rule_id, _, _ in node.rules:
+                        all_matches[rule_id] = []
+            if path.is_dir:
+                dir_state[id(path)] = (node, path_buckets)
+            for rule_id in path_buckets.matching_rules(path):
+                all_matches[rule_id].append(path)
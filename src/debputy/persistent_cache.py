@@ -0,0 +1,174 @@
+import functools
+import hashlib
+import json
+import os
+import pickle
+import stat
+import sys
+import tempfile
+from typing import Callable, TypeVar, Sequence, Union, IO, Tuple, Any, Optional
+
+from debputy.util import _debug_log
+from debputy.version import IS_RELEASE_BUILD, __version__
+
+T = TypeVar("T")
+
+# Bump when the format of the cache entries changes
+_CACHE_FORMAT_VERSION = 1
+
+
+@functools.lru_cache(None)
+def _cache_salt() -> bytes:
+    # Unreleased versions can change without changing the version (and resolving the version
+    # of a development build spawns `git`), so their entries are only keyed by the Python version
+    # and the cache format.
+    debputy_version = str(__version__) if IS_RELEASE_BUILD else "development"
+    # Cached YAML documents are instances of the YAML library, which may not be able to
+    # load pickles from other versions of it.
+    from debputy.yaml.compat import YAML_LIBRARY_VERSION
+
+    return (
+        f"{_CACHE_FORMAT_VERSION}:{debputy_version}:{sys.hexversion}:{pickle.HIGHEST_PROTOCOL}"
+        f":{YAML_LIBRARY_VERSION}"
+    ).encode("utf-8")
+
+
+def user_cache_dir() -> str:
+    """The debputy directory in the cache directory of the user (`$XDG_CACHE_HOME`)"""
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    # The XDG base directory specification says relative paths must be ignored
+    if not cache_home or not os.path.isabs(cache_home):
+        cache_home = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "debputy")
+
+
+def _is_trusted(st: os.stat_result) -> bool:
+    # Loading a pickle can run arbitrary code, so only entries that could only have been
+    # written by the current user are loaded.
+    return st.st_uid == os.getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+class PersistentCache:
+    """Cache for (pure) computations that should be reused across debputy invocations
+
+    Entries are stored with `pickle` in the cache directory (usually `user_cache_dir()`).
+    As loading a pickle can run arbitrary code, the cache directory must never be inside
+    a source tree and entries are only loaded when they are owned by the current user
+    and not writable by anyone else. There is one entry per `namespace` and `name`, which
+    is keyed by a digest of the `key_parts`, the debputy version and the Python version.
+    Any entry that cannot be read is treated as a cache miss, so the cache directory can
+    be deleted at any time.
+    """
+
+    __slots__ = ("_cache_dir",)
+
+    _FILE_EXTENSION = "pickle"
+
+    def __init__(self, cache_dir: str) -> None:
+        self._cache_dir = cache_dir
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    def get_or_compute(
+        self,
+        namespace: str,
+        name: str,
+        key_parts: Sequence[Union[str, bytes]],
+        compute: Callable[[], T],
+        *,
+        validate: Optional[Callable[[T], bool]] = None,
+    ) -> T:
+        """Return the cached value for the `key_parts` or compute (and store) it
+
+        :param validate: When provided, a cached value is only used if this returns
+          True for it. This is for values that depend on more than the `key_parts`
+          (such as files that are only known once the value has been computed).
+        """
+        digest = hashlib.sha256(_cache_salt())
+        for key_part in key_parts:
+            if isinstance(key_part, str):
+                key_part = key_part.encode("utf-8")
+            # Length prefix to avoid ambiguity between ("ab", "c") and ("a", "bc")
+            digest.update(len(key_part).to_bytes(8, "little"))
+            digest.update(key_part)
+        key = digest.hexdigest()
+        entry_name = hashlib.sha256(name.encode("utf-8")).hexdigest()
+        entry_path = os.path.join(
+            self._cache_dir,
+            namespace,
+            f"{entry_name}.{self._FILE_EXTENSION}",
+        )
+        try:
+            with open(entry_path, "rb") as fd:
+                if _is_trusted(os.fstat(fd.fileno())) and _is_trusted(
+                    os.stat(os.path.dirname(entry_path))
+                ):
+                    stored_key, value = self._load_entry(fd)
+                    if stored_key == key and (validate is None or validate(value)):
+                        _debug_log(
+                            f"Reusing cached {namespace} for {name} from {entry_path}"
+                        )
+                        return value
+                else:
+                    _debug_log(f"Ignoring untrusted cache entry {entry_path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            # Corrupted or written by an incompatible version. Either way, it will be replaced.
+            _debug_log(f"Ignoring unreadable cache entry {entry_path}: {e}")
+        value = compute()
+        self._store(entry_path, key, value)
+        return value
+
+    def _load_entry(self, fd: IO[bytes]) -> Tuple[str, Any]:
+        return pickle.load(fd)
+
+    def _dump_entry(self, entry: Tuple[str, Any], fd: IO[bytes]) -> None:
+        pickle.dump(entry, fd, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _store(self, entry_path: str, key: str, value: object) -> None:
+        entry_dir = os.path.dirname(entry_path)
+        try:
+            os.makedirs(entry_dir, mode=0o700, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=entry_dir,
+                prefix=".tmp-",
+                delete=False,
+            ) as fd:
+                try:
+                    self._dump_entry((key, value), fd)
+                except BaseException:
+                    os.unlink(fd.name)
+                    raise
+            # Atomic, so concurrent debputy processes never see a partial entry
+            os.replace(fd.name, entry_path)
+        except (
+            OSError,
+            pickle.PicklingError,
+            TypeError,
+            ValueError,
+            AttributeError,
+        ) as e:
+            _debug_log(f"Could not store cache entry {entry_path}: {e}")
+
+
+class JSONPersistentCache(PersistentCache):
+    """Variant of `PersistentCache` that stores the entries as JSON
+
+    This is for values that are plain data (such as the plugin index). Note that the
+    values are returned as they are read back from JSON (such as lists instead of
+    tuples).
+    """
+
+    __slots__ = ()
+
+    _FILE_EXTENSION = "json"
+
+    def _load_entry(self, fd: IO[bytes]) -> Tuple[str, Any]:
+        stored_key, value = json.load(fd)
+        return stored_key, value
+
+    def _dump_entry(self, entry: Tuple[str, Any], fd: IO[bytes]) -> None:
+        fd.write(json.dumps(entry).encode("utf-8"))
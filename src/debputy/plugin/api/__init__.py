@@ -6,6 +6,7 @@ from .spec import (
     DebputyPluginInitializer,
     PackageProcessingContext,
     MetadataAutoDetector,
+    PathMetadataAutoDetector,
     DpkgTriggerType,
     Maintscript,
     VirtualPath,
@@ -15,6 +16,7 @@ from .spec import (
     documented_attr,
     reference_documentation,
     virtual_path_def,
+    detector_path_selector,
     packager_provided_file_reference_documentation,
 )
 
@@ -22,6 +24,7 @@ __all__ = [
     "DebputyPluginInitializer",
     "PackageProcessingContext",
     "MetadataAutoDetector",
+    "PathMetadataAutoDetector",
     "DpkgTriggerType",
     "Maintscript",
     "BinaryCtrlAccessor",
@@ -31,6 +34,7 @@ __all__ = [
     "undocumented_attr",
     "reference_documentation",
     "virtual_path_def",
+    "detector_path_selector",
     "DebputyPluginRuntimeError",
     "DebputyMetadataAccessError",
     "packager_provided_file_reference_documentation",
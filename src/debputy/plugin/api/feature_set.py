@@ -1,5 +1,21 @@
 import dataclasses
-from typing import Dict, List, Tuple, Sequence, Any, Optional, Type
+import functools
+import threading
+from typing import (
+    Dict,
+    List,
+    Tuple,
+    Sequence,
+    Any,
+    Optional,
+    Type,
+    FrozenSet,
+    Mapping,
+    Iterable,
+    Callable,
+    Set,
+    TypeVar,
+)
 
 from debputy.manifest_parser.declarative_parser import ParserGenerator
 from debputy.plugin.api.impl_types import (
@@ -20,6 +36,8 @@ from debputy.plugin.api.parser_tables import (
 )
 from debputy.plugin.debputy.to_be_api_types import BuildSystemRule
 
+K = TypeVar("K")
+V = TypeVar("V")
 
 def _initialize_parser_generator() -> ParserGenerator:
     pg = ParserGenerator()
@@ -33,41 +51,332 @@ def _initialize_parser_generator() -> ParserGenerator:
     return pg
 
 
+def _keys_of(table: Mapping[Any, Any]) -> FrozenSet[str]:
+    return frozenset(k if isinstance(k, str) else _type_name(k) for k in table)
+
+
+def _type_name(t: Any) -> str:
+    if isinstance(t, tuple):
+        return ":".join(_type_name(v) for v in t)
+    return getattr(t, "__qualname__", None) or repr(t)
+
+
+def _manifest_keywords(parser_generator: ParserGenerator) -> FrozenSet[str]:
+    keywords = set()
+    for path, object_parser in parser_generator.dispatchable_object_parsers.items():
+        keywords.update(f"{path}:{k}" for k in object_parser.registered_keywords())
+    for rule_type, table_parser in parser_generator.dispatchable_table_parsers.items():
+        name = _type_name(rule_type)
+        keywords.update(f"{name}:{k}" for k in table_parser.registered_keywords())
+    return frozenset(keywords)
+
+
+def _reorder_by_plugin(
+    table: Dict[K, V],
+    plugin_name_of: Callable[[K], str],
+    positions: Mapping[str, int],
+) -> None:
+    # In place, as the plugin API keeps references to the tables
+    ordered = sorted(
+        table.items(),
+        key=lambda kv: positions.get(plugin_name_of(kv[0]), -1),
+    )
+    table.clear()
+    table.update(ordered)
+
+
 @dataclasses.dataclass(slots=True)
 class PluginProvidedFeatureSet:
+    """The features provided by all loaded plugins
+
+    Plugins can be deferred via `defer_plugin`. A deferred plugin is loaded on first
+    access to any of the feature tables it provides to. Therefore, all access to the
+    feature tables must go via the properties (such as `packager_provided_files`).
+
+    Some features are looked up by their key, and for those a deferred plugin is only
+    loaded when one of its keys is used:
+
+     * Manifest keywords are loaded by the dispatching parsers of the
+       `manifest_parser_generator` when they are used in the manifest.
+     * Packager provided files are loaded via `packager_provided_files_for` for
+       the files present in the `debian` directory.
+     * Manifest variables are loaded via `manifest_variables_for`.
+
+    Deferred plugins are loaded while holding a lock, which readers of the feature
+    tables wait for as long as any plugin is deferred.
+
+    The order of some feature tables determines the order in which the features are
+    applied (such as the package processors). When a deferred plugin is loaded, these
+    tables are reordered to match the load order registered via `register_load_order`,
+    so the result does not depend on which plugins were deferred.
+    """
+
     plugin_data: Dict[str, DebputyPluginMetadata] = dataclasses.field(
         default_factory=dict
     )
-    packager_provided_files: Dict[str, PackagerProvidedFileClassSpec] = (
+    _packager_provided_files: Dict[str, PackagerProvidedFileClassSpec] = (
         dataclasses.field(default_factory=dict)
     )
-    metadata_maintscript_detectors: Dict[str, List[MetadataOrMaintscriptDetector]] = (
+    _metadata_maintscript_detectors: Dict[str, List[MetadataOrMaintscriptDetector]] = (
         dataclasses.field(default_factory=dict)
     )
-    manifest_variables: Dict[str, PluginProvidedManifestVariable] = dataclasses.field(
+    _manifest_variables: Dict[str, PluginProvidedManifestVariable] = dataclasses.field(
         default_factory=dict
     )
-    all_package_processors: Dict[Tuple[str, str], PluginProvidedPackageProcessor] = (
+    _all_package_processors: Dict[Tuple[str, str], PluginProvidedPackageProcessor] = (
         dataclasses.field(default_factory=dict)
     )
-    auto_discard_rules: Dict[str, PluginProvidedDiscardRule] = dataclasses.field(
+    _auto_discard_rules: Dict[str, PluginProvidedDiscardRule] = dataclasses.field(
         default_factory=dict
     )
-    service_managers: Dict[str, ServiceManagerDetails] = dataclasses.field(
+    _service_managers: Dict[str, ServiceManagerDetails] = dataclasses.field(
         default_factory=dict
     )
-    known_packaging_files: Dict[str, PluginProvidedKnownPackagingFile] = (
+    _known_packaging_files: Dict[str, PluginProvidedKnownPackagingFile] = (
         dataclasses.field(default_factory=dict)
     )
-    mapped_types: Dict[Any, PluginProvidedTypeMapping] = dataclasses.field(
+    _mapped_types: Dict[Any, PluginProvidedTypeMapping] = dataclasses.field(
         default_factory=dict
     )
-    manifest_parser_generator: ParserGenerator = dataclasses.field(
+    _manifest_parser_generator: ParserGenerator = dataclasses.field(
         default_factory=_initialize_parser_generator
     )
-    auto_detectable_build_systems: Dict[
+    _auto_detectable_build_systems: Dict[
         Type[BuildSystemRule], PluginProvidedBuildSystemAutoDetection
     ] = dataclasses.field(default_factory=dict)
+    _deferred_plugins: Dict[
+        str, Tuple[Mapping[str, FrozenSet[str]], Callable[[], None]]
+    ] = dataclasses.field(default_factory=dict)
+    _loading_plugins: Set[str] = dataclasses.field(default_factory=set)
+    _plugin_positions: Dict[str, int] = dataclasses.field(default_factory=dict)
+    _deferred_plugins_lock: threading.RLock = dataclasses.field(
+        default_factory=threading.RLock
+    )
+
+    @property
+    def packager_provided_files(self) -> Dict[str, PackagerProvidedFileClassSpec]:
+        self._load_deferred_plugins_for("packager_provided_files")
+        return self._packager_provided_files
+
+    def packager_provided_files_for(
+        self,
+        names: Iterable[str],
+    ) -> Dict[str, PackagerProvidedFileClassSpec]:
+        """The packager provided files relevant for files with the given basenames
+
+        Unlike `packager_provided_files`, this only loads the deferred plugins with a
+        stem that is a (`.`-separated) part of one of the `names`. The result can include
+        stems that are not relevant for any of the `names`.
+        """
+        dotted_names = [f".{n}." for n in names]
+        self._load_deferred_plugins_providing(
+            "packager_provided_files",
+            lambda stem: any(f".{stem}." in n for n in dotted_names),
+        )
+        return self._packager_provided_files
+
+    @property
+    def metadata_maintscript_detectors(
+        self,
+    ) -> Dict[str, List[MetadataOrMaintscriptDetector]]:
+        self._load_deferred_plugins_for("metadata_maintscript_detectors")
+        return self._metadata_maintscript_detectors
+
+    @property
+    def manifest_variables(self) -> Dict[str, PluginProvidedManifestVariable]:
+        self._load_deferred_plugins_for("manifest_variables")
+        return self._manifest_variables
+
+    def manifest_variables_for(
+        self,
+        variable_names: Iterable[str],
+    ) -> Dict[str, PluginProvidedManifestVariable]:
+        """The manifest variables relevant for the given variable names
+
+        Unlike `manifest_variables`, this only loads the deferred plugins providing one
+        of the `variable_names`. The result can include other variables as well.
+        """
+        names = frozenset(variable_names)
+        self._load_deferred_plugins_providing("manifest_variables", names.__contains__)
+        return self._manifest_variables
+
+    @property
+    def all_package_processors(
+        self,
+    ) -> Dict[Tuple[str, str], PluginProvidedPackageProcessor]:
+        self._load_deferred_plugins_for("all_package_processors")
+        return self._all_package_processors
+
+    @property
+    def auto_discard_rules(self) -> Dict[str, PluginProvidedDiscardRule]:
+        self._load_deferred_plugins_for("auto_discard_rules")
+        return self._auto_discard_rules
+
+    @property
+    def service_managers(self) -> Dict[str, ServiceManagerDetails]:
+        self._load_deferred_plugins_for("service_managers")
+        return self._service_managers
+
+    @property
+    def known_packaging_files(self) -> Dict[str, PluginProvidedKnownPackagingFile]:
+        self._load_deferred_plugins_for("known_packaging_files")
+        return self._known_packaging_files
+
+    @property
+    def mapped_types(self) -> Dict[Any, PluginProvidedTypeMapping]:
+        self._load_deferred_plugins_for("mapped_types")
+        return self._mapped_types
+
+    @property
+    def manifest_parser_generator(self) -> ParserGenerator:
+        # Deferred plugins are loaded by the dispatching parsers on use of their keywords
+        return self._manifest_parser_generator
+
+    @property
+    def auto_detectable_build_systems(
+        self,
+    ) -> Dict[Type[BuildSystemRule], PluginProvidedBuildSystemAutoDetection]:
+        self._load_deferred_plugins_for("auto_detectable_build_systems")
+        return self._auto_detectable_build_systems
+
+    def provided_features(self) -> Dict[str, FrozenSet[str]]:
+        """The keys of all loaded features per feature table
+
+        The keys are stems for packager provided files, detector IDs for detectors,
+        keywords for manifest rules, etc. Deferred plugins are not loaded by this
+        method (and therefore not included).
+        """
+        detector_ids = frozenset(
+            f"{plugin_name}:{detector.detector_id}"
+            for plugin_name, detectors in self._metadata_maintscript_detectors.items()
+            for detector in detectors
+        )
+        return {
+            "packager_provided_files": _keys_of(self._packager_provided_files),
+            "metadata_maintscript_detectors": detector_ids,
+            "manifest_variables": _keys_of(self._manifest_variables),
+            "all_package_processors": _keys_of(self._all_package_processors),
+            "auto_discard_rules": _keys_of(self._auto_discard_rules),
+            "service_managers": _keys_of(self._service_managers),
+            "known_packaging_files": _keys_of(self._known_packaging_files),
+            "mapped_types": _keys_of(self._mapped_types),
+            "manifest_parser_generator": _manifest_keywords(
+                self._manifest_parser_generator
+            ),
+            "auto_detectable_build_systems": _keys_of(
+                self._auto_detectable_build_systems
+            ),
+        }
+
+    def register_load_order(self, plugin_names: Iterable[str]) -> None:
+        """Register the order in which the plugins would be loaded without deferral
+
+        Plugins that have already been registered keep their position.
+        """
+        positions = self._plugin_positions
+        for plugin_name in plugin_names:
+            positions.setdefault(plugin_name, len(positions))
+
+    def defer_plugin(
+        self,
+        plugin_name: str,
+        provided_features: Mapping[str, Iterable[str]],
+        loader: Callable[[], None],
+    ) -> None:
+        """Register a plugin to be loaded on first use of one of its features
+
+        :param plugin_name: The name of the plugin
+        :param provided_features: The keys of the features the plugin provides per
+          feature table (in the format of `provided_features()`).
+        :param loader: Loads the plugin. It is called at most once.
+        """
+        if plugin_name in self.plugin_data or plugin_name in self._deferred_plugins:
+            raise ValueError(f"The plugin {plugin_name} has already been registered")
+        features = {
+            feature_table: frozenset(keys)
+            for feature_table, keys in provided_features.items()
+        }
+        self._deferred_plugins[plugin_name] = (features, loader)
+        if "manifest_parser_generator" in features:
+            self._install_deferred_keyword_loaders()
+
+    @property
+    def deferred_plugins(self) -> FrozenSet[str]:
+        return frozenset(self._deferred_plugins)
+
+    def load_deferred_plugins(self) -> None:
+        with self._deferred_plugins_lock:
+            for plugin_name in list(self._deferred_plugins):
+                self._load_deferred_plugin(plugin_name)
+
+    def _install_deferred_keyword_loaders(self) -> None:
+        parser_generator = self._manifest_parser_generator
+        for path, parser in parser_generator.dispatchable_object_parsers.items():
+            parser.deferred_keyword_loader = functools.partial(
+                self._load_deferred_manifest_keywords,
+                path,
+            )
+        for rule_type, parser in parser_generator.dispatchable_table_parsers.items():
+            parser.deferred_keyword_loader = functools.partial(
+                self._load_deferred_manifest_keywords,
+                _type_name(rule_type),
+            )
+
+    def _load_deferred_manifest_keywords(
+        self,
+        parser_name: str,
+        keywords: Optional[Iterable[Any]],
+    ) -> None:
+        if keywords is None:
+            prefix = f"{parser_name}:"
+            matches: Callable[[str], bool] = lambda k: k.startswith(prefix)
+        else:
+            matches = frozenset(f"{parser_name}:{k}" for k in keywords).__contains__
+        self._load_deferred_plugins_providing("manifest_parser_generator", matches)
+
+    def _load_deferred_plugins_for(self, feature_table: str) -> None:
+        self._load_deferred_plugins_providing(feature_table, lambda _: True)
+
+    def _load_deferred_plugins_providing(
+        self,
+        feature_table: str,
+        matches: Callable[[str], bool],
+    ) -> None:
+        if not self._deferred_plugins:
+            return
+        # Plugins remain deferred until they are fully loaded, so readers in other
+        # threads wait here rather than seeing the feature tables while they change.
+        with self._deferred_plugins_lock:
+            for plugin_name, (features, _) in list(self._deferred_plugins.items()):
+                keys = features.get(feature_table)
+                if keys and any(matches(k) for k in keys):
+                    self._load_deferred_plugin(plugin_name)
+
+    def _load_deferred_plugin(self, plugin_name: str) -> None:
+        # The plugin can access the feature tables it provides to while it is loaded
+        if plugin_name in self._loading_plugins:
+            return
+        deferred = self._deferred_plugins.get(plugin_name)
+        if deferred is None:
+            return
+        _, loader = deferred
+        self._loading_plugins.add(plugin_name)
+        try:
+            loader()
+        finally:
+            self._loading_plugins.discard(plugin_name)
+            del self._deferred_plugins[plugin_name]
+            self._restore_load_order()
+
+    def _restore_load_order(self) -> None:
+        positions = self._plugin_positions
+        if not positions:
+            return
+        # Plugins without a registered position were loaded directly (such as the
+        # bundled plugin in tests) and are kept first.
+        _reorder_by_plugin(self.plugin_data, lambda k: k, positions)
+        _reorder_by_plugin(self._metadata_maintscript_detectors, lambda k: k, positions)
+        _reorder_by_plugin(self._all_package_processors, lambda k: k[0], positions)
 
     def package_processors_in_order(self) -> Sequence[PluginProvidedPackageProcessor]:
         order = []
@@ -56,6 +56,7 @@ from debputy.manifest_parser.parser_data import ParserContextData
 from debputy.manifest_parser.tagging_types import TypeMapping
 from debputy.manifest_parser.util import AttributePath
 from debputy.manifest_parser.util import resolve_package_type_selectors
+from debputy.persistent_cache import PersistentCache
 from debputy.plugin.api.feature_set import PluginProvidedFeatureSet
 from debputy.plugin.api.impl_types import (
     DebputyPluginMetadata,
@@ -95,6 +96,8 @@ from debputy.plugin.api.spec import (
     BinaryCtrlAccessor,
     PackageProcessingContext,
     MetadataAutoDetector,
+    PathMetadataAutoDetector,
+    DetectorPathSelector,
     PluginInitializationEntryPoint,
     DebputyPluginInitializer,
     PackageTypeSelector,
@@ -140,10 +143,12 @@ from debputy.util import (
     _error,
     print_command,
     _warn,
+    assume_not_none,
 )
 
 if TYPE_CHECKING:
     from debputy.highlevel_manifest import HighLevelManifest
+    from debputy.manifest_parser.declarative_parser import DeclarativeInputParser
 
 PLUGIN_TEST_SUFFIX = re.compile(r"_(?:t|test|check)(?:_([a-z0-9_]+))?[.]py$")
 
@@ -206,6 +211,7 @@ class DebputyPluginInitializerProvider(DebputyPluginInitializer):
         "_substitution",
         "_unloaders",
         "_load_started",
+        "_generate_parsers_eagerly",
     )
 
     def __init__(
@@ -213,6 +219,8 @@ class DebputyPluginInitializerProvider(DebputyPluginInitializer):
         plugin_metadata: DebputyPluginMetadata,
         feature_set: PluginProvidedFeatureSet,
         substitution: Substitution,
+        *,
+        generate_parsers_eagerly: bool = False,
     ) -> None:
         self._plugin_metadata: DebputyPluginMetadata = plugin_metadata
         self._feature_set = feature_set
@@ -220,6 +228,10 @@ class DebputyPluginInitializerProvider(DebputyPluginInitializer):
         self._substitution = substitution
         self._unloaders: List[Callable[[], None]] = []
         self._load_started = False
+        # When False, the parsers for manifest rules are generated on first use. This
+        # saves time on every load, but mistakes in the rule definitions are then only
+        # reported once the rule is used.
+        self._generate_parsers_eagerly = generate_parsers_eagerly
 
     def unload_plugin(self) -> None:
         if self._load_started:
@@ -278,7 +290,7 @@ class DebputyPluginInitializerProvider(DebputyPluginInitializer):
             PackagerProvidedFileReferenceDocumentation
         ] = None,
     ) -> None:
-        packager_provided_files = self._feature_set.packager_provided_files
+        packager_provided_files = self._feature_set.packager_provided_files_for((stem,))
         existing = packager_provided_files.get(stem)
 
         if format_callback is not None and self._plugin_name != "debputy":
@@ -370,6 +382,41 @@ class DebputyPluginInitializerProvider(DebputyPluginInitializer):
         auto_detector: MetadataAutoDetector,
         *,
         package_type: PackageTypeSelector = "deb",
+    ) -> None:
+        self._register_metadata_detector(
+            auto_detector_id,
+            auto_detector,
+            package_type,
+            None,
+        )
+
+    def path_metadata_detector(
+        self,
+        auto_detector_id: str,
+        auto_detector: PathMetadataAutoDetector,
+        path_selectors: Sequence[DetectorPathSelector],
+        *,
+        package_type: PackageTypeSelector = "deb",
+    ) -> None:
+        path_selectors = tuple(path_selectors)
+        if not all(isinstance(s, DetectorPathSelector) for s in path_selectors):
+            raise ValueError(
+                f"The plugin {self._plugin_name} provided path selectors for {auto_detector_id}"
+                " that were not created via `detector_path_selector`"
+            )
+        self._register_metadata_detector(
+            auto_detector_id,
+            auto_detector,
+            package_type,
+            path_selectors,
+        )
+
+    def _register_metadata_detector(
+        self,
+        auto_detector_id: str,
+        auto_detector: Union[MetadataAutoDetector, PathMetadataAutoDetector],
+        package_type: PackageTypeSelector,
+        path_selectors: Optional[Tuple[DetectorPathSelector, ...]],
     ) -> None:
         if auto_detector_id in self._plugin_detector_ids:
             raise ValueError(
@@ -388,6 +435,7 @@ class DebputyPluginInitializerProvider(DebputyPluginInitializer):
                 plugin_metadata=self._plugin_metadata,
                 applies_to_package_types=package_types,
                 enabled=True,
+                path_selectors=path_selectors,
             )
         )
 
@@ -488,7 +536,7 @@ class DebputyPluginInitializerProvider(DebputyPluginInitializer):
         self._unloaders.append(_unload)
 
     def _check_variable_name(self, variable_name: str) -> None:
-        manifest_variables = self._feature_set.manifest_variables
+        manifest_variables = self._feature_set.manifest_variables_for((variable_name,))
         existing = manifest_variables.get(variable_name)
 
         if existing is not None:
@@ -743,7 +791,7 @@ class DebputyPluginInitializerProvider(DebputyPluginInitializer):
         variable_reference_documentation: Optional[str] = None,
     ) -> None:
         self._check_variable_name(variable_name)
-        manifest_variables = self._feature_set.manifest_variables
+        manifest_variables = self._feature_set.manifest_variables_for((variable_name,))
         try:
             resolved_value = self._substitution.substitute(
                 value, "Plugin initialization"
@@ -908,19 +956,41 @@ class DebputyPluginInitializerProvider(DebputyPluginInitializer):
         else:
             docs = None
 
-        parser = feature_set.manifest_parser_generator.generate_parser(
-            parsed_format,
-            source_content=source_format,
-            inline_reference_documentation=inline_reference_documentation,
-            expected_debputy_integration_mode=expected_debputy_integration_mode,
-            automatic_docs=docs,
-        )
-        dispatching_parser.register_parser(
-            rule_name,
-            parser,
-            wrap_plugin_code(self._plugin_name, handler),
-            self._plugin_metadata,
-        )
+        plugin_name = self._plugin_name
+
+        def _generate_parser() -> "DeclarativeInputParser[PF]":
+            try:
+                return parser_generator.generate_parser(
+                    parsed_format,
+                    source_content=source_format,
+                    inline_reference_documentation=inline_reference_documentation,
+                    expected_debputy_integration_mode=expected_debputy_integration_mode,
+                    automatic_docs=docs,
+                )
+            except PluginBaseError:
+                raise
+            except Exception as e:
+                raise PluginInitializationError(
+                    f"The plugin {plugin_name} provided an invalid definition for the manifest rule"
+                    f" {rule_name!r}: {e}"
+                ) from e
+
+        handler = wrap_plugin_code(plugin_name, handler)
+        if self._generate_parsers_eagerly:
+            dispatching_parser.register_parser(
+                rule_name,
+                _generate_parser(),
+                handler,
+                self._plugin_metadata,
+            )
+        else:
+            dispatching_parser.register_deferred_parser(
+                rule_name,
+                _generate_parser,
+                handler,
+                self._plugin_metadata,
+                inline_reference_documentation=inline_reference_documentation,
+            )
 
         def _unload() -> None:
             raise PluginInitializationError(
@@ -1540,7 +1610,17 @@ def load_plugin_features(
     required_plugins: Optional[Set[str]] = None,
     plugin_feature_set: Optional[PluginProvidedFeatureSet] = None,
     debug_mode: bool = False,
+    plugin_index: Optional[PersistentCache] = None,
 ) -> PluginProvidedFeatureSet:
+    """Load the bundled plugin and the relevant JSON plugins
+
+    When a `plugin_index` is provided, it is used to record which features each JSON
+    plugin provides. On later loads, plugins with an up to date index entry are not
+    imported until one of the features they provide is used, such as one of their
+    manifest keywords or packager provided files (see
+    `PluginProvidedFeatureSet.defer_plugin`). The values of the index must be stored
+    as JSON (see `JSONPersistentCache`).
+    """
     if plugin_feature_set is None:
         plugin_feature_set = PluginProvidedFeatureSet()
     plugins = [plugin_metadata_for_debputys_own_plugin()]
@@ -1569,39 +1649,179 @@ def load_plugin_features(
             plugins.append(plugin_metadata)
             unloadable_plugins.add(plugin_metadata.plugin_name)
 
+    # Deferred plugins are loaded out of order. The feature set uses this to restore the
+    # order of the features that are applied in order.
+    plugin_feature_set.register_load_order(p.plugin_name for p in plugins)
     for plugin_metadata in plugins:
         api = DebputyPluginInitializerProvider(
-            plugin_metadata, plugin_feature_set, substitution
+            plugin_metadata,
+            plugin_feature_set,
+            substitution,
+            generate_parsers_eagerly=debug_mode,
+        )
+        is_unloadable = plugin_metadata.plugin_name in unloadable_plugins
+        index_key = None
+        if plugin_index is not None and not plugin_metadata.is_bundled:
+            index_key = _plugin_index_key(plugin_metadata)
+        if index_key is None:
+            _load_plugin(api, plugin_metadata, is_unloadable, debug_mode)
+            continue
+        _load_or_defer_plugin(
+            api,
+            plugin_metadata,
+            plugin_feature_set,
+            assume_not_none(plugin_index),
+            index_key,
+            is_unloadable,
+            debug_mode,
         )
-        try:
-            api.load_plugin()
-        except PluginBaseError as e:
-            if plugin_metadata.plugin_name not in unloadable_plugins:
-                raise
-            if debug_mode:
-                _warn(
-                    f"The optional plugin {plugin_metadata.plugin_name} failed during load. Re-raising due"
-                    f" to --debug/-d."
-                )
-                raise
-            try:
-                api.unload_plugin()
-            except Exception:
-                _warn(
-                    f"Failed to load optional {plugin_metadata.plugin_name} and an error was raised when trying to"
-                    " clean up after the half-initialized plugin. Re-raising load error as the partially loaded"
-                    " module might have tainted the feature set."
-                )
-                raise e from None
-            else:
-                _warn(
-                    f"The optional plugin {plugin_metadata.plugin_name} failed during load. The plugin was"
-                    f" deactivated. Use debug mode (--debug) to show the stacktrace (the warning will become an error)"
-                )
 
     return plugin_feature_set
 
 
+class _PluginNotIndexableError(Exception):
+    pass
+
+
+def _load_or_defer_plugin(
+    api: DebputyPluginInitializerProvider,
+    plugin_metadata: DebputyPluginMetadata,
+    plugin_feature_set: PluginProvidedFeatureSet,
+    plugin_index: PersistentCache,
+    index_key: List[Union[str, bytes]],
+    is_unloadable: bool,
+    debug_mode: bool,
+) -> None:
+    plugin_name = plugin_metadata.plugin_name
+    was_loaded = False
+
+    def _load_and_index() -> Dict[str, Any]:
+        nonlocal was_loaded
+        was_loaded = True
+        # Otherwise, features of deferred plugins would be attributed to this plugin if
+        # they are loaded while this plugin is being loaded.
+        plugin_feature_set.load_deferred_plugins()
+        before = plugin_feature_set.provided_features()
+        modules_before = set(sys.modules)
+        _load_plugin(api, plugin_metadata, is_unloadable, debug_mode)
+        if plugin_name not in plugin_feature_set.plugin_data:
+            # The plugin failed to load. Keep the warning for the next run.
+            raise _PluginNotIndexableError()
+        after = plugin_feature_set.provided_features()
+        # The features can come from any module the plugin imports (not just the
+        # module with its initializer), so the entry is only valid while none of
+        # them changed.
+        implementation_files = {}
+        for module_name in sys.modules.keys() - modules_before:
+            module_file = getattr(sys.modules[module_name], "__file__", None)
+            if module_file is not None:
+                implementation_files[module_file] = _file_state(module_file)
+        return {
+            "implementation_files": implementation_files,
+            "provided_features": {
+                feature_table: sorted(keys - before[feature_table])
+                for feature_table, keys in after.items()
+                if keys - before[feature_table]
+            },
+        }
+
+    try:
+        index_entry = plugin_index.get_or_compute(
+            "plugin-index",
+            plugin_metadata.plugin_path,
+            index_key,
+            _load_and_index,
+            validate=_is_plugin_index_entry_current,
+        )
+    except _PluginNotIndexableError:
+        return
+    if not was_loaded:
+        plugin_feature_set.defer_plugin(
+            plugin_name,
+            index_entry["provided_features"],
+            functools.partial(
+                _load_plugin, api, plugin_metadata, is_unloadable, debug_mode
+            ),
+        )
+
+
+def _file_state(path: str) -> Optional[str]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _is_plugin_index_entry_current(index_entry: Mapping[str, Any]) -> bool:
+    return all(
+        _file_state(path) == state
+        for path, state in index_entry["implementation_files"].items()
+    )
+
+
+def _plugin_index_key(
+    plugin_metadata: DebputyPluginMetadata,
+) -> Optional[List[Union[str, bytes]]]:
+    plugin_path = plugin_metadata.plugin_path
+    try:
+        with open(plugin_path, "rb") as fd:
+            content = fd.read()
+        raw = json.loads(content)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(raw, dict) or "module" in raw:
+        # The implementation is somewhere in the Python search path. Its mtime cannot
+        # be determined without importing it.
+        return None
+    module_state = "no-module"
+    if "plugin-initializer" in raw:
+        _, module_fs_path = _find_plugin_implementation_file(
+            plugin_metadata.plugin_name,
+            plugin_path,
+        )
+        try:
+            st = os.stat(module_fs_path)
+        except FileNotFoundError:
+            # Falls back to the Python search path (see above)
+            return None
+        module_state = f"{st.st_mtime_ns}:{st.st_size}"
+    return [content, module_state]
+
+
+def _load_plugin(
+    api: DebputyPluginInitializerProvider,
+    plugin_metadata: DebputyPluginMetadata,
+    is_unloadable: bool,
+    debug_mode: bool,
+) -> None:
+    try:
+        api.load_plugin()
+    except PluginBaseError as e:
+        if not is_unloadable:
+            raise
+        if debug_mode:
+            _warn(
+                f"The optional plugin {plugin_metadata.plugin_name} failed during load. Re-raising due"
+                f" to --debug/-d."
+            )
+            raise
+        try:
+            api.unload_plugin()
+        except Exception:
+            _warn(
+                f"Failed to load optional {plugin_metadata.plugin_name} and an error was raised when trying to"
+                " clean up after the half-initialized plugin. Re-raising load error as the partially loaded"
+                " module might have tainted the feature set."
+            )
+            raise e from None
+        else:
+            _warn(
+                f"The optional plugin {plugin_metadata.plugin_name} failed during load. The plugin was"
+                f" deactivated. Use debug mode (--debug) to show the stacktrace (the warning will become an error)"
+            )
+
+
 def find_json_plugin(
     search_dirs: Sequence[str],
     requested_plugin: str,
@@ -1,5 +1,7 @@
 import dataclasses
+import fnmatch
 import os.path
+import re
 from typing import (
     Optional,
     Callable,
@@ -48,6 +50,8 @@ from debputy.plugin.api import (
 from debputy.plugin.api.spec import (
     DebputyPluginInitializer,
     MetadataAutoDetector,
+    PathMetadataAutoDetector,
+    DetectorPathSelector,
     DpkgTriggerType,
     ParserDocumentation,
     PackageProcessor,
@@ -142,11 +146,43 @@ class DebputyPluginMetadata:
         assert self.plugin_initializer is not None
 
 
-@dataclasses.dataclass(slots=True, frozen=True)
+@dataclasses.dataclass(slots=True)
 class PluginProvidedParser(Generic[PF, TP]):
-    parser: "DeclarativeInputParser[PF]"
+    """A parser provided by a plugin along with the handler for its result
+
+    The parser can be given as a `parser_factory` instead, in which case the parser is
+    generated on first access to `parser`.  This avoids generating parsers for rules
+    that the current command never uses.
+    """
+
+    _parser: Optional["DeclarativeInputParser[PF]"]
     handler: Callable[[str, PF, "AttributePath", "ParserContextData"], TP]
     plugin_metadata: DebputyPluginMetadata
+    parser_factory: Optional[Callable[[], "DeclarativeInputParser[PF]"]] = None
+    _inline_reference_documentation: Optional[ParserDocumentation] = None
+
+    @property
+    def parser(self) -> "DeclarativeInputParser[PF]":
+        parser = self._parser
+        if parser is None:
+            parser_factory = self.parser_factory
+            assert parser_factory is not None
+            parser = parser_factory()
+            self._parser = parser
+            self.parser_factory = None
+        return parser
+
+    @property
+    def is_parser_generated(self) -> bool:
+        return self._parser is not None
+
+    @property
+    def inline_reference_documentation(self) -> Optional[ParserDocumentation]:
+        if self._parser is None:
+            # The attribute documentation has not been verified yet, but the rest of the
+            # documentation is available without generating the parser.
+            return self._inline_reference_documentation
+        return self._parser.inline_reference_documentation
 
     def parse(
         self,
@@ -241,21 +277,35 @@ class PackagerProvidedFileClassSpec:
 class MetadataOrMaintscriptDetector:
     plugin_metadata: DebputyPluginMetadata
     detector_id: str
-    detector: MetadataAutoDetector
+    detector: Union[MetadataAutoDetector, PathMetadataAutoDetector]
     applies_to_package_types: FrozenSet[str]
     enabled: bool = True
+    # When set, the detector is a `PathMetadataAutoDetector` that only sees the paths
+    # matching these selectors. Otherwise, it is a classic `MetadataAutoDetector`.
+    path_selectors: Optional[Tuple[DetectorPathSelector, ...]] = None
 
     def applies_to(self, binary_package: BinaryPackage) -> bool:
         return binary_package.package_type in self.applies_to_package_types
 
+    @property
+    def is_path_based(self) -> bool:
+        return self.path_selectors is not None
+
     def run_detector(
         self,
         fs_root: "VirtualPath",
         ctrl: "BinaryCtrlAccessor",
         context: "PackageProcessingContext",
+        *,
+        matched_paths: Optional[Sequence["VirtualPath"]] = None,
     ) -> None:
         try:
-            self.detector(fs_root, ctrl, context)
+            if self.path_selectors is None:
+                self.detector(fs_root, ctrl, context)
+            else:
+                if matched_paths is None:
+                    matched_paths = route_paths_to_detectors(fs_root, [self])[0]
+                self.detector(fs_root, matched_paths, ctrl, context)
         except DebputyFSIsROError as e:
             nv = self.plugin_metadata.plugin_name
             raise PluginAPIViolationError(
@@ -271,6 +321,90 @@ class MetadataOrMaintscriptDetector:
             )
 
 
+_PATH_TYPE_CHECKS: Mapping[str, Callable[["VirtualPath"], bool]] = {
+    "file": lambda p: p.is_file,
+    "dir": lambda p: p.is_dir,
+    "symlink": lambda p: p.is_symlink,
+}
+
+
+def _compile_path_selectors(
+    detector_index: int,
+    path_selectors: Sequence[DetectorPathSelector],
+) -> Iterator[
+    Tuple[
+        int,
+        Optional[str],
+        Optional[Callable[["VirtualPath"], bool]],
+        Optional[Callable[[str], Any]],
+    ]
+]:
+    # Selectors sharing the directory and path type are merged into a single regex, so
+    # detectors looking for many extensions (such as kernel modules) remain cheap.
+    globs_by_key: Dict[Tuple[Optional[str], Optional[str]], List[str]] = {}
+    match_all_keys = set()
+    for selector in path_selectors:
+        key = (selector.directory, selector.path_type)
+        if selector.basename_glob is None:
+            match_all_keys.add(key)
+        globs_by_key.setdefault(key, [])
+        if selector.basename_glob is not None:
+            globs_by_key[key].append(selector.basename_glob)
+
+    for (directory, path_type), globs in globs_by_key.items():
+        name_matcher = None
+        if (directory, path_type) not in match_all_keys:
+            name_matcher = re.compile(
+                "|".join(f"(?:{fnmatch.translate(g)})" for g in globs)
+            ).match
+        dir_prefix = f"{directory}/" if directory is not None else None
+        type_check = _PATH_TYPE_CHECKS[path_type] if path_type is not None else None
+        yield detector_index, dir_prefix, type_check, name_matcher
+
+
+def route_paths_to_detectors(
+    fs_root: "VirtualPath",
+    detectors: Sequence[MetadataOrMaintscriptDetector],
+) -> List[Optional[List["VirtualPath"]]]:
+    """Find the matching paths for all path based detectors in a single traversal of `fs_root`
+
+    The result is aligned with `detectors`. Classic detectors get `None` as they do their own
+    file system traversal.
+    """
+    result: List[Optional[List["VirtualPath"]]] = [
+        [] if d.is_path_based else None for d in detectors
+    ]
+    matchers = [
+        m
+        for idx, d in enumerate(detectors)
+        if d.path_selectors
+        for m in _compile_path_selectors(idx, d.path_selectors)
+    ]
+    if not matchers:
+        return result
+
+    for path in fs_root.all_paths():
+        if path.parent_dir is None:
+            # The root directory is never below any directory and not interesting
+            continue
+        path_name = path.path
+        basename = path.name
+        last_match = -1
+        for detector_index, dir_prefix, type_check, name_matcher in matchers:
+            if detector_index == last_match:
+                # Already matched by another selector for this detector
+                continue
+            if dir_prefix is not None and not path_name.startswith(dir_prefix):
+                continue
+            if name_matcher is not None and not name_matcher(basename):
+                continue
+            if type_check is not None and not type_check(path):
+                continue
+            result[detector_index].append(path)
+            last_match = detector_index
+    return result
+
+
 class DeclarativeInputParser(Generic[TD]):
     @property
     def inline_reference_documentation(self) -> Optional[ParserDocumentation]:
@@ -375,14 +509,28 @@ class DispatchingParserBase(Generic[TP]):
     def __init__(self, manifest_attribute_path_template: str) -> None:
         self.manifest_attribute_path_template = manifest_attribute_path_template
         self._parsers: Dict[str, PluginProvidedParser[Any, TP]] = {}
+        # Loads the deferred plugins providing the given keywords (all keywords on None)
+        self.deferred_keyword_loader: Optional[
+            Callable[[Optional[Iterable[str]]], None]
+        ] = None
+
+    def _load_deferred_keywords(self, keywords: Optional[Iterable[str]] = None) -> None:
+        deferred_keyword_loader = self.deferred_keyword_loader
+        if deferred_keyword_loader is not None:
+            deferred_keyword_loader(keywords)
 
     def is_known_keyword(self, keyword: str) -> bool:
+        if keyword not in self._parsers:
+            self._load_deferred_keywords((keyword,))
         return keyword in self._parsers
 
     def registered_keywords(self) -> Iterable[str]:
+        self._load_deferred_keywords()
         yield from self._parsers
 
     def parser_for(self, keyword: str) -> PluginProvidedParser[Any, TP]:
+        if keyword not in self._parsers:
+            self._load_deferred_keywords((keyword,))
         return self._parsers[keyword]
 
     def register_keyword(
@@ -441,6 +589,31 @@ class DispatchingParserBase(Generic[TP]):
         )
         self._add_parser(keyword, p)
 
+    def register_deferred_parser(
+        self,
+        keyword: Union[str, List[str]],
+        parser_factory: Callable[[], "DeclarativeInputParser[PF]"],
+        handler: Callable[[str, PF, "AttributePath", "ParserContextData"], TP],
+        plugin_metadata: DebputyPluginMetadata,
+        *,
+        inline_reference_documentation: Optional[ParserDocumentation] = None,
+    ) -> None:
+        """Register a parser that is generated on first use
+
+        :param parser_factory: Generates the parser. It is called at most once.
+        :param inline_reference_documentation: The documentation that the generated
+          parser will have. It is used for documenting the keyword without generating
+          the parser.
+        """
+        p = PluginProvidedParser(
+            None,
+            handler,
+            plugin_metadata,
+            parser_factory=parser_factory,
+            _inline_reference_documentation=inline_reference_documentation,
+        )
+        self._add_parser(keyword, p)
+
     def _add_parser(
         self,
         keyword: Union[str, Iterable[str]],
@@ -448,6 +621,9 @@ class DispatchingParserBase(Generic[TP]):
     ) -> None:
         ks = [keyword] if isinstance(keyword, str) else keyword
         for k in ks:
+            if k not in self._parsers:
+                # Any conflict with a deferred plugin must be detected now
+                self._load_deferred_keywords((k,))
             existing_parser = self._parsers.get(k)
             if existing_parser is not None:
                 message = (
@@ -517,7 +693,7 @@ class DispatchingObjectParser(
 
     def _new_parser(self, keyword: str, ppp: "PluginProvidedParser[PF, TP]") -> None:
         super()._new_parser(keyword, ppp)
-        doc = ppp.parser.inline_reference_documentation
+        doc = ppp.inline_reference_documentation
         if doc is None or doc.description is None:
             self._attribute_documentation.append(undocumented_attr(keyword))
         else:
@@ -589,6 +765,11 @@ class DispatchingObjectParser(
         result = {}
         unknown_keys = orig_value.keys() - self._parsers.keys()
         if unknown_keys:
+            self._load_deferred_keywords(unknown_keys)
+            unknown_keys = orig_value.keys() - self._parsers.keys()
+        if unknown_keys:
+            # Include all keywords in the error message
+            self._load_deferred_keywords()
             first_key = next(iter(unknown_keys))
             remaining_valid_attributes = self._parsers.keys() - orig_value.keys()
             if not remaining_valid_attributes:
@@ -736,6 +917,10 @@ class DispatchingTableParser(
             )
         provided_parser = self._parsers.get(key)
         if provided_parser is None:
+            self._load_deferred_keywords((key,))
+            provided_parser = self._parsers.get(key)
+        if provided_parser is None:
+            self._load_deferred_keywords()
             valid_keys = ", ".join(sorted(self._parsers.keys()))
             raise ManifestParseException(
                 f'Unknown or unsupported action "{key}" at {value_path.path}.'
@@ -1202,6 +1387,7 @@ class PackageProcessingContextProvider(PackageProcessingContext):
         "_related_udeb_package",
         "_package_data_table",
         "_cross_check_cache",
+        "_parallelization_limit",
     )
 
     def __init__(
@@ -1210,6 +1396,8 @@ class PackageProcessingContextProvider(PackageProcessingContext):
         binary_package: BinaryPackage,
         related_udeb_package: Optional[BinaryPackage],
         package_data_table: PackageDataTable,
+        *,
+        parallelization_limit: int = 1,
     ) -> None:
         self._manifest = manifest
         self._binary_package = binary_package
@@ -1218,6 +1406,7 @@ class PackageProcessingContextProvider(PackageProcessingContext):
         self._cross_check_cache: Optional[
             Sequence[Tuple[BinaryPackage, "VirtualPath"]]
         ] = None
+        self._parallelization_limit = parallelization_limit
 
     def _package_state_for(
         self,
@@ -1281,6 +1470,10 @@ class PackageProcessingContextProvider(PackageProcessingContext):
             self._cross_check_cache = cache
         return cache
 
+    @property
+    def parallelization_limit(self) -> int:
+        return self._parallelization_limit
+
 
 @dataclasses.dataclass(slots=True, frozen=True)
 class PluginProvidedTrigger:
@@ -31,6 +31,7 @@ from typing import (
 from debian.substvars import Substvars
 
 from debputy import util
+from debputy.elf_util import ElfFileInfo, read_elf_file_info
 from debputy.exceptions import TestPathWithNonExistentFSPathError, PureVirtualPathError
 from debputy.interpreter import Interpreter, extract_shebang_interpreter_from_file
 from debputy.manifest_parser.tagging_types import DebputyDispatchableType
@@ -54,6 +55,16 @@ PluginInitializationEntryPoint = Callable[["DebputyPluginInitializer"], None]
 MetadataAutoDetector = Callable[
     ["VirtualPath", "BinaryCtrlAccessor", "PackageProcessingContext"], None
 ]
+PathMetadataAutoDetector = Callable[
+    [
+        "VirtualPath",
+        Sequence["VirtualPath"],
+        "BinaryCtrlAccessor",
+        "PackageProcessingContext",
+    ],
+    None,
+]
+DetectorPathType = Literal["file", "dir", "symlink"]
 PackageProcessor = Callable[["VirtualPath", None, "PackageProcessingContext"], None]
 DpkgTriggerType = Literal[
     "activate",
@@ -243,6 +254,57 @@ class BuildSystemManifestRuleMetadata(DispatchablePluggableManifestRuleMetadata)
     auto_detection_shadow_build_systems: FrozenSet[str] = frozenset()
 
 
+@dataclasses.dataclass(slots=True, frozen=True)
+class DetectorPathSelector:
+    directory: Optional[str]
+    basename_glob: Optional[str]
+    path_type: Optional[DetectorPathType]
+
+
+def detector_path_selector(
+    directory: Optional[str] = None,
+    /,
+    basename_glob: Optional[str] = None,
+    path_type: Optional[DetectorPathType] = None,
+) -> DetectorPathSelector:
+    """Define which paths a path based metadata detector should see
+
+    A path matches the selector when it matches all the provided criteria. When no criteria
+    are provided, all paths match.
+
+        >>> # Select all regular files named `*.conf` anywhere below `/usr/share/foo`
+        >>> detector_path_selector(
+        ...     "/usr/share/foo",
+        ...     basename_glob="*.conf",
+        ...     path_type="file",
+        ... )
+        DetectorPathSelector(directory='./usr/share/foo', basename_glob='*.conf', path_type='file')
+
+    :param directory: If provided, only paths *below* this directory are selected (the directory itself
+      is not). The directory is given as an absolute path ("/usr/share/foo" or "./usr/share/foo").
+    :param basename_glob: If provided, only paths where the basename matches this glob (as defined by
+      `fnmatch.fnmatchcase`) are selected.
+    :param path_type: If provided, only paths of this type are selected. The type is one of `file`,
+      `dir` and `symlink`.
+    :return: An *opaque* object to be passed to `path_metadata_detector`. While the exact type is provided
+      to aid with typing, the type name and its behaviour is not part of the API.
+    """
+    if path_type is not None and path_type not in get_args(DetectorPathType):
+        raise ValueError(
+            f'Unknown path type "{path_type}". It must be one of:'
+            f' {", ".join(get_args(DetectorPathType))}'
+        )
+    if basename_glob is not None and "/" in basename_glob:
+        raise ValueError(
+            f'The basename glob "{basename_glob}" must not contain a slash'
+        )
+    if directory is not None:
+        directory = util._normalize_path(directory)
+        if directory == ".":
+            directory = None
+    return DetectorPathSelector(directory, basename_glob, path_type)
+
+
 def virtual_path_def(
     path_name: str,
     /,
@@ -356,6 +418,16 @@ class PackageProcessingContext:
     def accessible_package_roots(self) -> Iterable[Tuple[BinaryPackage, "VirtualPath"]]:
         raise NotImplementedError
 
+    @property
+    def parallelization_limit(self) -> int:
+        """How many concurrent workers the processing of this package may use
+
+        This is derived from the `parallel` option in `DEB_BUILD_OPTIONS`. When multiple
+        packages are processed concurrently, the limit is split between them, so the build
+        stays within the requested limit overall.
+        """
+        raise NotImplementedError
+
     # """The source package stanza from `debian/control`"""
     # source_package: SourcePackage
 
@@ -467,6 +539,10 @@ class DebputyPluginInitializer:
         Hooks are run in "some implementation defined order" and should not rely on being run before or after
         any other hook.
 
+        When `debputy-parallel-packages` is in `DEB_BUILD_OPTIONS`, the hook may be run for multiple binary
+        packages at the same time (in different threads). The hook must therefore not mutate state shared
+        between packages (such as module level caches) without its own locking.
+
         The hooks are only applied to packages defined in `debian/control`. Notably, the metadata detector will
         not apply to auto-generated `-dbgsym` packages (as those are not listed explicitly in `debian/control`).
 
@@ -480,6 +556,53 @@ class DebputyPluginInitializer:
         """
         raise NotImplementedError
 
+    def path_metadata_detector(
+        self,
+        auto_detector_id: str,
+        auto_detector: PathMetadataAutoDetector,
+        path_selectors: Sequence[DetectorPathSelector],
+        *,
+        package_type: PackageTypeSelector = "deb",
+    ) -> None:
+        """Provide a pre-assembly hook that only needs to see paths matching the given selectors
+
+        This is a variant of `metadata_or_maintscript_detector` for hooks that would otherwise walk
+        the file system looking for particular paths.  Instead, the hook declares which paths it is
+        interested in via `path_selectors` and `debputy` will find all matching paths for all such
+        hooks in a single pass over the file system.
+
+        The hook is called once per binary package with the file system root, the matching paths
+        (in the same order as `fs_root.all_paths()` would yield them), the control accessor and the
+        processing context.  The hook is also called when no paths matched, so it can see that as
+        well.  Otherwise, the same rules as for `metadata_or_maintscript_detector` apply.  Notably,
+        the two methods share the same namespace for detector IDs.
+
+            >>> def detect_foo_conf_files(  # doctest: +SKIP
+            ...     fs_root: VirtualPath,
+            ...     conf_files: Sequence[VirtualPath],
+            ...     ctrl: BinaryCtrlAccessor,
+            ...     context: PackageProcessingContext,
+            ... ) -> None:
+            ...     if conf_files:
+            ...         ctrl.substvars.add_dependency("misc:Depends", "foo-runtime")
+            >>> api.path_metadata_detector(  # doctest: +SKIP
+            ...     "foo-conf-files",
+            ...     detect_foo_conf_files,
+            ...     [detector_path_selector("/usr/share/foo", basename_glob="*.conf", path_type="file")],
+            ... )
+
+        :param auto_detector_id: A plugin-wide unique ID for this detector. Packagers may use this ID for disabling
+          the detector and accordingly the ID is part of the plugin's API toward the packager.
+        :param auto_detector: The code to be called that will be run at the metadata generation state (once for each
+          binary package).
+        :param path_selectors: The selectors (see `detector_path_selector`) defining which paths the detector
+          should see.  A path is passed to the detector if it matches at least one of the selectors.
+        :param package_type: Which kind of packages this metadata detector applies to.  The package type is generally
+          defined by `Package-Type` field in the binary package. The default is to only run for regular `deb` packages
+          and ignore `udeb` packages.
+        """
+        raise NotImplementedError
+
     def manifest_variable(
         self,
         variable_name: str,
@@ -1403,6 +1526,25 @@ class VirtualPath:
         except (PureVirtualPathError, TestPathWithNonExistentFSPathError):
             return None
 
+    def elf_info(self) -> Optional[ElfFileInfo]:
+        """Determine the ELF details of the file (type, build-id, SONAME, etc.)
+
+        The result is cached by debputy when possible, so multiple plugins asking for the
+        ELF details of the same file will only cause the file to be read once (until its
+        content is replaced).
+
+        Note: this method is only applicable for files (`is_file` is True).
+
+        :return: The ELF details if the file is an ELF executable or shared object. Otherwise,
+          None is returned.
+        """
+        if not self.is_file:
+            raise TypeError("Only files can be ELF files")
+        try:
+            return read_elf_file_info(self)
+        except (PureVirtualPathError, TestPathWithNonExistentFSPathError):
+            return None
+
     def metadata(
         self,
         metadata_type: Type[PMT],
@@ -83,6 +83,7 @@ class PackageProcessingContextTestProvider(PackageProcessingContext):
     related_udeb_package: Optional[BinaryPackage]
     related_udeb_package_version: Optional[str]
     accessible_package_roots: Callable[[], Sequence[Tuple[BinaryPackage, VirtualPath]]]
+    parallelization_limit: int = 1
 
 
 def _initialize_plugin_under_test(
@@ -110,10 +111,12 @@ def _initialize_plugin_under_test(
         )
         debputy_provider.load_plugin()
 
+    # Mistakes in the manifest rules of the plugin under test should fail its tests
     plugin_under_test_provider = DebputyPluginInitializerProvider(
         plugin_metadata,
         feature_set,
         substitution,
+        generate_parsers_eagerly=True,
     )
     plugin_under_test_provider.load_plugin()
 
@@ -282,6 +285,7 @@ def package_metadata_context(
     should_be_acted_on: bool = True,
     related_udeb_fs_root: Optional[VirtualPath] = None,
     accessible_package_roots: Sequence[Tuple[Mapping[str, str], VirtualPath]] = tuple(),
+    parallelization_limit: int = 1,
 ) -> PackageProcessingContext:
     process_table = faked_arch_table(host_arch)
     f = {
@@ -361,6 +365,7 @@ def package_metadata_context(
         binary_package_version=binary_package_version,
         related_udeb_package_version=related_udeb_package_version,
         accessible_package_roots=lambda: apr,
+        parallelization_limit=parallelization_limit,
     )
 
 
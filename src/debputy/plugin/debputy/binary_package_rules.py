@@ -16,6 +16,7 @@ from typing import (
 )
 
 from debputy import DEBPUTY_DOC_ROOT_DIR
+from debputy.deb_compression import COMPRESSIONS
 from debputy.maintscript_snippet import DpkgMaintscriptHelperCommand, MaintscriptSnippet
 from debputy.manifest_parser.base_types import FileSystemExactMatchRule
 from debputy.manifest_parser.tagging_types import DebputyParsedContent
@@ -104,6 +105,50 @@ def register_binary_package_rules(api: DebputyPluginInitializerProvider) -> None
         ),
     )
 
+    api.pluggable_manifest_rule(
+        OPARSER_PACKAGES,
+        "deb-compression",
+        DebCompressionParsedFormat,
+        _parse_deb_compression,
+        inline_reference_documentation=reference_documentation(
+            title="Compression of the deb (`deb-compression`)",
+            description=textwrap.dedent(
+                """\
+                Most packages should be fine with the default compression.  However, you can use the
+                `deb-compression` key to choose a different compression for the `control.tar` and `data.tar`
+                members of the `.deb` (and the related `-dbgsym` package).  An example being:
+
+                    packages:
+                        foo-data:
+                            # Large data package, where fast decompression on install matters more
+                            # than the size of the package.
+                            deb-compression:
+                                algorithm: zstd
+                                level: 19
+                                long-window: true
+
+                The `deb-compression` key is a mapping with the following key/value pairs:
+
+                 * `algorithm` (required): The compression algorithm, which must be one of `xz`, `zstd`,
+                   `gzip` or `none`.
+
+                 * `level` (optional): The compression level. For `zstd` this must be between 1 and 22 and for
+                   the other algorithms between 0 and 9. The default depends on the algorithm.
+
+                 * `long-window` (optional, `zstd` only): When `true`, `zstd` uses a 128 MiB window (`--long=27`)
+                   which can improve the compression of larger packages. The `.deb` is then always assembled by
+                   `debputy` as `dpkg-deb` does not support this option.
+
+                This feature translates into the `-Z`, `-z` (and `-S`) options for `dpkg-deb` and are applied
+                before any options passed via `dh_debputy -- <params>` (so the latter takes precedence). If the
+                latter includes a `-Z` option, this setting is ignored entirely as the level and the `long-window`
+                option are specific to the compression algorithm.
+            """
+            ),
+            reference_documentation_url=f"{DEBPUTY_DOC_ROOT_DIR}/MANIFEST-FORMAT.md#compression-of-the-deb-deb-compression",
+        ),
+    )
+
     api.pluggable_manifest_rule(
         OPARSER_PACKAGES,
         "transformations",
@@ -480,6 +525,32 @@ class BinaryVersionParsedFormat(DebputyParsedContent):
     binary_version: str
 
 
+class DebCompressionParsedFormat(DebputyParsedContent):
+    algorithm: Literal["xz", "zstd", "gzip", "none"]
+    level: NotRequired[int]
+    long_window: NotRequired[bool]
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class DebCompression:
+    algorithm: str
+    level: Optional[int] = None
+    long_window: bool = False
+
+    @property
+    def requires_debputy_assembly(self) -> bool:
+        # dpkg-deb has no support for zstd's long window
+        return self.long_window
+
+    def as_dpkg_deb_args(self) -> List[str]:
+        args = [f"-Z{self.algorithm}"]
+        if self.level is not None:
+            args.append(f"-z{self.level}")
+        if self.long_window:
+            args.append("-Slong")
+        return args
+
+
 class ListParsedFormat(DebputyParsedContent):
     elements: List[Any]
 
@@ -505,6 +576,31 @@ def _parse_binary_version(
     return parsed_data["binary_version"]
 
 
+def _parse_deb_compression(
+    _name: str,
+    parsed_data: DebCompressionParsedFormat,
+    attribute_path: AttributePath,
+    _parser_context: ParserContextData,
+) -> DebCompression:
+    algorithm = parsed_data["algorithm"]
+    level = parsed_data.get("level")
+    long_window = parsed_data.get("long_window", False)
+    compression = COMPRESSIONS[algorithm]
+    if level is not None and level not in compression.compression_levels:
+        levels = compression.compression_levels
+        raise ManifestParseException(
+            f'The compression algorithm "{algorithm}" does not support the compression level {level}'
+            f" (defined at {attribute_path['level'].path}). The level must be between {levels.start}"
+            f" and {levels.stop - 1}."
+        )
+    if long_window and "long" not in compression.allowed_strategies:
+        raise ManifestParseException(
+            f'The compression algorithm "{algorithm}" does not support long-window (defined at'
+            f" {attribute_path['long-window'].path}). Only zstd supports long-window."
+        )
+    return DebCompression(algorithm, level, long_window)
+
+
 def _parse_installation_search_dirs(
     _name: str,
     parsed_data: InstallationSearchDirsParsedFormat,
@@ -16,6 +16,10 @@ from debputy.plugin.debputy.metadata_detectors import (
     translate_capabilities,
     pam_auth_update,
     auto_depends_arch_any_solink,
+    KERNEL_MODULE_PATH_SELECTORS,
+    ICON_PATH_SELECTORS,
+    GSETTINGS_PATH_SELECTORS,
+    ALL_FILES_PATH_SELECTORS,
 )
 from debputy.plugin.debputy.paths import (
     SYSTEMD_TMPFILES_DIR,
@@ -85,18 +89,24 @@ def declare_manifest_variables(api: DebputyPluginInitializer) -> None:
 def register_package_metadata_detectors(api: DebputyPluginInitializer) -> None:
     api.metadata_or_maintscript_detector("systemd-tmpfiles", detect_systemd_tmpfiles)
     api.metadata_or_maintscript_detector("systemd-sysusers", detect_systemd_sysusers)
-    api.metadata_or_maintscript_detector("kernel-modules", detect_kernel_modules)
-    api.metadata_or_maintscript_detector("icon-cache", detect_icons)
-    api.metadata_or_maintscript_detector(
+    api.path_metadata_detector(
+        "kernel-modules",
+        detect_kernel_modules,
+        KERNEL_MODULE_PATH_SELECTORS,
+    )
+    api.path_metadata_detector("icon-cache", detect_icons, ICON_PATH_SELECTORS)
+    api.path_metadata_detector(
         "gsettings-dependencies",
         detect_gsettings_dependencies,
+        GSETTINGS_PATH_SELECTORS,
     )
     api.metadata_or_maintscript_detector("xfonts", detect_xfonts)
     api.metadata_or_maintscript_detector("initramfs-hooks", detect_initramfs_hooks)
     api.metadata_or_maintscript_detector("pycompile-files", detect_pycompile_files)
-    api.metadata_or_maintscript_detector(
+    api.path_metadata_detector(
         "translate-capabilities",
         translate_capabilities,
+        ALL_FILES_PATH_SELECTORS,
     )
     api.metadata_or_maintscript_detector("pam-auth-update", pam_auth_update)
     api.metadata_or_maintscript_detector(
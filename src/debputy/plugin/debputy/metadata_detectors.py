@@ -2,12 +2,13 @@ import itertools
 import os
 import re
 import textwrap
-from typing import Iterable, Iterator
+from typing import Iterable, Iterator, Sequence
 
 from debputy.plugin.api import (
     VirtualPath,
     BinaryCtrlAccessor,
     PackageProcessingContext,
+    detector_path_selector,
 )
 from debputy.plugin.debputy.paths import (
     INITRAMFS_HOOK_DIR,
@@ -28,6 +29,40 @@ KERNEL_MODULE_EXTENSIONS = tuple(
         ("", ".gz", ".bz2", ".xz"),
     )
 )
+KERNEL_MODULE_DIRS = ("./lib/modules", "./usr/lib/modules")
+ICON_DIR = "./usr/share/icons"
+
+KERNEL_MODULE_PATH_SELECTORS = tuple(
+    detector_path_selector(module_dir, basename_glob=f"*{ext}")
+    for module_dir, ext in itertools.product(
+        KERNEL_MODULE_DIRS,
+        KERNEL_MODULE_EXTENSIONS,
+    )
+)
+ICON_PATH_SELECTORS = tuple(
+    detector_path_selector(ICON_DIR, basename_glob=f"*{ext}", path_type="file")
+    for ext in (".png", ".svg", ".xpm", ".icon")
+)
+GSETTINGS_PATH_SELECTORS = tuple(
+    detector_path_selector(
+        GSETTINGS_SCHEMA_DIR,
+        basename_glob=f"*{ext}",
+        path_type="file",
+    )
+    for ext in (".xml", ".override")
+)
+ALL_FILES_PATH_SELECTORS = (detector_path_selector(path_type="file"),)
+
+
+def _top_level_names_below(
+    dir_path: str,
+    paths: Iterable[VirtualPath],
+) -> Iterator[str]:
+    prefix = f"{dir_path}/"
+    for path in paths:
+        p = path.path
+        if p.startswith(prefix):
+            yield p[len(prefix) :].split("/", 1)[0]
 
 
 def detect_initramfs_hooks(
@@ -128,21 +163,25 @@ def detect_systemd_sysusers(
 
 def detect_icons(
     fs_root: VirtualPath,
+    icon_files: Sequence[VirtualPath],
     ctrl: BinaryCtrlAccessor,
     _unused: PackageProcessingContext,
 ) -> None:
-    icons_root_dir = fs_root.lookup("./usr/share/icons")
+    if not icon_files:
+        return
+    icons_root_dir = fs_root.lookup(ICON_DIR)
     if not icons_root_dir:
         return
+    subdirs_with_icons = set(_top_level_names_below(ICON_DIR, icon_files))
     icon_dirs = []
+    # Use the directory order rather than the order of the icon files for the
+    # output to be stable.
     for subdir in icons_root_dir.iterdir:
         if subdir.name in ("gnome", "hicolor"):
             # dh_icons skips this for some reason.
             continue
-        for p in subdir.all_paths():
-            if p.is_file and p.name.endswith((".png", ".svg", ".xpm", ".icon")):
-                icon_dirs.append(subdir.absolute)
-                break
+        if subdir.name in subdirs_with_icons:
+            icon_dirs.append(subdir.absolute)
     if not icon_dirs:
         return
 
@@ -169,43 +208,38 @@ def detect_icons(
 
 
 def detect_gsettings_dependencies(
-    fs_root: VirtualPath,
+    _fs_root: VirtualPath,
+    schema_files: Sequence[VirtualPath],
     ctrl: BinaryCtrlAccessor,
     _unused: PackageProcessingContext,
 ) -> None:
-    gsettings_schema_dir = fs_root.lookup(GSETTINGS_SCHEMA_DIR)
-    if not gsettings_schema_dir:
-        return
-
-    for path in gsettings_schema_dir.all_paths():
-        if path.is_file and path.name.endswith((".xml", ".override")):
-            ctrl.substvars.add_dependency(
-                "misc:Depends", "dconf-gsettings-backend | gsettings-backend"
-            )
-            break
+    if schema_files:
+        ctrl.substvars.add_dependency(
+            "misc:Depends", "dconf-gsettings-backend | gsettings-backend"
+        )
 
 
 def detect_kernel_modules(
     fs_root: VirtualPath,
+    module_paths: Sequence[VirtualPath],
     ctrl: BinaryCtrlAccessor,
     _unused: PackageProcessingContext,
 ) -> None:
-    for prefix in [".", "./usr"]:
-        module_root_dir = fs_root.lookup(f"{prefix}/lib/modules")
+    if not module_paths:
+        return
+    for module_dir in KERNEL_MODULE_DIRS:
+        module_root_dir = fs_root.lookup(module_dir)
 
         if not module_root_dir:
             continue
 
-        module_version_dirs = []
-
-        for module_version_dir in module_root_dir.iterdir:
-            if not module_version_dir.is_dir:
-                continue
-
-            for fs_path in module_version_dir.all_paths():
-                if fs_path.name.endswith(KERNEL_MODULE_EXTENSIONS):
-                    module_version_dirs.append(module_version_dir.name)
-                    break
+        versions_with_modules = set(_top_level_names_below(module_dir, module_paths))
+        module_version_dirs = [
+            module_version_dir.name
+            for module_version_dir in module_root_dir.iterdir
+            if module_version_dir.is_dir
+            and module_version_dir.name in versions_with_modules
+        ]
 
         for module_version in module_version_dirs:
             module_version_escaped = ctrl.maintscript.escape_shell_words(module_version)
@@ -405,15 +439,14 @@ def detect_pycompile_files(
 
 
 def translate_capabilities(
-    fs_root: VirtualPath,
+    _fs_root: VirtualPath,
+    all_files: Sequence[VirtualPath],
     ctrl: BinaryCtrlAccessor,
     _context: PackageProcessingContext,
 ) -> None:
     caps = []
     maintscript = ctrl.maintscript
-    for p in fs_root.all_paths():
-        if not p.is_file:
-            continue
+    for p in all_files:
         metadata_ref = p.metadata(DebputyCapability)
         capability = metadata_ref.value
         if capability is None:
@@ -1,13 +1,33 @@
+import codecs
 import contextlib
+import dataclasses
 import functools
 import gzip
 import os
 import re
+import shutil
 import subprocess
+import tempfile
 from contextlib import ExitStack
-from typing import Optional, Iterator, IO, Any, List, Dict, Callable, Union
+from typing import (
+    Optional,
+    Iterator,
+    IO,
+    Any,
+    List,
+    Callable,
+    Union,
+    Tuple,
+    Iterable,
+)
 
+from debputy.compression_util import (
+    GzipBlockCompressor,
+    ParallelCompressionWriter,
+    compress_to_bytes,
+)
 from debputy.plugin.api import VirtualPath
+from debputy.plugin.api.spec import PackageProcessingContext
 from debputy.util import (
     _error,
     xargs,
@@ -16,6 +36,8 @@ from debputy.util import (
     assume_not_none,
     print_command,
     _debug_log,
+    generated_content_dir,
+    run_in_parallel,
 )
 
 
@@ -33,13 +55,12 @@ _SO_LINK_RE = re.compile(rb"[.]so\s+(.*)\s*")
 _LA_DEP_LIB_RE = re.compile(rb"'.+'")
 
 
-def _detect_so_link(path: VirtualPath) -> Optional[str]:
+def _detect_so_link(lines: Iterable[bytes]) -> Optional[str]:
     so_link_re = _SO_LINK_RE
-    with _open_maybe_gzip(path) as fd:
-        for line in fd:
-            m = so_link_re.search(line)
-            if m:
-                return m.group(1).decode("utf-8")
+    for line in lines:
+        m = so_link_re.search(line)
+        if m:
+            return m.group(1).decode("utf-8")
     return None
 
 
@@ -59,6 +80,10 @@ def _replace_with_symlink(path: VirtualPath, so_link_target: str) -> None:
     parent_dir.add_symlink(path.name, adjusted_target)
 
 
+def _parallelization_limit(context: Optional[PackageProcessingContext]) -> int:
+    return context.parallelization_limit if context is not None else 1
+
+
 @functools.lru_cache(1)
 def _has_man_recode() -> bool:
     # Ideally, we would just use shutil.which or something like that.
@@ -83,32 +108,115 @@ def _has_man_recode() -> bool:
     return True
 
 
-def process_manpages(fs_root: VirtualPath, _unused1: Any, _unused2: Any) -> None:
-    man_dir = fs_root.lookup("./usr/share/man")
-    if not man_dir:
-        return
-
-    re_encode = []
-    for path in (p for p in man_dir.all_paths() if p.is_file and p.has_fs_path):
-        size = path.size
-        if size == 0:
-            continue
-        so_link_target = None
-        if size <= 1024:
-            # debhelper has a 1024 byte guard on the basis that ".so file tend to be small".
-            # That guard worked well for debhelper, so lets keep it for now on that basis alone.
-            so_link_target = _detect_so_link(path)
+# The legacy encoding of manpages without a coding declaration that are not valid UTF-8.
+# This is the subset of the man-db table, where the language implies a single well-known
+# encoding. Other languages are left to `man-recode`.
+_MANPAGE_LEGACY_ENCODINGS = {
+    **{
+        lang: "iso-8859-1"
+        for lang in (
+            "",
+            "C",
+            "POSIX",
+            "en",
+            "da",
+            "de",
+            "es",
+            "fi",
+            "fr",
+            "ga",
+            "gl",
+            "id",
+            "is",
+            "it",
+            "nb",
+            "nl",
+            "nn",
+            "no",
+            "pt",
+            "sv",
+        )
+    },
+    **{lang: "iso-8859-2" for lang in ("cs", "hr", "hu", "pl", "ro", "sk", "sl")},
+    "el": "iso-8859-7",
+    "tr": "iso-8859-9",
+    "ru": "koi8-r",
+    "uk": "koi8-u",
+    "ja": "euc-jp",
+    "ko": "euc-kr",
+    "zh_CN": "gbk",
+    "zh_TW": "big5",
+}
+_MANPAGE_CODING_DECLARATION_RE = re.compile(rb"""^[.']\\".*-\*-.*\bcoding:""")
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class _ManpageRecodeResult:
+    so_link_target: Optional[str] = None
+    # The new (possibly compressed) content of the manpage. None if it is unchanged.
+    new_content: Optional[bytes] = None
+    # If True, the page must be recoded via `man-recode`
+    needs_man_recode: bool = False
+
+
+def _manpage_legacy_encoding(man_dir: VirtualPath, path: VirtualPath) -> Optional[str]:
+    relative_path = os.path.relpath(path.path, man_dir.path)
+    lang_dir = relative_path.split("/", 1)[0]
+    if lang_dir.startswith("man"):
+        lang_dir = ""
+    lang, _, charset = lang_dir.partition(".")
+    if charset:
+        # Directories like `fr.UTF-8` or `ja.eucJP` name the encoding explicitly
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            return None
+    encoding = _MANPAGE_LEGACY_ENCODINGS.get(lang)
+    if encoding is None and "_" in lang and not lang.startswith("zh_"):
+        encoding = _MANPAGE_LEGACY_ENCODINGS.get(lang.split("_", 1)[0])
+    return encoding
+
+
+def _recode_manpage(man_dir: VirtualPath, path: VirtualPath) -> _ManpageRecodeResult:
+    is_compressed = path.name.endswith(".gz")
+    with _open_maybe_gzip(path) as fd:
+        content = fd.read()
+    if path.size <= 1024:
+        # debhelper has a 1024 byte guard on the basis that ".so file tend to be small".
+        # That guard worked well for debhelper, so lets keep it for now on that basis alone.
+        so_link_target = _detect_so_link(content.splitlines(keepends=True))
         if so_link_target:
-            _replace_with_symlink(path, so_link_target)
-        else:
-            re_encode.append(path)
+            return _ManpageRecodeResult(so_link_target=so_link_target)
+
+    if _MANPAGE_CODING_DECLARATION_RE.match(content):
+        # man-recode rewrites the declaration as well; leave that to the real tool.
+        return _ManpageRecodeResult(needs_man_recode=True)
+    try:
+        content.decode("utf-8")
+        new_content = None
+    except UnicodeDecodeError:
+        # Same as man-recode: UTF-8 first and then the legacy encoding for the language
+        encoding = _manpage_legacy_encoding(man_dir, path)
+        if encoding is None:
+            return _ManpageRecodeResult(needs_man_recode=True)
+        try:
+            new_content = content.decode(encoding).encode("utf-8")
+        except UnicodeDecodeError:
+            return _ManpageRecodeResult(needs_man_recode=True)
+    if is_compressed:
+        # Recompress to ensure a reproducible gzip header (like `gzip -9n`)
+        new_content = compress_to_bytes(
+            GzipBlockCompressor(9),
+            new_content if new_content is not None else content,
+        )
+    return _ManpageRecodeResult(new_content=new_content)
 
-    if not re_encode or not _has_man_recode():
-        return
 
+def _man_recode(manpages_to_recode: List[VirtualPath]) -> None:
     with ExitStack() as manager:
         manpages = [
-            manager.enter_context(p.replace_fs_path_content()) for p in re_encode
+            manager.enter_context(p.replace_fs_path_content())
+            for p in manpages_to_recode
         ]
         static_cmd = ["man-recode", "--to-code", "UTF-8", "--suffix", ".encoded"]
         for cmd in xargs(static_cmd, manpages):
@@ -128,28 +236,49 @@ def process_manpages(fs_root: VirtualPath, _unused1: Any, _unused2: Any) -> None
             dest_name = manpage
             if dest_name.endswith(".gz"):
                 encoded_name = dest_name[:-3] + ".encoded"
+                _debug_log(f"Recompressing {encoded_name} into {dest_name}")
+                with open(encoded_name, "rb") as fd:
+                    content = fd.read()
                 with open(dest_name, "wb") as out:
-                    _debug_log(
-                        f"Recompressing {dest_name} via gzip -9nc {escape_shell(encoded_name)}"
-                    )
-                    try:
-                        subprocess.check_call(
-                            [
-                                "gzip",
-                                "-9nc",
-                                encoded_name,
-                            ],
-                            stdin=subprocess.DEVNULL,
-                            stdout=out,
-                        )
-                    except subprocess.CalledProcessError:
-                        _error(
-                            f"The command {escape_shell('gzip', '-nc', f'{encoded_name}')} > {dest_name} failed!"
-                        )
+                    out.write(compress_to_bytes(GzipBlockCompressor(9), content))
+                os.unlink(encoded_name)
             else:
                 os.rename(f"{dest_name}.encoded", manpage)
 
 
+def process_manpages(
+    fs_root: VirtualPath,
+    _unused: Any,
+    context: Optional[PackageProcessingContext],
+) -> None:
+    man_dir = fs_root.lookup("./usr/share/man")
+    if not man_dir:
+        return
+
+    manpages = [
+        p for p in man_dir.all_paths() if p.is_file and p.has_fs_path and p.size > 0
+    ]
+    # The pages are read, decoded and recompressed on a thread pool. The file system is only
+    # modified afterwards from this thread.
+    results = run_in_parallel(
+        functools.partial(_recode_manpage, man_dir),
+        manpages,
+        parallelization_limit=_parallelization_limit(context),
+    )
+    needs_man_recode = []
+    for path, result in zip(manpages, results):
+        if result.so_link_target:
+            _replace_with_symlink(path, result.so_link_target)
+        elif result.needs_man_recode:
+            needs_man_recode.append(path)
+        elif result.new_content is not None:
+            with path.replace_fs_path_content() as fs_path, open(fs_path, "wb") as fd:
+                fd.write(result.new_content)
+
+    if needs_man_recode and _has_man_recode():
+        _man_recode(needs_man_recode)
+
+
 def _filter_compress_paths() -> Callable[[VirtualPath], Iterator[VirtualPath]]:
     ignore_dir_basenames = {
         "_sources",
@@ -256,25 +385,55 @@ def _find_compressable_paths(fs_root: VirtualPath) -> Iterator[VirtualPath]:
         )
 
 
-def apply_compression(fs_root: VirtualPath, _unused1: Any, _unused2: Any) -> None:
+def _gzip_file(path: VirtualPath, output_dir: str) -> Tuple[str, int]:
+    # Equivalent to `gzip -9nc`: The gzip header has no name and a zero mtime, so the
+    # output is reproducible.
+    fd, gz_fs_path = tempfile.mkstemp(dir=output_dir, suffix=f"__{path.name}.gz")
+    try:
+        with (
+            open(fd, "wb") as output_fd,
+            ParallelCompressionWriter(GzipBlockCompressor(9), output_fd) as writer,
+            open(path.fs_path, "rb") as input_fd,
+        ):
+            shutil.copyfileobj(input_fd, writer, 1024 * 1024)
+    except OSError as e:
+        _error(f"The compression of {path.path} failed: {e}")
+    return gz_fs_path, os.path.getsize(gz_fs_path)
+
+
+def apply_compression(
+    fs_root: VirtualPath,
+    _unused1: Any,
+    context: Optional[PackageProcessingContext],
+) -> None:
     # TODO: Support hardlinks
-    compressed_files: Dict[str, str] = {}
-    for path in _find_compressable_paths(fs_root):
+    paths = list(_find_compressable_paths(fs_root))
+    output_dir = generated_content_dir()
+    # zlib releases the GIL while compressing, so the files are compressed via a thread pool.
+    # The file system is only modified afterwards from this thread.
+    compressed = run_in_parallel(
+        functools.partial(_gzip_file, output_dir=output_dir),
+        paths,
+        parallelization_limit=_parallelization_limit(context),
+    )
+    bytes_saved = 0
+    for path, (gz_fs_path, compressed_size) in zip(paths, compressed):
         parent_dir = assume_not_none(path.parent_dir)
-        with parent_dir.add_file(f"{path.name}.gz", mtime=path.mtime) as new_file, open(
-            new_file.fs_path, "wb"
-        ) as fd:
-            try:
-                subprocess.check_call(["gzip", "-9nc", path.fs_path], stdout=fd)
-            except subprocess.CalledProcessError:
-                full_command = f"gzip -9nc {escape_shell(path.fs_path)} > {escape_shell(new_file.fs_path)}"
-                _error(
-                    f"The compression of {path.path} failed. Please review the error message from gzip to"
-                    f" understand what went wrong.  Full command was: {full_command}"
-                )
-            compressed_files[path.path] = new_file.path
+        bytes_saved += path.size - compressed_size
+        new_file = parent_dir.insert_file_from_fs_path(
+            f"{path.name}.gz",
+            gz_fs_path,
+            require_copy_on_write=False,
+        )
+        new_file.mtime = path.mtime
         del parent_dir[path.name]
 
+    if paths:
+        package_desc = f" in {context.binary_package.name}" if context else ""
+        _info(
+            f"Compressed {len(paths)} files{package_desc} with gzip, saving {bytes_saved} bytes"
+        )
+
     all_remaining_symlinks = {p.path: p for p in fs_root.all_paths() if p.is_symlink}
     changed = True
     while changed:
@@ -206,7 +206,7 @@ class SubstitutionImpl(Substitution):
         plugin_feature_set = self._plugin_feature_set
         if (
             plugin_feature_set is not None
-            and key in plugin_feature_set.manifest_variables
+            and key in plugin_feature_set.manifest_variables_for((key,))
         ):
             return VariableNameState.DEFINED
         if key.startswith("env:"):
@@ -239,12 +239,14 @@ class SubstitutionImpl(Substitution):
                 p._mark_used(variable_name)
                 break
             plugin_feature_set = p._plugin_feature_set
+            provided_var = None
+            if plugin_feature_set is not None:
+                provided_var = plugin_feature_set.manifest_variables_for(
+                    (variable_name,)
+                ).get(variable_name)
             if (
-                plugin_feature_set is not None
-                and variable_name in plugin_feature_set.manifest_variables
-                and not plugin_feature_set.manifest_variables[
-                    variable_name
-                ].is_documentation_placeholder
+                provided_var is not None
+                and not provided_var.is_documentation_placeholder
             ):
                 p._mark_used(variable_name)
                 break
@@ -271,7 +273,7 @@ class SubstitutionImpl(Substitution):
             return static_variables[key]
         plugin_feature_set = self._plugin_feature_set
         if plugin_feature_set is not None:
-            provided_var = plugin_feature_set.manifest_variables.get(key)
+            provided_var = plugin_feature_set.manifest_variables_for((key,)).get(key)
             if (
                 provided_var is not None
                 and not provided_var.is_documentation_placeholder
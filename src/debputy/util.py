@@ -1,5 +1,8 @@
 import argparse
 import collections
+import concurrent.futures
+import errno
+import fcntl
 import functools
 import glob
 import logging
@@ -8,6 +11,7 @@ import re
 import shutil
 import subprocess
 import sys
+import threading
 import time
 from itertools import zip_longest
 from pathlib import Path
@@ -28,10 +32,9 @@ from typing import (
     List,
     Mapping,
     Any,
+    Callable,
 )
 
-from debian.deb822 import Deb822
-
 from debputy.architecture_support import DpkgArchitectureBuildProcessValuesTable
 from debputy.exceptions import DebputySubstitutionError
 from debputy.types import EnvironmentModification
@@ -74,6 +77,7 @@ if TYPE_CHECKING:
 
 
 T = TypeVar("T")
+R = TypeVar("R")
 
 
 SLASH_PRUNE = re.compile("//+")
@@ -190,6 +194,46 @@ def ensure_dir(path: str) -> None:
         os.makedirs(path, mode=0o755, exist_ok=True)
 
 
+# Not exposed by the fcntl module before Python 3.12
+_FICLONE = getattr(fcntl, "FICLONE", 0x40049409)
+_COPY_FALLBACK_ERRNOS = frozenset(
+    {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTTY}
+)
+
+
+def clone_or_copy_file(source: str, dest: str) -> None:
+    """Copy the content of `source` into `dest` (like `cp --reflink=auto`)
+
+    The file is cloned via the `FICLONE` ioctl if the file system supports it.
+    Otherwise, the content is copied via `os.copy_file_range` (which lets the
+    kernel copy the data without going through user space) with a fallback to
+    a regular copy.
+    """
+    with open(source, "rb") as source_fd:
+        mode = os.fstat(source_fd.fileno()).st_mode & 0o777
+        dest_fileno = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        with open(dest_fileno, "wb") as dest_fd:
+            try:
+                fcntl.ioctl(dest_fileno, _FICLONE, source_fd.fileno())
+                return
+            except OSError as e:
+                if e.errno not in _COPY_FALLBACK_ERRNOS:
+                    raise
+            copied = 0
+            try:
+                while True:
+                    n = os.copy_file_range(
+                        source_fd.fileno(), dest_fileno, 1024 * 1024 * 1024
+                    )
+                    if n == 0:
+                        return
+                    copied += n
+            except OSError as e:
+                if copied or e.errno not in _COPY_FALLBACK_ERRNOS:
+                    raise
+            shutil.copyfileobj(source_fd, dest_fd, 1024 * 1024)
+
+
 def _clean_path(orig_p: str) -> str:
     p = SLASH_PRUNE.sub("/", orig_p)
     if "." in p:
@@ -486,6 +530,8 @@ def resolve_source_date_epoch(
 
 
 def compute_output_filename(control_root_dir: str, is_udeb: bool) -> str:
+    from debian.deb822 import Deb822
+
     with open(os.path.join(control_root_dir, "control"), "rt") as fd:
         control_file = Deb822(fd)
 
@@ -531,6 +577,7 @@ def scratch_dir(*, create_if_not_exists: bool = True) -> str:
 
 
 _RUNTIME_CONTAINER_DIR_KEY: Optional[str] = None
+_RUNTIME_CONTAINER_DIR_LOCK = threading.Lock()
 
 
 def generated_content_dir(
@@ -539,22 +586,25 @@ def generated_content_dir(
     subdir_key: Optional[str] = None,
 ) -> str:
     global _RUNTIME_CONTAINER_DIR_KEY
-    container_dir = _RUNTIME_CONTAINER_DIR_KEY
-    first_run = False
-
-    if container_dir is None:
-        first_run = True
-        container_dir = f"_pb-{os.getpid()}"
-        _RUNTIME_CONTAINER_DIR_KEY = container_dir
-
-    directory = os.path.join(scratch_dir(), container_dir)
-
-    if first_run and os.path.isdir(directory):
-        # In the unlikely case there is a re-run with exactly the same pid, `debputy` should not
-        # see "stale" data.
-        # TODO: Ideally, we would always clean up this directory on failure, but `atexit` is not
-        #  reliable enough for that and we do not have an obvious hook for it.
-        shutil.rmtree(directory)
+    # Packages can be assembled concurrently, so ensure only one thread does the
+    # first run clean up (and no thread uses the directory before that is done).
+    with _RUNTIME_CONTAINER_DIR_LOCK:
+        container_dir = _RUNTIME_CONTAINER_DIR_KEY
+        first_run = False
+
+        if container_dir is None:
+            first_run = True
+            container_dir = f"_pb-{os.getpid()}"
+            _RUNTIME_CONTAINER_DIR_KEY = container_dir
+
+        directory = os.path.join(scratch_dir(), container_dir)
+
+        if first_run and os.path.isdir(directory):
+            # In the unlikely case there is a re-run with exactly the same pid, `debputy` should not
+            # see "stale" data.
+            # TODO: Ideally, we would always clean up this directory on failure, but `atexit` is not
+            #  reliable enough for that and we do not have an obvious hook for it.
+            shutil.rmtree(directory)
 
     directory = os.path.join(
         directory,
@@ -769,6 +819,75 @@ def grouper(
         raise ValueError("Expected fill, strict, or ignore")
 
 
+def worker_count(parallelization_limit: int, work_item_count: int) -> int:
+    """Number of workers to use for a given number of work items
+
+    The result is bounded by the parallelization limit (usually from `DEB_BUILD_OPTIONS`),
+    the number of available CPUs and the number of work items.
+    """
+    cpu_count = os.cpu_count() or 1
+    return max(1, min(parallelization_limit, cpu_count, work_item_count))
+
+
+PARALLEL_PACKAGES_BUILD_OPTION = "debputy-parallel-packages"
+
+
+def package_parallelization_limits(
+    deb_build_options: Mapping[str, Optional[str]],
+    parallelization_limit: int,
+    package_count: int,
+) -> Tuple[int, int]:
+    """Split the parallelization limit between the packages and the work within each package
+
+    Binary packages are only processed concurrently when `debputy-parallel-packages` is
+    in `DEB_BUILD_OPTIONS`. This runs plugin provided code (such as metadata detectors)
+    for different packages at the same time, so it is opt-in. Otherwise, the packages
+    are processed one at a time and the work within each package gets the full limit.
+
+    :return: A tuple of the limit for processing packages concurrently and the limit
+      for the work within each package.
+    """
+    if PARALLEL_PACKAGES_BUILD_OPTION not in deb_build_options:
+        return 1, parallelization_limit
+    package_limit = worker_count(parallelization_limit, package_count)
+    return package_limit, max(1, parallelization_limit // package_limit)
+
+
+def run_in_parallel(
+    func: Callable[[T], R],
+    work_items: Iterable[T],
+    *,
+    parallelization_limit: int,
+) -> List[R]:
+    """Apply `func` to all work items using a bounded thread pool
+
+    The results are returned in the same order as the work items, so the caller can
+    rely on the result being deterministic regardless of the order in which the work
+    items completed.
+
+    When the parallelization limit is 1 (or there is at most one work item), the work
+    is done in the calling thread without any thread pool.
+
+    The first exception raised by `func` (in work item order) is re-raised in the calling
+    thread. This includes the `SystemExit` raised by `_error`, so errors are reported the
+    same way as if the work had been done sequentially. Pending work items are cancelled
+    on error.
+    """
+    items = work_items if isinstance(work_items, list) else list(work_items)
+    workers = worker_count(parallelization_limit, len(items))
+    if workers < 2:
+        return [func(item) for item in items]
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(func, item) for item in items]
+        results = [f.result() for f in futures]
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+    return results
+
+
 _LOGGING_SET_UP = False
 
 
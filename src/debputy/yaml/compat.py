@@ -7,13 +7,21 @@ __all__ = [
     "CommentedBase",
     "CommentedMap",
     "CommentedSeq",
+    "YAML_LIBRARY_VERSION",
 ]
 
 try:
+    import ruyaml as _yaml_library
     from ruyaml import YAML, Node
     from ruyaml.comments import LineCol, CommentedBase, CommentedMap, CommentedSeq
     from ruyaml.error import YAMLError, MarkedYAMLError
 except (ImportError, ModuleNotFoundError):
+    import ruamel.yaml as _yaml_library  # type: ignore
     from ruamel.yaml import YAML, Node  # type: ignore
     from ruamel.yaml.comments import LineCol, CommentedBase, CommentedMap, CommentedSeq  # type: ignore
     from ruamel.yaml.error import YAMLError, MarkedYAMLError  # type: ignore
+
+# The name and version of the YAML library in use
+YAML_LIBRARY_VERSION = (
+    f"{_yaml_library.__name__}:{getattr(_yaml_library, '__version__', 'unknown')}"
+)
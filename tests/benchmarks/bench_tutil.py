@@ -0,0 +1,55 @@
+import gc
+import os
+import time
+import tracemalloc
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def timed(label: str, func: Callable[[], T], *, repeat: int = 1) -> T:
+    """Run `func` `repeat` times and report the best wall clock time
+
+    Run pytest with `-s` to see the reported numbers.
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    print(f"\n{label}: {best:.3f}s (best of {repeat})")
+    return result
+
+
+def _resident_set_size() -> int:
+    with open("/proc/self/statm") as fd:
+        resident_pages = int(fd.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def measured_memory(label: str, func: Callable[[], T], *, unit_count: int) -> T:
+    """Run `func` once and report how much memory its (retained) result uses
+
+    Both the traced Python allocations and the growth of the resident set size are
+    reported per unit (such as per path). Run pytest with `-s` to see the reported
+    numbers.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        rss_before = _resident_set_size()
+        traced_before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        gc.collect()
+        traced = tracemalloc.get_traced_memory()[0] - traced_before
+        rss = _resident_set_size() - rss_before
+    finally:
+        tracemalloc.stop()
+    print(
+        f"\n{label}: {traced / unit_count:.0f} bytes traced,"
+        f" {rss / unit_count:.0f} bytes RSS per unit ({unit_count} units)"
+    )
+    return result
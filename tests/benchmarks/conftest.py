@@ -0,0 +1,11 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def require_benchmarks_enabled() -> None:
+    # The benchmarks are slow and their results are only useful when compared
+    # between runs on the same machine, so they are opt-in.
+    if os.environ.get("DEBPUTY_RUN_BENCHMARKS") != "1":
+        pytest.skip("Benchmarks only run with DEBPUTY_RUN_BENCHMARKS=1")
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import sysconfig
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from debputy.commands import deb_packer
+from debputy.intermediate_manifest import TarMember, PathType
+
+from benchmarks.bench_tutil import timed
+
+MTIME = 1668973695
+# Keep the trees at a size where the benchmark runs in reasonable time even with xz -6
+TREE_SIZE_LIMIT = 32 * 1024 * 1024
+
+COMPRESSION_VARIANTS = [
+    ("xz", None, None),
+    ("zstd", None, None),
+    ("zstd", 19, None),
+    ("zstd", 19, "long"),
+]
+
+
+def _python_stdlib_tree() -> Tuple[str, List[str]]:
+    # Mostly text (similar to a -doc, -dev or a python module package)
+    root = sysconfig.get_paths()["stdlib"]
+    return root, _collect_files(root, lambda p: p.endswith(".py"))
+
+
+def _binaries_tree() -> Tuple[str, List[str]]:
+    # Mostly ELF binaries and libraries (similar to a library or tools package)
+    root = os.path.dirname(os.path.realpath(sys.executable))
+    root = os.path.dirname(root)
+    return root, _collect_files(
+        os.path.join(root, "lib"), lambda p: ".so" in os.path.basename(p)
+    )
+
+
+def _collect_files(root: str, predicate) -> List[str]:
+    files = []
+    total_size = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            if os.path.islink(path) or not os.path.isfile(path):
+                continue
+            if not predicate(path):
+                continue
+            total_size += os.path.getsize(path)
+            if total_size > TREE_SIZE_LIMIT:
+                return files
+            files.append(path)
+    return files
+
+
+def _write_manifest(manifest_path: Path, root: str, files: List[str]) -> None:
+    directories = {"./"}
+    members = []
+    for path in files:
+        member_path = "./" + os.path.relpath(path, root)
+        parent = os.path.dirname(member_path)
+        while parent not in (".", ""):
+            directories.add(parent + "/")
+            parent = os.path.dirname(parent)
+        members.append(
+            TarMember.from_file(member_path, path, mode=0o644, clamp_mtime_to=MTIME)
+        )
+    directory_members = [
+        TarMember.virtual_path(d, PathType.DIRECTORY, mode=0o755, mtime=MTIME)
+        for d in sorted(directories)
+    ]
+    manifest_path.write_text(
+        json.dumps([m.to_manifest() for m in directory_members + members])
+    )
+
+
+def _pack(
+    tmp_path: Path,
+    manifest_path: Path,
+    algorithm: str,
+    level,
+    strategy,
+) -> Path:
+    package_root = tmp_path / "root"
+    if not package_root.is_dir():
+        (package_root / "DEBIAN").mkdir(parents=True)
+        (package_root / "DEBIAN" / "control").write_text(
+            "Package: bench\nVersion: 1.0\nArchitecture: all\n"
+            "Maintainer: Bench <bench@example.org>\nDescription: Benchmark\n"
+        )
+    parsed_args = argparse.Namespace(
+        compression_level=level,
+        compression_strategy=strategy,
+        threads_max=None,
+        compression_backend="in-process",
+    )
+    compression = deb_packer.COMPRESSIONS[algorithm]
+    compression_cmd = deb_packer._compression_cmd(compression, parsed_args, parsed_args)
+    deb_file = tmp_path / f"bench-{algorithm}-{level}-{strategy}.deb"
+    deb_packer.pack(
+        str(deb_file),
+        compression,
+        compression,
+        str(package_root),
+        str(manifest_path),
+        MTIME,
+        compression_cmd,
+        compression_cmd,
+        prefer_raw_exceptions=True,
+    )
+    return deb_file
+
+
+def _unpack(deb_file: Path) -> None:
+    with subprocess.Popen(
+        ["dpkg-deb", "--fsys-tarfile", str(deb_file)],
+        stdout=subprocess.PIPE,
+    ) as proc:
+        assert proc.stdout is not None
+        while proc.stdout.read(1024 * 1024):
+            pass
+    assert proc.returncode == 0
+
+
+@pytest.mark.parametrize(
+    "tree_name,tree_builder",
+    [
+        ("python-stdlib", _python_stdlib_tree),
+        ("binaries", _binaries_tree),
+    ],
+)
+def test_bench_deb_compression(tmp_path, tree_name: str, tree_builder) -> None:
+    if shutil.which("zstd") is None or shutil.which("dpkg-deb") is None:
+        pytest.skip("Requires zstd and dpkg-deb")
+    root, files = tree_builder()
+    if not files:
+        pytest.skip(f"No files found for the {tree_name} tree")
+    tree_size = sum(os.path.getsize(f) for f in files)
+    manifest_path = tmp_path / "manifest.json"
+    _write_manifest(manifest_path, root, files)
+
+    results = []
+    for algorithm, level, strategy in COMPRESSION_VARIANTS:
+        label = f"{tree_name} ({len(files)} files, {tree_size >> 20} MiB): {algorithm}"
+        if level is not None:
+            label += f" -z{level}"
+        if strategy is not None:
+            label += f" -S{strategy}"
+        start = time.perf_counter()
+        deb_file = _pack(tmp_path, manifest_path, algorithm, level, strategy)
+        build_time = time.perf_counter() - start
+        timed(f"{label} unpack", lambda: _unpack(deb_file), repeat=3)
+        size = deb_file.stat().st_size
+        results.append((label, build_time, size))
+
+    for label, build_time, size in results:
+        print(f"{label}: build {build_time:.3f}s, size {size} bytes")
@@ -0,0 +1,52 @@
+import os
+import sys
+
+from debputy.elf_util import find_all_elf_files, ELF_LINKING_TYPE_DYNAMIC
+from debputy.filesystem_scan import FSRootDir
+
+from benchmarks.bench_tutil import timed
+
+FILE_COUNT = 50_000
+FILES_PER_DIR = 100
+# Roughly one in 50 files being an ELF file is in line with a typical -dev or library package
+ELF_FILE_RATIO = 50
+
+
+def _build_tree(tmp_path) -> FSRootDir:
+    elf_binary = os.path.realpath(sys.executable)
+    root = FSRootDir()
+    text_file = tmp_path / "data.txt"
+    text_file.write_text("Not an ELF file\n" * 20)
+    # All paths share the same two files on disk. The page cache will hide the I/O
+    # cost, which is fine as this benchmark is about the per-file overhead.
+    for i in range(FILE_COUNT):
+        dir_no, file_no = divmod(i, FILES_PER_DIR)
+        directory = root.mkdirs(f"./usr/lib/pkg{dir_no // 10}/sub{dir_no}")
+        if i % ELF_FILE_RATIO == 0:
+            directory.insert_file_from_fs_path(
+                f"lib{file_no}.so",
+                elf_binary,
+            )
+        else:
+            directory.insert_file_from_fs_path(
+                f"file{file_no}.txt",
+                str(text_file),
+            )
+    return root
+
+
+def test_bench_find_all_elf_files(tmp_path) -> None:
+    root = _build_tree(tmp_path)
+    expected = FILE_COUNT // ELF_FILE_RATIO
+
+    cold = timed(
+        f"find_all_elf_files over {FILE_COUNT} files (cold)",
+        lambda: find_all_elf_files(root),
+    )
+    warm = timed(
+        f"find_all_elf_files over {FILE_COUNT} files (cached)",
+        lambda: find_all_elf_files(root, with_linking_type=ELF_LINKING_TYPE_DYNAMIC),
+        repeat=3,
+    )
+    assert len(cold) == expected
+    assert len(warm) <= expected
@@ -0,0 +1,42 @@
+from debputy.filesystem_scan import FSRootDir
+
+from benchmarks.bench_tutil import measured_memory
+
+FILE_COUNT = 200_000
+FILES_PER_DIR = 50
+DIRS_PER_PARENT = 40
+
+
+def _build_tree(data_file: str) -> FSRootDir:
+    root = FSRootDir()
+    for i in range(FILE_COUNT):
+        dir_no, file_no = divmod(i, FILES_PER_DIR)
+        parent_no, sub_no = divmod(dir_no, DIRS_PER_PARENT)
+        directory = root.mkdirs(f"./usr/share/pkg{parent_no}/sub{sub_no}")
+        directory.insert_file_from_fs_path(f"file{file_no}.txt", data_file)
+    return root
+
+
+def _traverse(root: FSRootDir) -> FSRootDir:
+    # Populate the caches that the assembly would populate (paths and stat data)
+    for path in root.all_paths():
+        if path.is_file:
+            assert path.size > 0
+    return root
+
+
+def test_bench_fs_memory(tmp_path) -> None:
+    data_file = tmp_path / "data.txt"
+    data_file.write_text("data\n")
+
+    root = measured_memory(
+        f"Virtual file system with {FILE_COUNT} files",
+        lambda: _build_tree(str(data_file)),
+        unit_count=FILE_COUNT,
+    )
+    measured_memory(
+        "Caches populated by a traversal",
+        lambda: _traverse(root),
+        unit_count=FILE_COUNT,
+    )
+    assert sum(1 for p in root.all_paths() if p.is_file) == FILE_COUNT
@@ -0,0 +1,62 @@
+from debputy.filesystem_scan import FSRootDir
+
+from benchmarks.bench_tutil import timed
+
+NODE_COUNT = 200_000
+FILES_PER_DIR = 50
+DIRS_PER_PARENT = 40
+TRAVERSAL_COUNT = 10
+
+
+def _build_tree(tmp_path) -> FSRootDir:
+    root = FSRootDir()
+    data_file = tmp_path / "data.txt"
+    data_file.write_text("data\n")
+    # The root plus `./usr` and `./usr/share`
+    node_count = 3
+    dir_no = 0
+    while node_count < NODE_COUNT:
+        parent_no, sub_no = divmod(dir_no, DIRS_PER_PARENT)
+        if sub_no == 0:
+            node_count += 1
+        directory = root.mkdirs(f"./usr/share/pkg{parent_no}/sub{sub_no}")
+        # Insert in reverse order, so the traversal has to sort the children
+        for file_no in reversed(range(FILES_PER_DIR)):
+            directory.insert_file_from_fs_path(f"file{file_no}.txt", str(data_file))
+        node_count += FILES_PER_DIR + 1
+        dir_no += 1
+    return root
+
+
+def _traverse_all_paths(root: FSRootDir) -> int:
+    count = 0
+    for _ in range(TRAVERSAL_COUNT):
+        count += sum(1 for _ in root.all_paths())
+    return count
+
+
+def _traverse_walk(root: FSRootDir) -> int:
+    count = 0
+    for _ in range(TRAVERSAL_COUNT):
+        count += sum(len(children) for _, children in root.walk())
+    return count
+
+
+def test_bench_repeated_traversals(tmp_path) -> None:
+    root = _build_tree(tmp_path)
+    node_count = sum(1 for _ in root.all_paths())
+    assert node_count >= NODE_COUNT
+
+    all_paths_count = timed(
+        f"{TRAVERSAL_COUNT}x all_paths over {node_count} paths",
+        lambda: _traverse_all_paths(root),
+        repeat=3,
+    )
+    walk_count = timed(
+        f"{TRAVERSAL_COUNT}x walk over {node_count} paths",
+        lambda: _traverse_walk(root),
+        repeat=3,
+    )
+    assert all_paths_count == TRAVERSAL_COUNT * node_count
+    # walk reports children, which excludes the root itself
+    assert walk_count == TRAVERSAL_COUNT * (node_count - 1)
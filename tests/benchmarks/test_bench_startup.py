@@ -0,0 +1,111 @@
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+SRC_DIR = Path(__file__).parent.parent.parent / "src"
+RUN_COUNT = 5
+
+SUBCOMMANDS = [
+    ["--help"],
+    ["plugin", "list", "plugins"],
+    ["check-manifest"],
+]
+
+
+def _create_source_package(tmp_path: Path) -> Path:
+    debian_dir = tmp_path / "debian"
+    debian_dir.mkdir()
+    (debian_dir / "control").write_text(
+        textwrap.dedent(
+            """\
+            Source: foo
+            Build-Depends: debhelper-compat (= 13), dh-sequence-zz-debputy,
+
+            Package: foo
+            Architecture: all
+            Description: Test package
+             Test package
+            """
+        )
+    )
+    (debian_dir / "changelog").write_text(
+        textwrap.dedent(
+            """\
+            foo (1.0-1) unstable; urgency=medium
+
+              * Initial release.
+
+             -- Jane Doe <jane@example.com>  Mon, 01 Jan 2024 00:00:00 +0000
+            """
+        )
+    )
+    (debian_dir / "debputy.manifest").write_text(
+        textwrap.dedent(
+            """\
+            manifest-version: '0.1'
+            installations:
+              - install:
+                  source: foo
+                  into: foo
+            """
+        )
+    )
+    return tmp_path
+
+
+def _run_debputy(cwd: Path, args: List[str]) -> Tuple[float, float, int]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(SRC_DIR), env.get("PYTHONPATH")) if p
+    )
+    env["PYTHONPROFILEIMPORTTIME"] = "1"
+    # The import times go to stderr. It is written to a file, since reading both
+    # pipes sequentially could dead-lock once the stderr pipe is full.
+    with tempfile.TemporaryFile() as stderr_fd:
+        start = time.perf_counter()
+        with subprocess.Popen(
+            [sys.executable, "-m", "debputy.commands.debputy_cmd", *args],
+            cwd=cwd,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=stderr_fd,
+        ) as proc:
+            stdout = proc.stdout
+            assert stdout is not None
+            stdout.read(1)
+            first_output = time.perf_counter() - start
+            stdout.read()
+            proc.wait()
+        total = time.perf_counter() - start
+        stderr_fd.seek(0)
+        stderr = stderr_fd.read().decode("utf-8")
+    if proc.returncode != 0:
+        pytest.fail(f"debputy {' '.join(args)} failed: {stderr}")
+    # One line per module imported (-X importtime format)
+    module_count = sum(
+        1 for line in stderr.splitlines() if line.startswith("import time:")
+    )
+    # Minus the header line
+    return first_output, total, module_count - 1
+
+
+@pytest.mark.parametrize("args", SUBCOMMANDS, ids=" ".join)
+def test_bench_startup(tmp_path, args: List[str]) -> None:
+    cwd = _create_source_package(tmp_path)
+    # The first run populates the caches in the scratch dir
+    _run_debputy(cwd, args)
+    results = [_run_debputy(cwd, args) for _ in range(RUN_COUNT)]
+    first_output = min(r[0] for r in results)
+    total = min(r[1] for r in results)
+    module_count = results[-1][2]
+    print(
+        f"\ndebputy {' '.join(args)}: {first_output:.3f}s to first output,"
+        f" {total:.3f}s total, {module_count} modules imported (best of {RUN_COUNT})"
+    )
@@ -1,5 +1,5 @@
 import os
-from typing import Mapping
+from typing import Callable, Mapping, Tuple
 
 import pytest
 from debian.deb822 import Deb822
@@ -117,18 +117,17 @@ def _empty_debputy_plugin_feature_set() -> PluginProvidedFeatureSet:
     return PluginProvidedFeatureSet()
 
 
-@pytest.fixture(scope="session")
-def amd64_substitution(
-    amd64_dpkg_architecture_variables,
-    _empty_debputy_plugin_feature_set,
+def _substitution_for(
+    plugin_feature_set: PluginProvidedFeatureSet,
+    dpkg_arch_table: DpkgArchitectureBuildProcessValuesTable,
 ) -> Substitution:
     debian_dir = FSROOverlay.create_root_dir("debian", "debian")
     variable_context = VariableContext(
         debian_dir,
     )
     return SubstitutionImpl(
-        plugin_feature_set=_empty_debputy_plugin_feature_set,
-        dpkg_arch_table=amd64_dpkg_architecture_variables,
+        plugin_feature_set=plugin_feature_set,
+        dpkg_arch_table=dpkg_arch_table,
         static_variables=None,
         environment={},
         unresolvable_substitutions=frozenset(["SOURCE_DATE_EPOCH", "PACKAGE"]),
@@ -136,6 +135,37 @@ def amd64_substitution(
     )
 
 
+@pytest.fixture(scope="session")
+def amd64_substitution(
+    amd64_dpkg_architecture_variables,
+    _empty_debputy_plugin_feature_set,
+) -> Substitution:
+    return _substitution_for(
+        _empty_debputy_plugin_feature_set,
+        amd64_dpkg_architecture_variables,
+    )
+
+
+@pytest.fixture(scope="session")
+def new_amd64_feature_set_and_substitution(
+    amd64_dpkg_architecture_variables,
+) -> Callable[[], Tuple[PluginProvidedFeatureSet, Substitution]]:
+    """Creates a new (empty) feature set with a substitution using it
+
+    For tests that need to load plugins into a feature set of their own.
+    """
+
+    def _factory() -> Tuple[PluginProvidedFeatureSet, Substitution]:
+        feature_set = PluginProvidedFeatureSet()
+        substitution = _substitution_for(
+            feature_set,
+            amd64_dpkg_architecture_variables,
+        )
+        return feature_set, substitution
+
+    return _factory
+
+
 @pytest.fixture(scope="session")
 def no_profiles_or_build_options() -> DebBuildOptionsAndProfiles:
     return DebBuildOptionsAndProfiles(environ={})
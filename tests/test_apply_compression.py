@@ -1,5 +1,10 @@
+import gzip
+import shutil
+import subprocess
+
 from debputy.filesystem_scan import build_virtual_fs
 from debputy.plugin.api import virtual_path_def
+from debputy.plugin.api.test_api import package_metadata_context
 from debputy.plugin.debputy.package_processors import apply_compression
 
 
@@ -31,3 +36,55 @@ def test_apply_compression():
     de_bar_symlink = fs_root.lookup("./usr/share/man/de/man1/bar.1.gz")
     assert de_bar_symlink is not None
     assert de_bar_symlink.readlink() == "../../man1/foo.1.gz"
+
+
+def test_apply_compression_gzip_output(tmp_path):
+    man_content = "man page content\n" * 1000
+    changelog_content = "changelog\n"
+    fs_root = build_virtual_fs(
+        [
+            virtual_path_def(
+                "./usr/share/man/man1/foo.1",
+                materialized_content=man_content,
+                mtime=1668973695,
+            ),
+            virtual_path_def(
+                "./usr/share/doc/foo/changelog",
+                materialized_content=changelog_content,
+            ),
+            virtual_path_def(
+                "./usr/share/doc/foo/small-file",
+                materialized_content="small file",
+            ),
+        ],
+        read_write_fs=True,
+    )
+    apply_compression(
+        fs_root,
+        None,
+        package_metadata_context(parallelization_limit=4),
+    )
+
+    foo_gz = fs_root.lookup("./usr/share/man/man1/foo.1.gz")
+    assert foo_gz is not None
+    assert foo_gz.mtime == 1668973695
+    with foo_gz.open(byte_io=True) as fd:
+        compressed = fd.read()
+    assert gzip.decompress(compressed).decode("utf-8") == man_content
+    # Same header as `gzip -9n`: No name, no mtime, max compression and Unix as OS
+    assert compressed[:10] == b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x02\x03"
+    if shutil.which("gzip") is not None:
+        gnu_gzip = subprocess.check_output(
+            ["gzip", "-9nc"], input=man_content.encode("utf-8")
+        )
+        assert compressed[:10] == gnu_gzip[:10]
+
+    changelog_gz = fs_root.lookup("./usr/share/doc/foo/changelog.gz")
+    assert changelog_gz is not None
+    with changelog_gz.open(byte_io=True) as fd:
+        assert gzip.decompress(fd.read()).decode("utf-8") == changelog_content
+    assert fs_root.lookup("./usr/share/doc/foo/changelog") is None
+
+    # Below the size threshold for /usr/share/doc
+    assert fs_root.lookup("./usr/share/doc/foo/small-file") is not None
+    assert fs_root.lookup("./usr/share/doc/foo/small-file.gz") is None
@@ -0,0 +1,243 @@
+import os
+import shutil
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pytest
+
+from debputy.intermediate_manifest import TarMember, PathType
+from debputy.package_build.assemble_deb import (
+    _assemble_deb,
+    _dpkg_deb_args,
+    _prefer_debputy_assembly,
+)
+from debputy.plugin.debputy.binary_package_rules import DebCompression
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+PACKAGES = ["foo", "bar", "baz", "qux"]
+
+
+def _create_source_package(source_dir: Path) -> None:
+    debian_dir = source_dir / "debian"
+    debian_dir.mkdir(parents=True)
+    stanzas = "".join(
+        textwrap.dedent(
+            f"""\
+
+            Package: {p}
+            Architecture: all
+            Description: Test package {p}
+             Test package
+            """
+        )
+        for p in PACKAGES
+    )
+    (debian_dir / "control").write_text(
+        textwrap.dedent(
+            """\
+            Source: foo
+            Section: misc
+            Priority: optional
+            Maintainer: Jane Doe <jane@example.com>
+            Build-Depends: debhelper-compat (= 13), dh-sequence-zz-debputy,
+            """
+        )
+        + stanzas
+    )
+    (debian_dir / "changelog").write_text(
+        textwrap.dedent(
+            """\
+            foo (1.0-1) unstable; urgency=medium
+
+              * Initial release.
+
+             -- Jane Doe <jane@example.com>  Mon, 01 Jan 2024 00:00:00 +0000
+            """
+        )
+    )
+    # Installed into all packages from the (shared) source directory
+    (source_dir / "ChangeLog").write_text("Upstream changes\n")
+    for p in PACKAGES:
+        doc_dir = debian_dir / p / "usr" / "share" / "doc" / p
+        doc_dir.mkdir(parents=True)
+        (doc_dir / "README").write_text(f"Documentation for {p}\n" * 100)
+        man_dir = debian_dir / p / "usr" / "share" / "man" / "man1"
+        man_dir.mkdir(parents=True)
+        (man_dir / f"{p}.1").write_text(f".TH {p} 1\n")
+
+
+def _generate_debs(source_dir: Path, deb_build_options: str) -> Dict[str, bytes]:
+    output_dir = source_dir / "output"
+    output_dir.mkdir()
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(SRC_DIR), env.get("PYTHONPATH")) if p
+    )
+    env["DEB_BUILD_OPTIONS"] = f"debputy-deb-assembly=debputy {deb_build_options}"
+    env["SOURCE_DATE_EPOCH"] = "1700000000"
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "debputy.commands.debputy_cmd",
+            "internal-command",
+            "dh-integration-generate-debs",
+            str(output_dir),
+        ],
+        cwd=source_dir,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return {p.name: p.read_bytes() for p in output_dir.iterdir()}
+
+
+@pytest.mark.skipif(
+    shutil.which("dpkg-gencontrol") is None, reason="Requires dpkg-gencontrol"
+)
+def test_parallel_package_assembly(tmp_path) -> None:
+    sequential_dir = tmp_path / "sequential"
+    parallel_dir = tmp_path / "parallel"
+    _create_source_package(sequential_dir)
+    _create_source_package(parallel_dir)
+
+    sequential_debs = _generate_debs(sequential_dir, "parallel=4")
+    parallel_debs = _generate_debs(
+        parallel_dir,
+        "parallel=4 debputy-parallel-packages",
+    )
+
+    assert sorted(parallel_debs) == sorted(f"{p}_1.0-1_all.deb" for p in PACKAGES)
+    # The packages must not depend on whether they were assembled concurrently
+    assert parallel_debs == sequential_debs
+
+
+@pytest.mark.parametrize(
+    "upstream_args,expected_args,expected_requires_debputy_assembly",
+    [
+        (None, ["-Zzstd", "-z19", "-Slong"], True),
+        (["-z3"], ["-Zzstd", "-z19", "-Slong", "-z3"], True),
+        # The level and strategy are specific to the algorithm, so the manifest
+        # settings are dropped when the command line chooses the algorithm.
+        (["-Zxz"], ["-Zxz"], False),
+        (["-Z", "gzip", "-z9"], ["-Z", "gzip", "-z9"], False),
+    ],
+)
+def test_dpkg_deb_args_command_line_precedence(
+    upstream_args: Optional[List[str]],
+    expected_args: List[str],
+    expected_requires_debputy_assembly: bool,
+) -> None:
+    deb_compression = DebCompression("zstd", level=19, long_window=True)
+    assert _dpkg_deb_args(deb_compression, upstream_args) == (
+        expected_args,
+        expected_requires_debputy_assembly,
+    )
+    assert _dpkg_deb_args(None, upstream_args) == (upstream_args, False)
+
+
+@pytest.mark.parametrize(
+    "deb_build_options,expected",
+    [
+        ({}, False),
+        ({"debputy-deb-assembly": "dpkg-deb"}, False),
+        ({"debputy-deb-assembly": "debputy"}, True),
+    ],
+)
+def test_prefer_debputy_assembly(
+    deb_build_options: Dict[str, Optional[str]],
+    expected: bool,
+) -> None:
+    assert _prefer_debputy_assembly(deb_build_options) == expected
+
+
+def test_prefer_debputy_assembly_invalid_method() -> None:
+    with pytest.raises(SystemExit):
+        _prefer_debputy_assembly({"debputy-deb-assembly": "unknown"})
+
+
+def _assemble_deb_in_process(tmp_path: Path, manifest: List[TarMember]) -> Path:
+    control_dir = tmp_path / "DEBIAN"
+    control_dir.mkdir()
+    (control_dir / "control").write_text(
+        textwrap.dedent(
+            """\
+            Package: foo
+            Version: 1.0
+            Architecture: all
+            Maintainer: Jane Doe <jane@example.com>
+            Description: Test package
+            """
+        )
+    )
+    output = tmp_path / "foo.deb"
+    _assemble_deb(
+        "foo",
+        "<unused>",
+        manifest,
+        1668973695,
+        str(control_dir),
+        str(output),
+        None,
+        force_debputy_assembly=_prefer_debputy_assembly(
+            {"debputy-deb-assembly": "debputy"}
+        ),
+    )
+    return output
+
+
+def test_assemble_deb_in_process(tmp_path) -> None:
+    mtime = 1668973695
+    tool = tmp_path / "tool"
+    tool.write_bytes(b"#!/bin/sh\n")
+    manifest = [
+        TarMember.virtual_path("./", PathType.DIRECTORY, mode=0o755, mtime=mtime),
+        TarMember.virtual_path("./usr/", PathType.DIRECTORY, mode=0o755, mtime=mtime),
+        TarMember.virtual_path(
+            "./usr/bin/", PathType.DIRECTORY, mode=0o755, mtime=mtime
+        ),
+        TarMember.from_file("./usr/bin/tool", str(tool), mode=0o755, path_mtime=mtime),
+        TarMember.virtual_path(
+            "./usr/bin/tool-link",
+            PathType.HARDLINK,
+            mode=0o755,
+            mtime=mtime,
+            link_target="./usr/bin/tool",
+        ),
+    ]
+
+    output = _assemble_deb_in_process(tmp_path, manifest)
+
+    assert output.read_bytes().startswith(b"!<arch>\ndebian-binary")
+    if shutil.which("dpkg-deb") is not None:
+        contents = subprocess.check_output(
+            ["dpkg-deb", "--contents", str(output)], text=True
+        )
+        assert "./usr/bin/tool\n" in contents
+        assert "./usr/bin/tool-link link to ./usr/bin/tool" in contents
+
+
+def test_assemble_deb_in_process_validates_manifest(tmp_path) -> None:
+    mtime = 1668973695
+    tool = tmp_path / "tool"
+    tool.write_bytes(b"#!/bin/sh\n")
+    manifest = [
+        TarMember.virtual_path("./", PathType.DIRECTORY, mode=0o755, mtime=mtime),
+        # The hardlink must come after the file it links to
+        TarMember.virtual_path(
+            "./tool-link",
+            PathType.HARDLINK,
+            mode=0o755,
+            mtime=mtime,
+            link_target="./tool",
+        ),
+        TarMember.from_file("./tool", str(tool), mode=0o755, path_mtime=mtime),
+    ]
+
+    with pytest.raises(SystemExit):
+        _assemble_deb_in_process(tmp_path, manifest)
+    assert not (tmp_path / "foo.deb").exists()
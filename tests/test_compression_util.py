@@ -0,0 +1,62 @@
+import gzip
+import lzma
+import random
+import subprocess
+
+import pytest
+
+from debputy.compression_util import (
+    XzBlockCompressor,
+    GzipBlockCompressor,
+    compress_to_bytes,
+)
+
+
+def _test_data(size: int) -> bytes:
+    rng = random.Random(size)
+    words = [rng.randbytes(rng.randint(1, 12)) for _ in range(512)]
+    data = bytearray()
+    while len(data) < size:
+        data += rng.choice(words)
+    return bytes(data[:size])
+
+
+@pytest.mark.parametrize(
+    "compression_level,extreme,size",
+    [
+        (0, False, 0),
+        (0, False, 3 * 1024 * 1024 + 17),
+        (0, True, 1024 * 1024),
+        (6, False, 100000),
+    ],
+)
+def test_xz_block_compressor_matches_xz(
+    compression_level: int,
+    extreme: bool,
+    size: int,
+) -> None:
+    data = _test_data(size)
+    xz_cmd = ["xz", "-T2", f"-{compression_level}", "--no-adjust"]
+    if extreme:
+        xz_cmd.append("--extreme")
+    expected = subprocess.check_output(xz_cmd, input=data)
+
+    for threads in (1, 3):
+        compressed = compress_to_bytes(
+            XzBlockCompressor(compression_level, extreme=extreme),
+            data,
+            threads=threads,
+        )
+        assert compressed == expected
+        assert lzma.decompress(compressed) == data
+
+
+@pytest.mark.parametrize("size", [0, 1, 1024 * 1024, 2 * 1024 * 1024 + 3])
+def test_gzip_block_compressor(size: int) -> None:
+    data = _test_data(size)
+    compressed = compress_to_bytes(GzipBlockCompressor(9), data)
+    assert compress_to_bytes(GzipBlockCompressor(9), data, threads=3) == compressed
+    assert gzip.decompress(compressed) == data
+    # Same header as `gzip -9n`
+    assert compressed[:10] == subprocess.check_output(["gzip", "-9n"], input=data)[:10]
+    subprocess.run(["gzip", "-t"], input=compressed, check=True)
@@ -0,0 +1,163 @@
+import json
+import os
+import stat
+
+import pytest
+
+from debputy.commands.deb_materialization import materialize_deb
+from debputy.intermediate_manifest import TarMember, PathType
+
+
+def test_materialize_deb(tmp_path) -> None:
+    mtime = 1668973695
+    control_dir = tmp_path / "DEBIAN"
+    control_dir.mkdir()
+    (control_dir / "control").write_text("Package: foo\n")
+    # Only files in the scratch dir may be moved
+    staging_dir = tmp_path / "debputy" / "scratch-dir"
+    staging_dir.mkdir(parents=True)
+    (staging_dir / "tool").write_bytes(b"#!/bin/sh\n")
+    (staging_dir / "renamed-source").write_bytes(b"Renamed\n")
+    (staging_dir / "stolen").write_bytes(b"Moved rather than copied\n")
+
+    manifest = [
+        TarMember.virtual_path("./", PathType.DIRECTORY, mode=0o755, mtime=mtime),
+        TarMember.virtual_path("./usr/", PathType.DIRECTORY, mode=0o755, mtime=mtime),
+        TarMember.virtual_path(
+            "./usr/bin/", PathType.DIRECTORY, mode=0o755, mtime=mtime
+        ),
+        TarMember.from_file(
+            "./usr/bin/tool",
+            str(staging_dir / "tool"),
+            mode=0o755,
+            clamp_mtime_to=mtime,
+        ),
+        TarMember.from_file(
+            "./usr/bin/renamed",
+            str(staging_dir / "renamed-source"),
+            mode=0o644,
+            clamp_mtime_to=mtime,
+        ),
+        TarMember.from_file(
+            "./usr/bin/stolen",
+            str(staging_dir / "stolen"),
+            mode=0o644,
+            clamp_mtime_to=mtime,
+            may_steal_fs_path=True,
+        ),
+        TarMember.virtual_path(
+            "./usr/bin/link",
+            PathType.SYMLINK,
+            mode=0o777,
+            mtime=mtime,
+            link_target="tool",
+        ),
+    ]
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps([m.to_manifest() for m in manifest]))
+    output_dir = tmp_path / "output"
+
+    materialize_deb(
+        str(control_dir),
+        str(manifest_path),
+        mtime,
+        [],
+        False,
+        str(output_dir),
+        False,
+        True,
+    )
+
+    deb_root = output_dir / "deb-root"
+    assert (deb_root / "DEBIAN" / "control").read_text() == "Package: foo\n"
+    assert (deb_root / "usr" / "bin" / "tool").read_bytes() == b"#!/bin/sh\n"
+    assert (deb_root / "usr" / "bin" / "renamed").read_bytes() == b"Renamed\n"
+    assert (deb_root / "usr" / "bin" / "stolen").is_file()
+    assert not (staging_dir / "stolen").exists()
+    assert (staging_dir / "tool").is_file()
+    assert os.readlink(deb_root / "usr" / "bin" / "link") == "tool"
+    tool_stat = (deb_root / "usr" / "bin" / "tool").stat()
+    assert stat.S_IMODE(tool_stat.st_mode) == 0o755
+    assert tool_stat.st_mtime == mtime
+    assert stat.S_IMODE((deb_root / "usr" / "bin" / "renamed").stat().st_mode) == 0o644
+
+
+def test_materialize_deb_hardlinks(tmp_path) -> None:
+    mtime = 1668973695
+    control_dir = tmp_path / "DEBIAN"
+    control_dir.mkdir()
+    (control_dir / "control").write_text("Package: foo\n")
+    staging_dir = tmp_path / "debputy" / "scratch-dir"
+    staging_dir.mkdir(parents=True)
+    (staging_dir / "tool").write_bytes(b"#!/bin/sh\n")
+
+    manifest = [
+        TarMember.virtual_path("./", PathType.DIRECTORY, mode=0o755, mtime=mtime),
+        TarMember.virtual_path("./usr/", PathType.DIRECTORY, mode=0o755, mtime=mtime),
+        TarMember.virtual_path(
+            "./usr/bin/", PathType.DIRECTORY, mode=0o755, mtime=mtime
+        ),
+        TarMember.from_file(
+            "./usr/bin/tool",
+            str(staging_dir / "tool"),
+            mode=0o755,
+            clamp_mtime_to=mtime,
+            may_steal_fs_path=True,
+        ),
+        TarMember.virtual_path(
+            "./usr/bin/tool-alias",
+            PathType.HARDLINK,
+            mtime,
+            mode=0o755,
+            link_target="./usr/bin/tool",
+        ),
+    ]
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps([m.to_manifest() for m in manifest]))
+    output_dir = tmp_path / "output"
+
+    materialize_deb(
+        str(control_dir),
+        str(manifest_path),
+        mtime,
+        [],
+        False,
+        str(output_dir),
+        False,
+        True,
+    )
+
+    bin_dir = output_dir / "deb-root" / "usr" / "bin"
+    tool_stat = (bin_dir / "tool").stat()
+    alias_stat = (bin_dir / "tool-alias").stat()
+    assert (tool_stat.st_dev, tool_stat.st_ino) == (
+        alias_stat.st_dev,
+        alias_stat.st_ino,
+    )
+    assert stat.S_IMODE(tool_stat.st_mode) == 0o755
+    assert tool_stat.st_mtime == mtime
+
+    materialized_manifest = TarMember.parse_intermediate_manifest(
+        str(output_dir / "deb-structure-intermediate-manifest.json")
+    )
+    assert materialized_manifest[-1].path_type == PathType.HARDLINK
+    assert materialized_manifest[-1].link_target == "./usr/bin/tool"
+
+
+def test_intermediate_manifest_rejects_dangling_hardlinks(tmp_path) -> None:
+    mtime = 1668973695
+    manifest = [
+        TarMember.virtual_path("./", PathType.DIRECTORY, mode=0o755, mtime=mtime),
+        TarMember.virtual_path(
+            "./tool-alias",
+            PathType.HARDLINK,
+            mtime,
+            mode=0o755,
+            link_target="./tool",
+        ),
+    ]
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps([m.to_manifest() for m in manifest]))
+
+    with pytest.raises(ValueError, match="must come after the file it links to"):
+        TarMember.parse_intermediate_manifest(str(manifest_path))
@@ -1,6 +1,13 @@
+import hashlib
+import os
+
 import pytest
 
-from debputy.deb_packaging_support import install_upstream_changelog
+from debputy import deb_packaging_support
+from debputy.deb_packaging_support import (
+    install_upstream_changelog,
+    generate_md5sums_file,
+)
 from debputy.filesystem_scan import build_virtual_fs
 from debputy.plugin.api import virtual_path_def
 
@@ -216,3 +223,78 @@ def test_upstream_changelog_salsa_issue_49(
     doc_dir = data_fs_root.lookup(f"usr/share/doc/{dctrl.name}")
     assert doc_dir is not None
     assert doc_dir.is_symlink
+
+
+@pytest.mark.parametrize("parallelization_limit", [1, 4])
+def test_generate_md5sums_file(tmp_path, parallelization_limit: int) -> None:
+    control_output_dir = tmp_path / "DEBIAN"
+    control_output_dir.mkdir()
+    (control_output_dir / "conffiles").write_text("/etc/foo.conf\n")
+    big_file = tmp_path / "big-file"
+    big_file.write_bytes(b"x" * (1024 * 1024 + 1))
+    fs_root = build_virtual_fs(
+        [
+            virtual_path_def("./etc/foo.conf", content="conffile"),
+            virtual_path_def("./usr/share/doc-base/foo", content="doc-base"),
+            virtual_path_def("./usr/share/doc/foo/big", fs_path=str(big_file)),
+            virtual_path_def("./usr/share/doc/foo/empty", content=""),
+            virtual_path_def("./usr/share/doc/foo/link", link_target="big"),
+        ]
+    )
+
+    generate_md5sums_file(
+        str(control_output_dir),
+        fs_root,
+        parallelization_limit=parallelization_limit,
+    )
+
+    expected = "".join(
+        f"{hashlib.md5(content).hexdigest()}  {path}\n"
+        for path, content in [
+            ("usr/share/doc-base/foo", b"doc-base"),
+            ("usr/share/doc/foo/big", big_file.read_bytes()),
+            ("usr/share/doc/foo/empty", b""),
+        ]
+    )
+    assert (control_output_dir / "md5sums").read_text() == expected
+
+
+def test_generate_md5sums_file_no_files(tmp_path) -> None:
+    control_output_dir = tmp_path / "DEBIAN"
+    control_output_dir.mkdir()
+    fs_root = build_virtual_fs(["./usr/share/doc/foo/"])
+
+    generate_md5sums_file(str(control_output_dir), fs_root)
+
+    assert not (control_output_dir / "md5sums").exists()
+
+
+def test_generate_md5sums_file_hardlinks(tmp_path, monkeypatch) -> None:
+    control_output_dir = tmp_path / "DEBIAN"
+    control_output_dir.mkdir()
+    tool = tmp_path / "tool"
+    tool.write_bytes(b"#!/bin/sh\n")
+    os.link(tool, tmp_path / "tool-alias")
+    fs_root = build_virtual_fs(
+        [
+            virtual_path_def("./usr/bin/tool", fs_path=str(tool)),
+            virtual_path_def(
+                "./usr/bin/tool-alias", fs_path=str(tmp_path / "tool-alias")
+            ),
+        ]
+    )
+    hashed_paths = []
+    content_md5 = deb_packaging_support._content_md5
+
+    def _recording_content_md5(path):
+        hashed_paths.append(path.path)
+        return content_md5(path)
+
+    monkeypatch.setattr(deb_packaging_support, "_content_md5", _recording_content_md5)
+
+    generate_md5sums_file(str(control_output_dir), fs_root)
+
+    digest = hashlib.md5(b"#!/bin/sh\n").hexdigest()
+    expected = f"{digest}  usr/bin/tool\n{digest}  usr/bin/tool-alias\n"
+    assert (control_output_dir / "md5sums").read_text() == expected
+    assert hashed_paths == ["./usr/bin/tool"]
@@ -0,0 +1,210 @@
+import struct
+from typing import Optional, Tuple
+
+import pytest
+
+from debputy.elf_util import (
+    ELF_SHT_NOTE,
+    ELF_SHT_SYMTAB,
+    ELF_SHT_DYNAMIC,
+    ELF_NT_GNU_BUILD_ID,
+    ELF_DT_NEEDED,
+    ELF_DT_SONAME,
+    ELF_DT_RPATH,
+    ELF_DT_RUNPATH,
+    ELF_EI_ELFCLASS32,
+    ELF_EI_ELFCLASS64,
+    ELF_ENDIAN_BE,
+    ELF_ENDIAN_LE,
+    ELF_LINKING_TYPE_DYNAMIC,
+    ELF_LINKING_TYPE_STATIC,
+    ELF_TYPE_SHARED_OBJECT,
+    find_all_elf_files,
+)
+from debputy.plugin.api import VirtualPath, virtual_path_def
+from debputy.plugin.api.test_api import build_virtual_file_system
+from tutil import build_elf
+
+_SHT_PROGBITS = 1
+_SHT_STRTAB = 3
+
+
+def _note(name: bytes, n_type: int, desc: bytes, endian: str) -> bytes:
+    def _pad(b: bytes) -> bytes:
+        return b + b"\0" * (-len(b) % 4)
+
+    return (
+        struct.pack(f"{endian}LLL", len(name), len(desc), n_type)
+        + _pad(name)
+        + _pad(desc)
+    )
+
+
+def _elf_fs(tmp_path, content: bytes) -> Tuple[VirtualPath, VirtualPath]:
+    elf_file = tmp_path / "libfoo.so.1"
+    elf_file.write_bytes(content)
+    fs_root = build_virtual_file_system(
+        [virtual_path_def("./usr/lib/libfoo.so.1", fs_path=str(elf_file))]
+    )
+    return fs_root, fs_root.lookup("./usr/lib/libfoo.so.1")
+
+
+def _build_id_note(build_id: str, endian: str) -> Tuple[str, int, bytes]:
+    return (
+        ".note.gnu.build-id",
+        ELF_SHT_NOTE,
+        _note(b"GNU\0", ELF_NT_GNU_BUILD_ID, bytes.fromhex(build_id), endian),
+    )
+
+
+@pytest.mark.parametrize(
+    "is_64bit,endian",
+    [
+        (True, "<"),
+        (True, ">"),
+        (False, "<"),
+        (False, ">"),
+    ],
+)
+@pytest.mark.parametrize(
+    "extra_section,build_id,expected_stripped",
+    [
+        (None, "0123456789abcdef0123456789abcdef01234567", True),
+        ((".symtab", ELF_SHT_SYMTAB), "0123456789abcdef", False),
+        ((".debug_info", _SHT_PROGBITS), "fedcba9876543210", False),
+        ((".comment", _SHT_PROGBITS), None, True),
+    ],
+)
+def test_elf_info_build_id_and_stripped_state(
+    tmp_path,
+    is_64bit: bool,
+    endian: str,
+    extra_section: Optional[Tuple[str, int]],
+    build_id: Optional[str],
+    expected_stripped: bool,
+) -> None:
+    sections = []
+    if build_id is not None:
+        sections.append(_build_id_note(build_id, endian))
+    if extra_section is not None:
+        name, sh_type = extra_section
+        sections.append((name, sh_type, b"\0" * 24))
+    fs_root, path = _elf_fs(
+        tmp_path, build_elf(sections, is_64bit=is_64bit, endian=endian)
+    )
+
+    elf_info = path.elf_info()
+    assert elf_info is not None
+    assert elf_info.elf_type == ELF_TYPE_SHARED_OBJECT
+    assert elf_info.elf_class == (ELF_EI_ELFCLASS64 if is_64bit else ELF_EI_ELFCLASS32)
+    assert elf_info.endianness == (ELF_ENDIAN_LE if endian == "<" else ELF_ENDIAN_BE)
+    assert elf_info.linking_type == ELF_LINKING_TYPE_STATIC
+    assert elf_info.build_id == build_id
+    assert elf_info.is_stripped == expected_stripped
+
+
+def test_elf_info_not_elf(tmp_path) -> None:
+    empty_file = tmp_path / "empty"
+    empty_file.write_bytes(b"")
+    not_elf = tmp_path / "not-elf"
+    not_elf.write_bytes(b"#!/bin/sh\n" + b"\0" * 512)
+    fs_root = build_virtual_file_system(
+        [
+            virtual_path_def("./usr/bin/empty", fs_path=str(empty_file)),
+            virtual_path_def("./usr/bin/not-elf", fs_path=str(not_elf)),
+            virtual_path_def("./usr/bin/virtual", content="#!/bin/sh"),
+        ]
+    )
+
+    assert fs_root.lookup("./usr/bin/empty").elf_info() is None
+    assert fs_root.lookup("./usr/bin/not-elf").elf_info() is None
+    assert fs_root.lookup("./usr/bin/virtual").elf_info() is None
+    with pytest.raises(TypeError):
+        fs_root.lookup("./usr/bin").elf_info()
+
+
+def test_elf_info_truncated_section_headers(tmp_path) -> None:
+    build_id = "0123456789abcdef"
+    content = build_elf(
+        [
+            _build_id_note(build_id, "<"),
+            (".comment", _SHT_PROGBITS, b"\0" * 512),
+        ]
+    )
+    # Cut off the section header table. The file is still an ELF file,
+    # but without any of the details from the section headers.
+    fs_root, path = _elf_fs(tmp_path, content[:-200])
+
+    elf_info = path.elf_info()
+    assert elf_info is not None
+    assert elf_info.build_id is None
+    assert elf_info.is_stripped
+
+
+@pytest.mark.parametrize(
+    "is_64bit,endian",
+    [
+        (True, "<"),
+        (False, ">"),
+    ],
+)
+def test_elf_info_dynamic_section(tmp_path, is_64bit: bool, endian: str) -> None:
+    offset_size = "q" if is_64bit else "l"
+    dynstr = b"\0libfoo.so.1\0libc.so.6\0libm.so.6\0$ORIGIN/../lib\0/opt/lib\0"
+
+    def _dyn(tag: int, value: bytes) -> bytes:
+        return struct.pack(
+            f"{endian}{offset_size}{offset_size.upper()}", tag, dynstr.index(value)
+        )
+
+    dynamic = b"".join(
+        [
+            _dyn(ELF_DT_NEEDED, b"libc.so.6\0"),
+            _dyn(ELF_DT_SONAME, b"libfoo.so.1\0"),
+            _dyn(ELF_DT_NEEDED, b"libm.so.6\0"),
+            _dyn(ELF_DT_RUNPATH, b"$ORIGIN/../lib\0"),
+            _dyn(ELF_DT_RPATH, b"/opt/lib\0"),
+            # DT_NULL terminates the dynamic section, even if there is more data
+            struct.pack(f"{endian}{offset_size}{offset_size.upper()}", 0, 0),
+            _dyn(ELF_DT_NEEDED, b"libfoo.so.1\0"),
+        ]
+    )
+    fs_root, path = _elf_fs(
+        tmp_path,
+        build_elf(
+            [
+                (".dynstr", _SHT_STRTAB, dynstr),
+                (".dynamic", ELF_SHT_DYNAMIC, dynamic),
+            ],
+            is_64bit=is_64bit,
+            endian=endian,
+            section_links={".dynamic": ".dynstr"},
+        ),
+    )
+
+    elf_info = path.elf_info()
+    assert elf_info is not None
+    assert elf_info.linking_type == ELF_LINKING_TYPE_DYNAMIC
+    assert elf_info.soname == "libfoo.so.1"
+    assert elf_info.needed == ("libc.so.6", "libm.so.6")
+    assert elf_info.rpath == ("$ORIGIN/../lib", "/opt/lib")
+
+
+def test_elf_info_cache_is_reset_on_content_replacement(tmp_path) -> None:
+    first_build_id = "0123456789abcdef"
+    second_build_id = "fedcba9876543210"
+    fs_root, path = _elf_fs(tmp_path, build_elf([_build_id_note(first_build_id, "<")]))
+
+    assert path.elf_info().build_id == first_build_id
+    assert find_all_elf_files(fs_root) == [path]
+
+    with path.replace_fs_path_content() as fs_path, open(fs_path, "wb") as fd:
+        fd.write(build_elf([_build_id_note(second_build_id, "<")]))
+
+    assert path.elf_info().build_id == second_build_id
+
+    with path.replace_fs_path_content() as fs_path, open(fs_path, "wb") as fd:
+        fd.write(b"Not an ELF file" + b"\0" * 512)
+
+    assert path.elf_info() is None
+    assert find_all_elf_files(fs_root) == []
@@ -1,10 +1,13 @@
 import dataclasses
+import os
 import textwrap
-from typing import Tuple, List, Optional, Union, Sequence
+from typing import Tuple, List, Optional, Union, Sequence, Callable, Iterable
 
 import pytest
 
-from debputy.filesystem_scan import PathDef, build_virtual_fs
+from debputy import filesystem_scan
+from debputy.deb_packaging_support import _all_elf_files, _all_static_libs
+from debputy.filesystem_scan import FSRootDir, PathDef, build_virtual_fs
 from debputy.highlevel_manifest_parser import (
     YAMLManifestParser,
 )
@@ -12,6 +15,7 @@ from debputy.intermediate_manifest import PathType, IntermediateManifest, TarMem
 from debputy.plugin.api import virtual_path_def
 from debputy.plugin.api.test_api import build_virtual_file_system
 from debputy.transformation_rules import TransformationRuntimeError
+from tutil import build_elf
 
 
 @pytest.fixture()
@@ -848,3 +852,128 @@ def test_builtin_mode_normalization(
     print(intermediate_manifest)
 
     verify_paths(intermediate_manifest, expected_results)
+
+
+def test_hardlinks_in_intermediate_manifest(
+    manifest_parser_pkg_foo: YAMLManifestParser,
+    tmp_path,
+) -> None:
+    manifest = manifest_parser_pkg_foo.build_manifest()
+    clamp_mtime_to = 255
+    tool = tmp_path / "tool"
+    tool.write_text("#!/bin/sh\n")
+    os.link(tool, tmp_path / "tool-alias")
+    os.link(tool, tmp_path / "tool-other-mtime")
+
+    fs_root = build_virtual_fs(
+        [
+            virtual_path_def("usr/bin/tool", mode=0o755, fs_path=str(tool)),
+            virtual_path_def(
+                "usr/bin/tool-alias",
+                mode=0o755,
+                fs_path=str(tmp_path / "tool-alias"),
+            ),
+            virtual_path_def(
+                "usr/bin/tool-other-mtime",
+                mode=0o755,
+                mtime=10,
+                fs_path=str(tmp_path / "tool-other-mtime"),
+            ),
+        ],
+        read_write_fs=True,
+    )
+
+    intermediate_manifest = manifest.apply_to_binary_staging_directory(
+        "foo", fs_root, clamp_mtime_to
+    )
+    result = {tm.member_path: tm for tm in intermediate_manifest}
+    assert result["./usr/bin/tool"].path_type == PathType.FILE
+    hardlink = result["./usr/bin/tool-alias"]
+    assert hardlink.path_type == PathType.HARDLINK
+    assert hardlink.link_target == "./usr/bin/tool"
+    assert hardlink.is_virtual_entry and hardlink.fs_path is None
+    assert hardlink.mode == 0o755
+    # The metadata differs, so it cannot be a hardlink in the deb
+    assert result["./usr/bin/tool-other-mtime"].path_type == PathType.FILE
+
+    # The manifest must survive the round trip to the deb assembly
+    round_tripped = [
+        TarMember.from_dict(tm.to_manifest()) for tm in intermediate_manifest
+    ]
+    assert round_tripped == intermediate_manifest
+
+
+def _process_elf_files(fs_root) -> Iterable[str]:
+    with _all_elf_files(fs_root) as elf_info:
+        yield from elf_info
+
+
+def _process_static_libs(fs_root) -> Iterable[str]:
+    with _all_static_libs(fs_root) as static_libs:
+        yield from static_libs
+
+
+@pytest.mark.parametrize(
+    "process,content,basename",
+    [
+        (_process_elf_files, build_elf([]), "libfoo.so.1"),
+        (_process_static_libs, b"!<arch>\n" + b"\0" * 64, "libfoo.a"),
+    ],
+)
+@pytest.mark.parametrize("can_hardlink", [True, False])
+def test_hardlinks_share_processed_content(
+    manifest_parser_pkg_foo: YAMLManifestParser,
+    tmp_path,
+    monkeypatch,
+    process: Callable[..., Iterable[str]],
+    content: bytes,
+    basename: str,
+    can_hardlink: bool,
+) -> None:
+    manifest = manifest_parser_pkg_foo.build_manifest()
+    lib = tmp_path / basename
+    lib.write_bytes(content)
+    os.link(lib, tmp_path / f"{basename}-alias")
+    # Only paths backed by the file system (as in the build) can share their content
+    fs_root = FSRootDir()
+    lib_dir = fs_root.mkdirs("./usr/lib")
+    for name in (basename, f"{basename}-alias"):
+        lib_dir.insert_file_from_fs_path(name, str(tmp_path / name))
+    if not can_hardlink:
+
+        def _link_fails(*_args, **_kwargs) -> None:
+            raise OSError("Cross-device link")
+
+        monkeypatch.setattr(filesystem_scan.os, "link", _link_fails)
+
+    # A fake strip, which only happens once per inode
+    processed_paths = []
+    for fs_path in process(fs_root):
+        processed_paths.append(fs_path)
+        with open(fs_path, "wb") as fd:
+            fd.write(b"processed")
+    assert len(processed_paths) == 1
+
+    first = fs_root.lookup(f"usr/lib/{basename}")
+    alias = fs_root.lookup(f"usr/lib/{basename}-alias")
+    for path in (first, alias):
+        with path.open(byte_io=True) as fd:
+            assert fd.read() == b"processed"
+    # The original files must not be modified
+    assert lib.read_bytes() == content
+
+    intermediate_manifest = manifest.apply_to_binary_staging_directory(
+        "foo", fs_root, 255
+    )
+    result = {tm.member_path: tm for tm in intermediate_manifest}
+    first_member = result[f"./usr/lib/{basename}"]
+    alias_member = result[f"./usr/lib/{basename}-alias"]
+    assert first_member.path_type == PathType.FILE
+    if can_hardlink:
+        assert alias.hardlink_key == first.hardlink_key is not None
+        assert alias_member.path_type == PathType.HARDLINK
+        assert alias_member.link_target == f"./usr/lib/{basename}"
+    else:
+        # The copy is no longer hard linked, so both are emitted as files
+        assert alias.hardlink_key is None
+        assert alias_member.path_type == PathType.FILE
@@ -3,11 +3,13 @@ import textwrap
 import pytest
 
 from debputy.highlevel_manifest_parser import YAMLManifestParser
+from debputy.intermediate_manifest import PathType
 from debputy.installations import (
     InstallSearchDirContext,
     NoMatchForInstallPatternError,
     SearchDir,
 )
+from debputy.path_matcher import MatchRule, CompiledMatchRules
 from debputy.plugin.api import virtual_path_def
 from debputy.plugin.api.spec import INTEGRATION_MODE_DH_DEBPUTY
 from debputy.plugin.api.test_api import build_virtual_file_system
@@ -1072,3 +1074,70 @@ def test_install_doc_rules_ignore_udeb(manifest_parser_pkg_foo_w_udeb) -> None:
 
     udeb_doc_dir = foo_udeb_fs_root.lookup("/usr/share/doc")
     assert udeb_doc_dir is None
+
+
+def test_compiled_match_rules_match_finditer() -> None:
+    fs_root = build_virtual_file_system(
+        [
+            "./usr/bin/foo",
+            "./usr/lib/libfoo.so.1",
+            "./usr/lib/libfoo.so",
+            "./usr/lib/foo/plugins/plugin.so",
+            "./usr/lib/foo/plugins/README",
+            "./usr/lib/foo/data.tar.gz",
+            "./usr/share/doc/foo/README",
+            "./usr/share/doc/foo/changelog.gz",
+            "./usr/share/doc/foo/html/",
+            "./usr/share/doc/foo/html/index.html",
+            "./usr/share/foo/README",
+            virtual_path_def("./usr/share/foo/link", link_target="../doc/foo"),
+            virtual_path_def("./usr/lib/foo-link", link_target="foo"),
+        ]
+    )
+    patterns = [
+        ("*", None),
+        ("**/*.so", None),
+        ("*.so", PathType.FILE),
+        ("**/*.so.*", None),
+        ("**/lib*.so.1", None),
+        ("**/README", None),
+        ("*.gz", None),
+        ("*.tar.gz", None),
+        ("**/*c*", PathType.DIRECTORY),
+        ("**/l*", PathType.SYMLINK),
+        ("**/*o*", None),
+        ("**/[a-d]*", None),
+    ]
+    rules = [MatchRule.from_path_or_glob(p, "test", path_type=t) for p, t in patterns]
+    rules.extend(
+        MatchRule.recursive_beneath_directory(d, "test", path_type=t)
+        for d, t in [
+            ("usr/lib", None),
+            ("usr/lib/foo", None),
+            ("usr/lib/foo/plugins", PathType.FILE),
+            ("usr/share/doc/foo", None),
+            ("usr/share/doc/foo/html", None),
+            # Through a symlink: the walk does not reach it, so the rule finds its own matches
+            ("usr/lib/foo-link/plugins", None),
+            ("usr/share/missing", None),
+        ]
+    )
+    # Rules that are not compiled are delegated to the rule itself
+    rules.append(MatchRule.from_path_or_glob("usr/lib/*.so", "test"))
+    rules.append(MatchRule.from_path_or_glob("usr/bin/foo", "test"))
+    compiled = CompiledMatchRules(rules)
+    assert len(compiled) == len(rules) - 2
+
+    def _ignore(p) -> bool:
+        return p.name == "README"
+
+    for rule in rules:
+        for ignore_paths in (None, _ignore):
+            expected = [
+                p.path for p in rule.finditer(fs_root, ignore_paths=ignore_paths)
+            ]
+            actual = [
+                p.path
+                for p in compiled.finditer(rule, fs_root, ignore_paths=ignore_paths)
+            ]
+            assert actual == expected, rule.describe_match_short()
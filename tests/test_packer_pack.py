@@ -1,6 +1,15 @@
 import argparse
+import gzip
+import io
+import os
+import tarfile
 import json
+import shutil
+import subprocess
 from pathlib import Path
+from typing import Dict
+
+import pytest
 
 from debputy.commands import deb_packer
 from debputy.intermediate_manifest import TarMember, PathType
@@ -84,3 +93,256 @@ def test_pack_smoke(tmp_path):
         b"Q_\xe7\xeb\x00\x01\x84\x01\x80P\x00\x00(3\xf1\xfa\xb1\xc4g\xfb"
         b"\x02\x00\x00\x00\x00\x04YZ"
     )
+
+
+def _pack_fake_deb(
+    tmp_path: Path,
+    compression_cmd: "deb_packer.CompressionCommand",
+    compression: "deb_packer.Compression",
+) -> bytes:
+    mtime = 1668973695
+    root_dir = tmp_path / "root"
+    if not root_dir.is_dir():
+        root_dir.mkdir()
+        write_unpacked_deb(root_dir, "fake", "1.0", "amd64")
+        (root_dir / "data").write_bytes(b"Some content\n" * 100000)
+    deb_file = tmp_path / "output.deb"
+    package_manifest = tmp_path / "temporary-manifest.json"
+    package_manifest.write_text(
+        json.dumps(
+            [
+                TarMember.virtual_path(
+                    "./", PathType.DIRECTORY, mode=0o755, mtime=mtime
+                ).to_manifest(),
+                TarMember.from_file(
+                    "./data", str(root_dir / "data"), mode=0o644, clamp_mtime_to=mtime
+                ).to_manifest(),
+            ]
+        )
+    )
+    deb_packer.pack(
+        str(deb_file),
+        compression,
+        compression,
+        str(root_dir),
+        str(package_manifest),
+        mtime,
+        compression_cmd,
+        compression_cmd,
+        prefer_raw_exceptions=True,
+    )
+    return deb_file.read_bytes()
+
+
+def _ar_members(binary: bytes) -> Dict[str, bytes]:
+    assert binary.startswith(b"!<arch>\n")
+    offset = 8
+    members = {}
+    while offset < len(binary):
+        header = binary[offset : offset + 60]
+        name = header[0:16].decode("ascii").rstrip()
+        size = int(header[48:58])
+        offset += 60
+        members[name] = binary[offset : offset + size]
+        offset += size + (size % 2)
+    return members
+
+
+@pytest.mark.parametrize("compression_name", ["xz", "gzip", "none"])
+def test_pack_in_process_compression(tmp_path, compression_name: str) -> None:
+    parsed_args = argparse.Namespace(
+        is_udeb=False, compression_level=None, compression_strategy=None
+    )
+    compression = deb_packer.COMPRESSIONS[compression_name]
+    external = _pack_fake_deb(
+        tmp_path, compression.as_cmdline(parsed_args), compression
+    )
+    in_process = [
+        _pack_fake_deb(
+            tmp_path,
+            compression.as_in_process_compressor(parsed_args, threads=threads),
+            compression,
+        )
+        for threads in (1, 4)
+    ]
+    # The output must not depend on the number of threads
+    assert in_process[0] == in_process[1]
+    if compression_name != "gzip":
+        assert in_process[0] == external
+    else:
+        # GNU gzip and zlib produce different (but compatible) output
+        external_members = _ar_members(external)
+        in_process_members = _ar_members(in_process[0])
+        assert external_members.keys() == in_process_members.keys()
+        for name, content in external_members.items():
+            if name.endswith(".gz"):
+                assert gzip.decompress(in_process_members[name]) == gzip.decompress(
+                    content
+                )
+            else:
+                assert in_process_members[name] == content
+
+
+@pytest.mark.skipif(shutil.which("zstd") is None, reason="Requires zstd")
+@pytest.mark.parametrize(
+    "compression_level,compression_strategy",
+    [
+        (None, None),
+        (19, None),
+        (19, "long"),
+    ],
+)
+def test_pack_zstd(tmp_path, compression_level, compression_strategy) -> None:
+    compression = deb_packer.COMPRESSIONS["zstd"]
+    outputs = []
+    for threads in (1, 4):
+        parsed_args = argparse.Namespace(
+            is_udeb=False,
+            compression_level=compression_level,
+            compression_strategy=compression_strategy,
+            threads_max=threads,
+        )
+        outputs.append(
+            _pack_fake_deb(tmp_path, compression.as_cmdline(parsed_args), compression)
+        )
+    # The output must not depend on the number of threads
+    assert outputs[0] == outputs[1]
+    members = _ar_members(outputs[0])
+    assert "data.tar.zst" in members
+    # Decompress via the command line tool, as there is no stdlib zstd module
+    tar_content = subprocess.check_output(
+        ["zstd", "-d", "-q", "-c", "--long=27"], input=members["data.tar.zst"]
+    )
+    assert tar_content.startswith(b"./")
+
+
+def _tar_stream_test_members(tmp_path: Path):
+    mtime = 1668973695
+    content_dir = tmp_path / "content"
+    content_dir.mkdir()
+    members = [
+        TarMember.virtual_path("./", PathType.DIRECTORY, mode=0o755, mtime=mtime),
+        TarMember.virtual_path(
+            "./usr/share/doc/fake/" + "long-name" * 20,
+            PathType.SYMLINK,
+            mode=0o777,
+            mtime=mtime,
+            link_target="target",
+        ),
+    ]
+    for name, size in [("empty", 0), ("small", 100), ("block", 512), ("big", 3000001)]:
+        path = content_dir / name
+        path.write_bytes(os.urandom(size))
+        members.append(
+            TarMember.from_file(
+                f"./usr/share/fake/{name}", str(path), mode=0o644, clamp_mtime_to=mtime
+            )
+        )
+    # Sharing an inode does not make a file a hardlink in the data.tar. Only the
+    # manifest does that.
+    os.link(content_dir / "small", content_dir / "shared-inode")
+    members.append(
+        TarMember.from_file(
+            "./usr/share/fake/shared-inode",
+            str(content_dir / "shared-inode"),
+            mode=0o644,
+            clamp_mtime_to=mtime,
+        )
+    )
+    members.append(
+        TarMember.virtual_path(
+            "./usr/share/fake/hardlink",
+            PathType.HARDLINK,
+            mtime,
+            mode=0o644,
+            link_target="./usr/share/fake/small",
+        )
+    )
+    return members
+
+
+def test_tar_stream_writer_matches_tarfile(tmp_path) -> None:
+    members = _tar_stream_test_members(tmp_path)
+    expected = io.BytesIO()
+    with tarfile.open(mode="w|", fileobj=expected, format=tarfile.GNU_FORMAT) as tar_fd:
+        for member in members:
+            tar_info = member.create_tar_info(tar_fd)
+            if member.path_type == PathType.FILE:
+                with open(member.fs_path, "rb") as mfd:
+                    tar_fd.addfile(tar_info, fileobj=mfd)
+            else:
+                tar_fd.addfile(tar_info)
+
+    # Without a file descriptor (such as the in-process compressors)
+    in_memory = io.BytesIO()
+    with deb_packer.TarStreamWriter(in_memory) as tar_fd:
+        for member in members:
+            tar_fd.add_member(member)
+    assert in_memory.getvalue() == expected.getvalue()
+
+    # With a file descriptor (the content is transferred via sendfile)
+    output_file = tmp_path / "output.tar"
+    with open(output_file, "wb") as fd:
+        fd.write(b"prefix")
+        with deb_packer.TarStreamWriter(fd) as tar_fd:
+            for member in members:
+                tar_fd.add_member(member)
+        assert fd.tell() == len(b"prefix") + len(expected.getvalue())
+    assert output_file.read_bytes() == b"prefix" + expected.getvalue()
+
+    # With a pipe (such as the external compressors)
+    piped_file = tmp_path / "piped.tar"
+    with (
+        open(piped_file, "wb") as piped_fd,
+        subprocess.Popen(["cat"], stdin=subprocess.PIPE, stdout=piped_fd) as proc,
+        deb_packer.TarStreamWriter(proc.stdin) as tar_fd,
+    ):
+        for member in members:
+            tar_fd.add_member(member)
+    assert piped_file.read_bytes() == expected.getvalue()
+
+
+def test_tar_stream_writer_hardlinks(tmp_path) -> None:
+    members = _tar_stream_test_members(tmp_path)
+    output = io.BytesIO()
+    with deb_packer.TarStreamWriter(output) as tar_fd:
+        for member in members:
+            tar_fd.add_member(member)
+    output.seek(0)
+    with tarfile.open(fileobj=output, mode="r:") as tar_fd:
+        shared_inode = tar_fd.getmember("./usr/share/fake/shared-inode")
+        hardlink = tar_fd.getmember("./usr/share/fake/hardlink")
+        assert shared_inode.isreg()
+        assert shared_inode.size == 100
+        assert hardlink.islnk()
+        assert hardlink.linkname == "./usr/share/fake/small"
+        assert hardlink.size == 0
+
+
+@pytest.mark.parametrize("compression_name", ["xz", "gzip", "none"])
+def test_pack_from_intermediate_manifest(tmp_path, compression_name: str) -> None:
+    mtime = 1668973695
+    parsed_args = argparse.Namespace(
+        is_udeb=False, compression_level=None, compression_strategy=None
+    )
+    compression = deb_packer.COMPRESSIONS[compression_name]
+    packed = _pack_fake_deb(
+        tmp_path,
+        compression.as_in_process_compressor(parsed_args),
+        compression,
+    )
+    root_dir = tmp_path / "root"
+    data_tar_members = TarMember.parse_intermediate_manifest(
+        str(tmp_path / "temporary-manifest.json")
+    )
+    deb_file = tmp_path / "direct.deb"
+
+    deb_packer.pack_from_intermediate_manifest(
+        str(deb_file),
+        str(root_dir / "DEBIAN"),
+        data_tar_members,
+        mtime,
+        [f"-Z{compression_name}"],
+    )
+
+    assert deb_file.read_bytes() == packed
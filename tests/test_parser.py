@@ -1,3 +1,4 @@
+import os
 import textwrap
 
 import pytest
@@ -6,6 +7,7 @@ from debputy import DEBPUTY_DOC_ROOT_DIR
 from debputy.exceptions import DebputySubstitutionError
 from debputy.highlevel_manifest_parser import YAMLManifestParser
 from debputy.manifest_parser.exceptions import ManifestParseException
+from debputy.persistent_cache import PersistentCache
 from debputy.plugin.api.test_api import build_virtual_file_system
 
 
@@ -171,6 +173,43 @@ def test_parsing_variables_unused(manifest_parser_pkg_foo):
     assert normalize_doc_link(e_info.value.args[0]) == msg
 
 
+def test_parsing_with_persistent_cache(manifest_parser_pkg_foo, tmp_path):
+    content = textwrap.dedent(
+        """\
+    manifest-version: '0.1'
+    definitions:
+      variables:
+        UNUSED: "test"
+    """
+    )
+    persistent_cache = PersistentCache(str(tmp_path))
+    msg = (
+        'The variable "UNUSED" is unused. Either use it or remove it.'
+        " The variable was declared at definitions.variables.UNUSED [Line 4 column 4]."
+    )
+
+    with pytest.raises(ManifestParseException) as e_info:
+        manifest_parser_pkg_foo.parse_manifest(
+            fd=content,
+            persistent_cache=persistent_cache,
+        )
+    assert normalize_doc_link(e_info.value.args[0]) == msg
+
+    def _not_cached():
+        raise AssertionError("The YAML document should have been cached")
+
+    # The YAML document is cached even though the manifest was invalid, and it
+    # retains the line numbers (needed for error messages).
+    data = persistent_cache.get_or_compute(
+        "manifest-yaml",
+        os.path.abspath(manifest_parser_pkg_foo.manifest_path),
+        [content],
+        _not_cached,
+    )
+    assert data["definitions"]["variables"]["UNUSED"] == "test"
+    assert data["definitions"]["variables"].lc.key("UNUSED") == (3, 4)
+
+
 def test_parsing_package_foo_empty(manifest_parser_pkg_foo):
     content = textwrap.dedent(
         """\
@@ -443,6 +482,61 @@ def test_binary_version(manifest_parser_pkg_foo):
     assert manifest.package_state_for("foo").binary_version == "1:2.3"
 
 
+def test_deb_compression(manifest_parser_pkg_foo):
+    content = textwrap.dedent(
+        """\
+    manifest-version: '0.1'
+    packages:
+        foo:
+            deb-compression:
+                algorithm: zstd
+                level: 19
+                long-window: true
+
+    """
+    )
+
+    manifest = manifest_parser_pkg_foo.parse_manifest(fd=content)
+    deb_compression = manifest.package_state_for("foo").deb_compression
+    assert deb_compression is not None
+    assert deb_compression.as_dpkg_deb_args() == ["-Zzstd", "-z19", "-Slong"]
+    assert deb_compression.requires_debputy_assembly
+
+
+@pytest.mark.parametrize(
+    "deb_compression,expected_error",
+    [
+        (
+            "{algorithm: xz, level: 19}",
+            'The compression algorithm "xz" does not support the compression level 19',
+        ),
+        (
+            "{algorithm: gzip, long-window: true}",
+            'The compression algorithm "gzip" does not support long-window',
+        ),
+    ],
+)
+def test_deb_compression_invalid(
+    manifest_parser_pkg_foo,
+    deb_compression: str,
+    expected_error: str,
+) -> None:
+    content = textwrap.dedent(
+        f"""\
+    manifest-version: '0.1'
+    packages:
+        foo:
+            deb-compression: {deb_compression}
+
+    """
+    )
+
+    with pytest.raises(ManifestParseException) as e_info:
+        manifest_parser_pkg_foo.parse_manifest(fd=content)
+
+    assert e_info.value.args[0].startswith(expected_error)
+
+
 @pytest.mark.parametrize(
     "path,is_accepted",
     [
@@ -1,9 +1,13 @@
+import hashlib
+import os
 from typing import cast
 
 import pytest
 
 from debputy.exceptions import SymlinkLoopError
-from debputy.filesystem_scan import VirtualPathBase
+from debputy.filesystem_scan import VirtualPathBase, FSRootDir, FSROOverlay
+from debputy.intermediate_manifest import PathType
+from debputy.path_matcher import MatchRule, BasenameGlobMatch
 from debputy.plugin.api import virtual_path_def
 from debputy.plugin.api.test_api import build_virtual_file_system
 
@@ -45,3 +49,260 @@ def test_symlink_lookup() -> None:
     with pytest.raises(SymlinkLoopError):
         # But resolving it will cause issues
         fs.lookup("./usr/share/test/loop-a/")
+
+
+def test_content_digest_cache(tmp_path, monkeypatch) -> None:
+    content_file = tmp_path / "content"
+    content_file.write_bytes(b"Some content\n")
+    fs_root = build_virtual_file_system(
+        [
+            virtual_path_def("./usr/share/foo/data", fs_path=str(content_file)),
+            virtual_path_def("./usr/share/foo/virtual", content="Some content\n"),
+        ]
+    )
+    path = fs_root.lookup("./usr/share/foo/data")
+    expected_md5 = hashlib.md5(b"Some content\n").hexdigest()
+    file_digest_calls = []
+    real_file_digest = hashlib.file_digest
+
+    def _counting_file_digest(fd, algorithm):
+        file_digest_calls.append(algorithm)
+        return real_file_digest(fd, algorithm)
+
+    monkeypatch.setattr(hashlib, "file_digest", _counting_file_digest)
+
+    assert path.content_digest() == expected_md5
+    assert path.content_digest() == expected_md5
+    assert file_digest_calls == ["md5"]
+    assert (
+        path.content_digest("sha256") == hashlib.sha256(b"Some content\n").hexdigest()
+    )
+    assert file_digest_calls == ["md5", "sha256"]
+    assert fs_root.lookup("./usr/share/foo/virtual").content_digest() == expected_md5
+
+    # A change to the underlying file invalidates the cached digest
+    content_file.write_bytes(b"Changed content\n")
+    assert path.content_digest() == hashlib.md5(b"Changed content\n").hexdigest()
+
+    with path.replace_fs_path_content() as fs_path, open(fs_path, "wb") as fd:
+        fd.write(b"New content\n")
+    assert path.content_digest() == hashlib.md5(b"New content\n").hexdigest()
+
+    with pytest.raises(TypeError):
+        fs_root.lookup("./usr/share/foo").content_digest()
+
+
+def _indexed_fs() -> FSRootDir:
+    fs_root = FSRootDir(basename_index=True)
+    usr_lib = fs_root.mkdirs("./usr/lib")
+    for name in ["libfoo.la", "libfoo.so.1", "libbar.la"]:
+        with usr_lib.add_file(name):
+            pass
+    plugin_dir = fs_root.mkdirs("./usr/lib/foo/plugins")
+    for name in ["a.la", "b.so", "README"]:
+        with plugin_dir.add_file(name):
+            pass
+    doc_dir = fs_root.mkdirs("./usr/share/doc/foo")
+    with doc_dir.add_file("README"):
+        pass
+    return fs_root
+
+
+def _index_paths(fs_root: FSRootDir, *, basename=None, extension=None):
+    index = fs_root.basename_index
+    assert index is not None
+    if basename is not None:
+        paths = index.paths_with_basename(basename)
+    else:
+        paths = index.paths_with_extension(extension)
+    return sorted(p.path for p in paths)
+
+
+def test_basename_index_is_maintained() -> None:
+    fs_root = _indexed_fs()
+    assert _index_paths(fs_root, extension=".la") == [
+        "./usr/lib/foo/plugins/a.la",
+        "./usr/lib/libbar.la",
+        "./usr/lib/libfoo.la",
+    ]
+    assert _index_paths(fs_root, basename="README") == [
+        "./usr/lib/foo/plugins/README",
+        "./usr/share/doc/foo/README",
+    ]
+    assert _index_paths(fs_root, basename="plugins") == ["./usr/lib/foo/plugins"]
+
+    # Removal
+    fs_root.lookup("./usr/lib/libbar.la").unlink()
+    assert "./usr/lib/libbar.la" not in _index_paths(fs_root, extension=".la")
+
+    # Renaming a file
+    fs_root.lookup("./usr/lib/libfoo.la").name = "libfoo.a"
+    assert _index_paths(fs_root, extension=".la") == ["./usr/lib/foo/plugins/a.la"]
+    assert _index_paths(fs_root, extension=".a") == ["./usr/lib/libfoo.a"]
+
+    # Renaming a directory only changes the directory itself in the index
+    fs_root.lookup("./usr/lib/foo").name = "bar"
+    assert _index_paths(fs_root, basename="foo") == ["./usr/share/doc/foo"]
+    assert _index_paths(fs_root, extension=".la") == ["./usr/lib/bar/plugins/a.la"]
+
+    # Moving a directory into another place in the tree
+    fs_root.lookup("./usr/lib/bar/plugins").parent_dir = fs_root.lookup(
+        "./usr/share/doc/foo"
+    )
+    assert _index_paths(fs_root, extension=".so") == [
+        "./usr/share/doc/foo/plugins/b.so"
+    ]
+
+    # Replacing a path via a conflict removes the old path and its children
+    fs_root.mkdirs("./tmp/foo").parent_dir = fs_root.lookup("./usr/share/doc")
+    assert _index_paths(fs_root, basename="README") == []
+    assert _index_paths(fs_root, extension=".so") == []
+
+    # Removing a directory removes everything beneath it
+    del fs_root.lookup("./usr")["lib"]
+    assert _index_paths(fs_root, extension=".1") == []
+
+
+def test_traversal_order_follows_mutations() -> None:
+    fs_root = build_virtual_file_system(
+        [
+            "./usr/share/doc/foo/copyright",
+            "./usr/share/doc/foo/changelog.gz",
+            "./usr/share/doc/foo/README",
+        ]
+    )
+
+    def _traversal_paths():
+        walked = [p.path for p, _ in fs_root.walk()]
+        all_paths = [p.path for p in fs_root.all_paths()]
+        assert walked == all_paths
+        return all_paths
+
+    doc_dir = fs_root.lookup("./usr/share/doc/foo")
+    assert [p.name for p in doc_dir.all_paths()] == [
+        "foo",
+        "README",
+        "changelog.gz",
+        "copyright",
+    ]
+    # Traverse once to populate any caches before mutating the tree
+    _traversal_paths()
+
+    doc_dir.lookup("README").name = "zz-README"
+    doc_dir.mkdir("examples")
+    del doc_dir["changelog.gz"]
+    fs_root.mkdirs("./usr/bin")
+    assert _traversal_paths() == [
+        ".",
+        "./usr",
+        "./usr/bin",
+        "./usr/share",
+        "./usr/share/doc",
+        "./usr/share/doc/foo",
+        "./usr/share/doc/foo/copyright",
+        "./usr/share/doc/foo/examples",
+        "./usr/share/doc/foo/zz-README",
+    ]
+
+    # Pruning the children yielded by walk must not affect later traversals
+    for path, children in fs_root.walk():
+        children.clear()
+    assert len(_traversal_paths()) == 9
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        MatchRule.from_path_or_glob("*.la", "test"),
+        MatchRule.from_path_or_glob("**/README", "test"),
+        MatchRule.from_path_or_glob("*.la", "test", path_type=PathType.FILE),
+        MatchRule.from_path_or_glob("**/lib*.so.1", "test"),
+        BasenameGlobMatch(
+            "*.la",
+            only_when_in_directory="./usr/lib/foo",
+            recursive_match=True,
+        ),
+        BasenameGlobMatch(
+            "plugins",
+            only_when_in_directory="./usr/lib",
+            path_type=PathType.DIRECTORY,
+            recursive_match=True,
+        ),
+    ],
+)
+def test_basename_glob_match_with_index(rule: MatchRule) -> None:
+    fs_root = _indexed_fs()
+    unindexed_fs_root = build_virtual_file_system(
+        [p.tar_path for p in fs_root.all_paths() if p.parent_dir is not None]
+    )
+
+    def _ignore(p) -> bool:
+        return "plugins" in p.path
+
+    for ignore_paths in (None, _ignore):
+        expected = [
+            p.path for p in rule.finditer(unindexed_fs_root, ignore_paths=ignore_paths)
+        ]
+        actual = [p.path for p in rule.finditer(fs_root, ignore_paths=ignore_paths)]
+        assert actual == expected
+        assert expected or ignore_paths is not None
+
+
+def test_stat_cache_round_trip(tmp_path) -> None:
+    data_file = tmp_path / "data.txt"
+    data_file.write_text("data\n")
+    fs_root = FSRootDir()
+    path = fs_root.mkdirs("./usr/share/foo").insert_file_from_fs_path(
+        "data.txt",
+        str(data_file),
+    )
+    expected = os.lstat(data_file)
+    for _ in range(2):
+        st = path.stat()
+        assert st == expected
+        assert st.st_mtime_ns == expected.st_mtime_ns
+        assert st.st_mtime == expected.st_mtime
+        assert st.st_blocks == expected.st_blocks
+    assert path.size == len("data\n")
+
+
+@pytest.mark.parametrize("parallelization_limit", [1, 4])
+def test_fs_ro_overlay_loading(tmp_path, parallelization_limit: int) -> None:
+    (tmp_path / "usr/share/doc/foo").mkdir(parents=True)
+    (tmp_path / "usr/share/doc/foo/copyright").write_text("Copyright\n")
+    (tmp_path / "usr/bin").mkdir(parents=True)
+    (tmp_path / "usr/bin/foo").write_text("#!/bin/sh\n")
+    (tmp_path / "usr/bin/bar").symlink_to("foo")
+    os.mkfifo(tmp_path / "usr/bin/fifo")
+
+    fs_root = FSROOverlay.create_root_dir(".", str(tmp_path))
+    fs_root.prefetch_tree(parallelization_limit=parallelization_limit)
+
+    assert [p.path for p in fs_root.all_paths()] == [
+        ".",
+        "usr",
+        "usr/bin",
+        "usr/bin/bar",
+        "usr/bin/fifo",
+        "usr/bin/foo",
+        "usr/share",
+        "usr/share/doc",
+        "usr/share/doc/foo",
+        "usr/share/doc/foo/copyright",
+    ]
+    symlink = fs_root.lookup("./usr/bin/bar")
+    assert symlink.is_symlink and not symlink.is_file and not symlink.is_dir
+    assert symlink.readlink() == "foo"
+    fifo = fs_root.lookup("./usr/bin/fifo")
+    assert not fifo.is_file and not fifo.is_dir and not fifo.is_symlink
+    copyright_file = fs_root.lookup("./usr/share/doc/foo/copyright")
+    assert copyright_file.is_file
+    assert copyright_file.size == len("Copyright\n")
+    assert fs_root.lookup("./usr/share/doc").is_dir
+
+
+def test_fs_ro_overlay_missing_root(tmp_path) -> None:
+    fs_root = FSROOverlay.create_root_dir(".", str(tmp_path / "missing"))
+    fs_root.prefetch_tree(parallelization_limit=4)
+    assert not fs_root.is_dir
+    assert list(fs_root.all_paths()) == [fs_root]
@@ -0,0 +1,85 @@
+import argparse
+import os
+
+from debputy.commands.debputy_cmd.context import CommandContext
+from debputy.persistent_cache import PersistentCache, _cache_salt, user_cache_dir
+from debputy.yaml.compat import YAML_LIBRARY_VERSION
+
+
+def test_persistent_cache_reuses_entries(tmp_path) -> None:
+    computed = []
+
+    def _compute(value: str):
+        def _impl():
+            computed.append(value)
+            return {"value": value}
+
+        return _impl
+
+    cache = PersistentCache(str(tmp_path))
+    assert cache.get_or_compute("ns", "name", ["a"], _compute("a")) == {"value": "a"}
+    # A new instance to show that the entry is read from disk
+    cache = PersistentCache(str(tmp_path))
+    assert cache.get_or_compute("ns", "name", ["a"], _compute("a")) == {"value": "a"}
+    assert computed == ["a"]
+
+    # Changing the key replaces the entry
+    assert cache.get_or_compute("ns", "name", ["b"], _compute("b")) == {"value": "b"}
+    assert cache.get_or_compute("ns", "name", ["a"], _compute("a")) == {"value": "a"}
+    assert computed == ["a", "b", "a"]
+    assert len(list((tmp_path / "ns").iterdir())) == 1
+
+
+def test_persistent_cache_key_parts_are_not_ambiguous(tmp_path) -> None:
+    cache = PersistentCache(str(tmp_path))
+    assert cache.get_or_compute("ns", "name", ["ab", "c"], lambda: 1) == 1
+    assert cache.get_or_compute("ns", "name", ["a", "bc"], lambda: 2) == 2
+
+
+def test_persistent_cache_ignores_broken_entries(tmp_path) -> None:
+    cache = PersistentCache(str(tmp_path))
+    cache.get_or_compute("ns", "name", [b"key"], lambda: 1)
+    (entry,) = (tmp_path / "ns").iterdir()
+    entry.write_bytes(b"not a pickle")
+
+    assert cache.get_or_compute("ns", "name", [b"key"], lambda: 2) == 2
+    assert cache.get_or_compute("ns", "name", [b"key"], lambda: 3) == 2
+
+
+def test_persistent_cache_unpicklable_values(tmp_path) -> None:
+    cache = PersistentCache(str(tmp_path))
+    value = cache.get_or_compute("ns", "name", ["key"], lambda: (lambda: None))
+    assert callable(value)
+    assert not any(p.is_file() for p in tmp_path.rglob("*"))
+
+
+def test_persistent_cache_ignores_untrusted_entries(tmp_path) -> None:
+    cache = PersistentCache(str(tmp_path))
+    cache.get_or_compute("ns", "name", ["key"], lambda: 1)
+    (entry,) = (tmp_path / "ns").iterdir()
+    # Anyone could have replaced a world-writable entry
+    entry.chmod(0o666)
+
+    assert cache.get_or_compute("ns", "name", ["key"], lambda: 2) == 2
+
+
+def test_user_cache_dir(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert user_cache_dir() == str(tmp_path / "debputy")
+
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("XDG_CACHE_HOME", "relative/path")
+    assert user_cache_dir() == os.path.join(str(tmp_path), "home", ".cache", "debputy")
+
+
+def test_persistent_cache_salt_covers_yaml_library() -> None:
+    # Cached manifests are pickled YAML documents of the YAML library
+    assert YAML_LIBRARY_VERSION.encode("utf-8") in _cache_salt()
+
+
+def test_persistent_cache_is_opt_in() -> None:
+    parsed_args = argparse.Namespace()
+    # Commands run during the build must not write to the home directory
+    assert CommandContext(parsed_args, []).persistent_cache is None
+    context = CommandContext(parsed_args, [], use_persistent_cache=True)
+    assert context.persistent_cache is not None
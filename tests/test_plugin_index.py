@@ -0,0 +1,289 @@
+import json
+import textwrap
+import threading
+import sys
+from typing import Callable, Sequence, Tuple
+
+from debputy.persistent_cache import JSONPersistentCache, PersistentCache
+from debputy.plugin.api.feature_set import PluginProvidedFeatureSet
+from debputy.plugin.api.impl import load_plugin_features
+from debputy.substitution import Substitution
+from debputy.transformation_rules import TransformationRule
+
+
+def _create_plugin(tmp_path, *, initializer_code: Sequence[str] = tuple()) -> str:
+    plugin_json = tmp_path / "lazy-test-plugin.json"
+    plugin_json.write_text(
+        json.dumps(
+            {
+                "api-compat-version": 1,
+                "plugin-initializer": "initialize",
+            }
+        )
+    )
+    (tmp_path / "lazy_test_plugin.py").write_text(
+        textwrap.dedent(
+            """\
+            import os
+            import time
+
+            with open(os.path.join(os.path.dirname(__file__), "imports.log"), "a") as fd:
+                fd.write("imported\\n")
+
+
+            def initialize(api):
+                # Give concurrent readers a chance to see a partially loaded plugin
+                time.sleep(0.1)
+                api.packager_provided_file("lazy-test-stem", "/etc/lazy-test/{name}")
+                api.manifest_variable("LAZY_TEST_VARIABLE", "lazy")
+            """
+        )
+        + "".join(f"    {line}\n" for line in initializer_code)
+    )
+    return str(plugin_json)
+
+
+def _load(
+    plugin_path: str,
+    plugin_index: PersistentCache,
+    new_feature_set_and_substitution: Callable[
+        [], Tuple[PluginProvidedFeatureSet, Substitution]
+    ],
+) -> PluginProvidedFeatureSet:
+    feature_set, substitution = new_feature_set_and_substitution()
+    return load_plugin_features(
+        [],
+        substitution,
+        requested_plugins_only=[plugin_path],
+        plugin_feature_set=feature_set,
+        plugin_index=plugin_index,
+    )
+
+
+def test_plugin_index_defers_plugin_until_used(
+    tmp_path,
+    new_amd64_feature_set_and_substitution,
+) -> None:
+    plugin_dir = tmp_path / "plugin"
+    plugin_dir.mkdir()
+    plugin_path = _create_plugin(plugin_dir)
+    imports_log = plugin_dir / "imports.log"
+    plugin_index = JSONPersistentCache(str(tmp_path / "cache"))
+
+    # First load populates the index and has to import the plugin
+    feature_set = _load(
+        plugin_path, plugin_index, new_amd64_feature_set_and_substitution
+    )
+    assert "lazy-test-plugin" in feature_set.plugin_data
+    assert not feature_set.deferred_plugins
+    assert "lazy-test-stem" in feature_set.packager_provided_files
+    assert imports_log.read_text().splitlines() == ["imported"]
+
+    feature_set = _load(
+        plugin_path, plugin_index, new_amd64_feature_set_and_substitution
+    )
+    assert "lazy-test-plugin" not in feature_set.plugin_data
+    assert feature_set.deferred_plugins == frozenset({"lazy-test-plugin"})
+
+    # Features the plugin does not provide do not trigger the import
+    assert "lazy-test-stem" not in feature_set.service_managers
+    table_parser = feature_set.manifest_parser_generator.dispatch_parser_table_for(
+        TransformationRule
+    )
+    assert table_parser is not None
+    assert table_parser.is_known_keyword("remove")
+    # Nor do files or variables unrelated to the plugin
+    assert "lazy-test-stem" not in feature_set.packager_provided_files_for(
+        ["changelog", "foo.lazy-test-stemx", "foo.install"]
+    )
+    assert "OTHER_VARIABLE" not in feature_set.manifest_variables_for(
+        ["OTHER_VARIABLE"]
+    )
+    assert imports_log.read_text().splitlines() == ["imported"]
+
+    assert "lazy-test-stem" in feature_set.packager_provided_files_for(
+        ["changelog", "foo.lazy-test-stem"]
+    )
+    assert "lazy-test-plugin" in feature_set.plugin_data
+    assert not feature_set.deferred_plugins
+    assert imports_log.read_text().splitlines() == ["imported", "imported"]
+
+
+def test_plugin_index_entries_are_json(
+    tmp_path,
+    new_amd64_feature_set_and_substitution,
+) -> None:
+    plugin_dir = tmp_path / "plugin"
+    plugin_dir.mkdir()
+    plugin_path = _create_plugin(plugin_dir)
+    cache_dir = tmp_path / "cache"
+    plugin_index = JSONPersistentCache(str(cache_dir))
+
+    _load(plugin_path, plugin_index, new_amd64_feature_set_and_substitution)
+
+    assert len(list(cache_dir.rglob("*.json"))) == 1
+    assert not list(cache_dir.rglob("*.pickle"))
+
+
+def test_plugin_index_concurrent_first_use(
+    tmp_path,
+    new_amd64_feature_set_and_substitution,
+) -> None:
+    plugin_dir = tmp_path / "plugin"
+    plugin_dir.mkdir()
+    plugin_path = _create_plugin(plugin_dir)
+    imports_log = plugin_dir / "imports.log"
+    plugin_index = JSONPersistentCache(str(tmp_path / "cache"))
+    _load(plugin_path, plugin_index, new_amd64_feature_set_and_substitution)
+    feature_set = _load(
+        plugin_path, plugin_index, new_amd64_feature_set_and_substitution
+    )
+    assert feature_set.deferred_plugins == frozenset({"lazy-test-plugin"})
+
+    results = []
+
+    def _reader() -> None:
+        ppfs = feature_set.packager_provided_files_for(["foo.lazy-test-stem"])
+        results.append("lazy-test-stem" in ppfs)
+
+    threads = [threading.Thread(target=_reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # All readers wait for the plugin to be fully loaded, which happens only once
+    assert results == [True] * 4
+    assert imports_log.read_text().splitlines() == ["imported", "imported"]
+
+
+def test_plugin_index_is_invalidated_by_module_changes(
+    tmp_path,
+    new_amd64_feature_set_and_substitution,
+) -> None:
+    plugin_dir = tmp_path / "plugin"
+    plugin_dir.mkdir()
+    plugin_path = _create_plugin(plugin_dir)
+    plugin_index = JSONPersistentCache(str(tmp_path / "cache"))
+
+    _load(plugin_path, plugin_index, new_amd64_feature_set_and_substitution)
+    module_path = plugin_dir / "lazy_test_plugin.py"
+    module_path.write_text(module_path.read_text() + "\n# Changed\n")
+
+    feature_set = _load(
+        plugin_path, plugin_index, new_amd64_feature_set_and_substitution
+    )
+    assert "lazy-test-plugin" in feature_set.plugin_data
+    assert not feature_set.deferred_plugins
+
+
+def test_plugin_index_is_invalidated_by_helper_module_changes(
+    tmp_path,
+    monkeypatch,
+    new_amd64_feature_set_and_substitution,
+) -> None:
+    plugin_dir = tmp_path / "plugin"
+    plugin_dir.mkdir()
+    plugin_path = _create_plugin(
+        plugin_dir,
+        initializer_code=["import lazy_test_helper", "lazy_test_helper.register(api)"],
+    )
+    helper_path = plugin_dir / "lazy_test_helper.py"
+    helper_path.write_text(
+        textwrap.dedent(
+            """\
+            def register(api):
+                pass
+            """
+        )
+    )
+    monkeypatch.syspath_prepend(str(plugin_dir))
+    plugin_index = JSONPersistentCache(str(tmp_path / "cache"))
+
+    for _ in range(2):
+        # Each debputy process imports the helper anew
+        monkeypatch.delitem(sys.modules, "lazy_test_helper", raising=False)
+        feature_set = _load(
+            plugin_path, plugin_index, new_amd64_feature_set_and_substitution
+        )
+    assert feature_set.deferred_plugins == frozenset({"lazy-test-plugin"})
+
+    helper_path.write_text(
+        textwrap.dedent(
+            """\
+            def register(api):
+                api.packager_provided_file("lazy-helper-stem", "/etc/lazy-test/{name}")
+            """
+        )
+    )
+    monkeypatch.delitem(sys.modules, "lazy_test_helper", raising=False)
+    feature_set = _load(
+        plugin_path, plugin_index, new_amd64_feature_set_and_substitution
+    )
+    assert not feature_set.deferred_plugins
+    assert "lazy-helper-stem" in feature_set.packager_provided_files
+
+
+def _create_eager_plugin(tmp_path) -> str:
+    # Plugins with a "module" key are never deferred
+    plugin_json = tmp_path / "eager-test-plugin.json"
+    plugin_json.write_text(
+        json.dumps(
+            {
+                "api-compat-version": 1,
+                "module": "eager_test_plugin",
+                "plugin-initializer": "initialize",
+            }
+        )
+    )
+    (tmp_path / "eager_test_plugin.py").write_text(
+        textwrap.dedent(
+            """\
+            def initialize(api):
+                api.metadata_or_maintscript_detector("eager", lambda *_: None)
+            """
+        )
+    )
+    return str(plugin_json)
+
+
+def test_plugin_index_keeps_load_order(
+    tmp_path,
+    monkeypatch,
+    new_amd64_feature_set_and_substitution,
+) -> None:
+    plugin_dir = tmp_path / "plugin"
+    plugin_dir.mkdir()
+    plugin_path = _create_plugin(
+        plugin_dir,
+        initializer_code=[
+            'api.metadata_or_maintscript_detector("lazy", lambda *_: None)'
+        ],
+    )
+    eager_plugin_path = _create_eager_plugin(plugin_dir)
+    monkeypatch.syspath_prepend(str(plugin_dir))
+    plugin_index = JSONPersistentCache(str(tmp_path / "cache"))
+
+    orders = []
+    for _ in range(2):
+        feature_set, substitution = new_amd64_feature_set_and_substitution()
+        # Required plugins are loaded first
+        load_plugin_features(
+            [],
+            substitution,
+            required_plugins={plugin_path},
+            requested_plugins_only=[eager_plugin_path],
+            plugin_feature_set=feature_set,
+            plugin_index=plugin_index,
+        )
+        orders.append(
+            (
+                list(feature_set.metadata_maintscript_detectors),
+                list(feature_set.plugin_data),
+            )
+        )
+    # The second load deferred the plugin, but the order must be the same
+    assert feature_set.plugin_data["lazy-test-plugin"] is not None
+    assert orders[0] == orders[1]
+    detectors, _ = orders[0]
+    assert detectors.index("lazy-test-plugin") < detectors.index("eager-test-plugin")
@@ -0,0 +1,135 @@
+from typing import Any, Callable, Iterator, List, Tuple
+
+import pytest
+
+from debputy.exceptions import PluginInitializationError
+from debputy.manifest_parser.tagging_types import DebputyParsedContent
+from debputy.plugin.api import (
+    DebputyPluginInitializer,
+    PluginInitializationEntryPoint,
+)
+from debputy.plugin.api.feature_set import PluginProvidedFeatureSet
+from debputy.plugin.api.impl import DebputyPluginInitializerProvider
+from debputy.plugin.api.impl_types import (
+    DebputyPluginMetadata,
+    PluginProvidedParser,
+)
+from debputy.plugin.debputy.debputy_plugin import initialize_debputy_features
+from debputy.substitution import Substitution
+from debputy.transformation_rules import TransformationRule
+
+
+class InvalidRule(DebputyParsedContent):
+    # Mappings are not supported by the parser generator
+    values: dict
+
+
+def _register_invalid_rule(api: DebputyPluginInitializer) -> None:
+    api.pluggable_manifest_rule(
+        TransformationRule,
+        "invalid-rule",
+        InvalidRule,
+        lambda *_: None,
+    )
+
+
+def _load(
+    plugin_initializer: PluginInitializationEntryPoint,
+    new_feature_set_and_substitution: Callable[
+        [], Tuple[PluginProvidedFeatureSet, Substitution]
+    ],
+    *,
+    generate_parsers_eagerly: bool,
+) -> PluginProvidedFeatureSet:
+    feature_set, substitution = new_feature_set_and_substitution()
+    plugin_metadata = DebputyPluginMetadata(
+        plugin_name="debputy",
+        api_compat_version=1,
+        plugin_initializer=plugin_initializer,
+        plugin_loader=None,
+        plugin_path="<loaded-via-test>",
+    )
+    api = DebputyPluginInitializerProvider(
+        plugin_metadata,
+        feature_set,
+        substitution,
+        generate_parsers_eagerly=generate_parsers_eagerly,
+    )
+    api.load_plugin()
+    return feature_set
+
+
+def _manifest_rules(
+    feature_set: PluginProvidedFeatureSet,
+) -> Iterator[Tuple[str, PluginProvidedParser]]:
+    parser_generator = feature_set.manifest_parser_generator
+    dispatching_parsers: List[Tuple[str, Any]] = list(
+        parser_generator.dispatchable_object_parsers.items()
+    )
+    table_parsers = parser_generator.dispatchable_table_parsers
+    dispatching_parsers.extend((rt.__name__, p) for rt, p in table_parsers.items())
+    for name, dispatching_parser in dispatching_parsers:
+        for keyword in dispatching_parser.registered_keywords():
+            yield f"{name}:{keyword}", dispatching_parser.parser_for(keyword)
+
+
+def test_manifest_rule_parsers_are_generated_on_first_use(
+    new_amd64_feature_set_and_substitution,
+) -> None:
+    feature_set = _load(
+        initialize_debputy_features,
+        new_amd64_feature_set_and_substitution,
+        generate_parsers_eagerly=False,
+    )
+    rules = dict(_manifest_rules(feature_set))
+    remove_rule = rules["TransformationRule:remove"]
+    assert not remove_rule.is_parser_generated
+    # The documentation of object rules is available without generating the parser
+    binary_version = rules["packages.{{PACKAGE}}:binary-version"]
+    assert binary_version.inline_reference_documentation is not None
+    assert not binary_version.is_parser_generated
+
+    parser = remove_rule.parser
+    assert remove_rule.is_parser_generated
+    assert remove_rule.parser is parser
+
+    eager_feature_set = _load(
+        initialize_debputy_features,
+        new_amd64_feature_set_and_substitution,
+        generate_parsers_eagerly=True,
+    )
+    eager_rules = dict(_manifest_rules(eager_feature_set))
+    assert rules.keys() == eager_rules.keys()
+    for name, rule in rules.items():
+        eager_rule = eager_rules[name]
+        assert eager_rule.is_parser_generated
+        assert type(rule.parser) is type(eager_rule.parser)
+        assert (
+            rule.parser.inline_reference_documentation
+            == eager_rule.parser.inline_reference_documentation
+        )
+
+
+def test_invalid_manifest_rule_definitions(
+    new_amd64_feature_set_and_substitution,
+) -> None:
+    with pytest.raises(PluginInitializationError):
+        _load(
+            _register_invalid_rule,
+            new_amd64_feature_set_and_substitution,
+            generate_parsers_eagerly=True,
+        )
+
+    feature_set = _load(
+        _register_invalid_rule,
+        new_amd64_feature_set_and_substitution,
+        generate_parsers_eagerly=False,
+    )
+    table_parser = feature_set.manifest_parser_generator.dispatch_parser_table_for(
+        TransformationRule
+    )
+    assert table_parser is not None
+    rule = table_parser.parser_for("invalid-rule")
+    with pytest.raises(PluginInitializationError) as e_info:
+        _ = rule.parser
+    assert "invalid-rule" in e_info.value.args[0]
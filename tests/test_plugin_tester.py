@@ -1,6 +1,6 @@
 import json
 import os.path
-from typing import List, Tuple, Type, cast, TYPE_CHECKING
+from typing import List, Tuple, Type, cast, TYPE_CHECKING, Sequence
 
 import pytest
 
@@ -11,10 +11,14 @@ from debputy.plugin.api import (
     PackageProcessingContext,
     VirtualPath,
     virtual_path_def,
+    detector_path_selector,
 )
 from debputy.exceptions import PluginConflictError, PluginAPIViolationError
 from debputy.plugin.api.impl import DebputyPluginInitializerProvider
-from debputy.plugin.api.impl_types import automatic_discard_rule_example
+from debputy.plugin.api.impl_types import (
+    automatic_discard_rule_example,
+    route_paths_to_detectors,
+)
 from debputy.plugin.api.test_api import (
     build_virtual_file_system,
     package_metadata_context,
@@ -56,6 +60,33 @@ def bad_plugin(api: DebputyPluginInitializer) -> None:
     api.metadata_or_maintscript_detector("fs_rw", bad_metadata_detector_fs_rw)
 
 
+def record_matched_paths(
+    _fs_root: VirtualPath,
+    matched_paths: Sequence[VirtualPath],
+    ctrl: BinaryCtrlAccessor,
+    _context: PackageProcessingContext,
+) -> None:
+    ctrl.substvars["Test:Matched-Paths"] = ",".join(p.path for p in matched_paths)
+
+
+def path_detector_plugin(api: DebputyPluginInitializer) -> None:
+    api.path_metadata_detector(
+        "conf-files",
+        record_matched_paths,
+        [
+            detector_path_selector("/etc/foo", basename_glob="*.conf"),
+            detector_path_selector("/usr/share/foo", basename_glob="*.conf"),
+            # Overlaps with the previous selector, but matches must only be reported once
+            detector_path_selector("./usr/share/foo/", path_type="file"),
+        ],
+    )
+    api.path_metadata_detector(
+        "symlinks",
+        record_matched_paths,
+        [detector_path_selector(path_type="symlink")],
+    )
+
+
 def adr_inconsistent_example_plugin(api: DebputyPluginInitializerProvider) -> None:
     api.automatic_discard_rule(
         "adr-example-test",
@@ -96,6 +127,81 @@ def test_metadata_read_only():
     assert isinstance(e_info.value.__cause__, DebputyFSIsROError)
 
 
+def test_path_metadata_detector():
+    plugin = initialize_plugin_under_test_preloaded(
+        1,
+        path_detector_plugin,
+        plugin_name="path-detector-plugin",
+    )
+    fs_root = build_virtual_file_system(
+        [
+            "./etc/foo.conf",
+            "./etc/foo/a.conf",
+            "./etc/foo/a.conf.bak",
+            "./etc/foo/sub.conf/",
+            "./etc/foo/sub.conf/b.conf",
+            "./usr/share/foo/data.bin",
+            "./usr/share/foo/c.conf",
+            "./usr/share/foo/d/",
+            virtual_path_def("./usr/share/foo/e.conf", link_target="c.conf"),
+            virtual_path_def("./usr/bin/foo", link_target="/usr/bin/bar"),
+        ]
+    )
+    metadata = plugin.run_metadata_detector("conf-files", fs_root)
+    assert metadata.substvars["Test:Matched-Paths"].split(",") == [
+        "./etc/foo/a.conf",
+        "./etc/foo/sub.conf",
+        "./etc/foo/sub.conf/b.conf",
+        "./usr/share/foo/c.conf",
+        "./usr/share/foo/data.bin",
+        "./usr/share/foo/e.conf",
+    ]
+    metadata = plugin.run_metadata_detector("symlinks", fs_root)
+    assert metadata.substvars["Test:Matched-Paths"].split(",") == [
+        "./usr/bin/foo",
+        "./usr/share/foo/e.conf",
+    ]
+
+    metadata = plugin.run_metadata_detector(
+        "conf-files",
+        build_virtual_file_system(["./usr/share/doc/foo/copyright"]),
+    )
+    assert metadata.substvars["Test:Matched-Paths"] == ""
+
+
+def test_route_paths_to_detectors():
+    plugin = initialize_plugin_under_test_preloaded(
+        1,
+        path_detector_plugin,
+        plugin_name="path-detector-plugin",
+    )
+    # Mix in a classic detector to verify it is left alone by the routing.
+    detectors = [
+        *plugin._feature_set.metadata_maintscript_detectors["path-detector-plugin"],
+        *plugin._feature_set.metadata_maintscript_detectors["debputy"][:1],
+    ]
+    assert [d.is_path_based for d in detectors] == [True, True, False]
+    fs_root = build_virtual_file_system(
+        [
+            "./etc/foo/a.conf",
+            virtual_path_def("./usr/bin/foo", link_target="/usr/bin/bar"),
+        ]
+    )
+    conf_files, symlinks, classic = route_paths_to_detectors(fs_root, detectors)
+    assert [p.path for p in conf_files] == ["./etc/foo/a.conf"]
+    assert [p.path for p in symlinks] == ["./usr/bin/foo"]
+    assert classic is None
+
+
+def test_detector_path_selector_validation():
+    assert detector_path_selector("/").directory is None
+    assert detector_path_selector("usr/share/foo/").directory == "./usr/share/foo"
+    with pytest.raises(ValueError):
+        detector_path_selector("/usr", path_type="socket")
+    with pytest.raises(ValueError):
+        detector_path_selector(basename_glob="foo/*.conf")
+
+
 def test_packager_provided_files():
     plugin = initialize_plugin_under_test(plugin_desc_file=CUSTOM_PLUGIN_JSON_FILE)
     assert plugin.packager_provided_files_by_stem().keys() == {
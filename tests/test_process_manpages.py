@@ -0,0 +1,130 @@
+import gzip
+
+import pytest
+
+from debputy.filesystem_scan import build_virtual_fs
+from debputy.plugin.api import virtual_path_def
+from debputy.plugin.debputy import package_processors
+from debputy.plugin.debputy.package_processors import process_manpages
+
+
+def _gzip_file(tmp_path, name: str, content: bytes) -> str:
+    path = tmp_path / name
+    # A gzip header with a name and a mtime, which should be normalized
+    with gzip.GzipFile(str(path), "wb", mtime=1668973695) as fd:
+        fd.write(content)
+    return str(path)
+
+
+def _write(tmp_path, name: str, content: bytes):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return path
+
+
+@pytest.fixture
+def no_man_recode(monkeypatch):
+    def _fail_if_called(*args, **kwargs):
+        raise AssertionError("man-recode should not have been used")
+
+    monkeypatch.setattr(package_processors, "_has_man_recode", lambda: False)
+    monkeypatch.setattr(package_processors, "_man_recode", _fail_if_called)
+
+
+def _read(fs_root, path: str) -> bytes:
+    p = fs_root.lookup(path)
+    assert p is not None and p.is_file
+    with p.open(byte_io=True) as fd:
+        content = fd.read()
+    if path.endswith(".gz"):
+        # `gzip -9n` header: No name, no mtime, max compression and Unix as OS
+        assert content[:10] == b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x02\x03"
+        return gzip.decompress(content)
+    return content
+
+
+def test_process_manpages_native(tmp_path, no_man_recode) -> None:
+    latin1_page = ".TH FOO 1\nCaf\xe9\n".encode("iso-8859-1")
+    latin2_page = ".TH FOO 1\n\u017c\u00f3\u0142w\n".encode("iso-8859-2")
+    utf8_page = ".TH FOO 1\nCaf\xe9\n".encode("utf-8")
+    fs_root = build_virtual_fs(
+        [
+            virtual_path_def(
+                "./usr/share/man/man1/latin1.1",
+                fs_path=str(_write(tmp_path, "latin1.1", latin1_page)),
+            ),
+            virtual_path_def(
+                "./usr/share/man/man1/utf8.1.gz",
+                fs_path=_gzip_file(tmp_path, "utf8.1.gz", utf8_page),
+            ),
+            virtual_path_def(
+                "./usr/share/man/de/man1/latin1.1.gz",
+                fs_path=_gzip_file(tmp_path, "de-latin1.1.gz", latin1_page),
+            ),
+            virtual_path_def(
+                "./usr/share/man/pl_PL/man1/latin2.1",
+                fs_path=str(_write(tmp_path, "latin2.1", latin2_page)),
+            ),
+            virtual_path_def(
+                "./usr/share/man/man1/bar.1",
+                materialized_content=".so man1/utf8.1\n",
+            ),
+            virtual_path_def(
+                "./usr/share/man/de/man8/baz.8.gz",
+                fs_path=_gzip_file(tmp_path, "baz.8.gz", b".so man1/latin1.1\n"),
+            ),
+        ],
+        read_write_fs=True,
+    )
+
+    process_manpages(fs_root, None, None)
+
+    assert _read(fs_root, "./usr/share/man/man1/latin1.1") == utf8_page
+    assert _read(fs_root, "./usr/share/man/man1/utf8.1.gz") == utf8_page
+    assert _read(fs_root, "./usr/share/man/de/man1/latin1.1.gz") == utf8_page
+    assert _read(fs_root, "./usr/share/man/pl_PL/man1/latin2.1") == latin2_page.decode(
+        "iso-8859-2"
+    ).encode("utf-8")
+
+    bar = fs_root.lookup("./usr/share/man/man1/bar.1")
+    assert bar is not None and bar.is_symlink
+    assert bar.readlink() == "utf8.1"
+    baz = fs_root.lookup("./usr/share/man/de/man8/baz.8.gz")
+    assert baz is not None and baz.is_symlink
+    assert baz.readlink() == "../man1/latin1.1"
+
+
+def test_process_manpages_needs_man_recode(tmp_path, monkeypatch) -> None:
+    declared_page = b'.\\" -*- coding: ISO-8859-1 -*-\n.TH FOO 1\nCaf\xe9\n'
+    unknown_lang_page = ".TH FOO 1\nCaf\xe9\n".encode("iso-8859-1")
+    fs_root = build_virtual_fs(
+        [
+            virtual_path_def(
+                "./usr/share/man/man1/declared.1",
+                fs_path=str(_write(tmp_path, "declared.1", declared_page)),
+            ),
+            virtual_path_def(
+                "./usr/share/man/xx/man1/unknown.1",
+                fs_path=str(_write(tmp_path, "unknown.1", unknown_lang_page)),
+            ),
+            virtual_path_def(
+                "./usr/share/man/man1/utf8.1",
+                materialized_content=".TH FOO 1\n",
+            ),
+        ],
+        read_write_fs=True,
+    )
+    recoded = []
+    monkeypatch.setattr(package_processors, "_has_man_recode", lambda: True)
+    monkeypatch.setattr(
+        package_processors,
+        "_man_recode",
+        lambda paths: recoded.extend(p.path for p in paths),
+    )
+
+    process_manpages(fs_root, None, None)
+
+    assert recoded == [
+        "./usr/share/man/man1/declared.1",
+        "./usr/share/man/xx/man1/unknown.1",
+    ]
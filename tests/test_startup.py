@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+# Upper bound for the number of `debputy` modules imported by the commands below.
+# Counted rather than timed, so the test does not depend on the speed of the machine
+# (see tests/benchmarks/test_bench_startup.py for timings).
+DEBPUTY_MODULE_BUDGET = 15
+
+# Modules that are expensive to import and not needed to parse the command line or
+# run the commands below.
+DEFERRED_MODULES = [
+    "debian",
+    "ruamel",
+    "pygls",
+    "lsprotocol",
+    "hunspell",
+    "debputy.lsp",
+    "debputy.linting",
+    "debputy.manifest_parser",
+    "debputy.plugin",
+    "debputy.highlevel_manifest",
+    "debputy.dh_migration",
+    "debputy.analysis",
+    "debputy.commands.debputy_cmd.plugin_cmds",
+]
+
+LIGHT_COMMANDS = [
+    ["--help"],
+    ["lint", "--help"],
+    ["tool-support", "supports-tool-command", "export-reference-data"],
+    ["lsp", "editor-config"],
+]
+
+
+def _imported_modules(args: List[str], cwd: Path) -> List[str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(SRC_DIR), env.get("PYTHONPATH")) if p
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "debputy.commands.debputy_cmd"]
+        + args,
+        cwd=cwd,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    modules = []
+    for line in proc.stderr.decode("utf-8").splitlines():
+        if not line.startswith("import time:"):
+            continue
+        # Format: "import time: <self> | <cumulative> | <indented module name>"
+        modules.append(line.rsplit("|", 1)[1].strip())
+    # The first line is the header
+    return modules[1:]
+
+
+@pytest.mark.parametrize("args", LIGHT_COMMANDS, ids=" ".join)
+def test_startup_import_budget(args: List[str], tmp_path) -> None:
+    modules = _imported_modules(args, tmp_path)
+    deferred = [
+        m
+        for m in modules
+        if any(m == d or m.startswith(f"{d}.") for d in DEFERRED_MODULES)
+    ]
+    assert not deferred
+    debputy_modules = [m for m in modules if m.split(".")[0] == "debputy"]
+    assert len(debputy_modules) <= DEBPUTY_MODULE_BUDGET, debputy_modules
+
+
+def test_lazy_subcommands_match_their_implementation() -> None:
+    from debputy.commands.debputy_cmd import __main__  # noqa: F401 - registers commands
+    from debputy.commands.debputy_cmd.context import (
+        ROOT_COMMAND,
+        LazyLoadedSubcommand,
+    )
+
+    for name in ("plugin", "lsp", "lint", "reformat"):
+        subcommand = ROOT_COMMAND.subcommand(name)
+        if isinstance(subcommand, LazyLoadedSubcommand):
+            # Raises if the implementation does not match the lazy registration
+            subcommand = subcommand.load()
+        assert not isinstance(subcommand, LazyLoadedSubcommand)
+        assert ROOT_COMMAND.subcommand(name) is subcommand
@@ -1,8 +1,16 @@
+import errno
+import os
 from typing import Sequence, Union
 
 import pytest
 
-from debputy.util import escape_shell
+from debputy import util
+from debputy.util import (
+    escape_shell,
+    run_in_parallel,
+    clone_or_copy_file,
+    package_parallelization_limits,
+)
 
 
 @pytest.mark.parametrize(
@@ -18,3 +26,72 @@ from debputy.util import escape_shell
 def test_symlink_normalization(arg: Union[str, Sequence[str]], expected: str) -> None:
     actual = escape_shell(arg) if isinstance(arg, str) else escape_shell(*arg)
     assert actual == expected
+
+
+@pytest.mark.parametrize("parallelization_limit", [1, 4])
+def test_run_in_parallel_preserves_order(parallelization_limit: int) -> None:
+    items = list(range(20))
+    actual = run_in_parallel(
+        lambda x: x * x,
+        items,
+        parallelization_limit=parallelization_limit,
+    )
+    assert actual == [x * x for x in items]
+
+
+@pytest.mark.parametrize("parallelization_limit", [1, 4])
+def test_run_in_parallel_propagates_errors(parallelization_limit: int) -> None:
+    def _fail_on_odd(x: int) -> int:
+        if x % 2:
+            raise SystemExit(1)
+        return x
+
+    with pytest.raises(SystemExit):
+        run_in_parallel(
+            _fail_on_odd,
+            range(10),
+            parallelization_limit=parallelization_limit,
+        )
+
+
+@pytest.mark.parametrize(
+    "deb_build_options,expected",
+    [
+        # Packages are only processed concurrently on request
+        ({"parallel": "8"}, (1, 8)),
+        ({"parallel": "8", "debputy-parallel-packages": None}, (4, 2)),
+    ],
+)
+def test_package_parallelization_limits(
+    monkeypatch,
+    deb_build_options,
+    expected,
+) -> None:
+    monkeypatch.setattr(util.os, "cpu_count", lambda: 8)
+    assert package_parallelization_limits(deb_build_options, 8, 4) == expected
+
+
+@pytest.mark.parametrize("fallback_level", [0, 1, 2])
+def test_clone_or_copy_file(tmp_path, monkeypatch, fallback_level: int) -> None:
+    def _unsupported(*args, **kwargs):
+        raise OSError(errno.EOPNOTSUPP, "Not supported")
+
+    if fallback_level >= 1:
+        monkeypatch.setattr(util.fcntl, "ioctl", _unsupported)
+    if fallback_level >= 2:
+        monkeypatch.setattr(util.os, "copy_file_range", _unsupported)
+
+    source = tmp_path / "source"
+    content = os.urandom(3 * 1024 * 1024 + 17)
+    source.write_bytes(content)
+    dest = tmp_path / "dest"
+    dest.write_bytes(b"Existing content that is longer than nothing")
+
+    clone_or_copy_file(str(source), str(dest))
+    assert dest.read_bytes() == content
+
+    empty_source = tmp_path / "empty"
+    empty_source.write_bytes(b"")
+    empty_dest = tmp_path / "empty-dest"
+    clone_or_copy_file(str(empty_source), str(empty_dest))
+    assert empty_dest.read_bytes() == b""
@@ -1,6 +1,8 @@
+import struct
+
 import pytest
 
-from typing import Tuple, Mapping, Any
+from typing import Tuple, Mapping, Any, List, Optional
 
 from debian.deb822 import Deb822
 from debian.debian_support import DpkgArchTable
@@ -9,6 +11,11 @@ from debputy.architecture_support import (
     faked_arch_table,
     DpkgArchitectureBuildProcessValuesTable,
 )
+from debputy.elf_util import (
+    ELF_PT_DYNAMIC,
+    ELF_SHT_DYNAMIC,
+    ELF_TYPE_SHARED_OBJECT,
+)
 from debputy.packages import BinaryPackage
 from debputy.plugin.api.test_api import DEBPUTY_TEST_AGAINST_INSTALLED_PLUGINS
 
@@ -74,3 +81,103 @@ def build_time_only(func: Any) -> Any:
         DEBPUTY_TEST_AGAINST_INSTALLED_PLUGINS,
         reason="Test makes assumptions only valid during build time tests",
     )(func)
+
+
+_SHT_STRTAB = 3
+
+
+def build_elf(
+    sections: List[Tuple[str, int, bytes]],
+    *,
+    is_64bit: bool = True,
+    endian: str = "<",
+    section_links: Optional[Mapping[str, str]] = None,
+) -> bytes:
+    """Build a minimal ELF shared object with the given sections
+
+    Each section is a (name, type, content) tuple.
+    """
+    offset_size = "Q" if is_64bit else "L"
+    ehdr_size = 64 if is_64bit else 52
+    shdr_format = struct.Struct(
+        f"{endian}LL{offset_size}{offset_size}{offset_size}{offset_size}LL{offset_size}{offset_size}"
+    )
+    if is_64bit:
+        # p_type, p_flags, p_offset, p_vaddr, p_paddr, p_filesz, p_memsz, p_align
+        phdr_format = struct.Struct(f"{endian}LLQQQQQQ")
+    else:
+        # p_type, p_offset, p_vaddr, p_paddr, p_filesz, p_memsz, p_flags, p_align
+        phdr_format = struct.Struct(f"{endian}LLLLLLLL")
+    has_dynamic = any(t == ELF_SHT_DYNAMIC for _, t, _ in sections)
+    phnum = 1 if has_dynamic else 0
+    phoff = ehdr_size if has_dynamic else 0
+    data_start = ehdr_size + phnum * phdr_format.size
+
+    all_sections = list(sections)
+    shstrtab = bytearray(b"\0")
+    name_offsets = []
+    for name, _, _ in all_sections:
+        name_offsets.append(len(shstrtab))
+        shstrtab.extend(name.encode("ascii") + b"\0")
+    name_offsets.append(len(shstrtab))
+    shstrtab.extend(b".shstrtab\0")
+    all_sections.append((".shstrtab", _SHT_STRTAB, bytes(shstrtab)))
+
+    body = bytearray()
+    section_offsets = []
+    for _, _, content in all_sections:
+        section_offsets.append(data_start + len(body))
+        body.extend(content)
+        body.extend(b"\0" * (-len(body) % 8))
+    shoff = data_start + len(body)
+    section_index = {name: i + 1 for i, (name, _, _) in enumerate(all_sections)}
+    links = {
+        name: section_index[target] for name, target in (section_links or {}).items()
+    }
+    shdrs = bytearray(shdr_format.size)
+    phdrs = bytearray()
+    for (name, sh_type, content), name_offset, offset in zip(
+        all_sections, name_offsets, section_offsets
+    ):
+        shdrs.extend(
+            shdr_format.pack(
+                name_offset,
+                sh_type,
+                0,
+                0,
+                offset,
+                len(content),
+                links.get(name, 0),
+                0,
+                4,
+                0,
+            )
+        )
+        if sh_type == ELF_SHT_DYNAMIC:
+            if is_64bit:
+                phdr = (ELF_PT_DYNAMIC, 0, offset, 0, 0, len(content), 0, 8)
+            else:
+                phdr = (ELF_PT_DYNAMIC, offset, 0, 0, len(content), 0, 0, 4)
+            phdrs.extend(phdr_format.pack(*phdr))
+
+    e_ident = b"\x7fELF" + bytes([2 if is_64bit else 1, 1 if endian == "<" else 2, 1])
+    e_ident += b"\0" * (16 - len(e_ident))
+    ehdr = e_ident + struct.pack(
+        f"{endian}HHL{offset_size}{offset_size}{offset_size}LHHHHHH",
+        ELF_TYPE_SHARED_OBJECT,
+        62,
+        1,
+        0,
+        phoff,
+        shoff,
+        0,
+        ehdr_size,
+        phdr_format.size,
+        phnum,
+        shdr_format.size,
+        len(all_sections) + 1,
+        len(all_sections),
+    )
+    data = ehdr + bytes(phdrs) + bytes(body) + bytes(shdrs)
+    # Pad so the file passes the minimum size checks regardless of content
+    return data + b"\0" * max(0, 256 - len(data))